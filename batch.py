@@ -0,0 +1,283 @@
+# batch.py - Headless batch mode: run text commands through the controller
+#
+# Usage: python batch.py [commands.txt|commands.jsonl|-] [--output results.jsonl]
+#                        [--workers 4] [--format auto|text|jsonl] [--stub-apis]
+#
+# Reads one command per line, plain text or JSONL ({"text": ..., "id": ...,
+# "intent": ...}), and writes one JSON result per line with the matched
+# intent, its arguments, the response and how long it took. Side effects
+# such as opening a browser are recorded instead of performed. Input is
+# streamed in chunks with a bounded number in flight, so memory stays flat
+# however long the corpus is. A summary with commands per second goes to
+# stderr; the exit status is 1 if any "intent" expectation was not met.
+
+import argparse
+import collections
+import itertools
+import json
+import sys
+import tempfile
+import time
+import webbrowser
+from concurrent.futures import ProcessPoolExecutor
+
+from controller import CommandController
+from model import SpeechModel
+from utils import api_manager, storage
+from utils.instrumentation import Tracer, set_tracer
+from utils.knowledge_store import KnowledgeStore
+from utils.prefetch import PrefetchScheduler
+from utils.response_cache import ResponseCache
+
+# Commands sent to a worker at a time, and chunks queued per worker
+CHUNK_SIZE = 256
+IN_FLIGHT = 4
+
+# URLs the controller tried to open for the command being processed
+_opened = []
+_controller = None
+
+
+class HeadlessModel(SpeechModel):
+    """SpeechModel's news, weather and search answers without a microphone or recognizers."""
+
+    def __init__(self, cache=None, knowledge=None):
+        """
+        Initialize the data resources only.
+
+        Args:
+            cache: ResponseCache; defaults to an in-memory one
+            knowledge: KnowledgeStore; defaults to an in-memory one
+        """
+        self.cache = cache or ResponseCache(":memory:")
+        self.knowledge = knowledge or KnowledgeStore(":memory:")
+        # No fetchers: nothing is prefetched and no usage is learned
+        self.prefetcher = PrefetchScheduler(self.cache, {})
+        self.last_error = None
+        self.capture = None
+        self.speech_recognizer = None
+
+    def close(self):
+        self.cache.close()
+        self.knowledge.close()
+
+
+class TextView:
+    """View that discards everything, for runs with nobody listening."""
+
+    def speak(self, text):
+        pass
+
+    def speak_action(self, text):
+        pass
+
+    def prewarm(self, phrases=None, wait=False):
+        pass
+
+
+def _record_open(url, *args, **kwargs):
+    _opened.append(url)
+    return True
+
+
+def init_worker(api_urls, data_dir):
+    """
+    Build the controller for this process.
+
+    Args:
+        api_urls: Dict of api_manager attribute -> URL to use instead
+        data_dir: Data directory, so nothing touches the user's own state
+    """
+    global _controller
+    storage.DATA_DIR = data_dir
+    for attribute, url in api_urls.items():
+        setattr(api_manager, attribute, url)
+    webbrowser.open = _record_open
+    # Percentiles only, no trace file of every command
+    set_tracer(Tracer(trace_path=""))
+    _controller = CommandController(HeadlessModel(), TextView())
+
+
+def parse_line(raw, fmt):
+    """
+    Turn one input line into a command record.
+
+    Args:
+        raw: Line without its newline
+        fmt: 'text', 'jsonl' or 'auto' (JSON if the line starts with '{')
+
+    Returns:
+        Dict with 'text' and, for JSONL, any 'id' and expected 'intent'
+    """
+    if fmt == 'text' or (fmt == 'auto' and not raw.lstrip().startswith('{')):
+        return {'text': raw.strip()}
+    record = json.loads(raw)
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    record['text'] = record.get('text', record.get('command', ''))
+    return record
+
+
+def run_command(line_no, raw, fmt):
+    """
+    Run one input line through the controller.
+
+    Returns:
+        Result dict for the output file
+    """
+    result = {'line': line_no}
+    try:
+        record = parse_line(raw, fmt)
+    except ValueError as e:
+        result['error'] = f"bad input: {e}"
+        return result
+    if 'id' in record:
+        result['id'] = record['id']
+    result['text'] = record['text']
+
+    del _opened[:]
+    started = time.perf_counter()
+    try:
+        intent, args, response = _controller.handle(record['text'])
+        result.update(intent=intent, args=list(args), response=response)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        intent = None
+    result['ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+    if _opened:
+        result['opened'] = list(_opened)
+    if 'intent' in record:
+        result['expected'] = record['intent']
+        result['ok'] = intent == record['intent']
+    return result
+
+
+def run_chunk(lines, fmt):
+    """Run a chunk of (line number, raw line) pairs; the unit of work for a worker."""
+    return [run_command(line_no, raw, fmt) for line_no, raw in lines]
+
+
+def read_chunks(stream, size):
+    """Yield lists of up to size (line number, line) pairs, skipping blank lines."""
+    numbered = ((n, line.rstrip("\r\n")) for n, line in enumerate(stream, 1) if line.strip())
+    while True:
+        chunk = list(itertools.islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_serial(chunks, fmt):
+    for chunk in chunks:
+        yield from run_chunk(chunk, fmt)
+
+
+def run_parallel(chunks, fmt, workers, initargs):
+    """
+    Run chunks on a process pool and yield results in input order.
+
+    At most workers * IN_FLIGHT chunks are submitted at once; Pool.imap
+    would read the whole input ahead of the workers.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.submit(run_chunk, chunk, fmt))
+            if len(pending) >= workers * IN_FLIGHT:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class BatchSummary:
+    """Running totals for a batch; constant size however many commands run."""
+
+    def __init__(self):
+        self.commands = 0
+        self.errors = 0
+        self.checked = 0
+        self.mismatches = 0
+        self.intents = collections.Counter()
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, result):
+        self.commands += 1
+        if 'error' in result:
+            self.errors += 1
+        if 'text' in result:
+            self.intents[result.get('intent')] += 1
+        self.total_ms += result.get('ms', 0.0)
+        self.max_ms = max(self.max_ms, result.get('ms', 0.0))
+        if 'ok' in result:
+            self.checked += 1
+            self.mismatches += not result['ok']
+
+    def report(self, elapsed):
+        lines = [
+            f"{self.commands} commands in {elapsed:.2f}s: {self.commands / elapsed if elapsed else 0:.1f} commands/s",
+            f"handler time: mean {self.total_ms / self.commands if self.commands else 0:.3f} ms, "
+            f"max {self.max_ms:.3f} ms; errors: {self.errors}",
+        ]
+        if self.checked:
+            lines.append(f"intent checks: {self.checked - self.mismatches}/{self.checked} as expected")
+        for intent, count in self.intents.most_common():
+            lines.append(f"  {intent or '(not understood)':<24} {count}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run text commands through Jarvis without audio")
+    parser.add_argument("input", nargs="?", default="-", help="command file, or - for stdin")
+    parser.add_argument("--output", default="-", help="results JSONL file, or - for stdout")
+    parser.add_argument("--format", choices=["auto", "text", "jsonl"], default="auto")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes; 0 runs in this process")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--data-dir", help="data directory for caches and state; defaults to a fresh temporary one")
+    parser.add_argument("--stub-apis", action="store_true",
+                        help="answer news, weather and search from the local stub server")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="stub server delay in seconds")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="jarvis_batch_")
+    stub = None
+    api_urls = {}
+    if args.stub_apis:
+        from benchmarks.stub_api_server import StubApiServer
+        stub = StubApiServer(delays={'default': args.api_latency}).start()
+        api_urls = stub.urls()
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    summary = BatchSummary()
+    started = time.perf_counter()
+    try:
+        chunks = read_chunks(source, args.chunk_size)
+        if args.workers > 0:
+            results = run_parallel(chunks, args.format, args.workers, (api_urls, data_dir))
+        else:
+            init_worker(api_urls, data_dir)
+            results = run_serial(chunks, args.format)
+        for result in results:
+            summary.add(result)
+            sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+    except KeyboardInterrupt:
+        print("Interrupted.", file=sys.stderr)
+    finally:
+        elapsed = time.perf_counter() - started
+        sink.flush()
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+        if stub is not None:
+            stub.stop()
+
+    print(summary.report(elapsed), file=sys.stderr)
+    if summary.mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# benchmarks/bench_audio_output.py - Playback startup and file I/O, temp files vs in-memory audio
+#
+# Usage: python -m benchmarks.bench_audio_output [--utterances 200] [--repeat-share 0.5]
+#                                                [--outputs process,null,wav,device]
+#
+# Speaks a stream of short utterances, a share of them repeats, through
+# each output:
+#   process  the previous path: mp3 written to a temp file, moved into the
+#            speech cache and played by path in the playsound helper process
+#   null     in memory, discarded
+#   wav      in memory, decoded once and appended to one open WAV file
+#   device   in memory, decoded once and fed to one long-lived miniaudio
+#            device (needs miniaudio; a machine without a sound card gets
+#            its null backend, which still runs in real time)
+# Synthesis is simulated and instant. It produces a short 24 kHz WAV
+# tone rather than mp3, because there is no mp3 encoder to make test
+# audio with. Reported per output:
+# - playback startup, from play() to the first audio the sink accepted.
+#   For the process player this is the play() round trip with whatever
+#   playsound is installed, which is a lower bound.
+# - files opened and bytes written by this process, from an audit hook
+#   and /proc/self/io. The speech cache still stores each new phrase for
+#   the next run, so new phrases cost a write on every path.
+# - files the player had to open by path, which happens in the helper
+#   process and is not in the counts above
+# - files created
+
+import argparse
+import importlib.util
+import io
+import math
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+from benchmarks.fakes import SimulatedSpeechView
+from utils import audio_output
+from utils.audio_output import ClipCache, DeviceOutput, NullOutput, WavOutput
+from utils.instrumentation import percentile
+from utils.playback import ProcessPlayer
+from utils.tts_cache import SpeechCache
+
+PHRASES = [
+    "It is sunny in London.", "You have two new reminders.", "The time is 6 PM.",
+    "Opening YouTube.", "Here is the latest news.", "Playing music by Queen.",
+]
+
+_opens = [0]
+
+
+def _audit(event, args):
+    if event == "open":
+        _opens[0] += 1
+
+
+def io_counters():
+    """(bytes written, write calls) for this process, or zeros where /proc is missing."""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields['wchar']), int(fields['syscw'])
+    except OSError:
+        return 0, 0
+
+
+def tone(text, seconds=0.1, rate=24000):
+    """A short WAV tone standing in for synthesized speech, pitched by the text."""
+    pitch = 200 + hash(text) % 400
+    frames = b"".join(struct.pack("<h", int(8000 * math.sin(2 * math.pi * pitch * i / rate)))
+                      for i in range(int(seconds * rate)))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(frames)
+    return buffer.getvalue()
+
+
+class BenchView(SimulatedSpeechView):
+    """SimulatedSpeechView with instant synthesis of real audio and a real output."""
+
+    def __init__(self, player):
+        super().__init__(rtt=0.0, per_char=0.0, player=player)
+        self.speech_cache = SpeechCache(tempfile.mkdtemp(prefix="jarvis_bench_cache_"))
+        self.clips = ClipCache()
+
+    def _synthesize(self, text, path):
+        with open(path, "wb") as f:
+            f.write(tone(text))
+
+    def _synthesize_bytes(self, text):
+        return tone(text)
+
+
+def texts(count, repeat_share):
+    """Utterances, repeat_share of them drawn from a few fixed phrases."""
+    result = []
+    for i in range(count):
+        if i % 100 < repeat_share * 100:
+            result.append(PHRASES[i % len(PHRASES)])
+        else:
+            result.append(f"Unique answer number {i}.")
+    return result
+
+
+def build_player(name, directory):
+    if name == "process":
+        return ProcessPlayer()
+    if name == "null":
+        return NullOutput()
+    if name == "wav":
+        return WavOutput(os.path.join(directory, "session.wav"))
+    return DeviceOutput()
+
+
+def run(name, utterances, directory):
+    player = build_player(name, directory)
+    player.start()
+    view = BenchView(player)
+    cancel = threading.Event()
+    # Let the helper process or device come up before timing
+    view._play_file(view._render("Warming up."))
+
+    watched = [view.temp_dir, view.speech_cache.cache_dir]
+    files_before = sum(len(os.listdir(d)) for d in watched)
+    opens_before = _opens[0]
+    written_before, writes_before = io_counters()
+
+    startup = []
+    totals = []
+    path_plays = 0
+    for text in utterances:
+        started = time.perf_counter()
+        audio = view._render(text)
+        path_plays += isinstance(audio, str)
+        play_started = time.perf_counter()
+        player.play(audio, cancel)
+        ended = time.perf_counter()
+        totals.append(ended - started)
+        if name == "process":
+            startup.append(ended - play_started)
+    if name != "process":
+        startup = list(player.startup)[-len(utterances):]
+
+    written, writes = io_counters()
+    stats = {
+        'startup': sorted(startup),
+        'total': sorted(totals),
+        'opens': _opens[0] - opens_before,
+        'written': written - written_before,
+        'writes': writes - writes_before,
+        'path_plays': path_plays,
+        'files': sum(len(os.listdir(d)) for d in watched) - files_before,
+    }
+    player.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio output benchmark")
+    parser.add_argument("--utterances", type=int, default=200)
+    parser.add_argument("--repeat-share", type=float, default=0.5, help="fraction of utterances that repeat")
+    parser.add_argument("--outputs", default="process,null,wav,device")
+    args = parser.parse_args()
+
+    sys.addaudithook(_audit)
+    directory = tempfile.mkdtemp(prefix="jarvis_bench_audio_")
+    utterances = texts(args.utterances, args.repeat_share)
+    print(f"{args.utterances} utterances, {args.repeat_share:.0%} repeated; 0.1 s of 24 kHz audio each\n")
+    print(f"{'output':<8} {'startup p50':>12} {'p99':>9} {'per utt p50':>12} {'opens':>6} "
+          f"{'KB written':>11} {'writes':>7} {'player opens':>12} {'new files':>9}")
+    for name in args.outputs.split(","):
+        if name == "device" and not audio_output.available():
+            print(f"{name:<8} skipped: miniaudio is not installed")
+            continue
+        if name == "process" and importlib.util.find_spec("playsound") is None:
+            print(f"{name:<8} skipped: playsound is not installed")
+            continue
+        r = run(name, utterances, directory)
+        ms = lambda values, q: percentile(values, q) * 1000
+        print(f"{name:<8} {ms(r['startup'], 0.5):>10.3f}ms {ms(r['startup'], 0.99):>7.3f}ms "
+              f"{ms(r['total'], 0.5):>10.3f}ms {r['opens']:>6} {r['written'] / 1024:>11.1f} "
+              f"{r['writes']:>7} {r['path_plays']:>12} {r['files']:>9}")
+
+
+if __name__ == "__main__":
+    main()
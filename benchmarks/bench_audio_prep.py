@@ -0,0 +1,111 @@
+# benchmarks/bench_audio_prep.py - Bytes uploaded and recognition latency with and without audio preparation
+#
+# Usage: python -m benchmarks.bench_audio_prep [--commands 12] [--rtt 0.15] [--uplink-kbps 1000]
+#                                              [--decode 0.15]
+#
+# A fixture of spoken commands at 44.1 kHz stereo (fixtures.command_session)
+# is segmented by AudioCapture as the microphone would be. Each phrase is
+# then sent as captured (the previous behaviour: pre-roll and closing
+# pause included, at the capture rate) and after audio_prep.prepare
+# (trimmed to the speech, 16 kHz).
+#
+# Upload size is the FLAC that speech_recognition sends to Google when its
+# encoder is available, else the PCM it would encode. Recognition latency
+# is simulated as --rtt plus the upload over --uplink-kbps plus --decode
+# seconds of server time per second of audio; the preparation itself is
+# measured, with numpy and, if audioop is there, without it.
+
+import argparse
+import time
+
+from benchmarks.fixtures import command_session
+from utils import audio_prep
+from utils.audio_capture import AudioCapture, WavFileSource
+from utils.instrumentation import percentile
+
+
+def segment(path):
+    capture = AudioCapture(WavFileSource(path), dynamic_energy_threshold=True, phrase_time_limit=5,
+                           buffer_seconds=600, max_pending=1000)
+    capture.calibrate(duration=0.5)
+    capture.start()
+    phrases = []
+    while True:
+        audio = capture.listen(timeout=30)
+        if audio is None:
+            break
+        phrases.append(audio)
+    capture.stop()
+    return phrases, capture.energy_threshold
+
+
+def upload_bytes(audio):
+    """(bytes, encoding) of what recognize_google would upload."""
+    try:
+        return len(audio.get_flac_data(convert_width=2)), "FLAC"
+    except (AttributeError, OSError):
+        return len(audio.frame_data), "PCM"
+
+
+def seconds_of(audio):
+    return len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio preparation benchmark")
+    parser.add_argument("--commands", type=int, default=12)
+    parser.add_argument("--rtt", type=float, default=0.15, help="recognizer round trip seconds")
+    parser.add_argument("--uplink-kbps", type=float, default=1000, help="upload bandwidth")
+    parser.add_argument("--decode", type=float, default=0.15, help="server seconds per second of audio")
+    args = parser.parse_args()
+
+    path = command_session(count=args.commands)
+    phrases, threshold = segment(path)
+    print(f"{len(phrases)} phrases segmented from {args.commands} commands "
+          f"({phrases[0].sample_rate} Hz, downmixed by the capture source)\n")
+
+    def latency(audio, size):
+        return args.rtt + size * 8 / (args.uplink_kbps * 1000) + seconds_of(audio) * args.decode
+
+    rows = {}
+    for name, transform in (("as captured", lambda audio: audio),
+                            ("prepared", lambda audio: audio_prep.prepare(audio, threshold))):
+        sizes, seconds, latencies = [], [], []
+        for audio in phrases:
+            sent = transform(audio)
+            size, encoding = upload_bytes(sent)
+            sizes.append(size)
+            seconds.append(seconds_of(sent))
+            latencies.append(latency(sent, size))
+        rows[name] = (sizes, seconds, sorted(latencies), encoding)
+
+    print(f"{'':<12} {'bytes/turn':>11} {'audio/turn':>11} {'recognize p50':>14} {'p95':>7}")
+    for name, (sizes, seconds, latencies, encoding) in rows.items():
+        print(f"{name:<12} {sum(sizes) / len(sizes):>11,.0f} {sum(seconds) / len(seconds):>10.2f}s "
+              f"{percentile(latencies, 0.5):>13.2f}s {percentile(latencies, 0.95):>6.2f}s")
+    before, after = (sum(rows[name][0]) for name in rows)
+    print(f"Upload ({encoding}) cut by {1 - after / before:.0%}")
+
+    print("\nPreparation cost per phrase:")
+    numpy = audio_prep.np
+    for label, module in (("numpy", numpy), ("audioop", None)):
+        if label == "numpy" and module is None:
+            print("  numpy    not installed")
+            continue
+        if label == "audioop" and audio_prep.audioop is None:
+            continue
+        audio_prep.np = module
+        durations = []
+        for _ in range(20):
+            for audio in phrases:
+                started = time.perf_counter()
+                audio_prep.prepare(audio, threshold)
+                durations.append(time.perf_counter() - started)
+        durations.sort()
+        print(f"  {label:<8} p50 {percentile(durations, 0.5) * 1000:6.2f} ms  "
+              f"p95 {percentile(durations, 0.95) * 1000:6.2f} ms")
+    audio_prep.np = numpy
+
+
+if __name__ == "__main__":
+    main()
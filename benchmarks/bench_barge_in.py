@@ -0,0 +1,92 @@
+# benchmarks/bench_barge_in.py - How quickly Jarvis stops talking when interrupted
+#
+# Usage: python -m benchmarks.bench_barge_in [--runs 5] [--budget 0.15]
+#
+# A synthetic real-time source asks for help, then talks over the long
+# help answer with a second command. A fake output device plays speech in
+# 20 ms blocks. Each run checks that the help answer was cut off within the
+# budget and that the interrupting command was still answered. The exit
+# status is non-zero if any run misses the budget.
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+
+from benchmarks.fakes import ScriptedBackend, SimulatedSpeechView
+from controller import CommandController
+from jarvis import EXIT_PHRASES
+from model import SpeechModel
+from utils import storage
+from utils.audio_capture import SyntheticSource
+from utils.barge_in import cutoff_summary
+from utils.knowledge_store import KnowledgeStore
+from utils.pipeline import AssistantPipeline
+from utils.response_cache import ResponseCache
+
+TRANSCRIPTS = ["help", "what time is it", "goodbye"]
+
+
+def run_once(args):
+    """Run one scripted session and return its pipeline and view."""
+    script = [
+        ('silence', 1.0), ('tone', 0.8),       # "help"
+        ('silence', args.talk_over_after),     # Jarvis starts the long answer
+        ('tone', 0.8),                         # "what time is it", over the answer
+        ('silence', 3.0), ('tone', 0.6),       # "goodbye"
+        ('silence', 1.5),
+    ]
+    model = SpeechModel(SyntheticSource(script, realtime=True),
+                        backends=[ScriptedBackend(TRANSCRIPTS)],
+                        cache=ResponseCache(":memory:"),
+                        knowledge=KnowledgeStore(":memory:"))
+    view = SimulatedSpeechView(scale=1.0, rtt=0.1)
+    controller = CommandController(model, view)
+
+    pipeline = AssistantPipeline(model, view, controller, EXIT_PHRASES, barge_in=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.start()
+        pipeline.wait(timeout=60)
+    model.close()
+    return pipeline, view
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barge-in cut-off latency benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.15, help="maximum cut-off latency in seconds")
+    parser.add_argument("--talk-over-after", type=float, default=2.5,
+                        help="seconds of silence before the user talks over the answer")
+    args = parser.parse_args()
+
+    storage.DATA_DIR = tempfile.mkdtemp(prefix="jarvis_bench_data_")
+
+    failures = []
+    print(f"{'run':>3} {'detect ms':>10} {'cut-off ms':>11} {'onset->silence ms':>18}  answered")
+    for run in range(1, args.runs + 1):
+        pipeline, view = run_once(args)
+        turns = list(pipeline.turns)
+        summary = cutoff_summary(turns)
+        answered = [t.text for t in turns if 'done' in t.times and not t.interrupted]
+
+        if summary['interruptions'] != 1:
+            failures.append(f"run {run}: expected 1 interruption, got {summary['interruptions']}")
+            print(f"{run:>3} {'-':>10} {'-':>11} {'-':>18}  {answered}")
+            continue
+        if "what time is it" not in answered:
+            failures.append(f"run {run}: the interrupting command was not answered")
+        if summary['cutoff_max'] > args.budget:
+            failures.append(f"run {run}: cut-off took {summary['cutoff_max'] * 1000:.0f} ms")
+
+        print(f"{run:>3} {summary['detect_max'] * 1000:>10.0f} {summary['cutoff_max'] * 1000:>11.1f} "
+              f"{(summary['detect_max'] + summary['cutoff_max']) * 1000:>18.0f}  {answered}")
+
+    if failures:
+        print("\n".join(["FAILED:"] + failures))
+        sys.exit(1)
+    print(f"OK: every cut-off within {args.budget * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_compound.py - One compound turn vs the same commands asked one after another
+#
+# Usage: python -m benchmarks.bench_compound [--weather 0.4] [--news 0.6] [--turn-overhead 1.2]
+#                                            [--repeat 5]
+#
+# Weather and news lookups take fixed times. "What's the weather in Paris
+# and tell me the news" is handled as one compound turn, with both
+# lookups running at once, and as two separate turns. Each separate turn
+# also pays --turn-overhead seconds for the user to ask and be recognized,
+# which a compound turn pays once. Then the news lookup fails, to check
+# that the weather still gets answered. Last, utterances that contain
+# "and" but are a single command are checked to stay whole.
+
+import argparse
+import time
+
+from controller import CommandController
+
+
+class SlowModel:
+    """Model stand-in with fixed weather and news latency."""
+
+    def __init__(self, weather, news, news_fails=False):
+        self.weather = weather
+        self.news = news
+        self.news_fails = news_fails
+
+    def get_weather(self, city):
+        time.sleep(self.weather)
+        return {'description': 'light rain', 'temperature': 18}
+
+    def get_news(self, category=None):
+        time.sleep(self.news)
+        if self.news_fails:
+            raise ConnectionError("news API unreachable")
+        return {'articles': [{'title': 'Markets steady'}, {'title': 'New exoplanet images'}]}
+
+
+COMPOUND = "what's the weather in paris and tell me the news"
+SEPARATE = ["what's the weather in paris", "tell me the news"]
+
+SINGLE = [
+    "search for salt and pepper",
+    "tell me about salt and pepper",
+    "what's the weather in trinidad and tobago",
+    "remind me to buy milk and eggs",
+    "play music by simon and garfunkel",
+    "tell me about tom and jerry",
+]
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compound command benchmark")
+    parser.add_argument("--weather", type=float, default=0.4, help="weather lookup seconds")
+    parser.add_argument("--news", type=float, default=0.6, help="news lookup seconds")
+    parser.add_argument("--turn-overhead", type=float, default=1.2,
+                        help="seconds per turn to ask and be recognized")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    controller = CommandController(SlowModel(args.weather, args.news), None)
+    compound = []
+    separate = []
+    for _ in range(args.repeat):
+        elapsed, (intent, _, response) = timed(lambda: controller.handle(COMPOUND))
+        assert intent == 'compound', intent
+        compound.append(elapsed)
+        separate.append(sum(timed(lambda: controller.process_command(text))[0] for text in SEPARATE))
+    handlers_compound = min(compound)
+    handlers_separate = min(separate)
+
+    print(f"Weather {args.weather}s, news {args.news}s, {args.turn_overhead}s to ask and recognize a turn\n")
+    print(f"{'':<22} {'handlers':>9} {'with turns':>11}")
+    print(f"{'one compound turn':<22} {handlers_compound:>8.2f}s {handlers_compound + args.turn_overhead:>10.2f}s")
+    print(f"{'two separate turns':<22} {handlers_separate:>8.2f}s "
+          f"{handlers_separate + len(SEPARATE) * args.turn_overhead:>10.2f}s")
+    print(f"\nAnswer: {response}")
+
+    failing = CommandController(SlowModel(args.weather, args.news, news_fails=True), None)
+    _, _, response = failing.handle(COMPOUND)
+    print(f"With the news API down: {response}")
+
+    kept = [text for text in SINGLE if controller._split_compound(text) is None]
+    print(f"\nSingle commands containing 'and' left whole: {len(kept)}/{len(SINGLE)}")
+    for text in SINGLE:
+        if text not in kept:
+            print(f"  split by mistake: {text}")
+    controller.handler_pool.close()
+    failing.handler_pool.close()
+
+
+if __name__ == "__main__":
+    main()
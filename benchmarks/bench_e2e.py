@@ -0,0 +1,267 @@
+# benchmarks/bench_e2e.py - Scripted end-to-end sessions with no microphone, speakers or network
+#
+# Usage: python -m benchmarks.bench_e2e [--session daily] [--repeat 3]
+#                                       [--sink null|recording] [--output results.json]
+#                                       [--baseline old.json]
+#
+# Each session is rendered to a WAV fixture and fed to a real Jarvis
+# (capture, segmentation, pipeline, router, cache, HTTP client) through
+# WavFileSource. Recognition is a scripted stand-in, speech output goes to a
+# null or recording sink, and the news, weather and search APIs are served
+# by the local stub. Results are written as JSON with sorted keys and a
+# schema version so runs from different versions can be diffed; with
+# --baseline the run is compared against an earlier results file and the
+# exit status is non-zero if latency regressed past the threshold.
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import webbrowser
+
+from benchmarks.fakes import FakeOutputDevice, NullSink, ScriptedBackend, SimulatedSpeechView
+from benchmarks.fixtures import session_wav
+from benchmarks.stub_api_server import StubApiServer
+from jarvis import Jarvis
+from model import SpeechModel
+from utils import api_manager, storage
+from utils.audio_capture import WavFileSource
+from utils.instrumentation import Tracer, percentile, set_tracer
+from utils.knowledge_store import KnowledgeStore
+from utils.response_cache import ResponseCache
+
+SCHEMA_VERSION = 1
+
+# say: what the recognizer stand-in returns; seconds: how long the user
+# talks; pause: silence after the turn while Jarvis answers
+SESSIONS = {
+    'smoke': [
+        {'say': "what time is it", 'seconds': 0.8, 'pause': 1.5},
+        {'say': "what is today's date", 'seconds': 0.8, 'pause': 1.5},
+        {'say': "goodbye", 'seconds': 0.5, 'pause': 1.5},
+    ],
+    'daily': [
+        {'say': "what's the weather in london", 'seconds': 1.2, 'pause': 2.0},
+        {'say': "tell me the news", 'seconds': 1.0, 'pause': 2.0},
+        {'say': "what time is it", 'seconds': 0.8, 'pause': 1.5},
+        {'say': "tell me about the moon landing", 'seconds': 1.4, 'pause': 2.5},
+        {'say': "what's the weather in london", 'seconds': 1.2, 'pause': 2.0},
+        {'say': "search for pasta recipes", 'seconds': 1.2, 'pause': 2.0},
+        {'say': "tell me about the moon landing", 'seconds': 1.4, 'pause': 2.0},
+        {'say': "goodbye", 'seconds': 0.5, 'pause': 1.5},
+    ],
+}
+
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, timeout=5)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_jarvis(turns, args):
+    """Build Jarvis for one session with every external dependency replaced."""
+    source = WavFileSource(session_wav(turns), realtime=True)
+    backend = ScriptedBackend([turn['say'] for turn in turns], latency=args.recognize_latency)
+    model = SpeechModel(source, backends=[backend], cache=ResponseCache(":memory:"),
+                        knowledge=KnowledgeStore(":memory:"))
+
+    if args.sink == "null":
+        sink = NullSink()
+    else:
+        sink = FakeOutputDevice(chars_per_second=args.speech_rate)
+    view = SimulatedSpeechView(rtt=args.tts_latency, player=sink)
+    return Jarvis(model=model, view=view)
+
+
+def run_session(turns, args):
+    """
+    Run one scripted session.
+
+    Returns:
+        (turn latencies in seconds, number of answered turns, barge-ins, wall seconds)
+    """
+    # A fresh data directory, so learned prefetch targets do not carry over
+    storage.DATA_DIR = tempfile.mkdtemp(prefix="jarvis_bench_data_")
+    jarvis = build_jarvis(turns, args)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        jarvis.start()
+    elapsed = time.perf_counter() - started
+
+    completed = [t for t in jarvis.pipeline.turns if t.audio is not None]
+    latencies = [t.latency() for t in completed if t.latency() is not None]
+    answered = sum(1 for t in completed if 'first_audio' in t.times)
+    barge_ins = sum(1 for t in completed if t.interrupted)
+    return latencies, answered, barge_ins, elapsed
+
+
+def ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def benchmark_session(name, turns, args):
+    """Run a session args.repeat times and summarize it."""
+    tracer = Tracer(trace_path="")
+    set_tracer(tracer)
+
+    latencies, answered, barge_ins, wall = [], 0, 0, 0.0
+    for _ in range(args.repeat):
+        run_latencies, run_answered, run_barge_ins, elapsed = run_session(turns, args)
+        latencies += run_latencies
+        answered += run_answered
+        barge_ins += run_barge_ins
+        wall += elapsed
+
+    ordered = sorted(latencies)
+    stages = {
+        stage: {'count': s['count'], 'p50_ms': ms(s['p50']), 'p95_ms': ms(s['p95']), 'p99_ms': ms(s['p99'])}
+        for stage, s in tracer.summary().items()
+    }
+    return {
+        'turns': {
+            'scripted': len(turns) * args.repeat,
+            'answered': answered,
+            'barge_ins': barge_ins,
+        },
+        'latency_ms': {
+            'mean': ms(sum(ordered) / len(ordered)) if ordered else None,
+            'p50': ms(percentile(ordered, 0.50)),
+            'p95': ms(percentile(ordered, 0.95)),
+            'max': ms(ordered[-1]) if ordered else None,
+        },
+        'throughput': {
+            'session_seconds': round(wall / args.repeat, 2),
+            'turns_per_minute': round(answered / wall * 60, 2) if wall else None,
+        },
+        'stages': stages,
+    }
+
+
+def compare(results, baseline, threshold, min_delta):
+    """
+    Print latency changes against a baseline results file.
+
+    Args:
+        results: This run's results
+        baseline: Earlier results with the same schema
+        threshold: Relative slowdown that counts as a regression, e.g. 0.2
+        min_delta: Milliseconds a metric must also slow down by, so jitter
+                   in sub-millisecond stages is not reported
+
+    Returns:
+        List of regressions
+    """
+    regressions = []
+    print(f"\n{'session':<8} {'metric':<28} {'baseline':>9} {'now':>9} {'change':>8}")
+    for name, now in results['sessions'].items():
+        before = baseline.get('sessions', {}).get(name)
+        if before is None:
+            continue
+        metrics = [(f"turn p{p}", before['latency_ms'].get(f"p{p}"), now['latency_ms'].get(f"p{p}"))
+                   for p in (50, 95)]
+        metrics += [(f"{stage} p95", before['stages'][stage]['p95_ms'], s['p95_ms'])
+                    for stage, s in sorted(now['stages'].items())
+                    if stage in before.get('stages', {}) and stage not in ('turn', 'listen', 'play', 'startup')]
+        for metric, old, new in metrics:
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            flag = ""
+            if change > threshold and new - old >= min_delta:
+                flag = " !"
+                regressions.append(f"{name} {metric}: {old} -> {new} ms")
+            print(f"{name:<8} {metric:<28} {old:>9.1f} {new:>9.1f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end scripted session benchmark")
+    parser.add_argument("--session", action="append", choices=sorted(SESSIONS),
+                        help="session to run (repeatable, default: all)")
+    parser.add_argument("--session-file", help="JSON file with a list of turns to run as session 'custom'")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--sink", choices=["null", "recording"], default="null",
+                        help="null returns at once; recording plays at --speech-rate")
+    parser.add_argument("--speech-rate", type=float, default=15.0, help="characters per second of playback")
+    parser.add_argument("--recognize-latency", type=float, default=0.3)
+    parser.add_argument("--tts-latency", type=float, default=0.25)
+    parser.add_argument("--api-latency", type=float, default=0.2)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="regression threshold as a fraction")
+    parser.add_argument("--min-delta", type=float, default=10.0, help="ignore slowdowns below this many ms")
+    args = parser.parse_args()
+
+    sessions = {name: SESSIONS[name] for name in (args.session or sorted(SESSIONS))}
+    if args.session_file:
+        with open(args.session_file, encoding="utf-8") as f:
+            sessions = {'custom': json.load(f)}
+
+    # Commands like "search for ..." and "open youtube" must not open a browser
+    webbrowser.open = lambda url, *args, **kwargs: True
+
+    results = {
+        'schema': SCHEMA_VERSION,
+        'benchmark': "jarvis-e2e",
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'revision': git_revision(),
+        },
+        'config': {
+            'repeat': args.repeat,
+            'sink': args.sink,
+            'speech_rate': args.speech_rate,
+            'recognize_latency': args.recognize_latency,
+            'tts_latency': args.tts_latency,
+            'api_latency': args.api_latency,
+        },
+        'sessions': {},
+    }
+
+    with StubApiServer(delays={'default': args.api_latency}) as stub:
+        for attribute, url in stub.urls().items():
+            setattr(api_manager, attribute, url)
+        for name, turns in sessions.items():
+            results['sessions'][name] = benchmark_session(name, turns, args)
+
+    print(f"{'session':<8} {'answered':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'turns/min':>10}")
+    for name, r in results['sessions'].items():
+        latency = r['latency_ms']
+        print(f"{name:<8} {r['turns']['answered']:>4}/{r['turns']['scripted']:<4} {latency['p50'] or 0:>8.1f} "
+              f"{latency['p95'] or 0:>8.1f} {latency['max'] or 0:>8.1f} {r['throughput']['turns_per_minute'] or 0:>10.1f}")
+        slowest = sorted(r['stages'].items(), key=lambda item: item[1]['p95_ms'], reverse=True)
+        for stage, s in slowest:
+            if stage in ('listen', 'play', 'startup'):
+                continue
+            print(f"    {stage:<28} n={s['count']:<4} p50 {s['p50_ms']:>8.1f}  p95 {s['p95_ms']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get('schema') != SCHEMA_VERSION:
+            print(f"Baseline schema {baseline.get('schema')} does not match {SCHEMA_VERSION}; not comparing")
+            return
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print("\n".join(["REGRESSIONS:"] + regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
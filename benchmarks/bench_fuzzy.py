@@ -0,0 +1,192 @@
+# benchmarks/bench_fuzzy.py - Routing accuracy and cost of fuzzy matching on noisy transcripts
+#
+# Usage: python -m benchmarks.bench_fuzzy [--variants 20] [--seed 1]
+#
+# Clean commands are corrupted the way speech recognition gets them wrong:
+# known mishearings ("whether", "you tube") and random one-letter slips
+# in a keyword or entity. Each noisy transcript is routed with the exact
+# patterns alone and with the fuzzy stage added, and the intent compared
+# with the clean command's. A separate set of genuine information queries
+# checks that fuzzy matching does not hijack them.
+
+import argparse
+import random
+import string
+import time
+
+from controller import CommandController
+from utils.instrumentation import get_tracer, percentile
+
+# (clean command, intent)
+CLEAN = [
+    ("open youtube", "open_website"),
+    ("open github", "open_website"),
+    ("open linkedin", "open_website"),
+    ("open gmail", "open_website"),
+    ("what's the weather in paris", "get_weather"),
+    ("what is the weather in london", "get_weather"),
+    ("weather forecast for tokyo", "get_weather"),
+    ("current weather in berlin", "get_weather"),
+    ("play music by adele", "play_music"),
+    ("play song by queen", "play_music"),
+    ("tell me the news", "tell_news"),
+    ("tell me the news about sports", "tell_news"),
+    ("what time is it", "tell_time"),
+    ("tell me the time", "tell_time"),
+    ("what is today's date", "tell_date"),
+    ("system info", "system_info"),
+    ("set a reminder to call mom", "set_reminder"),
+    ("search for pasta recipes", "search_web"),
+    ("performance report", "performance_report"),
+    ("which process uses the most memory", "top_process"),
+    ("cpu over the last five minutes", "system_trend"),
+]
+
+# Mishearings seen from cloud recognizers
+MISHEARD = {
+    "youtube": ["you tube", "u tube"],
+    "github": ["git hub"],
+    "linkedin": ["linked in"],
+    "gmail": ["g mail"],
+    "weather": ["whether", "wether", "wheather"],
+    "music": ["musik", "muzik"],
+    "song": ["sung", "sonk"],
+    "news": ["nws", "newz"],
+    "time": ["tyme"],
+    "date": ["dait"],
+    "system": ["sistem", "sister"],
+    "reminder": ["remainder", "remindr"],
+    "search": ["serch", "surch"],
+    "performance": ["perfomance", "preformance"],
+    "process": ["proces", "prosess"],
+    "memory": ["memry", "memorie"],
+    "paris": ["pariss", "parris"],
+    "london": ["londn", "lunden"],
+    "tokyo": ["tokio"],
+    "berlin": ["berlen"],
+}
+
+# Genuine information queries: these must stay with the search fallback
+QUERIES = [
+    "tell me about the moon landing",
+    "tell me about pasta recipes",
+    "tell me about black holes",
+    "tell me about the roman empire",
+    "who invented the telephone",
+    "how tall is mount everest",
+    "tell me about paris in the twenties",
+    "what does photosynthesis mean",
+    "tell me about the london underground",
+    "how do vaccines work",
+    "tell me about mushrooms",
+    "tell me about the music industry",
+    "tell me about leather",
+    "tell me about heather",
+    "tell me about the nets",
+    "tell me about helm",
+]
+
+
+def slip(word, rng):
+    """One random typing-style slip: drop, double, swap or replace a letter."""
+    i = rng.randrange(len(word))
+    kind = rng.choice(["drop", "double", "swap", "replace"])
+    if kind == "drop" and len(word) > 4:
+        return word[:i] + word[i + 1:]
+    if kind == "double":
+        return word[:i] + word[i] + word[i:]
+    if kind == "swap" and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def noisy_corpus(variants, seed):
+    """
+    Build noisy transcripts from the clean commands.
+
+    Returns:
+        List of (noisy text, intent)
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for text, intent in CLEAN:
+        words = text.split()
+        targets = [i for i, w in enumerate(words) if w in MISHEARD or len(w) >= 5]
+        for _ in range(variants):
+            i = rng.choice(targets)
+            noisy = list(words)
+            if words[i] in MISHEARD and rng.random() < 0.5:
+                noisy[i] = rng.choice(MISHEARD[words[i]])
+            else:
+                noisy[i] = slip(words[i], rng)
+            corpus.append((" ".join(noisy), intent))
+    return corpus
+
+
+def route(controller, text, fuzzy):
+    """Intent an utterance would be handled by; the search fallback counts as get_information."""
+    found = controller.router.dispatch(text)
+    if fuzzy:
+        found = controller._correct_route(text, found, get_tracer())
+    return found[0].__name__ if found else "get_information"
+
+
+class _Span:
+    fields = {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy intent matching benchmark")
+    parser.add_argument("--variants", type=int, default=20, help="noisy versions of each clean command")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    controller = CommandController(None, None)
+    build = time.perf_counter() - started
+    matcher = controller.fuzzy
+    corpus = noisy_corpus(args.variants, args.seed)
+
+    print(f"Index: {len(matcher.words)} words, controller built in {build * 1000:.1f} ms")
+    print(f"Noisy transcripts: {len(corpus)} from {len(CLEAN)} commands\n")
+
+    print(f"{'routing':<14} {'correct':>8} {'accuracy':>9} {'to search':>10}")
+    for label, fuzzy in (("exact", False), ("exact+fuzzy", True)):
+        intents = [route(controller, text, fuzzy) for text, _ in corpus]
+        correct = sum(1 for got, (_, want) in zip(intents, corpus) if got == want)
+        searched = sum(1 for got in intents if got == "get_information")
+        print(f"{label:<14} {correct:>8} {correct / len(corpus):>9.1%} {searched:>10}")
+
+    clean_kept = sum(1 for text, intent in CLEAN if route(controller, text, True) == intent)
+    hijacked = [q for q in QUERIES if route(controller, q, True) != "get_information"]
+    print(f"\nClean commands still routed correctly: {clean_kept}/{len(CLEAN)}")
+    print(f"Information queries hijacked: {len(hijacked)}/{len(QUERIES)} {hijacked or ''}")
+
+    misses = [(text, intent, route(controller, text, True)) for text, intent in corpus]
+    misses = [m for m in misses if m[1] != m[2]]
+    if misses:
+        print("\nStill misrouted (first 10):")
+        for text, want, got in misses[:10]:
+            print(f"  {text!r:44} wanted {want}, got {got}")
+
+    # Cost of the fuzzy stage alone, on utterances the exact router missed
+    print()
+    fallthrough = [text for text, _ in corpus if route(controller, text, False) == "get_information"]
+    for label, clear in (("cold (memo cleared)", True), ("warm (memoized)", False)):
+        if not clear:
+            for text in fallthrough:
+                controller._fuzzy_route(text, _Span())
+        durations = []
+        for text in fallthrough:
+            if clear:
+                matcher.correct_word.cache_clear()
+            t = time.perf_counter()
+            controller._fuzzy_route(text, _Span())
+            durations.append(time.perf_counter() - t)
+        durations.sort()
+        print(f"Fuzzy stage, {label}: n={len(durations)} "
+              f"p50 {percentile(durations, 0.5) * 1e6:.1f} us, p99 {percentile(durations, 0.99) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
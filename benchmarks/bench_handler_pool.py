@@ -0,0 +1,86 @@
+# benchmarks/bench_handler_pool.py - Silence before the first word with slow and hung handlers
+#
+# Usage: python -m benchmarks.bench_handler_pool [--latencies 0.2,1.5,4,30] [--deadline 3]
+#                                                [--ack-after 0.7]
+#
+# The weather lookup is replaced by one that takes a fixed time, from
+# quick to hung. For each latency, "what's the weather in London" is
+# handled inline (the previous behaviour) and on the handler pool, and
+# two times are reported: how long until Jarvis says anything (the
+# acknowledgement, or the answer if that came first) and how long until
+# the turn is over (answer, or fallback at the deadline). Then the cost of
+# the pool hop itself, which local handlers such as tell_time skip.
+
+import argparse
+import time
+
+from controller import CommandController
+from utils.handler_pool import HandlerPolicy
+from utils.instrumentation import percentile
+
+
+class SlowModel:
+    """Model stand-in whose weather lookup takes `latency` seconds."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def get_weather(self, city):
+        time.sleep(self.latency)
+        return {'description': 'light rain', 'temperature': 18}
+
+
+def one_turn(controller):
+    """(seconds to first words, seconds to end of turn, what ended it)."""
+    started = time.perf_counter()
+    first = []
+    acknowledge = lambda text: first.append(time.perf_counter())
+    response = controller.process_command("what's the weather in london", acknowledge)
+    ended = time.perf_counter()
+    outcome = "fallback" if "taking too long" in response else "answer"
+    return (first[0] if first else ended) - started, ended - started, outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Handler pool benchmark")
+    parser.add_argument("--latencies", default="0.2,1.5,4,30", help="weather lookup times in seconds")
+    parser.add_argument("--deadline", type=float, default=3.0)
+    parser.add_argument("--ack-after", type=float, default=0.7)
+    parser.add_argument("--calls", type=int, default=2000, help="calls timed for the pool overhead")
+    args = parser.parse_args()
+
+    print(f"Weather acknowledged after {args.ack_after}s, abandoned after {args.deadline}s; "
+          f"inline runs capped at 10 s\n")
+    print(f"{'lookup':>7} {'mode':<7} {'first words':>12} {'turn over':>10}  outcome")
+    for latency in (float(value) for value in args.latencies.split(",")):
+        for pooled in (False, True):
+            if not pooled and latency > 10:
+                print(f"{latency:>6.1f}s {'inline':<7} {'> 10 s':>12} {'> 10 s':>10}  stalled until the lookup returns")
+                continue
+            controller = CommandController(SlowModel(latency), None)
+            controller.use_handler_pool = pooled
+            policy = controller.get_weather.policy
+            controller.get_weather.__func__.policy = HandlerPolicy(
+                ack=policy.ack, ack_after=args.ack_after, deadline=args.deadline, fallback=policy.fallback)
+            first, over, outcome = one_turn(controller)
+            controller.handler_pool.close()
+            controller.get_weather.__func__.policy = policy
+            print(f"{latency:>6.1f}s {'pool' if pooled else 'inline':<7} {first:>11.2f}s {over:>9.2f}s  {outcome}")
+
+    controller = CommandController(SlowModel(0.0), None)
+    print(f"\nAn instant weather lookup, {args.calls} calls:")
+    for pooled in (False, True):
+        controller.use_handler_pool = pooled
+        durations = []
+        for _ in range(args.calls):
+            started = time.perf_counter()
+            controller.process_command("what's the weather in london")
+            durations.append(time.perf_counter() - started)
+        durations.sort()
+        print(f"  {'pool' if pooled else 'inline':<7} handle p50 {percentile(durations, 0.5) * 1e6:7.1f} us  "
+              f"p99 {percentile(durations, 0.99) * 1e6:7.1f} us")
+    controller.handler_pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# benchmarks/bench_health.py - Cost of a failing backend with and without circuit breakers
+#
+# Usage: python -m benchmarks.bench_health [--calls 20] [--tts-timeout 0.5] [--open-seconds 1]
+#
+# Two outages, each run with breakers off (the previous behaviour: every
+# call waits for the backend to fail) and on:
+#   tts      gTTS hangs for --tts-timeout and then fails, so each sentence
+#            ends up spoken by pyttsx3. Measured: time to first audio.
+#   weather  the local stub API answers 503 after --delay, so the client
+#            retries with backoff before giving up. Measured: call latency
+#            and requests sent to the failing server.
+# Then the backend comes back, and the time until traffic returns to it
+# is measured; with breakers on, that is found by a background probe.
+# Finally the per-call cost of the breaker bookkeeping itself.
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from benchmarks.fakes import NullSink, SimulatedSpeechView
+from benchmarks.stub_api_server import StubApiServer
+from utils import api_manager
+from utils.health import HealthRegistry, set_health
+from utils.instrumentation import percentile
+
+
+class OutageView(SimulatedSpeechView):
+    """Simulated view whose gTTS can be taken down."""
+
+    def __init__(self, timeout):
+        super().__init__(rtt=0.05, per_char=0.0, player=NullSink())
+        self.timeout = timeout
+        self.down = True
+        self.gtts_used = 0
+
+    def _synthesize(self, text, path):
+        if self.down:
+            time.sleep(self.timeout)
+            raise ConnectionError("gTTS unreachable")
+        self.gtts_used += 1
+        super()._synthesize(text, path)
+
+    def _probe(self):
+        self._synthesize("OK", os.path.join(self.temp_dir, "probe.mp3"))
+
+
+def quietly(func, *args):
+    """Call func without the per-call console output of the code under test."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def registry(enabled, open_seconds):
+    # With breakers off a circuit never opens
+    return HealthRegistry(failure_threshold=3 if enabled else 10 ** 9, open_seconds=open_seconds)
+
+
+def wait_for(condition, interval, limit=30):
+    """Seconds until condition() is true, trying every interval."""
+    started = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - started > limit:
+            return None
+        time.sleep(interval)
+    return time.perf_counter() - started
+
+
+def tts_outage(args, enabled):
+    view = OutageView(args.tts_timeout)
+    view.health = registry(enabled, args.open_seconds)
+    view.health.register('gtts', probe=view._probe)
+
+    first_audio = []
+    for i in range(args.calls):
+        quietly(view.speak, f"Outage sentence number {i}.")
+        first_audio.append(view.last_timing['time_to_first_audio'])
+    first_audio.sort()
+
+    view.down = False
+    counter = iter(range(10 ** 6))
+
+    def recovered():
+        used = view.gtts_used
+        quietly(view.speak, f"Recovery sentence number {next(counter)}.")
+        return view.gtts_used > used
+
+    recovery = wait_for(recovered, 0.05)
+    return first_audio, recovery, view.health
+
+
+def weather_outage(args, enabled, stub):
+    health = registry(enabled, args.open_seconds)
+    health.register(api_manager.WEATHER_BACKEND, probe=lambda: api_manager._probe(api_manager.WEATHER_API_URL))
+    set_health(health)
+    stub.status = 503
+    before = stub.requests_served
+    latencies = []
+    for _ in range(args.calls):
+        started = time.perf_counter()
+        quietly(api_manager.get_weather, "london")
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    sent = stub.requests_served - before
+
+    stub.status = 200
+    recovery = wait_for(lambda: quietly(api_manager.get_weather, "london") is not None
+                        and health.state(api_manager.WEATHER_BACKEND) == 'closed', 0.05)
+    return latencies, sent, recovery, health
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Circuit breaker benchmark")
+    parser.add_argument("--calls", type=int, default=20, help="calls made during each outage")
+    parser.add_argument("--tts-timeout", type=float, default=0.5, help="seconds gTTS takes to fail")
+    parser.add_argument("--delay", type=float, default=0.05, help="stub server latency")
+    parser.add_argument("--open-seconds", type=float, default=1.0, help="open period before a probe")
+    args = parser.parse_args()
+
+    ms = lambda values, q: percentile(values, q) * 1000
+    seconds = lambda value: f"{value:.2f}s" if value is not None else "never"
+
+    print(f"gTTS down, failing after {args.tts_timeout}s; {args.calls} sentences")
+    for enabled in (False, True):
+        first_audio, recovery, health = tts_outage(args, enabled)
+        snapshot = health.snapshot()['gtts']
+        print(f"  breakers {'on ' if enabled else 'off'}  first audio p50 {ms(first_audio, 0.5):7.1f} ms  "
+              f"p95 {ms(first_audio, 0.95):7.1f} ms  gTTS calls {snapshot['calls']:>3}  "
+              f"back on gTTS after {seconds(recovery)}")
+
+    with StubApiServer(delays={'default': args.delay}) as stub:
+        for name, url in stub.urls().items():
+            setattr(api_manager, name, url)
+        print(f"\nWeather API answering 503 after {args.delay}s; {args.calls} calls")
+        for enabled in (False, True):
+            latencies, sent, recovery, health = weather_outage(args, enabled, stub)
+            print(f"  breakers {'on ' if enabled else 'off'}  call p50 {ms(latencies, 0.5):7.1f} ms  "
+                  f"p95 {ms(latencies, 0.95):7.1f} ms  requests sent {sent:>3}  "
+                  f"recovered after {seconds(recovery)}")
+        print("\n" + health.report())
+
+    health = HealthRegistry()
+    count = 100000
+    started = time.perf_counter()
+    for _ in range(count):
+        health.call('local', int)
+    per_call = (time.perf_counter() - started) / count
+    print(f"\nBookkeeping per call on a closed circuit: {per_call * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_http_client.py - Bare requests.get vs the pooled, async-capable client
+#
+# Usage: python -m benchmarks.bench_http_client [--calls 30] [--delay 0.05]
+#
+# Runs against the local stub server, so it needs no network or API keys.
+
+import argparse
+import asyncio
+import time
+
+import requests
+
+from benchmarks.stub_api_server import StubApiServer
+from utils import api_manager
+from utils.http_client import AsyncHttpClient, HttpClient
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP client benchmark")
+    parser.add_argument("--calls", type=int, default=30)
+    parser.add_argument("--delay", type=float, default=0.05, help="stub server latency")
+    args = parser.parse_args()
+
+    with StubApiServer(delays={'default': args.delay}) as stub:
+        urls = stub.urls()
+        for name, url in urls.items():
+            setattr(api_manager, name, url)
+        weather_url = urls['WEATHER_API_URL']
+
+        # 1. The original pattern: a new connection for every call
+        before = stub.connections
+        _, bare = timed(lambda: [requests.get(weather_url, params={'q': 'london'})
+                                 for _ in range(args.calls)])
+        bare_connections = stub.connections - before
+
+        # 2. Shared session with keep-alive
+        client = HttpClient()
+        before = stub.connections
+        _, pooled = timed(lambda: [client.get(weather_url, params={'q': 'london'})
+                                   for _ in range(args.calls)])
+        pooled_connections = stub.connections - before
+
+        # 3. The same calls issued concurrently from asyncio
+        async def concurrent():
+            aclient = AsyncHttpClient(client, max_in_flight=8)
+            try:
+                return await asyncio.gather(*[
+                    aclient.get(weather_url, params={'q': 'london'}) for _ in range(args.calls)
+                ])
+            finally:
+                aclient.close()
+
+        _, parallel = timed(lambda: asyncio.run(concurrent()))
+
+        # 4. A hung endpoint is cut off by the read deadline instead of blocking
+        stub.delays['default'] = 5
+        hung = HttpClient(read_timeout=0.5, retries=0)
+        start = time.perf_counter()
+        try:
+            hung.get(weather_url)
+            outcome = "answered"
+        except requests.Timeout:
+            outcome = "timed out"
+        hung_time = time.perf_counter() - start
+        stub.delays['default'] = args.delay
+
+    print(f"{'mode':<22} {'calls':>6} {'connections':>12} {'total s':>8} {'per call ms':>12}")
+    print(f"{'bare requests.get':<22} {args.calls:>6} {bare_connections:>12} {bare:>8.2f} {bare / args.calls * 1000:>12.1f}")
+    print(f"{'pooled session':<22} {args.calls:>6} {pooled_connections:>12} {pooled:>8.2f} {pooled / args.calls * 1000:>12.1f}")
+    print(f"{'async, 8 in flight':<22} {args.calls:>6} {'-':>12} {parallel:>8.2f} {parallel / args.calls * 1000:>12.1f}")
+    print(f"hung endpoint with 0.5 s read deadline: {outcome} after {hung_time:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_instrumentation.py - Cost of the per-stage timing spans
+#
+# Usage: python -m benchmarks.bench_instrumentation [--spans 200000]
+#
+# Times an empty block bare, inside a span with tracing disabled, inside a
+# span kept in memory only, and inside a span also queued for the JSONL
+# trace file. A voice turn records about a dozen spans.
+
+import argparse
+import os
+import tempfile
+import time
+
+from utils.instrumentation import Tracer
+
+SPANS_PER_TURN = 12
+
+
+def per_call(func, n):
+    started = time.perf_counter()
+    func(n)
+    return (time.perf_counter() - started) / n
+
+
+def bare(n):
+    for _ in range(n):
+        pass
+
+
+def spanned(tracer):
+    def run(n):
+        span = tracer.span
+        for _ in range(n):
+            with span('stage'):
+                pass
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumentation overhead benchmark")
+    parser.add_argument("--spans", type=int, default=200000)
+    args = parser.parse_args()
+
+    trace_path = os.path.join(tempfile.mkdtemp(prefix="jarvis_trace_"), "trace.jsonl")
+    tracers = [
+        ("disabled", Tracer(trace_path="", enabled=False)),
+        ("memory only", Tracer(trace_path="")),
+        ("memory + trace file", Tracer(trace_path=trace_path)),
+    ]
+
+    baseline = per_call(bare, args.spans)
+    print(f"{'mode':<20} {'ns/span':>8} {'us/turn':>8}")
+    for name, tracer in tracers:
+        cost = per_call(spanned(tracer), args.spans) - baseline
+        print(f"{name:<20} {cost * 1e9:>8.0f} {cost * SPANS_PER_TURN * 1e6:>8.1f}")
+
+    started = time.perf_counter()
+    tracers[2][1].close()
+    flushed = time.perf_counter() - started
+    size = os.path.getsize(trace_path)
+    print(f"trace file: {size / 1e6:.1f} MB, last flush {flushed * 1000:.0f} ms on the writer thread, "
+          f"{flushed / args.spans * 1e9:.0f} ns/span")
+
+
+if __name__ == "__main__":
+    main()
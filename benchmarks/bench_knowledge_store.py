@@ -0,0 +1,151 @@
+# benchmarks/bench_knowledge_store.py - Local answering from the search result index at scale
+#
+# Usage: python -m benchmarks.bench_knowledge_store [--sizes 10000,100000,300000]
+#                                                    [--queries 2000] [--seed 1]
+#
+# The index is filled with synthetic search results, three per query as
+# customsearch returns them, spread over a year of fetch times. At each
+# size it measures how fast results are added, how long a question takes
+# to answer when it was searched before (reworded, e.g. "tell me about
+# ...") and when it was not, and what share of repeated questions are
+# answered without the network. "other" counts questions never searched
+# for that were still answered, because every word of them is in some
+# other result's title. At the largest size it then purges
+# everything older than the purge age and compacts, reporting the time
+# taken and the file size before and after.
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from utils.instrumentation import percentile
+from utils.knowledge_store import KnowledgeStore, PURGE_AGE
+
+DAY = 24 * 60 * 60
+SYLLABLES = ["ka", "lo", "mi", "ra", "te", "su", "no", "vi", "pe", "da", "zu", "ho", "ne", "bi", "gor", "tan"]
+PHRASINGS = ["{}", "tell me about {}", "what is {}", "who was {}", "{} please"]
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def vocabulary(size, rng):
+    """Distinct made-up words, so term frequencies are controlled."""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def results_for(topic, words, rng, n):
+    """Three search results about a topic, numbered n, n+1, n+2."""
+    items = []
+    for i in range(3):
+        filler = " ".join(rng.choice(words) for _ in range(20))
+        items.append({
+            'title': f"{topic.title()} - {rng.choice(words)} encyclopedia",
+            'snippet': f"{topic} is {filler}.",
+            'link': f"https://example.com/{n + i}",
+        })
+    return items
+
+
+def fill(store, clock, topics, words, rng, start, end, span_days):
+    """Index results for topics[start:end] with fetch times spread over span_days."""
+    now = clock.now
+    started = time.perf_counter()
+    for i in range(start, end):
+        clock.now = now - rng.random() * span_days * DAY
+        store.add(topics[i], results_for(topics[i], words, rng, i * 3))
+    clock.now = now
+    return time.perf_counter() - started
+
+
+def timed_searches(store, questions):
+    durations = []
+    answered = 0
+    for question in questions:
+        t = time.perf_counter()
+        answered += bool(store.search(question))
+        durations.append(time.perf_counter() - t)
+    durations.sort()
+    return durations, answered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Knowledge store benchmark")
+    parser.add_argument("--sizes", default="10000,100000,300000", help="comma-separated snippet counts")
+    parser.add_argument("--queries", type=int, default=2000, help="questions timed per size")
+    parser.add_argument("--span-days", type=float, default=365, help="fetch times spread over this many days")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    words = vocabulary(20000, rng)
+    topics = []
+    seen = set()
+    while len(topics) < sizes[-1] // 3 + args.queries:
+        topic = " ".join(rng.sample(words, rng.randint(1, 3)))
+        if topic not in seen:
+            seen.add(topic)
+            topics.append(topic)
+    unseen = topics[sizes[-1] // 3:]
+
+    directory = tempfile.mkdtemp(prefix="jarvis_knowledge_")
+    path = os.path.join(directory, "knowledge.sqlite3")
+    clock = FakeClock(time.time())
+    # Answer from anything indexed within the benchmark's span, so the
+    # hit rate measures matching rather than age
+    store = KnowledgeStore(path, max_age=args.span_days * DAY, max_rows=sizes[-1] * 2, clock=clock)
+
+    print(f"Index at {path}; {args.queries} questions per size\n")
+    print(f"{'snippets':>9} {'add/s':>8} {'hit p50':>9} {'hit p99':>9} {'miss p50':>9} "
+          f"{'miss p99':>9} {'answered':>9} {'other':>6}")
+    indexed = 0
+    for size in sizes:
+        count = size // 3
+        elapsed = fill(store, clock, topics, words, rng, indexed, count, args.span_days)
+        added = (count - indexed) * 3
+        indexed = count
+
+        repeated = [rng.choice(PHRASINGS).format(topics[rng.randrange(indexed)]) for _ in range(args.queries)]
+        new = [rng.choice(PHRASINGS).format(topic) for topic in unseen[:args.queries]]
+        hit_times, answered = timed_searches(store, repeated)
+        miss_times, other = timed_searches(store, new)
+        us = lambda durations, q: percentile(durations, q) * 1e6
+        print(f"{store.count():>9} {added / elapsed:>8.0f} {us(hit_times, 0.5):>7.0f}us {us(hit_times, 0.99):>7.0f}us "
+              f"{us(miss_times, 0.5):>7.0f}us {us(miss_times, 0.99):>7.0f}us "
+              f"{answered / len(repeated):>9.1%} {other:>6}")
+
+    store.compact()
+    before = os.path.getsize(path)
+    cutoff_days = min(PURGE_AGE / DAY, args.span_days / 2)
+    started = time.perf_counter()
+    deleted = store.purge(older_than=cutoff_days * DAY)
+    purge_time = time.perf_counter() - started
+    started = time.perf_counter()
+    store.compact()
+    compact_time = time.perf_counter() - started
+    after = os.path.getsize(path)
+
+    print(f"\nPurge of results older than {cutoff_days:.0f} days: {deleted} deleted in {purge_time:.2f}s")
+    print(f"Compaction: {compact_time:.2f}s, file {before / 2**20:.1f} MB -> {after / 2**20:.1f} MB")
+
+    repeated = [rng.choice(PHRASINGS).format(topics[rng.randrange(indexed)]) for _ in range(args.queries)]
+    hit_times, answered = timed_searches(store, repeated)
+    print(f"After purge: {store.count()} snippets, p50 {percentile(hit_times, 0.5) * 1e6:.0f}us, "
+          f"p99 {percentile(hit_times, 0.99) * 1e6:.0f}us, {answered / len(repeated):.1%} answered "
+          f"(the rest were purged)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_pipeline.py - End-to-end turn latency: serial loop vs staged pipeline
+#
+# Usage: python -m benchmarks.bench_pipeline [--scale 0.1]
+#
+# A synthetic real-time audio source plays one tone burst per scripted
+# command, a scripted recognizer returns the transcripts, the APIs are
+# served by the local stub and speech output is simulated. Latency is
+# measured from the end of each utterance (as segmented by the capture
+# thread) to the first audio of the answer.
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+from benchmarks.fakes import ScriptedBackend, SimulatedSpeechView
+from benchmarks.stub_api_server import StubApiServer
+from controller import CommandController
+from jarvis import EXIT_PHRASES
+from model import SpeechModel
+from utils import api_manager, storage
+from utils.audio_capture import SyntheticSource
+from utils.knowledge_store import KnowledgeStore
+from utils.pipeline import AssistantPipeline
+from utils.response_cache import ResponseCache
+
+COMMANDS = [
+    "what time is it",
+    "what's the weather in paris",
+    "tell me the news",
+    "tell me about mars",
+    "what is today's date",
+    "goodbye",
+]
+
+
+def build(args):
+    """Build a model, view and controller wired to fakes."""
+    script = [('silence', 1.0)]
+    for _ in COMMANDS:
+        script += [('tone', args.utterance), ('silence', args.gap)]
+    source = SyntheticSource(script, realtime=True)
+
+    backend = ScriptedBackend(COMMANDS, latency=args.recognize_latency)
+    model = SpeechModel(source, backends=[backend], cache=ResponseCache(":memory:"),
+                        knowledge=KnowledgeStore(":memory:"))
+    view = SimulatedSpeechView(scale=args.scale)
+    controller = CommandController(model, view)
+    return model, view, controller
+
+
+def run_serial(model, view, controller):
+    """The original Jarvis.start loop: one stage after another on one thread."""
+    latencies = []
+    while True:
+        audio = model.listen(timeout=5)
+        if audio is None:
+            break
+        command = model.transcribe(audio)
+        if command and any(p in command.lower() for p in EXIT_PHRASES):
+            response = "Shutting down. Goodbye!"
+        else:
+            response = controller.process_command(command)
+
+        speak_started = time.perf_counter()
+        view.speak(response)
+        latencies.append(speak_started + view.last_timing['time_to_first_audio'] - audio.ended_at)
+        if response == "Shutting down. Goodbye!":
+            break
+    return latencies
+
+
+def run_pipeline(model, view, controller):
+    # Commands here are spoken while answers play; measure overlap, not
+    # interruption. The synthetic microphone never hears the simulated
+    # speaker, so there is no echo to gate.
+    pipeline = AssistantPipeline(model, view, controller, EXIT_PHRASES, barge_in=False, echo_gate=False)
+    pipeline.start()
+    pipeline.wait(timeout=120)
+    return [t.latency() for t in pipeline.turns if t.audio is not None and t.latency() is not None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline turn-latency benchmark")
+    parser.add_argument("--scale", type=float, default=0.1, help="speech output delay multiplier")
+    parser.add_argument("--utterance", type=float, default=1.0, help="seconds per spoken command")
+    parser.add_argument("--gap", type=float, default=1.0, help="seconds between commands")
+    parser.add_argument("--recognize-latency", type=float, default=0.4)
+    parser.add_argument("--api-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    storage.DATA_DIR = tempfile.mkdtemp(prefix="jarvis_bench_data_")
+
+    results = {}
+    with StubApiServer(delays={'default': args.api_latency}) as stub:
+        for name, url in stub.urls().items():
+            setattr(api_manager, name, url)
+
+        for mode, runner in (("serial", run_serial), ("pipeline", run_pipeline)):
+            model, view, controller = build(args)
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies = runner(model, view, controller)
+            elapsed = time.perf_counter() - started
+            model.close()
+            results[mode] = (latencies, elapsed)
+
+    print(f"{'mode':<9} {'turns':>5} {'mean s':>7} {'p50 s':>7} {'max s':>7} {'session s':>10}")
+    for mode, (latencies, elapsed) in results.items():
+        ordered = sorted(latencies)
+        print(f"{mode:<9} {len(ordered):>5} {sum(ordered) / len(ordered):>7.2f} "
+              f"{ordered[len(ordered) // 2]:>7.2f} {ordered[-1]:>7.2f} {elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
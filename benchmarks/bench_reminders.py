@@ -0,0 +1,130 @@
+# benchmarks/bench_reminders.py - Reminder scheduler with tens of thousands pending
+#
+# Usage: python -m benchmarks.bench_reminders [--pending 50000] [--timed 200]
+#
+# Fills a reminder store with --pending reminders spread over the next
+# month and measures insert and cancel cost, how long a restart takes to
+# load them all back, and what recovering missed reminders costs. Then
+# --timed reminders due within the next second run on the real timer
+# thread to measure how late each is delivered.
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+
+from utils.instrumentation import percentile
+from utils.reminders import ReminderScheduler
+
+MONTH = 30 * 24 * 60 * 60
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def timed(fn, items):
+    durations = []
+    for item in items:
+        t = time.perf_counter()
+        fn(item)
+        durations.append(time.perf_counter() - t)
+    durations.sort()
+    return durations
+
+
+def line(label, durations):
+    print(f"{label:<26} n={len(durations):<6} p50 {percentile(durations, 0.5) * 1e6:7.1f} us  "
+          f"p99 {percentile(durations, 0.99) * 1e6:7.1f} us")
+
+
+def at_scale(args, path):
+    rng = random.Random(args.seed)
+    clock = FakeClock(time.time())
+    delivered = []
+    scheduler = ReminderScheduler(path, clock=clock, deliver=delivered.append)
+
+    due_times = [clock.now + rng.random() * MONTH for _ in range(args.pending)]
+    ids = []
+    inserts = timed(lambda due: ids.append(scheduler.add(f"reminder {len(ids)}", due)), due_times)
+    line("add", inserts)
+
+    cancelled = rng.sample(ids, args.pending // 10)
+    line("cancel (lazy)", timed(scheduler.cancel, cancelled))
+    stats = scheduler.stats()
+    print(f"{'':<26} heap {stats['heap']} entries for {stats['pending']} pending")
+
+    t = time.perf_counter()
+    next_due = scheduler.next_due()
+    print(f"{'next due':<26} {(time.perf_counter() - t) * 1e6:.1f} us")
+    scheduler.close()
+
+    # A restart a week later: everything due in that week was missed
+    clock.now += 7 * 24 * 60 * 60
+    t = time.perf_counter()
+    scheduler = ReminderScheduler(path, clock=clock, deliver=delivered.append)
+    load = time.perf_counter() - t
+    t = time.perf_counter()
+    missed = scheduler.run_due()
+    recover = time.perf_counter() - t
+    print(f"{'restart: load pending':<26} {scheduler.stats()['pending'] + missed} reminders in {load * 1000:.1f} ms")
+    print(f"{'restart: deliver missed':<26} {missed} reminders in {recover * 1000:.1f} ms, one announcement")
+    assert next_due is not None
+    scheduler.close()
+
+
+def timer_accuracy(args, path):
+    rng = random.Random(args.seed)
+    scheduler = ReminderScheduler(path)
+    lateness = []
+    done = threading.Event()
+    expected = {}
+    spoken = [0]
+
+    def deliver(text):
+        now = time.time()
+        spoken[0] += 1
+        # Reminders due together arrive in one announcement
+        for number in re.findall(r"timed (\d+)", text):
+            lateness.append(now - expected.pop(int(number)))
+        if not expected:
+            done.set()
+
+    scheduler.start(deliver)
+    started = time.time()
+    for i in range(args.timed):
+        due = started + 0.05 + rng.random()
+        expected[i] = due
+        scheduler.add(f"timed {i}", due)
+    done.wait(timeout=10)
+    scheduler.stop()
+
+    lateness.sort()
+    print(f"\nTimer thread, {args.timed} reminders due within a second:")
+    print(f"  delivered {len(lateness)}, late by p50 {percentile(lateness, 0.5) * 1000:.2f} ms, "
+          f"p99 {percentile(lateness, 0.99) * 1000:.2f} ms, max {lateness[-1] * 1000:.2f} ms")
+    print(f"  {spoken[0]} announcements for {args.timed} reminders")
+    scheduler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reminder scheduler benchmark")
+    parser.add_argument("--pending", type=int, default=50000, help="reminders in the store")
+    parser.add_argument("--timed", type=int, default=200, help="reminders delivered by the real timer")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="jarvis_reminders_")
+    at_scale(args, os.path.join(directory, "reminders.sqlite3"))
+    timer_accuracy(args, os.path.join(directory, "timed.sqlite3"))
+
+
+if __name__ == "__main__":
+    main()
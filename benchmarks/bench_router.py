@@ -0,0 +1,87 @@
+# benchmarks/bench_router.py - Per-utterance dispatch cost: regex loop vs CommandRouter
+#
+# Usage: python -m benchmarks.bench_router [--sizes 13,100,300,800] [--rounds 200]
+
+import argparse
+import random
+import re
+import string
+import time
+
+from controller import CommandController
+from utils.router import CommandRouter
+
+# Utterances covering early, late and missing matches in the table
+UTTERANCES = [
+    "open youtube",
+    "what's the weather in london",
+    "what time is it",
+    "what is today's date",
+    "set a reminder to call mom",
+    "tell me about mars",
+    "how tall is mount everest",
+]
+
+
+def build_table(size):
+    """
+    Build a command table of the requested size.
+
+    The real controller patterns keep their priority and synthetic command
+    patterns built from random keywords are inserted ahead of them, so every
+    real command has to get past the extra entries - the worst case for a
+    sequential scan.
+    """
+    base = list(CommandController(None, None).commands.items())
+    rng = random.Random(size)
+    extra = []
+    for _ in range(max(0, size - len(base))):
+        verb = "".join(rng.choice(string.ascii_lowercase) for _ in range(6))
+        extra.append((rf'{verb}\s+(?:the\s+)?(\w+)(?:\s+with\s+(.+))?', None))
+    return extra + base
+
+
+def legacy_dispatch(table, text):
+    """The original CommandController loop: re.search per pattern, in order."""
+    for pattern, handler in table:
+        match = re.search(pattern, text)
+        if match:
+            return handler, match.groups()
+    return None
+
+
+def time_dispatch(dispatch, rounds):
+    """Return mean microseconds per utterance."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in UTTERANCES:
+            dispatch(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(UTTERANCES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="13,100,300,800")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'patterns':>9} {'loop us':>10} {'router us':>10} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        table = build_table(size)
+        router = CommandRouter(table)
+        router.compile()
+
+        # Both paths must agree before their speed is worth comparing
+        for text in UTTERANCES:
+            expected = legacy_dispatch(table, text)
+            actual = router.dispatch(text)
+            assert (expected and expected[1]) == (actual and tuple(actual[1])), text
+
+        loop_us = time_dispatch(lambda text: legacy_dispatch(table, text), args.rounds)
+        router_us = time_dispatch(router.dispatch, args.rounds)
+        print(f"{len(table):>9} {loop_us:>10.2f} {router_us:>10.2f} {loop_us / router_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# benchmarks/bench_server.py - Load test for the Jarvis server at increasing concurrency
+#
+# Usage: python -m benchmarks.bench_server [--levels 1,2,4,8,16,32] [--seconds 5]
+#                                          [--audio-share 0.2] [--url http://host:port]
+#
+# Without --url a server is started in a child process with the scripted
+# recognizer, simulated speech synthesis and the stub news/weather/search
+# API, so only the server itself is measured. Each level runs that many
+# clients, each on its own keep-alive connection, sending commands back to
+# back for --seconds; a share of them ask for the answer as streamed audio,
+# and --unique-share of them ask about something new, missing every cache.
+# Reported per level: requests per second, latency percentiles, and how
+# many requests were rejected (503) or missed their deadline (504).
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from utils.instrumentation import percentile
+
+COMMANDS = [
+    "what time is it",
+    "what is today's date",
+    "what's the weather in london",
+    "what's the weather in paris",
+    "tell me the news",
+    "tell me about the moon landing",
+    "tell me about volcanoes",
+    "open youtube",
+    "help",
+]
+
+
+def serve(args):
+    """Child process: run the server with simulated engines until killed."""
+    import asyncio
+    import webbrowser
+
+    from benchmarks.fakes import NullSink, ScriptedBackend, SimulatedSpeechView
+    from benchmarks.stub_api_server import StubApiServer
+    from controller import CommandController
+    from model import SpeechModel
+    from server import JarvisServer
+    from utils import api_manager
+    from utils.knowledge_store import KnowledgeStore
+    from utils.response_cache import ResponseCache
+
+    webbrowser.open = lambda url, *a, **k: True
+    stub = StubApiServer(delays={'default': args.api_latency}).start()
+    for attribute, url in stub.urls().items():
+        setattr(api_manager, attribute, url)
+
+    model = SpeechModel(backends=[ScriptedBackend(COMMANDS)], cache=ResponseCache(":memory:"),
+                        knowledge=KnowledgeStore(":memory:"), listen=False)
+    view = SimulatedSpeechView(rtt=args.tts_latency, player=NullSink())
+    server = JarvisServer(CommandController(model, view), view, port=0,
+                          max_concurrency=args.max_concurrency, deadline=args.deadline)
+    asyncio.run(server.serve_forever())
+
+
+def start_server(args):
+    """Start the child server and return (process, url)."""
+    command = [sys.executable, "-m", "benchmarks.bench_server", "--serve",
+               "--max-concurrency", str(args.max_concurrency), "--deadline", str(args.deadline),
+               "--tts-latency", str(args.tts_latency), "--api-latency", str(args.api_latency)]
+    env = dict(os.environ, JARVIS_TRACE_FILE="")
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env)
+    for line in process.stdout:
+        if "listening on" in line:
+            return process, line.split("listening on", 1)[1].strip()
+    raise RuntimeError("server exited before it was listening")
+
+
+class Client(threading.Thread):
+    """Sends commands back to back on one keep-alive connection until stopped."""
+
+    def __init__(self, url, stop, audio_share, unique_share, seed):
+        super().__init__(daemon=True)
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port
+        self.stop = stop
+        self.audio_share = audio_share
+        self.unique_share = unique_share
+        self.random = random.Random(seed)
+        self.latencies = []
+        self.statuses = {}
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        while not self.stop.is_set():
+            audio = self.random.random() < self.audio_share
+            if self.random.random() < self.unique_share:
+                # Misses every cache: a fresh search and fresh synthesis
+                text = f"tell me about topic {self.random.getrandbits(48)}"
+            else:
+                text = self.random.choice(COMMANDS)
+            body = json.dumps({'text': text})
+            started = time.perf_counter()
+            try:
+                connection.request("POST", "/command?reply=audio" if audio else "/command", body,
+                                   {'Content-Type': "application/json"})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                status = 'error'
+            elapsed = time.perf_counter() - started
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if status == 200:
+                self.latencies.append(elapsed)
+        connection.close()
+
+
+def run_level(url, clients, seconds, audio_share, unique_share):
+    """Run one concurrency level; returns its summary."""
+    stop = threading.Event()
+    workers = [Client(url, stop, audio_share, unique_share, seed=i) for i in range(clients)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(l for w in workers for l in w.latencies)
+    statuses = {}
+    for worker in workers:
+        for status, count in worker.statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {
+        'clients': clients,
+        'ok': len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'rejected': statuses.get(503, 0),
+        'timed_out': statuses.get(504, 0),
+        'failed': sum(c for s, c in statuses.items() if s not in (200, 503, 504)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jarvis server load test")
+    parser.add_argument("--url", help="server to test; default starts one with simulated engines")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="comma-separated client counts")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each level")
+    parser.add_argument("--audio-share", type=float, default=0.2, help="fraction of requests asking for audio")
+    parser.add_argument("--unique-share", type=float, default=0.0,
+                        help="fraction of requests that miss every cache")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--deadline", type=float, default=2.0)
+    parser.add_argument("--tts-latency", type=float, default=0.25)
+    parser.add_argument("--api-latency", type=float, default=0.2)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args)
+    try:
+        print(f"Server {url}, {args.seconds:g}s per level, {args.audio_share:.0%} audio replies, "
+              f"{args.unique_share:.0%} uncached")
+        print(f"{'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'503':>5} {'504':>5} {'failed':>6}")
+        for clients in (int(level) for level in args.levels.split(",")):
+            r = run_level(url, clients, args.seconds, args.audio_share, args.unique_share)
+            ms = lambda seconds: (seconds or 0) * 1000
+            print(f"{r['clients']:>7} {r['throughput']:>8.1f} {ms(r['p50']):>8.1f} {ms(r['p95']):>8.1f} "
+                  f"{ms(r['p99']):>8.1f} {r['rejected']:>5} {r['timed_out']:>5} {r['failed']:>6}")
+
+        host, port = urlsplit(url).hostname, urlsplit(url).port
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        connection.request("GET", "/health")
+        health = json.loads(connection.getresponse().read())
+        print(f"\nServer counts: {health['counts']}")
+        print(f"Speech cache: {health['speech_cache']['hits']} hits, {health['speech_cache']['misses']} misses; "
+              f"response cache: {health['response_cache']['hits']} hits, {health['response_cache']['misses']} misses")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_startup.py - Time from process launch to "ready", eager vs fast start
+#
+# Usage: python -m benchmarks.bench_startup [--runs 5] [--real-view]
+#
+# Each run launches a fresh interpreter that builds Jarvis on a real-time
+# WAV fixture and exits the moment Jarvis is ready to greet. The parent
+# times launch to the READY line. Every mode gets its own data directory,
+# so its first run starts without a saved calibration (cold) and the later
+# runs reuse it (warm). --real-view uses SpeechView instead of the
+# simulated one, for machines with gTTS, pyttsx3 and playsound installed.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = [("eager", "0"), ("fast", "1")]
+
+
+def probe(wav, real_view):
+    """Child process: build Jarvis, report when it is ready, and exit."""
+    from utils import startup
+    from jarvis import Jarvis
+    from model import SpeechModel
+    from utils.audio_capture import WavFileSource
+    from utils.knowledge_store import KnowledgeStore
+    from utils.response_cache import ResponseCache
+
+    if real_view:
+        from view import SpeechView
+        view = SpeechView()
+    else:
+        from benchmarks.fakes import NullSink, SimulatedSpeechView
+        view = SimulatedSpeechView(player=NullSink())
+    model = SpeechModel(WavFileSource(wav, realtime=True), cache=ResponseCache(":memory:"),
+                        knowledge=KnowledgeStore(":memory:"))
+
+    def ready():
+        report = {
+            'in_process': time.perf_counter() - startup.LAUNCHED_AT,
+            'threshold': round(model.capture.energy_threshold, 1),
+            'loaded': sorted(name for name in ('speech_recognition', 'gtts', 'pyttsx3', 'requests', 'psutil')
+                             if name in sys.modules),
+        }
+        print("READY " + json.dumps(report), flush=True)
+        os._exit(0)
+
+    Jarvis(model=model, view=view, on_ready=ready).start()
+
+
+def launch(mode_flag, data_dir, wav, real_view):
+    """Run one probe and return (seconds to READY, probe report)."""
+    env = dict(os.environ, JARVIS_FAST_START=mode_flag, JARVIS_DATA_DIR=data_dir, JARVIS_TRACE_FILE="")
+    command = [sys.executable, "-m", "benchmarks.bench_startup", "--probe", wav]
+    if real_view:
+        command.append("--real-view")
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env)
+    for line in process.stdout:
+        if line.startswith("READY "):
+            elapsed = time.perf_counter() - started
+            process.wait(timeout=10)
+            return elapsed, json.loads(line[len("READY "):])
+    process.wait(timeout=10)
+    raise RuntimeError(f"probe exited with status {process.returncode} before it was ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="launches per mode; the first is cold")
+    parser.add_argument("--real-view", action="store_true", help="use the real SpeechView")
+    parser.add_argument("--probe", metavar="WAV", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe(args.probe, args.real_view)
+        return
+
+    from benchmarks.fixtures import session_wav
+    wav = session_wav([{'say': "what time is it", 'seconds': 1.0, 'pause': 1.0}])
+
+    print(f"{'mode':<6} {'run':>4} {'launch->ready s':>16} {'in-process s':>13} {'threshold':>10}  loaded at ready")
+    results = {}
+    for mode, flag in MODES:
+        data_dir = tempfile.mkdtemp(prefix=f"jarvis_startup_{mode}_")
+        times = []
+        for run in range(1, args.runs + 1):
+            elapsed, report = launch(flag, data_dir, wav, args.real_view)
+            times.append(elapsed)
+            label = "cold" if run == 1 else str(run)
+            print(f"{mode:<6} {label:>4} {elapsed:>16.3f} {report['in_process']:>13.3f} "
+                  f"{report['threshold']:>10}  {', '.join(report['loaded']) or '-'}")
+        results[mode] = times
+
+    print()
+    for mode, times in results.items():
+        warm = sorted(times[1:]) or times
+        print(f"{mode:<6} cold {times[0]:.3f} s, warm median {warm[len(warm) // 2]:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
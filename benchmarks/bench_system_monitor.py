@@ -0,0 +1,109 @@
+# benchmarks/bench_system_monitor.py - System questions answered from the sampler vs measured on demand
+#
+# Usage: python -m benchmarks.bench_system_monitor [--calls 200] [--run-seconds 3]
+#
+# Compares how long "system info" keeps the voice loop busy before and after
+# the background sampler, times the trend and top-process questions on a
+# full history, and measures what the sampler itself costs: CPU per sample
+# from the thread's own clock, its share of a core while running, and the
+# memory the ring buffer holds once full.
+
+import argparse
+import platform
+import time
+import tracemalloc
+
+import psutil
+
+from utils.commands import get_system_info, get_system_trend, get_top_process
+from utils.instrumentation import percentile
+from utils.system_monitor import SAMPLE_INTERVAL, SystemSampler
+
+
+def system_info_before():
+    """get_system_info as it was: measure CPU usage for a full second."""
+    memory = psutil.virtual_memory()
+    cpu_percent = psutil.cpu_percent(interval=1)
+    disk = psutil.disk_usage('/')
+    return (f"You're running {platform.system()} with a {platform.processor()} processor. "
+            f"You have {round(memory.total / (1024**3), 2)} GB of RAM with {memory.percent}% in use. "
+            f"Your CPU is at {cpu_percent}% capacity. "
+            f"Your main disk has {round(disk.total / (1024**3), 2)} GB total with {disk.percent}% used.")
+
+
+def time_calls(func, calls):
+    """Call func repeatedly and return sorted durations in seconds."""
+    durations = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return sorted(durations)
+
+
+def report(label, durations):
+    print(f"{label:<32} n={len(durations):<5} p50 {percentile(durations, 0.5) * 1000:>9.3f} ms  "
+          f"p99 {percentile(durations, 0.99) * 1000:>9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="System metrics sampler benchmark")
+    parser.add_argument("--calls", type=int, default=200, help="calls per timed question")
+    parser.add_argument("--run-seconds", type=float, default=3.0, help="how long to run the sampler thread")
+    parser.add_argument("--interval", type=float, default=0.05, help="sampling interval for the run")
+    args = parser.parse_args()
+
+    print("Answer latency")
+    report("system info (before)", time_calls(system_info_before, 2))
+
+    # A full history, sampled as fast as possible so it fills quickly
+    sampler = SystemSampler(interval=SAMPLE_INTERVAL)
+    tracemalloc.start()
+    for _ in range(sampler.capacity):
+        sampler.sample()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Time sampling again without tracemalloc slowing it down
+    sampler.sample_count, sampler.sample_cpu_seconds = 0, 0.0
+    for _ in range(20):
+        sampler.sample()
+    # Spread the samples over the history window, as the thread would have
+    now = time.time()
+    for i, sample in enumerate(sampler.samples):
+        sample['time'] = now - (sampler.capacity - 1 - i) * sampler.interval
+
+    report("system info (sampler)", time_calls(lambda: get_system_info(sampler), args.calls))
+    report("cpu over last five minutes", time_calls(lambda: get_system_trend('cpu', 'five minutes', sampler), args.calls))
+    report("process using most memory", time_calls(lambda: get_top_process('memory', sampler), args.calls))
+    print()
+    print(f"  {get_system_trend('cpu', 'five minutes', sampler)}")
+    print(f"  {get_top_process('memory', sampler)}")
+    print(f"  {get_top_process('cpu', sampler)}")
+
+    overhead = sampler.overhead()
+    print("\nSampler cost")
+    print(f"  history: {len(sampler.samples)} samples of {overhead['capacity']} "
+          f"({sampler.capacity * sampler.interval / 60:.0f} min at {sampler.interval:g}s), "
+          f"~{overhead['buffer_bytes'] / 1024:.0f} KB by getsizeof, "
+          f"{peak / 1024:.0f} KB peak allocated while filling")
+    print(f"  CPU per sample: {overhead['cpu_per_sample'] * 1000:.2f} ms "
+          f"({len(psutil.pids())} processes), "
+          f"{overhead['cpu_per_sample'] / SAMPLE_INTERVAL:.3%} of a core at the {SAMPLE_INTERVAL:g}s default")
+
+    # The thread at an aggressive interval: the budget should stretch it
+    running = SystemSampler(interval=args.interval)
+    process = psutil.Process()
+    cpu_before = sum(process.cpu_times()[:2])
+    running.start()
+    time.sleep(args.run_seconds)
+    running.stop()
+    process_cpu = sum(process.cpu_times()[:2]) - cpu_before
+    overhead = running.overhead()
+    print(f"  thread at {args.interval:g}s for {args.run_seconds:g}s: {overhead['samples']} samples, "
+          f"interval stretched to {overhead['interval']:.3f}s, "
+          f"{overhead['cpu_fraction']:.2%} of a core (budget {running.cpu_budget:.0%}), "
+          f"process CPU {process_cpu / args.run_seconds:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_tts_pipeline.py - Time-to-first-audio for one-shot vs chunked speech
+#
+# Usage: python -m benchmarks.bench_tts_pipeline [--scale 0.1]
+#
+# Synthesis and playback are simulated with sleeps so the run is repeatable
+# without network or speakers. The defaults model a gTTS round-trip of
+# 250 ms plus 2 ms per character, and playback at 15 characters per second.
+
+import argparse
+import contextlib
+import io
+
+from benchmarks.fakes import SimulatedSpeechView
+from controller import CommandController
+from utils.api_manager import format_search_results
+
+
+class FakeModel:
+    """Model stand-in that returns canned news."""
+
+    def get_news(self, category=None):
+        return {'articles': [
+            {'title': 'Central bank holds interest rates steady as inflation cools'},
+            {'title': 'New telescope images reveal water vapour on a distant exoplanet'},
+            {'title': 'City council approves expansion of the downtown cycling network'},
+        ]}
+
+
+def long_responses():
+    """The existing long answers: help, news headlines and web search results."""
+    controller = CommandController(FakeModel(), None)
+    search = format_search_results("mars", [
+        {'title': 'Mars - Wikipedia',
+         'snippet': 'Mars is the fourth planet from the Sun. The surface of Mars is orange-red '
+                    'because it is covered in iron oxide dust, giving it the nickname the Red Planet.'},
+        {'title': 'Mars Facts - NASA Science',
+         'snippet': 'Mars is one of the most explored bodies in our solar system, and it is the only '
+                    'planet where we have sent rovers to roam the alien landscape.'},
+        {'title': 'Mars | Facts, Surface, Moons and Temperature | Britannica',
+         'snippet': 'Mars, fourth planet in the solar system in order of distance from the Sun and '
+                    'seventh in size and mass. It is a periodically conspicuous reddish object.'},
+    ])
+    return {
+        'get_help': controller.get_help(),
+        'tell_news': controller.tell_news(),
+        'search_web': search,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=float, default=0.1, help="multiply all simulated delays")
+    parser.add_argument("--rtt", type=float, default=0.25)
+    parser.add_argument("--per-char", type=float, default=0.002)
+    parser.add_argument("--chars-per-second", type=float, default=15.0)
+    args = parser.parse_args()
+
+    print(f"{'response':<12} {'mode':<9} {'chunks':>6} {'first audio s':>14} {'total s':>9}")
+    for name, text in long_responses().items():
+        for chunked in (False, True):
+            view = SimulatedSpeechView(args.scale, args.rtt, args.per_char, args.chars_per_second)
+            view.chunk_speech = chunked
+            with contextlib.redirect_stdout(io.StringIO()):
+                view.speak(text)
+            timing = view.last_timing
+            # Report in unscaled seconds
+            print(f"{name:<12} {'chunked' if chunked else 'one-shot':<9} {timing['chunks']:>6} "
+                  f"{timing['time_to_first_audio'] / args.scale:>14.2f} "
+                  f"{timing['total'] / args.scale:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_wake_word.py - Cloud calls, misses and CPU with the on-device wake word gate
+#
+# Usage: python -m benchmarks.bench_wake_word [--minutes 10] [--sensitivities 0.2,0.35,0.5,0.8]
+#                                             [--window 8]
+#
+# A fixture session of made-up speech (see fixtures.wake_session) holds
+# background talk with "Jarvis <command>" phrases mixed in, some of them
+# with a pause after the wake word. Three takes of the wake word are
+# enrolled as templates. The session is segmented once by AudioCapture,
+# then the phrases are replayed through the gate at each sensitivity on
+# the session's own clock, so the command window behaves as it would live.
+#
+# Reported per sensitivity: phrases sent to the cloud recognizer per hour
+# (without the gate every phrase is), commands missed (false rejects),
+# background phrases let through (false accepts; those the detector took
+# for the wake word, the rest came in an open command window), detector
+# latency and detector CPU per hour of audio.
+
+import argparse
+import os
+import tempfile
+import wave
+
+from benchmarks.fixtures import wake_session, wake_templates
+from utils.audio_capture import AudioCapture, WavFileSource
+from utils.instrumentation import percentile
+from utils.wake_word import TemplateDetector, WakeWordGate
+
+COMMANDS = ('wake+command', 'command')
+
+
+def segment(path):
+    """
+    Segment a WAV as the live capture would.
+
+    Returns:
+        (phrases, capture) where phrases is a list of
+        (audio, start, end) with start and end in seconds into the file
+    """
+    source = WavFileSource(path)
+    with wave.open(path, "rb") as w:
+        seconds = w.getnframes() / w.getframerate()
+    capture = AudioCapture(source, dynamic_energy_threshold=True, phrase_time_limit=5,
+                           buffer_seconds=seconds + 10, max_pending=100000)
+    # Chunk timestamps to positions in the file
+    positions = {}
+    capture.add_listener(lambda energy, stamp: positions.setdefault(stamp, len(positions) * capture.seconds_per_chunk))
+    capture.calibrate(duration=0.5)
+    capture.start()
+    phrases = []
+    while True:
+        audio = capture.listen(timeout=30)
+        if audio is None:
+            break
+        end = positions.get(audio.ended_at, positions and max(positions.values()))
+        start = positions.get(audio.started_at, end) - capture.pre_roll
+        phrases.append((audio, start, end + capture.seconds_per_chunk))
+    capture.stop()
+    return phrases, capture
+
+
+def label(start, end, truth):
+    """Kind of the labelled phrase that overlaps start-end most, or 'noise'."""
+    best, kind = 0.0, 'noise'
+    for phrase in truth:
+        overlap = min(end, phrase['end']) - max(start, phrase['start'])
+        if overlap > best:
+            best, kind = overlap, phrase['kind']
+    return kind
+
+
+def replay(detector, phrases, truth, energy_threshold, pre_roll, window):
+    now = [0.0]
+    gate = WakeWordGate(detector, window=window, clock=lambda: now[0])
+    passed = {}
+    detected_others = 0
+    for audio, start, end in phrases:
+        # The segmenter hands a phrase over once the closing pause is heard
+        now[0] = end
+        kind = label(start, end, truth)
+        detections = gate.detections
+        sent = gate.accept(audio, energy_threshold, pre_roll) is not None
+        passed.setdefault(kind, [0, 0])
+        passed[kind][0] += sent
+        passed[kind][1] += 1
+        if kind == 'other' and gate.detections > detections:
+            detected_others += 1
+    return gate, passed, detected_others
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wake word gate benchmark")
+    parser.add_argument("--minutes", type=float, default=10.0, help="length of the fixture session")
+    parser.add_argument("--sensitivities", default="0.2,0.35,0.5,0.8")
+    parser.add_argument("--window", type=float, default=8.0, help="command window seconds")
+    args = parser.parse_args()
+
+    path, truth = wake_session(minutes=args.minutes)
+    hours = os.path.getsize(path) / (16000 * 2) / 3600
+    print(f"Session: {hours * 60:.1f} min, {len(truth)} phrases "
+          f"({sum(p['kind'] in ('wake+command', 'wake') for p in truth)} with the wake word)")
+    phrases, capture = segment(path)
+    kinds = [label(start, end, truth) for _, start, end in phrases]
+    commands = sum(kind in COMMANDS for kind in kinds)
+    print(f"Segmented into {len(phrases)} phrases, {commands} of them commands\n")
+
+    template_dir = tempfile.mkdtemp(prefix="jarvis-wake-")
+    wake_templates(template_dir)
+
+    print(f"{'':<12} {'cloud calls/h':>13} {'missed':>7} {'false accepts':>14} {'detected':>9} {'FA/h':>6} "
+          f"{'detect p50':>11} {'p95':>7} {'CPU s/h':>8}")
+    print(f"{'no gate':<12} {len(phrases) / hours:>13.0f} {0:>7} {kinds.count('other'):>14} {'':>9} "
+          f"{kinds.count('other') / hours:>6.0f}")
+    for sensitivity in (float(value) for value in args.sensitivities.split(",")):
+        detector = TemplateDetector.from_directory(template_dir, sensitivity=sensitivity)
+        gate, passed, detected = replay(detector, phrases, truth, capture.energy_threshold,
+                               capture.pre_roll, args.window)
+        missed = sum(total - sent for kind, (sent, total) in passed.items() if kind in COMMANDS)
+        false_accepts = passed.get('other', [0, 0])[0]
+        ordered = sorted(gate.detect_seconds)
+        print(f"{'sens ' + str(sensitivity):<12} {gate.passed / hours:>13.0f} "
+              f"{missed:>3}/{commands:<3} {false_accepts:>14} {detected:>9} {false_accepts / hours:>6.1f} "
+              f"{percentile(ordered, 0.5) * 1000:>8.1f} ms {percentile(ordered, 0.95) * 1000:>4.1f} ms "
+              f"{gate.cpu_seconds / hours:>8.1f}")
+
+    print(f"\nCommand window {args.window:.0f}s. Detection runs once a phrase ends, so the decision comes "
+          f"{capture.pause_threshold:.1f}s (the closing pause) plus the detect time after the last word.")
+
+
+if __name__ == "__main__":
+    main()
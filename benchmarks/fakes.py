@@ -0,0 +1,146 @@
+# benchmarks/fakes.py - Stand-ins for the recognizer and speech output used by benchmarks
+
+import collections
+import itertools
+import tempfile
+import threading
+import time
+
+from utils.health import HealthRegistry
+from utils.recognizers import RecognizerBackend
+from utils.tts_cache import SpeechCache
+from view import SpeechView
+
+
+class ScriptedBackend(RecognizerBackend):
+    """Recognizer that returns a fixed list of transcripts, one per utterance."""
+
+    name = "scripted"
+    local = True
+
+    def __init__(self, transcripts, latency=0.0, confidence=0.95):
+        """
+        Initialize the backend.
+
+        Args:
+            transcripts: Texts returned in order; None means 'not understood'
+            latency: Seconds each transcription takes
+            confidence: Confidence reported with every transcript
+        """
+        super().__init__(None)
+        self.transcripts = collections.deque(transcripts)
+        self.latency = latency
+        self.confidence = confidence
+
+    def transcribe(self, audio):
+        time.sleep(self.latency)
+        if not self.transcripts:
+            return "", 0.0
+        return self.transcripts.popleft(), self.confidence
+
+
+class FakeOutputDevice:
+    """
+    Audio output that "plays" text files by waiting, in device-sized blocks.
+
+    Like a real device it can only stop at a block boundary, and it records
+    when each cut-off actually took effect.
+    """
+
+    def __init__(self, chars_per_second=15.0, scale=1.0, block=0.02):
+        """
+        Initialize the device.
+
+        Args:
+            chars_per_second: Playback speed
+            scale: Multiplier applied to playback duration
+            block: Seconds of audio handed to the device at a time
+        """
+        self.chars_per_second = chars_per_second
+        self.scale = scale
+        self.block = block
+        self.played = []
+        self.cutoffs = []
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def play_text(self, text, cancel):
+        """Play text; returns True if it played to the end."""
+        self.played.append(text)
+        remaining = len(text) / self.chars_per_second * self.scale
+        while remaining > 0:
+            if cancel.is_set():
+                self.cutoffs.append(time.perf_counter())
+                return False
+            time.sleep(min(self.block, remaining))
+            remaining -= self.block
+        return True
+
+    def play(self, path, cancel):
+        with open(path, encoding="utf-8") as f:
+            return self.play_text(f.read(), cancel)
+
+
+class NullSink(FakeOutputDevice):
+    """Output that records what it was asked to play and returns at once."""
+
+    def play_text(self, text, cancel):
+        self.played.append(text)
+        return not cancel.is_set()
+
+
+class SimulatedSpeechView(SpeechView):
+    """SpeechView with simulated gTTS latency and playback duration."""
+
+    def __init__(self, scale=1.0, rtt=0.25, per_char=0.002, chars_per_second=15.0, player=None):
+        """
+        Initialize the simulated view.
+
+        Args:
+            scale: Multiplier applied to every simulated delay
+            rtt: Seconds per synthesis request
+            per_char: Extra synthesis seconds per character
+            chars_per_second: Playback speed
+            player: Output device; defaults to a FakeOutputDevice at that speed
+        """
+        self.use_google_tts = True
+        self.tts_lang = 'en'
+        self.tts_slow = False
+        self.chunk_speech = True
+        self.chunk_lookahead = 2
+        self.last_timing = {}
+        self.temp_dir = tempfile.mkdtemp(prefix="jarvis_bench_")
+        self._file_ids = itertools.count(1)
+        # A fresh, empty cache so every run pays for synthesis
+        self.speech_cache = SpeechCache(tempfile.mkdtemp(prefix="jarvis_bench_cache_"))
+
+        self.scale = scale
+        self.rtt = rtt
+        self.per_char = per_char
+        self.chars_per_second = chars_per_second
+        self._cancel = threading.Event()
+        self.player = player or FakeOutputDevice(chars_per_second, scale)
+        # Its own breakers, so one run's failures do not carry into the next
+        self.health = HealthRegistry()
+
+    @property
+    def spoken(self):
+        return self.player.played
+
+    def prewarm(self, phrases=None, wait=False):
+        pass
+
+    def speak_action(self, text):
+        pass
+
+    def _synthesize(self, text, path):
+        time.sleep((self.rtt + self.per_char * len(text)) * self.scale)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def _speak_backup(self, text):
+        return self.player.play_text(text, self._cancel)
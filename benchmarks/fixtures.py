@@ -0,0 +1,275 @@
+# benchmarks/fixtures.py - WAV fixtures for scripted voice sessions
+#
+# A session is a list of turns, each with the text the recognizer stand-in
+# returns and how long the user talks. The matching WAV file has one tone
+# burst per turn, which the capture segmenter picks up as one utterance.
+#
+# For the wake word there are speech-like words instead: syllables with a
+# pitch contour and a few harmonics, and hiss for the fricatives. A
+# "speaker" is a pitch and tempo applied to them, so a word said by the
+# enrolled speaker varies a little from take to take, like real speech.
+
+import array
+import hashlib
+import json
+import math
+import os
+import random
+import tempfile
+import wave
+
+from utils.audio_capture import SyntheticSource
+
+FIXTURE_DIR = os.path.join(tempfile.gettempdir(), "jarvis_fixtures")
+
+
+def session_script(turns, lead_in=1.0, tail=2.0):
+    """
+    Build a SyntheticSource script for a session.
+
+    Args:
+        turns: List of dicts with 'say', 'seconds' (speech length) and
+               'pause' (silence after it, while Jarvis answers)
+        lead_in: Seconds of silence before the first turn
+        tail: Seconds of silence after the last turn
+
+    Returns:
+        List of (kind, seconds)
+    """
+    script = [('silence', lead_in)]
+    for turn in turns:
+        script.append(('tone', turn.get('seconds', 1.0)))
+        script.append(('silence', turn.get('pause', 2.0)))
+    script.append(('silence', tail))
+    return script
+
+
+def write_wav(path, script, sample_rate=16000):
+    """Render a SyntheticSource script into a mono 16-bit WAV file."""
+    source = SyntheticSource(script, sample_rate=sample_rate)
+    source.open()
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(source.sample_width)
+        wav.setframerate(sample_rate)
+        while True:
+            chunk = source.read()
+            if not chunk:
+                break
+            wav.writeframes(chunk)
+    source.close()
+    return path
+
+
+def session_wav(turns, directory=FIXTURE_DIR, sample_rate=16000):
+    """
+    Get the WAV fixture for a session, generating it on first use.
+
+    Files are named by a hash of the script, so a changed session never
+    reuses a stale fixture.
+
+    Returns:
+        Path to the WAV file
+    """
+    script = session_script(turns)
+    digest = hashlib.sha256(json.dumps([script, sample_rate]).encode("utf-8")).hexdigest()[:16]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"session_{digest}.wav")
+    if not os.path.exists(path):
+        partial = f"{path}.{os.getpid()}.tmp"
+        write_wav(partial, script, sample_rate)
+        os.replace(partial, path)
+    return path
+
+
+# Syllables as (seconds, start pitch Hz, end pitch Hz, hiss share); pitch 0 is pure hiss
+WAKE_SYLLABLES = [(0.22, 170, 135, 0.15), (0.07, 125, 125, 0.0), (0.14, 155, 195, 0.05), (0.14, 0, 0, 1.0)]
+
+
+def random_word(rng, syllables=None):
+    """A made-up word: 1-4 syllables with random pitch contours, some with hiss."""
+    word = []
+    for _ in range(syllables or rng.randint(1, 4)):
+        if rng.random() < 0.2:
+            word.append((rng.uniform(0.06, 0.16), 0, 0, 1.0))
+        else:
+            start = rng.uniform(100, 240)
+            word.append((rng.uniform(0.08, 0.26), start, start * rng.uniform(0.7, 1.35), rng.uniform(0, 0.3)))
+    return word
+
+
+def near_miss(rng):
+    """A word that starts like the wake word and ends differently ("jar...")."""
+    return WAKE_SYLLABLES[:2] + random_word(rng, rng.randint(1, 2))
+
+
+def say(word, rng, pitch=1.0, tempo=1.0, amplitude=6000, jitter=0.06, sample_rate=16000):
+    """
+    Render a word as 16-bit samples.
+
+    Args:
+        word: List of syllables (see WAKE_SYLLABLES)
+        rng: random.Random, for hiss and take-to-take variation
+        pitch, tempo: The speaker
+        amplitude: Peak level of voiced sound
+        jitter: Random variation of each syllable's pitch and length
+
+    Returns:
+        array.array('h')
+    """
+    samples = array.array('h')
+    phase = 0.0
+    for seconds, start, end, hiss in word:
+        n = int(seconds / tempo * rng.uniform(1 - jitter, 1 + jitter) * sample_rate)
+        wobble = rng.uniform(1 - jitter, 1 + jitter) * pitch
+        previous = 0.0
+        for i in range(n):
+            envelope = math.sin(math.pi * i / n) ** 0.5
+            value = 0.0
+            if start:
+                f0 = (start + (end - start) * i / n) * wobble
+                phase += 2 * math.pi * f0 / sample_rate
+                value = (math.sin(phase) + 0.6 * math.sin(2 * phase) + 0.4 * math.sin(3 * phase)
+                         + 0.25 * math.sin(5 * phase)) / 2.25 * (1 - hiss)
+            if hiss:
+                noise = rng.uniform(-1, 1)
+                # Differenced noise is brighter, like a fricative
+                value += (noise - previous) * 0.5 * hiss
+                previous = noise
+            samples.append(int(amplitude * envelope * value))
+    return samples
+
+
+def _write_samples(path, samples, sample_rate, channels=1):
+    if channels == 2:
+        stereo = array.array('h', bytes(len(samples) * 4))
+        stereo[0::2] = samples
+        stereo[1::2] = samples
+        samples = stereo
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return path
+
+
+def wake_templates(directory, count=3, seed=7, sample_rate=16000):
+    """Write count takes of the wake word by the enrolled speaker into directory."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        take = array.array('h', bytes(int(0.1 * sample_rate) * 2))
+        take.extend(say(WAKE_SYLLABLES, rng))
+        take.extend(array.array('h', bytes(int(0.1 * sample_rate) * 2)))
+        paths.append(_write_samples(os.path.join(directory, f"wake_{i + 1}.wav"), take, sample_rate))
+    return paths
+
+
+def wake_session(minutes=5.0, command_share=0.2, seed=11, noise=60, directory=FIXTURE_DIR, sample_rate=16000):
+    """
+    Get a WAV of background talk with wake word commands mixed in.
+
+    About command_share of the phrases are "Jarvis <command>" by the
+    enrolled speaker, some with a pause after the wake word (so the command
+    is a phrase of its own, inside the command window). The rest are made-up
+    words by other speakers and by the enrolled one, standing in for
+    television and conversation; some start with a near miss of the wake word.
+
+    Returns:
+        (path, phrases) where phrases is a list of dicts with 'start' and
+        'end' seconds and 'kind': 'wake+command', 'wake', 'command' (the
+        phrase after a lone wake word) or 'other'
+    """
+    key = json.dumps([minutes, command_share, seed, noise, sample_rate, WAKE_SYLLABLES])
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"wake_{digest}.wav")
+    labels_path = path + ".json"
+    if os.path.exists(path) and os.path.exists(labels_path):
+        with open(labels_path, encoding="utf-8") as f:
+            return path, json.load(f)
+
+    rng = random.Random(seed)
+    samples = array.array('h')
+    phrases = []
+    n = 0
+
+    def pause(seconds):
+        nonlocal n
+        for _ in range(int(seconds * sample_rate)):
+            samples.append(((n * 7919) % (2 * noise + 1)) - noise)
+            n += 1
+
+    def phrase(kind, words):
+        start = len(samples) / sample_rate
+        for word, speaker in words:
+            samples.extend(say(word, rng, *speaker))
+            pause(rng.uniform(0.05, 0.2))
+        phrases.append({'kind': kind, 'start': start, 'end': len(samples) / sample_rate})
+
+    enrolled = (1.0, 1.0)
+    pause(1.5)
+    while len(samples) < minutes * 60 * sample_rate:
+        command = [(random_word(rng), enrolled) for _ in range(rng.randint(2, 4))]
+        roll = rng.random()
+        if roll < command_share * 0.6:
+            phrase('wake+command', [(WAKE_SYLLABLES, enrolled)] + command)
+        elif roll < command_share:
+            phrase('wake', [(WAKE_SYLLABLES, enrolled)])
+            pause(rng.uniform(1.2, 2.0))
+            phrase('command', command)
+        else:
+            speaker = enrolled if rng.random() < 0.3 else (rng.uniform(0.7, 1.5), rng.uniform(0.8, 1.25))
+            words = [(random_word(rng), speaker) for _ in range(rng.randint(1, 5))]
+            if rng.random() < 0.15:
+                words[0] = (near_miss(rng), speaker)
+            phrase('other', words)
+        pause(rng.uniform(1.5, 4.0))
+
+    partial = f"{path}.{os.getpid()}.tmp"
+    _write_samples(partial, samples, sample_rate)
+    os.replace(partial, path)
+    with open(labels_path, "w", encoding="utf-8") as f:
+        json.dump(phrases, f)
+    return path, phrases
+
+
+def command_session(count=12, seed=5, noise=80, sample_rate=44100, channels=2, directory=FIXTURE_DIR):
+    """
+    Get a WAV of spoken commands as a desktop microphone records them.
+
+    Each command is 2-5 made-up words by one speaker, with a few seconds of
+    room noise between commands. The default 44.1 kHz stereo is what most
+    sound cards deliver, so capture has to downmix it and there is a rate
+    to come down from before upload.
+
+    Returns:
+        Path to the WAV file
+    """
+    key = json.dumps(['commands', count, seed, noise, sample_rate, channels])
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"commands_{digest}.wav")
+    if os.path.exists(path):
+        return path
+
+    rng = random.Random(seed)
+    samples = array.array('h')
+
+    def pause(seconds):
+        samples.extend(int(rng.gauss(0, noise)) for _ in range(int(seconds * sample_rate)))
+
+    pause(1.5)
+    for _ in range(count):
+        for _ in range(rng.randint(2, 5)):
+            samples.extend(say(random_word(rng), rng, sample_rate=sample_rate))
+            pause(rng.uniform(0.05, 0.2))
+        pause(rng.uniform(2.0, 3.5))
+
+    partial = f"{path}.{os.getpid()}.tmp"
+    _write_samples(partial, samples, sample_rate, channels)
+    os.replace(partial, path)
+    return path
+
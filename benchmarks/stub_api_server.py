@@ -0,0 +1,175 @@
+# benchmarks/stub_api_server.py - Local stand-in for newsapi, openweathermap and customsearch
+#
+# Usage: python -m benchmarks.stub_api_server [--port 8765] [--delay 0.2]
+#
+# Then point Jarvis at it:
+#   JARVIS_NEWS_API_URL=http://127.0.0.1:8765/v2/top-headlines
+#   JARVIS_WEATHER_API_URL=http://127.0.0.1:8765/data/2.5/weather
+#   JARVIS_SEARCH_API_URL=http://127.0.0.1:8765/customsearch/v1
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+NEWS_PATH = "/v2/top-headlines"
+WEATHER_PATH = "/data/2.5/weather"
+SEARCH_PATH = "/customsearch/v1"
+
+
+def news_payload(params):
+    category = params.get('category', 'general')
+    return {
+        'status': 'ok',
+        'totalResults': 3,
+        'articles': [
+            {'title': f'Top {category} story: markets steady ahead of central bank decision'},
+            {'title': f'Second {category} story: new telescope images reveal distant exoplanet'},
+            {'title': f'Third {category} story: city council approves cycling network expansion'},
+        ]
+    }
+
+
+def weather_payload(params):
+    return {
+        'name': params.get('q', 'London').title(),
+        'main': {'temp': 18.4, 'humidity': 72},
+        'weather': [{'description': 'light rain'}],
+        'wind': {'speed': 4.1},
+    }
+
+
+def search_payload(params):
+    query = params.get('q', '')
+    return {
+        'items': [
+            {'title': f'{query.title()} - Wikipedia',
+             'snippet': f'{query.capitalize()} is a topic covered in depth by this encyclopedia article.'},
+            {'title': f'{query.title()} facts and figures',
+             'snippet': f'Everything you need to know about {query}, from history to the latest research.'},
+            {'title': f'{query.title()} news and updates',
+             'snippet': f'Recent reporting and analysis about {query}.'},
+        ]
+    }
+
+
+ROUTES = {
+    NEWS_PATH: news_payload,
+    WEATHER_PATH: weather_payload,
+    SEARCH_PATH: search_payload,
+}
+
+
+class StubApiServer:
+    """
+    Threaded HTTP server playing back canned API payloads.
+
+    Use as a context manager; urls() gives the endpoint URLs to assign to
+    utils.api_manager.NEWS_API_URL and friends.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, delays=None, status=200):
+        """
+        Initialize the stub server.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind, 0 for any free port
+            delays: Dict of path -> seconds to wait before answering
+                    (key 'default' applies to every path)
+            status: HTTP status to answer with
+        """
+        self.delays = dict(delays or {})
+        self.status = status
+        self.requests_served = 0
+        self.connections = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                stub.connections += 1
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                payload = ROUTES.get(url.path)
+
+                time.sleep(stub.delays.get(url.path, stub.delays.get('default', 0)))
+
+                if payload is None:
+                    status, body = 404, {'error': 'not found'}
+                else:
+                    status, body = stub.status, payload(params)
+                data = json.dumps(body).encode("utf-8")
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                stub.requests_served += 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self):
+        """Endpoint URLs keyed by the api_manager attribute they replace."""
+        return {
+            'NEWS_API_URL': self.base_url + NEWS_PATH,
+            'WEATHER_API_URL': self.base_url + WEATHER_PATH,
+            'SEARCH_API_URL': self.base_url + SEARCH_PATH,
+        }
+
+    def serve_forever(self):
+        """Serve on the calling thread until stop() or KeyboardInterrupt."""
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve canned API payloads")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before each answer")
+    args = parser.parse_args()
+
+    server = StubApiServer(port=args.port, delays={'default': args.delay})
+    for name, url in server.urls().items():
+        print(f"{name}={url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,36 @@
 # controller.py - Processes commands and orchestrates actions
-import webbrowser
 import re
+import webbrowser
+from utils.router import CommandRouter
+from utils.fuzzy import FuzzyMatcher, KNOWN_CITIES
+from utils.handler_pool import HandlerPool, local, slow, policy_of
+from utils.health import get_health
+from utils.instrumentation import get_tracer
+from utils.api_manager import NEWS_CATEGORIES
+from utils.prefetch import PREFETCH_CITIES
 from utils.commands import (
+    SITE_URLS,
     open_website,
     play_music,
     search_google,
     get_system_info,
+    get_system_trend,
+    get_top_process,
     create_reminder,
+    list_reminders,
+    cancel_reminder,
     tell_time,
     tell_date
 )
 
+# Words joining several commands in one utterance ("what's the weather in
+# Paris and tell me the news")
+CONJUNCTIONS = re.compile(r'\s*,?\s+(?:and\s+then|and\s+also|and|then|also|plus)\s+|\s*,\s*')
+
+# "tell me about <topic>" names its topic outright; the topic is never
+# corrected into a command ("tell me about heather" is not the weather)
+EXPLICIT_TOPIC = re.compile(r'\btell\s+me\s+about\s+')
+
 
 class CommandController:
     """Controller component handling command processing and business logic."""
@@ -26,73 +46,230 @@ class CommandController:
         self.model = model
         self.view = view
         
-        # Command patterns
+        # Command patterns, in priority order
         self.commands = {
-            r'open\s+(youtube|google|linkedin|gmail|github)': self.open_website,
-            r'search\s+(?:for\s+)?(.*?)(?:\s+on\s+google)?': self.search_web,
+            # Reminders first and anchored: their text may hold other commands
+            # ("remind me to open youtube in 5 minutes")
+            r'^(?:cancel|delete|remove)\s+(?:the\s+|my\s+)?reminders?(?:\s+(?:to|about|for)\s+(.+))?': self.cancel_reminder,
+            r'^(?:what\s+are\s+my\s+|list\s+(?:my\s+)?|show\s+(?:my\s+)?)reminders': self.list_reminders,
+            r'^(?:set\s+(?:a\s+)?reminder|remind\s+me)(?:\s+(?:to\s+)?(.+))?': self.set_reminder,
+            r'open\s+(' + '|'.join(SITE_URLS) + ')': self.open_website,
+            r'search\s+(?:for\s+)?(.*?)(?:\s+on\s+google)?$': self.search_web,
             r'play\s+(music|song)(?:\s+by\s+(.+))?': self.play_music,
             r'tell\s+me\s+(?:about\s+)?the\s+news(?:\s+about\s+(.+))?': self.tell_news,
             r'what(?:\'s|\s+is)?\s+(?:the\s+)?weather(?:\s+(?:like|in|at|for)\s+(.+))?':self.get_weather,
             r'weather(?:\s+(?:report|forecast|update))?(?:\s+(?:in|at|for)\s+(.+))?':self.get_weather,
             r'(?:current|today\'s)\s+weather(?:\s+(?:in|at|for)\s+(.+))?':self.get_weather,
-            r'tell\s+me\s+(?:about\s+)?(.+)': self.process_command,
             r'(?:what(?:\'s|\s+is)?\s+(?:the\s+)?time(?:\s+(?:now|right now|currently))?|tell\s+(?:me\s+)?(?:the\s+)?time|(?:current|present)\s+time|time\s+(?:now|please|right now))': self.tell_time,
-            r'(what\s+(?:is\s+)?today\'?s?\s+date': self.tell_date,
+            r'what\s+(?:is\s+)?today\'?s?\s+date': self.tell_date,
             r'system\s+info(?:rmation)?': self.system_info,
-            r'set\s+(?:a\s+)?reminder(?:\s+to\s+(.+))?': self.set_reminder,
+            r'\b(cpu|processor|memory|ram|disk|storage)\b(?:\s+(?:usage|use|load))?\s+(?:been\s+)?(?:over|for|during|in)\s+the\s+(?:last|past)\s+(.+)': self.system_trend,
+            r'(?:which|what)\s+(?:process|program|app(?:lication)?)\s+(?:is\s+)?(?:uses|using|takes|taking)\s+(?:up\s+)?(?:the\s+)?most\s+(memory|ram|cpu|processor)': self.top_process,
+            r'(?:performance|latency)\s+report': self.performance_report,
             r'help': self.get_help,
+            r'tell\s+me\s+(?:about\s+)?(.+)': self.get_information,
         }
+        
+        # Validate and merge the table once instead of scanning it per utterance
+        self.router = CommandRouter(self.commands)
+        self.router.compile()
+        
+        # Near-miss words ("whether", "you tube") are corrected against the
+        # words in the patterns and the names Jarvis knows before giving up
+        # and searching the web for the utterance
+        self.fuzzy_matching = True
+        self.fuzzy = FuzzyMatcher.from_patterns(
+            self.commands,
+            entities=list(SITE_URLS) + KNOWN_CITIES + PREFETCH_CITIES + NEWS_CATEGORIES
+        )
+        
+        # Handlers declared @slow run on worker threads with a deadline;
+        # @local ones run inline. Turn off where the caller enforces its own
+        # deadline and has nowhere to speak an acknowledgement.
+        self.use_handler_pool = True
+        self.handler_pool = HandlerPool()
     
-    def process_command(self, command):
+    def process_command(self, command, acknowledge=None):
         """
         Process the recognized speech command.
     
-         Args:
-        command: Text string of user's spoken command
+        Args:
+            command: Text string of user's spoken command
+            acknowledge: Called with a short holding phrase ("Checking the
+                         weather.") if the answer is slow in coming
+        
+        Returns:
+            Response string or None if action doesn't require verbal response
+        """
+        return self.handle(command, acknowledge)[2]
+    
+    def handle(self, command, acknowledge=None):
+        """
+        Process a command and report how it was understood.
+        
+        Args:
+            command: Text string of user's spoken command
+            acknowledge: See process_command()
         
         Returns:
-        Response string or None if action doesn't require verbal response
+            (intent, args, response): the handler name (None when nothing
+            could be made of the command), the arguments it was called
+            with, and the response
         """
         if not command:
-            return "I didn't understand that command."
+            return None, (), "I didn't understand that command."
     
-         # Convert command to lowercase for better matching
+        tracer = get_tracer()
+        with tracer.span('command'):
+            return self._process(command, tracer, acknowledge)
+    
+    def _process(self, command, tracer, acknowledge=None):
+        """Route a non-empty command and run its handler, timing each step."""
+        # Convert command to lowercase for better matching
         cmd_lower = command.lower()
     
-    # Check each command pattern for a match
-        for pattern, handler in self.commands.items():
-            match = re.search(pattern, cmd_lower)
-            if match:
-            # Extract any capture groups and pass to handler
-                args = match.groups()
-                return handler(*args)
-    
-    # Fallback - treat unrecognized commands as information queries
-    # Remove common filler words
-            query = cmd_lower
-            fillers = ["please", "can you", "could you", "would you", "i want", "i need"]
-            for filler in fillers:
-                query = query.replace(filler, "")
-    
-            query = query.strip()
-    
-            # If query is too short or just a greeting, give a default response
-            if len(query) < 3 or query in ["hi", "hello", "hey"]:
-             return f"I'm not sure how to process '{command}'. Try saying 'help' for a list of commands."
-    
-            # Otherwise, attempt to find information about it
-            return self.get_information(query)
-
-
+        with tracer.span('route'):
+            parts = self._split_compound(cmd_lower)
+            route = self.router.dispatch(cmd_lower) if parts is None else None
+        if parts is not None:
+            with tracer.span('handler.compound', parts=len(parts)):
+                return self._run_compound(parts, acknowledge)
+        route = self._correct_route(cmd_lower, route, tracer)
+        if route:
+            handler, args = route
+            with tracer.span(f"handler.{handler.__name__}"):
+                return handler.__name__, args, self._run(handler, args, acknowledge)
+    
+        # Fallback - treat unrecognized commands as information queries
+        # Remove common filler words
+        query = cmd_lower
+        fillers = ["please", "can you", "could you", "would you", "i want", "i need"]
+        for filler in fillers:
+            query = query.replace(filler, "")
+    
+        query = query.strip()
+    
+        # If query is too short or just a greeting, give a default response
+        if len(query) < 3 or query in ["hi", "hello", "hey"]:
+            return None, (), f"I'm not sure how to process '{command}'. Try saying 'help' for a list of commands."
+    
+        # Otherwise, attempt to find information about it
+        with tracer.span('handler.get_information'):
+            return 'get_information', (query,), self._run(self.get_information, (query,), acknowledge)
+    
+    def _run(self, handler, args, acknowledge):
+        """Call a handler, on the pool under its deadline unless it is local or the pool is off."""
+        if not self.use_handler_pool:
+            return handler(*args)
+        return self.handler_pool.run(handler, args, acknowledge)
+    
+    def holding_phrases(self):
+        """Acknowledgements and deadline fallbacks the handlers can speak, for the speech cache."""
+        phrases = []
+        for handler in dict.fromkeys(self.commands.values()):
+            policy = policy_of(handler)
+            for phrase in (policy.ack, policy.fallback):
+                if phrase and phrase not in phrases:
+                    phrases.append(phrase)
+        return phrases
+    
+    def _split_compound(self, cmd_lower):
+        """
+        Split an utterance holding several commands at its conjunctions.
         
-        # If no matches, return a default response
-        return f"I'm not sure how to process '{command}'. Try saying 'help' for a list of commands."
+        It is only split if every part routes to a command on its own, so
+        "search for salt and pepper" or "weather in trinidad and tobago"
+        stay whole. A reminder keeps everything after it as its text.
+        
+        Returns:
+            List of (text, handler, args) in spoken order, or None
+        """
+        if not CONJUNCTIONS.search(cmd_lower):
+            return None
+        texts = [text.strip() for text in CONJUNCTIONS.split(cmd_lower)]
+        texts = [text for text in texts if text]
+        if len(texts) < 2:
+            return None
+        parts = []
+        for i, text in enumerate(texts):
+            route = self.router.dispatch(text)
+            if route is None or (route[0] == self.set_reminder and i < len(texts) - 1):
+                return None
+            parts.append((text, route[0], route[1]))
+        return parts
+    
+    def _run_compound(self, parts, acknowledge):
+        """
+        Run the commands of a compound utterance at once and merge their answers.
+        
+        A part that fails is reported in the answer without losing the others.
+        
+        Returns:
+            ('compound', ((intent, args), ...), response)
+        """
+        calls = [(handler, args) for _, handler, args in parts]
+        if self.use_handler_pool:
+            results = self.handler_pool.run_all(calls, acknowledge)
+        else:
+            results = []
+            for handler, args in calls:
+                try:
+                    results.append(handler(*args))
+                except Exception as e:
+                    results.append(e)
+        
+        sentences = []
+        for (text, handler, _), result in zip(parts, results):
+            if isinstance(result, Exception):
+                print(f"Command error in '{text}': {result}")
+                result = f"Sorry, I couldn't finish '{text}'."
+            if result:
+                result = result.strip()
+                sentences.append(result if result[-1] in '.!?' else result + '.')
+        intents = tuple((handler.__name__, args) for _, handler, args in parts)
+        return 'compound', intents, " ".join(sentences) or None
+    
+    def _correct_route(self, cmd_lower, route, tracer):
+        """
+        Try the fuzzy stage on an utterance the exact patterns did not place.
+        
+        It runs when nothing matched, or only the information fallback did,
+        and never on "tell me about ..." (see EXPLICIT_TOPIC).
+        
+        Returns:
+            The corrected (handler, args), else route unchanged
+        """
+        if not self.fuzzy_matching:
+            return route
+        if route is not None and (route[0] != self.get_information or EXPLICIT_TOPIC.search(cmd_lower)):
+            return route
+        with tracer.span('route.fuzzy') as span:
+            return self._fuzzy_route(cmd_lower, span) or route
     
+    def _fuzzy_route(self, cmd_lower, span):
+        """
+        Route a corrected version of an utterance that only matched the information fallback.
+        
+        Returns:
+            (handler, args) if the correction reaches a specific command, else None
+        """
+        corrected = self.fuzzy.correct(cmd_lower)
+        if corrected is None:
+            return None
+        text, confidence = corrected
+        route = self.router.dispatch(text)
+        if route is None or route[0] == self.get_information:
+            return None
+        span.fields['confidence'] = round(confidence, 2)
+        return route
+    
+    @local
     def open_website(self, site):
         """Open a specified website."""
         result = open_website(site)
         return result
     
+    @local
     def search_web(self, query):
         """Search for information on Google."""
         if not query:
@@ -101,11 +278,13 @@ class CommandController:
         result = search_google(query)
         return f"I've searched for {query}"
     
+    @local
     def play_music(self, music_type, artist=None):
         """Play music, optionally by a specific artist."""
         result = play_music(music_type, artist)
         return result
     
+    @slow("Getting the headlines.", fallback="Sorry, the news service is taking too long to answer.")
     def tell_news(self, category=None):
         """Get and speak news updates."""
         news_data = self.model.get_news(category)
@@ -122,6 +301,7 @@ class CommandController:
         
         return news_text
     
+    @slow("Checking the weather.", fallback="Sorry, the weather service is taking too long to answer.")
     def get_weather(self, city=None):
         """Get weather information for a city."""
         if not city:
@@ -134,6 +314,7 @@ class CommandController:
         
         return f"The weather in {city} is {weather_data['description']} with a temperature of {weather_data['temperature']}°C."
     
+    @slow("Let me look that up.", fallback="Sorry, I couldn't find that in time. Please ask again in a moment.")
     def get_information(self, query):
         """Get general information on a topic."""
         if not query:
@@ -146,18 +327,32 @@ class CommandController:
         
         return info
     
+    @local
     def tell_time(self):
         """Tell the current time."""
         return tell_time()
     
+    @local
     def tell_date(self):
         """Tell today's date."""
         return tell_date()
     
+    @local
     def system_info(self):
         """Get and speak system information."""
         return get_system_info()
     
+    @local
+    def system_trend(self, resource, window=None):
+        """Describe recent CPU, memory or disk usage from the sampler's history."""
+        return get_system_trend(resource, window)
+    
+    @slow("Checking your processes.")
+    def top_process(self, resource):
+        """Name the process using the most memory or CPU."""
+        return get_top_process(resource)
+    
+    @local
     def set_reminder(self, reminder_text=None):
         """Set a reminder with optional text."""
         if not reminder_text:
@@ -166,6 +361,29 @@ class CommandController:
         result = create_reminder(reminder_text)
         return result
     
+    @local
+    def list_reminders(self):
+        """Read out the next pending reminders."""
+        return list_reminders()
+    
+    @local
+    def cancel_reminder(self, reminder_text=None):
+        """Cancel a reminder by some of its words."""
+        return cancel_reminder(reminder_text)
+    
+    @local
+    def performance_report(self):
+        """Print per-stage timing percentiles and speak a short summary."""
+        tracer = get_tracer()
+        health = get_health()
+        self.view.speak_action("Performance report\n" + tracer.report() + "\n\nBackends\n" + health.report())
+        report = tracer.spoken_report()
+        unavailable = health.unavailable()
+        if unavailable:
+            report += f" Currently bypassing {', '.join(unavailable)}."
+        return report
+    
+    @local
     def get_help(self):
         """Provide help information about available commands."""
         help_text = "Here are some commands you can use: "
@@ -176,8 +394,11 @@ class CommandController:
         help_text += "Check the weather with 'what's the weather in New York'. "
         help_text += "Ask about something with 'tell me about Mars'. "
         help_text += "Ask for the time with 'what time is it'. "
-        help_text += "Set reminders with 'set reminder to call mom'. "
-        help_text += "Get system information with 'system info'. "
+        help_text += "Set reminders with 'remind me to call mom in 20 minutes' or 'at 6 pm tomorrow'. "
+        help_text += "Get system information with 'system info', "
+        help_text += "or ask 'CPU over the last five minutes' and 'which process uses the most memory'. "
+        help_text += "Ask for two things at once, like 'what's the weather in Paris and tell me the news'. "
+        help_text += "Hear how fast I'm responding with 'performance report'. "
         help_text += "Exit by saying 'exit' or 'goodbye'."
         
         return help_text
@@ -1,55 +1,155 @@
 # jarvis.py - Main application file
 import os
+import sys
 import time
+# First, so its launch timestamp is taken before the heavy imports below
+from utils import startup
 from model import SpeechModel
 from view import SpeechView
 from controller import CommandController
+from utils.pipeline import AssistantPipeline
+from utils.barge_in import cutoff_summary
+from utils.health import get_health
+from utils.instrumentation import get_tracer
+from utils.system_monitor import get_sampler
+from utils.reminders import get_scheduler
+from utils.audio_output import NullOutput
+
+# Saying any of these ends the session
+EXIT_PHRASES = ["exit", "stop", "goodbye", "bye"]
 
 class Jarvis:
    
     
-    def __init__(self):
+    def __init__(self, model=None, view=None, on_ready=None):
+        
+        if not startup.FAST_START:
+            # Import every engine up front, as older versions did
+            startup.preload()
         
-        self.model = SpeechModel()
-        self.view = SpeechView()
+        self.model = model or SpeechModel()
+        self.view = view or SpeechView()
         self.controller = CommandController(self.model, self.view)
+        if getattr(self.model, 'wake_gate', None) is not None:
+            # "Jarvis" on its own: show that the command window is open
+            self.model.wake_gate.on_wake = lambda: self.view.speak_action("Yes?")
+        
+        # Synthesize the long fixed answers while the first turn is listening
+        self.view.prewarm([self.controller.get_help()] + self.controller.holding_phrases())
+        self.on_ready = on_ready
+        self.ready_at = None
         
     def start(self):
         """Start Jarvis assistant."""
+        # Ready: the microphone is being captured and the greeting is next
+        self.ready_at = time.perf_counter()
+        get_tracer().record('startup', self.ready_at - startup.LAUNCHED_AT)
+        self.view.speak_action(f"Ready in {self.ready_at - startup.LAUNCHED_AT:.2f}s")
+        if self.on_ready is not None:
+            self.on_ready()
+        if startup.FAST_START:
+            # Load what was deferred while the greeting plays, before it is needed
+            startup.preload_in_background()
+        
         self.view.speak("Jarvis initialized and ready to assist you.")
+        self.model.prefetcher.start()
+        # Old search results are purged and the index compacted while idle
+        self.model.knowledge.maintain()
+        # System questions are answered from samples taken in the background
+        get_sampler().start()
         
-        while True:
-            try:
-                # Listen for commands
-                self.view.speak_action("Listening...")
-                command = self.model.recognize_speech()
-                
-                if command:
-                    # Check for exit command
-                    if any(phrase in command.lower() for phrase in ["exit", "stop", "goodbye", "bye"]):
-                        self.view.speak("Shutting down. Goodbye!")
-                        break
-                    
-                    # Process command
-                    self.view.speak_action(f"Processing: {command}")
-                    response = self.controller.process_command(command)
-                    
-                    # Speak response if not None
-                    if response:
-                        self.view.speak(response)
-                else:
-                    self.view.speak("I didn't catch that. Could you repeat?")
-                    
-            except KeyboardInterrupt:
-                self.view.speak("Interrupted. Shutting down.")
-                break
-            except Exception:
-                self.view.speak("Sorry I didn't catch that. Could you repeat?")
-                # Small pause to prevent error loops
-                time.sleep(1)
+        # Listening, recognition, command handling, synthesis and playback
+        # run as concurrent stages so consecutive turns overlap
+        self.pipeline = AssistantPipeline(self.model, self.view, self.controller, EXIT_PHRASES)
+        self.pipeline.start()
+        # Due reminders, including any missed while Jarvis was not running,
+        # are spoken between turns
+        get_scheduler().start(self.pipeline.announce)
+        
+        try:
+            self.pipeline.wait()
+        except KeyboardInterrupt:
+            self.pipeline.stop()
+            self.pipeline.wait(timeout=5)
+            self.view.speak("Interrupted. Shutting down.")
+        # Reminders now wait for the next session
+        get_scheduler().stop()
+        
+        latency = self.pipeline.latency_summary()
+        if latency['turns']:
+            self.view.speak_action(f"Turn latency over {latency['turns']} turns: "
+                                   f"median {latency['p50']:.2f}s, worst {latency['max']:.2f}s")
+        handlers = self.controller.handler_pool.stats()
+        if handlers['pooled']:
+            self.view.speak_action(f"Slow commands: {handlers['pooled']} run on the handler pool, "
+                                   f"{handlers['acknowledged']} acknowledged while waiting, "
+                                   f"{handlers['abandoned']} past their deadline")
+        self.controller.handler_pool.close()
+        barge_in = cutoff_summary(self.pipeline.turns)
+        if barge_in['interruptions']:
+            self.view.speak_action(f"Barge-in: {barge_in['interruptions']} interruptions, "
+                                   f"worst cut-off {barge_in['cutoff_max'] * 1000:.0f} ms")
+        if self.pipeline.echoes_dropped:
+            self.view.speak_action(f"Echo gate: {self.pipeline.echoes_dropped} phrases heard during "
+                                   f"playback dropped as Jarvis's own voice")
         
         self.view.speak("Jarvis has been terminated.")
+        self.model.close()
+        prefetch = self.model.prefetcher.stats()
+        self.view.speak_action(f"Prefetch: {prefetch['prefetches']} refreshes, {prefetch['failures']} failed, "
+                               f"{prefetch['served_from_prefetch']} of {prefetch['foreground_requests']} "
+                               f"requests served from prefetched data")
+        knowledge = self.model.knowledge.stats()
+        self.view.speak_action(f"Knowledge store: {knowledge['hits']} questions answered locally, "
+                               f"{knowledge['misses']} searched online, {knowledge['snippets']} results indexed")
+        self.view.speak_action(self.view.speech_cache.describe())
+        if hasattr(self.view.player, 'stats'):
+            output = self.view.player.stats()
+            if output['utterances']:
+                self.view.speak_action(f"Audio output: {output['utterances']} utterances, "
+                                       f"median startup {output['startup_p50'] * 1000:.1f} ms")
+        sampler = get_sampler()
+        sampler.stop()
+        overhead = sampler.overhead()
+        self.view.speak_action(f"System sampler: {overhead['samples']} samples, "
+                               f"{overhead['cpu_per_sample'] * 1000:.1f} ms CPU each, "
+                               f"{overhead['cpu_fraction']:.2%} of a core, "
+                               f"{overhead['buffer_bytes'] / 1024:.0f} KB of history")
+        gate = getattr(self.model, 'wake_gate', None)
+        if gate is not None:
+            wake = gate.stats()
+            self.view.speak_action(f"Wake word ({wake['detector']}): {wake['passed']} of {wake['phrases']} phrases "
+                                   f"sent to the recognizer, {wake['detections']} detections, "
+                                   f"{wake['cpu_seconds_per_hour'] or 0:.0f} CPU seconds per hour of speech")
+        for name, stats in self.model.speech_recognizer.summary().items():
+            self.view.speak_action(f"Recognizer {name}: {stats['wins']}/{stats['calls']} wins, "
+                                   f"median latency {stats['p50_latency'] or 0:.2f}s")
+        self.view.speech_cache.close()
+        
+        self.view.speak_action("Backend health\n" + get_health().report())
+        tracer = get_tracer()
+        self.view.speak_action("Stage timings\n" + tracer.report())
+        tracer.close()
 
 if __name__ == "__main__":
-    jarvis = Jarvis()
-    jarvis.start()
+    if "--warm-cache" in sys.argv:
+        # Install-time warm-up: fill the speech cache without opening the microphone
+        view = SpeechView(output=NullOutput())
+        controller = CommandController(None, view)
+        view.prewarm([controller.get_help()] + controller.holding_phrases(), wait=True)
+        print(view.speech_cache.describe())
+    elif "--enroll-wake-word" in sys.argv:
+        # Record the user saying the wake word for the on-device detector
+        from utils.audio_capture import AudioCapture, MicrophoneSource
+        from utils.wake_word import enroll
+        capture = AudioCapture(MicrophoneSource())
+        capture.calibrate(duration=1)
+        capture.start()
+        try:
+            paths = enroll(capture)
+        finally:
+            capture.stop()
+        print(f"Saved {len(paths)} recordings; set JARVIS_WAKE=template or leave it unset to use them")
+    else:
+        jarvis = Jarvis()
+        jarvis.start()
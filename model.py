@@ -1,45 +1,169 @@
 # model.py - Handles speech recognition and data processing
-import speech_recognition as sr
-import requests
 import json
 import os
-from utils.api_manager import get_news, get_weather, search_web
+import time
+from utils.api_manager import get_news, get_weather, fetch_search_results, answer_from_results, format_search_results
+from utils.response_cache import ResponseCache, normalize_key
+from utils.knowledge_store import KnowledgeStore
+from utils.prefetch import PrefetchScheduler, PREFETCH_CITIES, PREFETCH_CATEGORIES
+from utils.audio_capture import AudioCapture, CalibrationStore, MicrophoneSource
+from utils.recognizers import GoogleBackend, SphinxBackend, RacingRecognizer
+from utils.handler_pool import abandoned
+from utils.instrumentation import get_tracer
+from utils.startup import FAST_START
+from utils.wake_word import open_gate
+from utils.audio_prep import prepare
+
+# Starting energy threshold, before calibration
+ENERGY_THRESHOLD = 4000
 
 class SpeechModel:
     """Model component handling speech recognition and data processing."""
     
-    def __init__(self):
-        """Initialize speech recognition engine and data resources."""
-        self.recognizer = sr.Recognizer()
-        self.recognizer.energy_threshold = 4000
-        self.recognizer.dynamic_energy_threshold = True
+    def __init__(self, audio_source=None, backends=None, cache=None, listen=True, knowledge=None,
+                 wake_gate=None):
+        """
+        Initialize speech recognition engine and data resources.
+        
+        Args:
+            audio_source: AudioSource to listen to; defaults to the microphone.
+                          A WavFileSource or SyntheticSource can stand in for
+                          it on machines without audio hardware.
+            backends: RecognizerBackend instances to race; defaults to local
+                      Sphinx (when installed) alongside Google
+            cache: ResponseCache for weather, news and search answers
+            knowledge: KnowledgeStore that answers questions from earlier searches
+            listen: Open and calibrate audio_source; False for a model that
+                    only transcribes audio handed to it, as the server does
+            wake_gate: WakeWordGate that phrases must pass before they are
+                       recognized; defaults to the one JARVIS_WAKE sets up
+                       when listening to the microphone
+        """
+        self.cache = cache or ResponseCache()
+        self.knowledge = knowledge or KnowledgeStore()
+        
+        # Usual weather and news are refreshed in the background while idle
+        self.prefetcher = PrefetchScheduler(
+            self.cache,
+            {'weather': get_weather, 'news': get_news},
+            targets={'weather': PREFETCH_CITIES, 'news': PREFETCH_CATEGORIES}
+        )
+        
+        self.last_error = None
+        
+        # Offline and cloud recognition race on the same audio, so a short
+        # command answered confidently by the local engine skips the network.
+        # Each backend creates its sr.Recognizer on first use.
+        if backends is None:
+            backends = [GoogleBackend()]
+            if SphinxBackend.available():
+                backends.insert(0, SphinxBackend())
+        self.speech_recognizer = RacingRecognizer(backends)
         
-        # Adjust for ambient noise when initializing
-        with sr.Microphone() as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=1)
+        # One input stream stays open for the whole session; phrases are
+        # segmented in the background and queued until we ask for them
+        self.capture = None
+        self.wake_gate = None
+        if not listen:
+            return
+        
+        # Phrases without the wake word are dropped on the device instead of
+        # going to the cloud recognizer
+        self.wake_gate = wake_gate if wake_gate is not None or audio_source is not None else open_gate()
+        self.capture = AudioCapture(
+            audio_source or MicrophoneSource(),
+            energy_threshold=ENERGY_THRESHOLD,
+            dynamic_energy_threshold=True,
+            phrase_time_limit=5
+        )
+        
+        # Adjust for ambient noise when initializing. With fast start, the
+        # threshold saved for this device last time is reused instead of
+        # blocking for a second, and refined as audio comes in.
+        self.capture.calibrate(duration=1, store=CalibrationStore() if FAST_START else None)
+        self.capture.start()
+    
+    def listen(self, timeout=5):
+        """
+        Wait for the next phrase from the capture thread.
+        
+        With a wake word gate, phrases it drops are skipped and the wait
+        goes on for the rest of timeout.
+        
+        Returns:
+            AudioData, or None if nothing was said within timeout
+        """
+        if self.wake_gate is None:
+            return self.capture.listen(timeout=timeout)
+        deadline = time.monotonic() + timeout
+        while True:
+            audio = self.capture.listen(timeout=max(0.0, deadline - time.monotonic()))
+            if audio is None:
+                return None
+            audio = self.wake_gate.accept(audio, self.capture.energy_threshold, self.capture.pre_roll)
+            if audio is not None:
+                return audio
+            if time.monotonic() >= deadline:
+                return None
     
     def recognize_speech(self):
         """
         Listen through microphone and convert speech to text.
         Returns recognized text or None if unable to recognize.
         """
-        with sr.Microphone() as source:
-            try:
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-                text = self.recognizer.recognize_google(audio)
-                return text
-            except sr.UnknownValueError:
-                return None
-            except sr.RequestError:
-                return "Sorry, my speech recognition service is currently unavailable."
+        audio = self.listen(timeout=5)
+        if audio is None:
+            self.last_error = None
+            return None
+        
+        return self.transcribe(audio)
+    
+    def transcribe(self, audio):
+        """
+        Convert captured audio to text.
+        
+        Returns:
+            Recognized text, or None. When every backend failed with a service
+            error, last_error holds a message to tell the user instead.
+        """
+        tracer = get_tracer()
+        if getattr(audio, 'started_at', None) is not None:
+            # Speech onset to end of phrase, including the closing pause
+            tracer.record('listen', audio.ended_at - audio.started_at)
+        with tracer.span('prepare') as span:
+            # Upload only the speech, at the rate the recognizers use
+            span.fields['bytes_in'] = len(audio.frame_data)
+            audio = prepare(audio, self.capture.energy_threshold if self.capture is not None else None)
+            span.fields['bytes_out'] = len(audio.frame_data)
+        with tracer.span('recognize') as span:
+            text = self.speech_recognizer.recognize(audio)
+            span.fields['understood'] = text is not None
+        if text is not None and self.wake_gate is not None:
+            text = self.wake_gate.strip(text)
+        if text is None and self.speech_recognizer.last_error is not None:
+            print(f"Speech recognition error: {self.speech_recognizer.last_error}")
+            self.last_error = "Sorry, my speech recognition service is currently unavailable."
+        else:
+            self.last_error = None
+        return text
+    
+    def close(self):
+        """Stop background work and release the input device."""
+        self.prefetcher.stop()
+        if self.capture is not None:
+            self.capture.stop()
     
     def get_news(self, category='general'):
         """Fetch news updates from the news API."""
-        return get_news(category)
+        category = normalize_key(category or 'general')
+        self.prefetcher.record('news', category)
+        return self.cache.get_or_fetch('news', category, lambda: get_news(category))
     
     def get_weather(self, city):
         """Fetch weather information for the specified city."""
-        return get_weather(city)
+        city = normalize_key(city)
+        self.prefetcher.record('weather', city)
+        return self.cache.get_or_fetch('weather', city, lambda: get_weather(city))
     
     def search_songs(self, query):
         """Search for songs based on the query."""
@@ -49,4 +173,24 @@ class SpeechModel:
     
     def search_information(self, query):
         """Search the web for information based on the query."""
-        return search_web(query)
+        key = normalize_key(query)
+        # Anything searched for before that covers the question is answered
+        # from the local index without a request
+        with get_tracer().span('knowledge.search') as span:
+            local = self.knowledge.search(key)
+            span.fields['hit'] = bool(local)
+        if local:
+            return format_search_results(query, local)
+        
+        def fetch():
+            items = fetch_search_results(query)
+            if items:
+                self.knowledge.add(key, items)
+            return items
+        
+        items = self.cache.get_or_fetch('search', key, fetch)
+        if items is None and abandoned():
+            # The fallback has been spoken; a browser tab opening now would
+            # come out of nowhere
+            return None
+        return answer_from_results(query, items)
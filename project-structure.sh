@@ -2,12 +2,70 @@
 
 jarvis/
 ├── jarvis.py               # Main application file
+├── batch.py                # Headless batch mode over text command files
+├── server.py               # Local HTTP server sharing one warm Jarvis
 ├── model.py                # Model component
 ├── view.py                 # View component
 ├── controller.py           # Controller component
 ├── utils/
 │   ├── __init__.py         # Makes utils a proper package
+│   ├── barge_in.py         # Detects the user talking over Jarvis
 │   ├── commands.py         # Command execution utilities
-│   └── api_manager.py      # API interaction functions
+│   ├── api_manager.py      # API interaction functions
+│   ├── audio_capture.py    # Persistent capture thread and audio sources
+│   ├── audio_prep.py       # Silence trimming and 16 kHz downsampling before upload
+│   ├── health.py           # Backend circuit breakers, probes and health report
+│   ├── handler_pool.py     # Slow handlers on workers, acknowledgements and deadlines
+│   ├── fuzzy.py            # Near-miss word correction before the search fallback
+│   ├── http_client.py      # Pooled HTTP client with deadlines and retries
+│   ├── pipeline.py         # Concurrent recognize/dispatch/synthesize/play stages
+│   ├── instrumentation.py  # Per-stage timing spans, percentiles and trace file
+│   ├── knowledge_store.py  # Full-text index of past search results (SQLite FTS5)
+│   ├── playback.py         # Interruptible audio file playback
+│   ├── audio_output.py     # In-memory speech clips and long-lived output sinks
+│   ├── prefetch.py         # Idle-time prefetch of weather and news
+│   ├── recognizers.py      # Speech recognition backends and racing
+│   ├── reminders.py        # Persistent reminders, time parsing and the timer thread
+│   ├── response_cache.py   # TTL cache for weather, news and search answers
+│   ├── router.py           # Compiled intent router
+│   ├── startup.py          # Deferred imports and the fast-start switch
+│   ├── wake_word.py        # On-device wake word detector, command window and enrolment
+│   ├── system_monitor.py   # Background CPU/memory/disk sampler with rolling history
+│   ├── storage.py          # Persistent data directory (~/.jarvis)
+│   └── tts_cache.py        # Synthesized speech cache
+├── benchmarks/
+│   ├── __init__.py
+│   ├── fixtures.py         # WAV fixtures for scripted sessions and wake word speech
+│   ├── fakes.py            # Scripted recognizer and simulated speech output
+│   ├── stub_api_server.py  # Local canned news/weather/search API
+│   ├── bench_audio_prep.py # Bytes uploaded and recognition latency before and after trimming
+│   ├── bench_audio_output.py # Playback startup and file I/O, temp files vs in-memory
+│   ├── bench_barge_in.py   # Cut-off latency when the user interrupts
+│   ├── bench_compound.py   # Compound turns vs separate turns, error isolation
+│   ├── bench_e2e.py        # Scripted end-to-end sessions, JSON results
+│   ├── bench_fuzzy.py      # Routing accuracy on noisy transcripts
+│   ├── bench_health.py     # Outage cost with and without circuit breakers
+│   ├── bench_handler_pool.py # Silence before the first word with slow and hung handlers
+│   ├── bench_wake_word.py  # Cloud calls, misses, false accepts and CPU with the wake word gate
+│   ├── bench_http_client.py # Pooled vs bare HTTP calls
+│   ├── bench_instrumentation.py # Cost of the timing spans
+│   ├── bench_knowledge_store.py # Local answer latency and compaction at scale
+│   ├── bench_pipeline.py   # Turn latency, serial loop vs staged pipeline
+│   ├── bench_reminders.py  # Reminder insert/cancel/restart cost and timer accuracy
+│   ├── bench_router.py     # Command dispatch micro-benchmark
+│   ├── bench_system_monitor.py # System questions from the sampler vs on demand
+│   ├── bench_server.py     # Server throughput and tail latency vs concurrency
+│   ├── bench_startup.py    # Launch-to-ready time, eager vs fast start
+│   └── bench_tts_pipeline.py # Time-to-first-audio for chunked speech
+├── tests/
+│   ├── test_audio_capture.py # Capture segmentation over synthetic and stereo WAV sources
+│   ├── test_handler_pool.py # Handler deadlines and the abandoned() check
+│   ├── test_http_client.py # HttpClient retries and time budget against a scripted session
+│   ├── test_pipeline.py    # Pipeline stages with fakes: recognizer errors, echo gating, barge-in cut-off
+│   ├── test_prefetch.py    # Prefetch targets, failure backoff and pauses
+│   ├── test_recognizers.py # Recognizer race outcomes with fake backends
+│   ├── test_reminders.py   # Reminder time parsing and scheduler delivery on an injected clock
+│   ├── test_routing.py     # Command table routing regressions (python -m pytest tests)
+│   └── test_wake_word.py   # Wake word gate, command window and transcript stripping with a scripted detector
 ├── requirements.txt        # Project dependencies
 └── README.md               # Project documentation
@@ -0,0 +1,482 @@
+# server.py - Local HTTP server so many clients share one warm Jarvis
+#
+# Usage: python server.py [--host 127.0.0.1] [--port 8765]
+#                         [--max-concurrency 8] [--deadline 10]
+#
+# Endpoints:
+#   POST /command   JSON {"text": "..."}, or a mono WAV body (Content-Type: audio/wav)
+#                   -> {"transcript", "intent", "args", "response", "ms"}
+#                   With ?reply=audio the answer comes back as speech instead:
+#                   chunked audio/mpeg, with the JSON result in X-Jarvis-Result
+#   POST /speak     JSON {"text": "..."} -> chunked audio/mpeg, sentence by sentence
+#   GET  /health    In-flight requests, limits, counters, cache statistics and
+#                   the circuit state of each backend
+#
+# Every request has a deadline (X-Deadline header, in seconds, can shorten
+# it) and at most --max-concurrency run at once; others wait for a slot
+# until their deadline, then get 503. The response cache, speech cache,
+# recognizers and prefetcher are shared by every client.
+
+import argparse
+import asyncio
+import collections
+import http
+import io
+import json
+import os
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from utils.audio_output import AudioClip, NullOutput
+from utils.health import get_health
+from utils.instrumentation import get_tracer
+from utils.startup import lazy_import
+
+sr = lazy_import("speech_recognition")
+
+HOST = os.environ.get("JARVIS_SERVER_HOST", "127.0.0.1")
+PORT = int(os.environ.get("JARVIS_SERVER_PORT", "8765"))
+MAX_CONCURRENCY = int(os.environ.get("JARVIS_SERVER_CONCURRENCY", "8"))
+DEADLINE = float(os.environ.get("JARVIS_SERVER_DEADLINE", "10"))
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 10 * 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 30
+
+# Sentences synthesized ahead of the one being sent
+RENDER_AHEAD = 2
+
+AUDIO_TYPES = ("audio/wav", "audio/x-wav", "audio/wave")
+
+
+class HttpError(Exception):
+    """Ends a request with an HTTP error status and a JSON message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """One parsed HTTP request."""
+
+    def __init__(self, method, target, headers, body):
+        self.method = method
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+        self.keep_alive = headers.get('connection', '').lower() != 'close'
+
+    def json(self):
+        try:
+            payload = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HttpError(400, "Body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise HttpError(400, "Body must be a JSON object")
+        return payload
+
+
+async def read_request(reader):
+    """
+    Read one request from a connection.
+
+    Returns:
+        Request, or None if the client closed the connection between requests
+    """
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise HttpError(400, "Incomplete request")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "Request headers too large")
+    except asyncio.TimeoutError:
+        return None
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if 'transfer-encoding' in headers:
+        raise HttpError(411, "Send a Content-Length")
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HttpError(400, "Bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "Body too large")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target, headers, body)
+
+
+def _head(status, content_type, keep_alive, extra=None, length=None):
+    lines = [f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}",
+             f"Content-Type: {content_type}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines.append(f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked")
+    for name, value in (extra or {}).items():
+        lines.append(f"{name}: {value}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def write_json(writer, status, payload, keep_alive=True):
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(_head(status, "application/json", keep_alive, length=len(body)) + body)
+    await writer.drain()
+
+
+class JarvisServer:
+    """
+    asyncio HTTP front end for one CommandController and SpeechView.
+
+    Blocking work (recognition, command handlers, synthesis) runs on a
+    thread pool sized to the concurrency limit. A request holds its slot
+    until its work has actually finished, even after its deadline has
+    passed and the client got a 504, so abandoned work cannot pile up.
+    Two clients asking for the same sentence share one synthesis.
+    """
+
+    def __init__(self, controller, view, host=HOST, port=PORT,
+                 max_concurrency=MAX_CONCURRENCY, deadline=DEADLINE):
+        """
+        Initialize the server.
+
+        Args:
+            controller: CommandController; its model transcribes audio requests
+            view: SpeechView used for synthesis only
+            host: Interface to bind
+            port: Port to bind, 0 for any free port
+            max_concurrency: Requests processed at once
+            deadline: Longest a request may take, in seconds
+        """
+        self.controller = controller
+        # Requests already run on their own workers under their own deadline,
+        # and a JSON reply has no room for a spoken acknowledgement
+        controller.use_handler_pool = False
+        self.model = controller.model
+        self.view = view
+        self.host = host
+        self.port = port
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="jarvis-server")
+        self._slots = None
+        self._renders = {}
+        self._server = None
+        self._loop = None
+
+        self.in_flight = 0
+        self.counts = collections.Counter()
+
+    # Lifecycle
+
+    async def start(self):
+        """Bind the listening socket; port is updated if it was 0."""
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port,
+                                                  limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Jarvis server listening on {self.url}", flush=True)
+        async with self._server:
+            await self._server.serve_forever()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    # Connections
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HttpError as e:
+                    self.counts['bad_request'] += 1
+                    await write_json(writer, e.status, {'error': e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                await self._respond(request, writer)
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, request, writer):
+        routes = {
+            ('POST', '/command'): self._command,
+            ('POST', '/speak'): self._speak,
+            ('GET', '/health'): self._health,
+        }
+        handler = routes.get((request.method, request.path))
+        if handler is None:
+            status = 405 if request.path in {path for _, path in routes} else 404
+            self.counts['bad_request'] += 1
+            await write_json(writer, status, {'error': http.HTTPStatus(status).phrase}, request.keep_alive)
+            return
+
+        self.counts['requests'] += 1
+        with get_tracer().span(f"server.{request.path.strip('/')}") as span:
+            try:
+                await handler(request, writer)
+            except HttpError as e:
+                span.fields['status'] = e.status
+                self.counts[{503: 'rejected', 504: 'timed_out'}.get(e.status, 'bad_request')] += 1
+                await write_json(writer, e.status, {'error': e.message}, request.keep_alive)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                print(f"Server error on {request.path}: {e}")
+                span.fields['status'] = 500
+                self.counts['errors'] += 1
+                await write_json(writer, 500, {'error': "Internal error"}, request.keep_alive)
+
+    # Deadlines and the concurrency limit
+
+    def _deadline_at(self, request):
+        deadline = self.deadline
+        try:
+            deadline = min(deadline, float(request.headers.get('x-deadline', deadline)))
+        except ValueError:
+            raise HttpError(400, "Bad X-Deadline")
+        return self._loop.time() + deadline
+
+    def _remaining(self, deadline_at):
+        return max(0.0, deadline_at - self._loop.time())
+
+    async def _admit(self, deadline_at):
+        """Wait for a slot until the deadline."""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._remaining(deadline_at))
+        except asyncio.TimeoutError:
+            raise HttpError(503, "Server busy")
+        self.in_flight += 1
+
+    def _release(self, outstanding):
+        """Give the slot back once every thread this request started has finished."""
+        def release(_=None):
+            self.in_flight -= 1
+            self._slots.release()
+
+        unfinished = [f for f in outstanding if not f.done()]
+        if unfinished:
+            asyncio.gather(*unfinished, return_exceptions=True).add_done_callback(release)
+        else:
+            release()
+
+    async def _call(self, outstanding, deadline_at, func, *args):
+        """Run blocking func on the pool, giving up on it (not the thread) at the deadline."""
+        future = self._loop.run_in_executor(self._executor, func, *args)
+        outstanding.append(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self._remaining(deadline_at))
+        except asyncio.TimeoutError:
+            raise HttpError(504, "Deadline exceeded")
+
+    async def _render(self, chunk):
+        """Synthesize a chunk, sharing the work with any request already rendering it."""
+        future = self._renders.get(chunk)
+        if future is None:
+            future = self._loop.run_in_executor(self._executor, self.view.render_chunk, chunk)
+            self._renders[chunk] = future
+            future.add_done_callback(lambda _: self._renders.pop(chunk, None))
+        return await asyncio.shield(future)
+
+    # Endpoints
+
+    def _transcribe(self, body):
+        """Transcribe a mono WAV request body."""
+        try:
+            with wave.open(io.BytesIO(body), "rb") as wav:
+                if wav.getnchannels() != 1:
+                    raise HttpError(400, "Send mono WAV audio")
+                audio = sr.AudioData(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth())
+        except (wave.Error, EOFError) as e:
+            raise HttpError(400, f"Unreadable WAV audio: {e or type(e).__name__}")
+        return self.model.transcribe(audio)
+
+    async def _command(self, request, writer):
+        deadline_at = self._deadline_at(request)
+        content_type = request.headers.get('content-type', '').split(";")[0].strip().lower()
+        if content_type not in AUDIO_TYPES:
+            text = request.json().get('text')
+            if not isinstance(text, str) or not text.strip():
+                raise HttpError(400, "Missing 'text'")
+
+        await self._admit(deadline_at)
+        outstanding = []
+        try:
+            started = time.perf_counter()
+            result = {'transcript': None}
+            if content_type in AUDIO_TYPES:
+                text = await self._call(outstanding, deadline_at, self._transcribe, request.body)
+                result['transcript'] = text
+            if text is None:
+                result.update(intent=None, args=[],
+                              response=self.model.last_error or "I didn't catch that. Could you please repeat?")
+            else:
+                intent, args, response = await self._call(outstanding, deadline_at, self.controller.handle, text)
+                result.update(intent=intent, args=list(args), response=response)
+            result['ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+            if request.query.get('reply') == 'audio' and result['response']:
+                await self._stream_speech(request, writer, result['response'], deadline_at,
+                                          {'X-Jarvis-Result': json.dumps(result)})
+            else:
+                await write_json(writer, 200, result, request.keep_alive)
+            self.counts['ok'] += 1
+        finally:
+            self._release(outstanding)
+
+    async def _speak(self, request, writer):
+        deadline_at = self._deadline_at(request)
+        text = request.json().get('text')
+        if not isinstance(text, str) or not text.strip():
+            raise HttpError(400, "Missing 'text'")
+
+        await self._admit(deadline_at)
+        try:
+            await self._stream_speech(request, writer, text, deadline_at)
+            self.counts['ok'] += 1
+        finally:
+            self._release([])
+
+    async def _stream_speech(self, request, writer, text, deadline_at, headers=None):
+        """
+        Send text as chunked mp3, one sentence at a time, rendering a few ahead.
+
+        The first sentence must be ready before the deadline, or the request
+        fails with 504 (or 503 if synthesis is unavailable). After that the
+        stream ends early if the deadline passes; X-Speech-Chunks tells the
+        client how many sentences a complete answer has.
+        """
+        chunks = self.view.split(text)
+        renders = collections.deque()
+        upcoming = iter(chunks)
+
+        def render_ahead():
+            while len(renders) <= RENDER_AHEAD:
+                chunk = next(upcoming, None)
+                if chunk is None:
+                    return
+                renders.append(asyncio.ensure_future(self._render(chunk)))
+
+        render_ahead()
+        try:
+            try:
+                first = await asyncio.wait_for(asyncio.shield(renders[0]), self._remaining(deadline_at))
+            except asyncio.TimeoutError:
+                raise HttpError(504, "Deadline exceeded")
+            if first is None:
+                raise HttpError(503, "Speech synthesis unavailable")
+
+            headers = dict(headers or {}, **{'X-Speech-Chunks': len(chunks)})
+            writer.write(_head(200, "audio/mpeg", request.keep_alive, headers))
+            while renders:
+                try:
+                    audio_file = await asyncio.wait_for(asyncio.shield(renders.popleft()),
+                                                        self._remaining(deadline_at))
+                except asyncio.TimeoutError:
+                    self.counts['truncated'] += 1
+                    break
+                render_ahead()
+                if audio_file is None:
+                    continue
+                if isinstance(audio_file, AudioClip):
+                    data = audio_file.data
+                else:
+                    try:
+                        with open(audio_file, "rb") as f:
+                            data = f.read()
+                    except OSError as e:
+                        # Evicted from the speech cache in the meantime
+                        print(f"Could not read {audio_file}: {e}")
+                        continue
+                writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            for pending in renders:
+                pending.cancel()
+
+    async def _health(self, request, writer):
+        stages = {stage: {'count': s['count'], 'p50_ms': round(s['p50'] * 1000, 1),
+                          'p95_ms': round(s['p95'] * 1000, 1)}
+                  for stage, s in get_tracer().summary().items() if stage.startswith('server.')}
+        await write_json(writer, 200, {
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'deadline': self.deadline,
+            'counts': dict(self.counts),
+            'response_cache': self.model.cache.stats(),
+            'knowledge': self.model.knowledge.stats(),
+            'speech_cache': self.view.speech_cache.stats(),
+            'stages': stages,
+            'backends': get_health().snapshot(),
+        }, request.keep_alive)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Jarvis over local HTTP")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--deadline", type=float, default=DEADLINE, help="seconds per request")
+    args = parser.parse_args()
+
+    from controller import CommandController
+    from model import SpeechModel
+    from view import SpeechView
+    from utils.system_monitor import get_sampler
+    from utils.reminders import get_scheduler
+
+    # No microphone: audio arrives with the requests
+    model = SpeechModel(listen=False)
+    # Speech is only streamed to clients, never played here
+    view = SpeechView(output=NullOutput())
+    controller = CommandController(model, view)
+    view.prewarm([controller.get_help()])
+    model.prefetcher.start()
+    model.knowledge.maintain()
+    get_sampler().start()
+    # Nobody to speak to: due reminders are printed
+    get_scheduler().start()
+
+    server = JarvisServer(controller, view, args.host, args.port, args.max_concurrency, args.deadline)
+
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Shutting down.")
+    finally:
+        get_scheduler().stop()
+        model.close()
+        view.speech_cache.close()
+        get_tracer().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# tests/test_audio_capture.py - Segmenting synthetic and WAV audio into phrases
+
+import array
+import wave
+
+import pytest
+
+from utils import audio_capture
+from utils.audio_capture import AudioCapture, RingBuffer, SyntheticSource, WavFileSource, downmix
+
+SCRIPT = [("silence", 1.0), ("tone", 0.8), ("silence", 1.5), ("tone", 0.6), ("silence", 1.5)]
+
+
+def segment(source, **options):
+    """Calibrate on the lead-in silence, then collect every phrase until the source ends."""
+    capture = AudioCapture(source, buffer_seconds=30, **options)
+    capture.calibrate(0.5)
+    capture.start()
+    phrases = []
+    try:
+        while True:
+            audio = capture.listen(timeout=5)
+            if audio is None:
+                break
+            phrases.append(audio)
+    finally:
+        capture.stop()
+    assert capture.ended
+    assert capture.buffer.overruns == 0
+    return phrases
+
+
+def seconds(audio):
+    return len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+
+def test_tones_are_segmented_into_phrases():
+    source = SyntheticSource(SCRIPT)
+    phrases = segment(source)
+    assert len(phrases) == 2
+    chunk = source.chunk_size / source.sample_rate
+    for audio, tone in zip(phrases, (0.8, 0.6)):
+        assert audio.sample_rate == 16000 and audio.sample_width == 2
+        # The tone plus at most the pre-roll before it and the pause after it
+        assert tone <= seconds(audio) <= tone + 0.5 + 0.8 + 2 * chunk
+        assert audio.started_at <= audio.ended_at
+    assert phrases[0].ended_at <= phrases[1].started_at
+
+
+def test_speech_shorter_than_the_phrase_threshold_is_ignored():
+    phrases = segment(SyntheticSource([("silence", 1.0), ("tone", 0.1), ("silence", 1.5)]))
+    assert phrases == []
+
+
+def test_long_speech_is_cut_at_the_phrase_time_limit():
+    phrases = segment(SyntheticSource([("silence", 1.0), ("tone", 3.0), ("silence", 1.5)]),
+                      phrase_time_limit=1.5)
+    assert len(phrases) > 1
+    chunk = 1024 / 16000
+    assert all(seconds(audio) <= 1.5 + chunk for audio in phrases)
+    assert seconds(phrases[0]) >= 1.5
+
+
+def test_unread_phrases_beyond_max_pending_drop_the_oldest():
+    source = SyntheticSource([("silence", 1.0)] + [("tone", 0.5), ("silence", 1.0)] * 3)
+    capture = AudioCapture(source, buffer_seconds=30, max_pending=2)
+    capture.calibrate(0.5)
+    capture.start()
+    try:
+        while not capture._ended.wait(0.05):
+            pass
+        assert capture.dropped_utterances == 1
+        first = capture.listen(timeout=1)
+        second = capture.listen(timeout=1)
+        assert first.started_at < second.started_at
+        assert capture.listen(timeout=1) is None
+    finally:
+        capture.stop()
+
+
+def test_ring_buffer_overwrites_the_oldest_chunk_when_full():
+    buffer = RingBuffer(2)
+    for n in range(3):
+        buffer.write(n)
+    assert buffer.overruns == 1
+    assert [buffer.read(timeout=0), buffer.read(timeout=0)] == [1, 2]
+    assert buffer.read(timeout=0) is None
+
+
+@pytest.mark.parametrize("with_audioop", [True, False])
+def test_downmix_averages_channels(monkeypatch, with_audioop):
+    if not with_audioop:
+        monkeypatch.setattr(audio_capture, "audioop", None)
+    stereo = array.array('h', [100, 300, -200, -400, 7, 7]).tobytes()
+    assert array.array('h', downmix(stereo, 2, 2)).tolist() == [200, -300, 7]
+    assert downmix(stereo, 2, 1) == stereo
+
+
+def write_stereo(path, script):
+    """Write the synthetic script to a 16-bit stereo WAV, the same signal in both channels."""
+    source = SyntheticSource(script)
+    source.open()
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(source.sample_rate)
+        while True:
+            mono = array.array('h', source.read())
+            if not mono:
+                break
+            stereo = array.array('h', [0]) * (2 * len(mono))
+            stereo[0::2] = mono
+            stereo[1::2] = mono
+            wav.writeframes(stereo.tobytes())
+    return path
+
+
+@pytest.mark.parametrize("with_audioop", [True, False])
+def test_stereo_wav_is_downmixed_and_segmented(tmp_path, monkeypatch, with_audioop):
+    if not with_audioop:
+        monkeypatch.setattr(audio_capture, "audioop", None)
+    source = WavFileSource(write_stereo(str(tmp_path / "stereo.wav"), SCRIPT))
+    phrases = segment(source)
+    assert len(phrases) == 2
+    assert all(audio.sample_width == 2 for audio in phrases)
+
+
+def test_multichannel_24_bit_wav_without_audioop_is_refused(tmp_path, monkeypatch):
+    path = str(tmp_path / "stereo24.wav")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(3)
+        wav.setframerate(16000)
+        wav.writeframes(b"\0" * 6 * 160)
+    monkeypatch.setattr(audio_capture, "audioop", None)
+    with pytest.raises(ValueError):
+        WavFileSource(path)
@@ -0,0 +1,62 @@
+# tests/test_handler_pool.py - Deadlines on pooled handlers and what an abandoned handler can see
+
+import threading
+
+import pytest
+
+from utils.handler_pool import HandlerPool, abandoned, local, slow
+
+
+class Handlers:
+    def __init__(self):
+        self.checked = threading.Event()
+        self.saw_abandoned = None
+
+    @slow(fallback="Too slow.", deadline=0.05)
+    def stuck(self):
+        # Outlives its deadline, then looks before acting
+        threading.Event().wait(0.2)
+        self.saw_abandoned = abandoned()
+        self.checked.set()
+        return "late answer"
+
+    @slow(fallback="Too slow.", deadline=1.0)
+    def quick(self):
+        self.saw_abandoned = abandoned()
+        return "answer"
+
+    @local
+    def inline(self):
+        return abandoned()
+
+
+@pytest.fixture
+def pool():
+    pool = HandlerPool(workers=2)
+    yield pool
+    pool.close()
+
+
+def test_handler_past_its_deadline_sees_it_was_abandoned(pool):
+    handlers = Handlers()
+    assert pool.run(handlers.stuck, ()) == "Too slow."
+    assert handlers.checked.wait(2)
+    assert handlers.saw_abandoned is True
+    assert pool.stats()['abandoned'] == 1
+
+
+def test_handler_within_its_deadline_is_not_abandoned(pool):
+    handlers = Handlers()
+    assert pool.run(handlers.quick, ()) == "answer"
+    assert handlers.saw_abandoned is False
+
+
+def test_abandoned_in_run_all(pool):
+    handlers = Handlers()
+    assert pool.run_all([(handlers.stuck, ()), (handlers.inline, ())]) == ["Too slow.", False]
+    assert handlers.checked.wait(2)
+    assert handlers.saw_abandoned is True
+
+
+def test_abandoned_outside_the_pool():
+    assert abandoned() is False
@@ -0,0 +1,136 @@
+# tests/test_http_client.py - HttpClient retries and time budget against a scripted session
+
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from utils import http_client
+from utils.http_client import HttpClient
+
+
+class Clock:
+    """Fake monotonic clock; sleep() and slow responses move it forward."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """
+    Plays back one outcome per get(): a status code or an exception to raise.
+
+    Each call takes `took` seconds of the fake clock and records its timeout.
+    """
+
+    def __init__(self, clock, outcomes, took=0.0):
+        self.clock = clock
+        self.outcomes = list(outcomes)
+        self.took = took
+        self.timeouts = []
+        self.responses = []
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        self.clock.now += self.took
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = FakeResponse(outcome)
+        self.responses.append(response)
+        return response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_client, "time", SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def client_for(clock, outcomes, took=0.0, **options):
+    client = HttpClient(backoff=0.25, **options)
+    # Worst-case jitter, so budget checks are deterministic
+    client._delay = lambda attempt: client.backoff * (2 ** attempt)
+    client.session = FakeSession(clock, outcomes, took)
+    return client
+
+
+def test_success_is_returned_without_retrying(clock):
+    client = client_for(clock, [200])
+    assert client.get("http://api").status_code == 200
+    assert len(client.session.timeouts) == 1
+
+
+def test_connection_error_is_retried_until_a_response(clock):
+    client = client_for(clock, [requests.ConnectionError("reset"), requests.Timeout("slow"), 200])
+    assert client.get("http://api").status_code == 200
+    assert len(client.session.timeouts) == 3
+    # Backoff of 0.25 s then 0.5 s between the attempts
+    assert clock.now == pytest.approx(100.75)
+
+
+def test_retryable_status_is_retried_and_the_failed_response_closed(clock):
+    client = client_for(clock, [503, 200])
+    assert client.get("http://api").status_code == 200
+    first, second = client.session.responses
+    assert first.closed and not second.closed
+
+
+def test_other_statuses_are_returned_as_is(clock):
+    client = client_for(clock, [404, 200])
+    assert client.get("http://api").status_code == 404
+    assert len(client.session.timeouts) == 1
+
+
+def test_last_error_is_raised_once_retries_run_out(clock):
+    client = client_for(clock, [requests.ConnectionError("one"), requests.ConnectionError("two"), 200],
+                        retries=1)
+    with pytest.raises(requests.ConnectionError, match="two"):
+        client.get("http://api")
+    assert len(client.session.timeouts) == 2
+
+
+def test_last_retryable_response_is_returned_once_retries_run_out(clock):
+    client = client_for(clock, [503, 502, 200], retries=1)
+    assert client.get("http://api").status_code == 502
+
+
+def test_timeouts_are_capped_by_the_remaining_budget(clock):
+    client = client_for(clock, [requests.Timeout("slow"), 200], took=2.0,
+                        connect_timeout=3.05, read_timeout=8, budget=5)
+    assert client.get("http://api").status_code == 200
+    first, second = client.session.timeouts
+    assert first == (3.05, 5)
+    # 2 s spent on the first attempt and 0.25 s backing off
+    assert second == pytest.approx((2.75, 2.75))
+
+
+def test_no_retry_is_started_once_the_budget_is_spent(clock):
+    client = client_for(clock, [requests.Timeout("slow")] * 3, took=0.9, budget=1.0)
+    with pytest.raises(requests.Timeout):
+        client.get("http://api")
+    # 0.1 s left after the first attempt is less than the backoff plus MIN_ATTEMPT
+    assert len(client.session.timeouts) == 1
+    assert clock.now == pytest.approx(100.9)
+
+
+def test_per_call_budget_overrides_the_client_budget(clock):
+    client = client_for(clock, [503, 200], took=0.5, budget=10)
+    assert client.get("http://api", budget=0.6).status_code == 503
+    assert client.session.timeouts == [(pytest.approx(0.6), pytest.approx(0.6))]
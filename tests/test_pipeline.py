@@ -0,0 +1,222 @@
+# tests/test_pipeline.py - The staged pipeline with fake capture, recognizer, controller and output
+
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from utils.barge_in import cutoff_summary
+from utils.pipeline import AssistantPipeline
+
+
+class FakeCapture:
+    energy_threshold = 300
+    seconds_per_chunk = 0.02
+
+    def __init__(self):
+        self.ended = False
+        self.listeners = []
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+
+class FakePrefetcher:
+    @contextmanager
+    def paused(self):
+        yield
+
+
+class FakeModel:
+    """
+    Hands out phrases in order; transcribe maps each to a text or raises it.
+
+    With end=False the source stays open after the last phrase, as a live
+    microphone does, until capture.ended is set.
+    """
+
+    def __init__(self, phrases, end=True):
+        self.end = end
+        self.capture = FakeCapture()
+        self.prefetcher = FakePrefetcher()
+        self.last_error = None
+        self.transcribed = []
+        self._phrases = list(phrases)
+
+    def listen(self, timeout=None):
+        if not self._phrases:
+            if self.end:
+                self.capture.ended = True
+            else:
+                time.sleep(0.01)
+            return None
+        return self._phrases.pop(0)
+
+    def transcribe(self, audio):
+        self.transcribed.append(audio)
+        if isinstance(audio.text, Exception):
+            raise audio.text
+        return audio.text
+
+
+class FakeView:
+    def __init__(self):
+        self.played = []
+
+    def speak_action(self, text):
+        pass
+
+    def split(self, text):
+        return [text]
+
+    def render_chunk(self, chunk):
+        return chunk
+
+    def play_chunk(self, chunk, audio_file):
+        self.played.append(chunk)
+        return True
+
+    def interrupt(self):
+        pass
+
+    def clear_interrupt(self):
+        pass
+
+
+class FakeController:
+    def process_command(self, text, acknowledge=None):
+        return f"You said {text}"
+
+
+def phrase(text, started_at=None, ended_at=None):
+    return SimpleNamespace(text=text, started_at=started_at, ended_at=ended_at)
+
+
+def run(phrases):
+    model, view = FakeModel(phrases), FakeView()
+    pipeline = AssistantPipeline(model, view, FakeController(), ["goodbye"], barge_in=False)
+    pipeline.start()
+    assert pipeline.wait(timeout=10)
+    return pipeline, model, view
+
+
+def test_recognizer_error_is_answered_and_listening_goes_on():
+    pipeline, model, view = run([phrase(ConnectionError("network is down")), phrase("what time is it")])
+    assert len(model.transcribed) == 2
+    assert view.played == ["I didn't catch that. Could you repeat?", "You said what time is it"]
+
+
+def test_phrase_overlapping_playback_is_dropped_as_echo():
+    now = time.perf_counter()
+    echo = phrase("you said hello", now - 1.0, now - 0.5)
+    model, view = FakeModel([echo, phrase("hello", now + 1, now + 2)]), FakeView()
+    pipeline = AssistantPipeline(model, view, FakeController(), ["goodbye"], barge_in=False)
+    pipeline._playback.append([now - 1.2, now - 0.6])
+    pipeline.start()
+    assert pipeline.wait(timeout=10)
+    assert [audio.text for audio in model.transcribed] == ["hello"]
+    assert pipeline.echoes_dropped == 1
+
+
+@pytest.mark.parametrize("playback, onsets, echo", [
+    ([[10.0, 12.0]], [], True),        # Heard while Jarvis spoke
+    ([[10.0, None]], [], True),        # Jarvis is still speaking
+    ([[10.0, 12.0]], [11.2], False),   # The user talked over the answer
+    ([[10.0, 12.0]], [9.0], True),     # A barge-in belonging to an earlier phrase
+    ([[5.0, 10.5]], [], True),         # Playback ended inside the phrase
+    ([[5.0, 9.0]], [], False),         # Playback ended before the phrase
+])
+def test_is_echo(playback, onsets, echo):
+    pipeline = AssistantPipeline(FakeModel([]), FakeView(), FakeController(), [], barge_in=False)
+    pipeline._playback.extend(playback)
+    pipeline._barge_onsets.extend(onsets)
+    assert pipeline._is_echo(phrase("hi", 10.2, 11.5)) is echo
+
+
+def test_echo_gate_off_keeps_overlapping_phrases():
+    now = time.perf_counter()
+    model, view = FakeModel([phrase("hello", now - 1.0, now - 0.5)]), FakeView()
+    pipeline = AssistantPipeline(model, view, FakeController(), ["goodbye"], barge_in=False, echo_gate=False)
+    pipeline._playback.append([now - 1.2, None])
+    pipeline.start()
+    assert pipeline.wait(timeout=10)
+    assert view.played == ["You said hello"]
+
+
+class PlayingView(FakeView):
+    """Plays each sentence for a second in 20 ms blocks, stopping at the block after interrupt()."""
+
+    block = 0.02
+
+    def __init__(self):
+        super().__init__()
+        self._cancel = threading.Event()
+
+    def split(self, text):
+        return [sentence + "." for sentence in text.split(". ")]
+
+    def play_chunk(self, chunk, audio_file):
+        self.played.append(chunk)
+        deadline = time.perf_counter() + 1.0
+        while time.perf_counter() < deadline:
+            if self._cancel.is_set():
+                return False
+            time.sleep(self.block)
+        return True
+
+    def interrupt(self):
+        self._cancel.set()
+
+    def clear_interrupt(self):
+        self._cancel.clear()
+
+
+class AnsweringController:
+    def process_command(self, text, acknowledge=None):
+        return "First sentence. Second sentence. Third sentence"
+
+
+def talk_over(capture, monitor, seconds=0.2):
+    """Feed loud chunks to the capture listeners once Jarvis has started speaking."""
+    deadline = time.perf_counter() + 5
+    while not monitor.armed and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    for _ in range(int(seconds / capture.seconds_per_chunk)):
+        for listener in list(capture.listeners):
+            listener(capture.energy_threshold * 10, time.perf_counter())
+        time.sleep(capture.seconds_per_chunk)
+
+
+def test_barge_in_cuts_the_answer_off_within_a_block():
+    model, view = FakeModel([phrase("help")], end=False), PlayingView()
+    pipeline = AssistantPipeline(model, view, AnsweringController(), ["goodbye"], barge_in=True)
+    pipeline.start()
+    talk_over(model.capture, pipeline.monitor)
+    deadline = time.perf_counter() + 5
+    while not pipeline.turns and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+    model.capture.ended = True
+    assert pipeline.wait(timeout=5)
+
+    turn = pipeline.turns[0]
+    assert 'interrupted' in turn.times and 'cut' in turn.times
+    # The first sentence is cut off, the rest is never played
+    assert view.played == ["First sentence."]
+    cutoff = turn.times['cut'] - turn.times['interrupted']
+    assert 0 <= cutoff <= PlayingView.block + 0.03
+    summary = cutoff_summary(pipeline.turns)
+    assert summary['interruptions'] == 1
+    assert summary['cutoff_max'] == cutoff
+
+
+def test_cutoff_summary_ignores_turns_cut_short_without_a_barge_in():
+    turn = phrase("hi")
+    turn.times = {'cut': 2.0}
+    assert cutoff_summary([turn])['interruptions'] == 0
@@ -0,0 +1,96 @@
+# tests/test_prefetch.py - Which targets the prefetcher refreshes, and when it backs off
+
+import pytest
+
+from utils import prefetch
+from utils.prefetch import PrefetchScheduler
+from utils.response_cache import NO_STORE, ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.fixture
+def build(tmp_path):
+    def build(answers):
+        clock = Clock()
+        calls = []
+
+        def fetch(key):
+            calls.append(key)
+            return answers[key]
+
+        scheduler = PrefetchScheduler(ResponseCache(":memory:", clock=clock), {'weather': fetch},
+                                      targets={'weather': list(answers)},
+                                      usage_path=str(tmp_path / "usage.json"), clock=clock)
+        scheduler._executor = InlineExecutor()
+        return scheduler, clock, calls
+    return build
+
+
+def test_successful_prefetch_is_counted_and_not_repeated(build):
+    scheduler, clock, calls = build({'paris': {'temp': 20}})
+    assert scheduler.run_once() == 1
+    assert scheduler.run_once() == 0
+    assert calls == ['paris']
+    assert scheduler.stats()['prefetches'] == 1
+
+
+@pytest.mark.parametrize("answer", [None, {'temp': 20, NO_STORE: True}])
+def test_failing_target_backs_off_exponentially(build, answer):
+    scheduler, clock, calls = build({'your current location': answer})
+    assert scheduler.run_once() == 1
+    assert scheduler.stats()['prefetches'] == 0
+    assert scheduler.stats()['failures'] == 1
+
+    # Not retried on the next idle ticks
+    assert scheduler.run_once() == 0
+    clock.now += prefetch.RETRY_BACKOFF - 1
+    assert scheduler.run_once() == 0
+    clock.now += 1
+    assert scheduler.run_once() == 1
+
+    # Twice as long after the second failure
+    clock.now += prefetch.RETRY_BACKOFF
+    assert scheduler.run_once() == 0
+    clock.now += prefetch.RETRY_BACKOFF
+    assert scheduler.run_once() == 1
+    assert len(calls) == 3
+
+
+def test_backoff_is_capped(build, monkeypatch):
+    monkeypatch.setattr(prefetch, "MAX_BACKOFF", 100.0)
+    scheduler, clock, calls = build({'nowhere': None})
+    for _ in range(10):
+        clock.now += 100.0
+        assert scheduler.run_once() == 1
+    assert len(calls) == 10
+
+
+def test_success_clears_the_backoff(build):
+    answers = {'paris': None}
+    scheduler, clock, calls = build(answers)
+    scheduler.run_once()
+    answers['paris'] = {'temp': 20}
+    clock.now += prefetch.RETRY_BACKOFF
+    assert scheduler.run_once() == 1
+    assert scheduler._failures == {}
+
+
+def test_prefetching_resumes_after_the_last_overlapping_pause(build):
+    scheduler, _, _ = build({})
+    with scheduler.paused():
+        with scheduler.paused():
+            pass
+        assert not scheduler._idle.is_set()
+    assert scheduler._idle.is_set()
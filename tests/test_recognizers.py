@@ -0,0 +1,85 @@
+# tests/test_recognizers.py - Which backend's answer the racing recognizer keeps
+
+import threading
+import time
+
+import pytest
+import speech_recognition as sr
+
+from utils.recognizers import RacingRecognizer, RecognizerBackend
+
+
+class FakeBackend(RecognizerBackend):
+    """Answers (text, confidence) or raises after delay seconds."""
+
+    def __init__(self, name, answer, delay=0.0, local=False, calibrated=True):
+        super().__init__(recognizer=object())
+        self.name = name
+        self.answer = answer
+        self.delay = delay
+        self.local = local
+        self.calibrated = calibrated
+        self.released = threading.Event()
+
+    def transcribe(self, audio):
+        self.released.wait(self.delay)
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return self.answer
+
+
+def sphinx(answer=("what is the weather", 1.0), delay=0.0):
+    # Sphinx reports no usable confidence, here a certain-looking 1.0
+    return FakeBackend("sphinx", answer, delay, local=True, calibrated=False)
+
+
+def google(answer, delay=0.05):
+    return FakeBackend("google", answer, delay)
+
+
+@pytest.fixture
+def race():
+    racers = []
+
+    def build(*backends, deadline=1.0):
+        racer = RacingRecognizer(backends, deadline=deadline)
+        racers.append((racer, backends))
+        return racer
+
+    yield build
+    for _, backends in racers:
+        for backend in backends:
+            backend.released.set()
+
+
+def test_uncalibrated_sphinx_does_not_beat_google(race):
+    racer = race(sphinx(), google(("what's the weather", 0.9)))
+    assert racer.recognize(b"") == "what's the weather"
+    assert racer.summary()['google']['wins'] == 1
+
+
+def test_low_confidence_google_still_beats_sphinx(race):
+    racer = race(sphinx(), google(("what's the weather", 0.3)))
+    assert racer.recognize(b"") == "what's the weather"
+
+
+def test_sphinx_answers_when_google_fails(race):
+    racer = race(sphinx(), google(sr.RequestError("offline")))
+    started = time.perf_counter()
+    assert racer.recognize(b"") == "what is the weather"
+    # No wait for the deadline once every calibrated engine is done
+    assert time.perf_counter() - started < 0.5
+    assert racer.last_error is None
+
+
+def test_sphinx_answers_when_google_misses_the_deadline(race):
+    racer = race(sphinx(), google(("too late", 0.9), delay=5.0), deadline=0.2)
+    started = time.perf_counter()
+    assert racer.recognize(b"") == "what is the weather"
+    assert 0.2 <= time.perf_counter() - started < 1.0
+    assert racer.summary()['sphinx']['wins'] == 1
+
+
+def test_nothing_understood(race):
+    racer = race(sphinx(sr.UnknownValueError()), google(sr.UnknownValueError()))
+    assert racer.recognize(b"") is None
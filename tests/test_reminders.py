@@ -0,0 +1,196 @@
+# tests/test_reminders.py - When spoken reminders fall due, and when the scheduler delivers them
+
+import datetime
+
+import pytest
+
+from utils import reminders
+from utils.commands import create_reminder
+from utils.reminders import ReminderScheduler, parse_reminder
+
+
+def at(day, hour, minute=0):
+    """Local timestamp on a day of June 2026 (no daylight saving change nearby)."""
+    return datetime.datetime(2026, 6, day, hour, minute).timestamp()
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def scheduler():
+    clock = Clock(at(10, 12))
+    delivered = []
+    scheduler = ReminderScheduler(":memory:", clock=clock, deliver=delivered.append)
+    scheduler.delivered_texts = delivered
+    yield scheduler
+    scheduler.close()
+
+
+@pytest.mark.parametrize("text, now, message, due", [
+    # A bare hour is the next time the clock shows it
+    ("call mom at 6", at(10, 15), "call mom", at(10, 18)),
+    ("call mom at 6", at(10, 19), "call mom", at(11, 6)),
+    ("call mom at 6 pm", at(10, 19), "call mom", at(11, 18)),
+    ("call mom at 6 am", at(10, 5), "call mom", at(10, 6)),
+    ("stretch at 18:30", at(10, 9), "stretch", at(10, 18, 30)),
+    ("call mom at 6 pm tomorrow", at(10, 9), "call mom", at(11, 18)),
+    ("tomorrow at 7:30 water the plants", at(10, 23), "water the plants", at(11, 7, 30)),
+    ("eat lunch at noon", at(10, 11), "eat lunch", at(10, 12)),
+    ("eat lunch at noon", at(10, 13), "eat lunch", at(11, 12)),
+    ("lock the door at midnight", at(10, 23), "lock the door", at(11, 0)),
+    ("lock the door at midnight", at(10, 0, 30), "lock the door", at(11, 0)),
+    ("take out the trash tonight", at(10, 15), "take out the trash", at(10, 20)),
+    ("take out the trash tonight at 9", at(10, 15), "take out the trash", at(10, 21)),
+    ("tomorrow to pay rent", at(10, 15), "pay rent", at(11, reminders.DEFAULT_HOUR)),
+    ("in 20 minutes to stretch", at(10, 15), "stretch", at(10, 15, 20)),
+])
+def test_parse_reminder_times(text, now, message, due):
+    assert parse_reminder(text, now) == (message, due)
+
+
+@pytest.mark.parametrize("text", ["call mom at 13 pm", "call mom at 25", "call mom at 6:75"])
+def test_impossible_clock_times_have_no_due_time(text):
+    assert parse_reminder(text, at(10, 12))[1] is None
+
+
+def test_tonight_after_eight_is_already_past(scheduler):
+    scheduler.clock.now = at(10, 21)
+    assert create_reminder("take out the trash tonight", scheduler) == "That time has already passed."
+    assert scheduler.pending() == []
+
+
+def test_run_due_delivers_only_what_is_due(scheduler):
+    scheduler.add("stretch", at(10, 12, 20))
+    scheduler.add("call mom", at(10, 18))
+    scheduler.clock.now = at(10, 12, 19)
+    assert scheduler.run_due() == 0
+    scheduler.clock.now = at(10, 12, 20)
+    assert scheduler.run_due() == 1
+    assert scheduler.delivered_texts == ["Reminder: stretch."]
+    assert [message for _, _, message in scheduler.pending()] == ["call mom"]
+
+
+def test_reminders_due_together_are_announced_together(scheduler):
+    scheduler.add("stretch", at(10, 12, 1))
+    scheduler.add("drink water", at(10, 12, 1))
+    scheduler.clock.now = at(10, 12, 1)
+    assert scheduler.run_due() == 2
+    assert scheduler.delivered_texts == ["You have 2 reminders: stretch; drink water."]
+
+
+def test_reminder_missed_while_not_running_is_delivered_on_restart(tmp_path):
+    path = str(tmp_path / "reminders.sqlite3")
+    clock = Clock(at(10, 12))
+    first = ReminderScheduler(path, clock=clock, deliver=lambda text: None)
+    first.add("call mom", at(10, 18))
+    first.add("pay rent", at(12, 9))
+    first.close()
+
+    delivered = []
+    clock.now = at(11, 8)
+    second = ReminderScheduler(path, clock=clock, deliver=delivered.append)
+    try:
+        assert second.run_due() == 1
+        assert delivered == ["Reminder: call mom (due at 6:00 PM)."]
+        assert [message for _, _, message in second.pending()] == ["pay rent"]
+    finally:
+        second.close()
+
+    # Delivered once: a third start does not announce it again
+    third = ReminderScheduler(path, clock=clock, deliver=delivered.append)
+    try:
+        assert third.run_due() == 0
+    finally:
+        third.close()
+
+
+def test_cancelled_reminder_is_skipped_when_it_comes_up(scheduler):
+    kept = scheduler.add("call mom", at(10, 13))
+    cancelled = scheduler.add("stretch", at(10, 12, 30))
+    assert scheduler.cancel(cancelled)
+    assert not scheduler.cancel(cancelled)
+    assert scheduler.stats()['stale'] == 1
+    assert scheduler.next_due() == at(10, 13)
+    assert scheduler.stats()['stale'] == 0
+
+    scheduler.clock.now = at(10, 13)
+    assert scheduler.run_due() == 1
+    assert scheduler.delivered_texts == ["Reminder: call mom."]
+    assert kept not in [i for _, i, _ in scheduler.pending()]
+
+
+def test_heap_is_rebuilt_once_cancelled_entries_pile_up(scheduler, monkeypatch):
+    monkeypatch.setattr(reminders, "REBUILD_AFTER", 4)
+    ids = [scheduler.add(f"reminder {n}", at(10, 13) + n) for n in range(8)]
+    for reminder_id in ids[1:6]:
+        scheduler.cancel(reminder_id)
+    # Five stale entries against three pending ones: rebuilt without them
+    assert scheduler.stats() == {'pending': 3, 'delivered': 0, 'heap': 3, 'stale': 0}
+
+    scheduler.clock.now = at(10, 13) + 7
+    assert scheduler.run_due() == 3
+    assert scheduler.delivered_texts == ["You have 3 reminders: reminder 0; reminder 6; reminder 7."]
+    assert scheduler.stats()['stale'] == 0
+
+
+def test_cancel_matching_cancels_every_match(scheduler):
+    scheduler.add("call mom", at(10, 18))
+    scheduler.add("call the bank", at(10, 17))
+    scheduler.add("stretch", at(10, 16))
+    assert scheduler.cancel_matching("call") == ["call the bank", "call mom"]
+    assert [message for _, _, message in scheduler.pending()] == ["stretch"]
+
+
+def test_failed_announcement_keeps_the_reminder_pending(tmp_path):
+    path = str(tmp_path / "reminders.sqlite3")
+    clock = Clock(at(10, 12))
+    attempts = []
+
+    def deliver(text):
+        attempts.append(text)
+        if len(attempts) == 1:
+            raise RuntimeError("the pipeline is stopping")
+
+    scheduler = ReminderScheduler(path, clock=clock, deliver=deliver)
+    try:
+        scheduler.add("call mom", at(10, 12, 1))
+        clock.now = at(10, 12, 1)
+        assert scheduler.run_due() == 0
+        assert [message for _, _, message in scheduler.pending()] == ["call mom"]
+        # Not marked delivered on disk either
+        restarted = ReminderScheduler(path, clock=clock)
+        assert [message for _, _, message in restarted.pending()] == ["call mom"]
+        restarted.close()
+
+        # Retried later, not on every wake of the timer
+        assert scheduler.run_due() == 0
+        assert len(attempts) == 1
+        clock.now += reminders.RETRY_AFTER
+        assert scheduler.run_due() == 1
+        assert attempts[-1] == "Reminder: call mom."
+        assert scheduler.pending() == []
+        assert scheduler.stats()['delivered'] == 1
+    finally:
+        scheduler.close()
+
+
+def test_reminder_cancelled_before_a_retry_is_not_delivered(scheduler):
+    def deliver(text):
+        raise RuntimeError("queue full")
+
+    scheduler.deliver = deliver
+    reminder_id = scheduler.add("stretch", at(10, 12, 1))
+    scheduler.clock.now = at(10, 12, 1)
+    assert scheduler.run_due() == 0
+    assert scheduler.cancel(reminder_id)
+    scheduler.deliver = scheduler.delivered_texts.append
+    scheduler.clock.now += reminders.RETRY_AFTER
+    assert scheduler.run_due() == 0
+    assert scheduler.delivered_texts == []
+    assert scheduler.stats()['stale'] == 0
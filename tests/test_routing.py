@@ -0,0 +1,80 @@
+# tests/test_routing.py - Which handler the command table picks for an utterance
+
+import pytest
+
+from controller import CommandController
+from utils.instrumentation import get_tracer
+
+
+@pytest.fixture(scope="module")
+def controller():
+    controller = CommandController(None, None)
+    yield controller
+    controller.handler_pool.close()
+
+
+def route(controller, text):
+    found = controller.router.dispatch(text)
+    return (found[0].__name__, found[1]) if found else None
+
+
+def corrected_intent(controller, text):
+    """Handler name after the fuzzy stage, as _process would pick it."""
+    found = controller._correct_route(text, controller.router.dispatch(text), get_tracer())
+    return found[0].__name__ if found else None
+
+
+@pytest.mark.parametrize("text, handler, reminder", [
+    ("remind me to open youtube in 5 minutes", "set_reminder", "open youtube in 5 minutes"),
+    ("remind me to check the weather and call mom in 10 minutes", "set_reminder",
+     "check the weather and call mom in 10 minutes"),
+    ("set a reminder to search for flights at 6 pm", "set_reminder", "search for flights at 6 pm"),
+    ("remind me to tell me about the news tomorrow at 9", "set_reminder", "tell me about the news tomorrow at 9"),
+    ("remind me to play music at 7", "set_reminder", "play music at 7"),
+])
+def test_reminder_text_with_other_commands(controller, text, handler, reminder):
+    assert route(controller, text) == (handler, (reminder,))
+
+
+def test_reminder_is_not_split_as_a_compound(controller):
+    text = "remind me to check the weather and tell me the news in 10 minutes"
+    assert controller._split_compound(text) is None
+
+
+def test_reminder_after_another_command_is_still_split(controller):
+    parts = controller._split_compound("what's the time and remind me to call mom in 10 minutes")
+    assert [handler.__name__ for _, handler, _ in parts] == ["tell_time", "set_reminder"]
+
+
+@pytest.mark.parametrize("text, handler", [
+    ("tell me about the program in the last episode", "get_information"),
+    ("tell me about the drama in the past season", "get_information"),
+    ("ram usage over the last hour", "system_trend"),
+    ("how has my cpu been over the past 10 minutes", "system_trend"),
+    ("cancel my reminder to call mom", "cancel_reminder"),
+    ("what are my reminders", "list_reminders"),
+    ("open youtube", "open_website"),
+    ("what's the weather in london", "get_weather"),
+])
+def test_other_commands_unchanged(controller, text, handler):
+    assert route(controller, text)[0] == handler
+
+
+@pytest.mark.parametrize("text", [
+    "tell me about leather",
+    "tell me about heather",
+    "tell me about the feather",
+    "tell me about the nets",
+    "tell me about helm",
+])
+def test_explicit_topics_are_not_corrected_into_commands(controller, text):
+    assert corrected_intent(controller, text) == "get_information"
+
+
+@pytest.mark.parametrize("text, handler", [
+    ("what's the whether in paris", "get_weather"),
+    ("open you tube", "open_website"),
+    ("tell me the newz", "tell_news"),
+])
+def test_misheard_commands_are_corrected(controller, text, handler):
+    assert corrected_intent(controller, text) == handler
@@ -0,0 +1,158 @@
+# tests/test_wake_word.py - The wake word gate and command window with a scripted detector
+
+import array
+import math
+
+import pytest
+import speech_recognition as sr
+
+from benchmarks.fixtures import wake_templates
+from utils import audio_prep, wake_word
+from utils.wake_word import TemplateDetector, WakeWordGate, features, open_gate
+
+RATE = 16000
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class ScriptedDetector:
+    """Answers detect() with (detected, score, end) results in order."""
+
+    name = "scripted"
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def detect(self, audio, skip_seconds=0.0):
+        self.calls.append(skip_seconds)
+        return self.results.pop(0)
+
+
+MISSED = (False, math.inf, 0.0)
+# Found, with no idea where the word ends (as the sphinx detector answers)
+FOUND = (True, 0.5, 0.0)
+
+
+def audio(*parts):
+    """AudioData from (kind, seconds) parts, kind 'loud' or 'quiet'."""
+    samples = array.array('h')
+    for kind, seconds in parts:
+        amplitude = 8000 if kind == "loud" else 0
+        samples.extend(int(amplitude * math.sin(2 * math.pi * 440 * n / RATE)) for n in range(int(seconds * RATE)))
+    phrase = sr.AudioData(samples.tobytes(), RATE, 2)
+    phrase.started_at, phrase.ended_at = 5.0, 6.0
+    return phrase
+
+
+def seconds(phrase):
+    return len(phrase.frame_data) / (phrase.sample_rate * phrase.sample_width)
+
+
+def gate_for(*results, window=8.0):
+    woken = []
+    gate = WakeWordGate(ScriptedDetector(*results), window=window, clock=Clock(),
+                        on_wake=lambda: woken.append(True))
+    gate.woken = woken
+    return gate
+
+
+def test_phrase_without_the_wake_word_is_dropped():
+    gate = gate_for(MISSED)
+    assert gate.accept(audio(("loud", 1.0))) is None
+    assert not gate.window_open
+    assert gate.stats()['passed'] == 0
+
+
+def test_wake_word_passes_the_phrase_and_opens_the_window():
+    gate = gate_for(FOUND)
+    phrase = audio(("loud", 1.0))
+    assert gate.accept(phrase, pre_roll=0.3) is phrase
+    assert gate.detector.calls == [0.3]
+    assert gate.window_open
+    assert gate.stats()['detections'] == 1 and gate.stats()['passed'] == 1
+
+
+def test_wake_word_is_cut_off_when_its_end_is_known():
+    gate = gate_for((True, 0.5, 0.5))
+    command = gate.accept(audio(("loud", 0.5), ("loud", 1.0)), energy_threshold=300)
+    assert seconds(command) == pytest.approx(1.0)
+    assert (command.started_at, command.ended_at) == (5.0, 6.0)
+    assert gate.woken == []
+
+
+def test_wake_word_alone_opens_the_window_for_the_next_phrase():
+    gate = gate_for((True, 0.5, 0.5))
+    assert gate.accept(audio(("loud", 0.5), ("quiet", 0.8)), energy_threshold=300) is None
+    assert gate.woken == [True]
+    assert gate.window_open
+
+    # Inside the window the detector is not consulted
+    gate.clock.now += 7.0
+    phrase = audio(("loud", 1.0))
+    assert gate.accept(phrase) is phrase
+    assert gate.detector.results == [] and len(gate.detector.calls) == 1
+
+
+def test_phrases_inside_the_window_do_not_extend_it():
+    gate = gate_for(FOUND, MISSED)
+    gate.accept(audio(("loud", 1.0)))
+    gate.clock.now += 5.0
+    assert gate.accept(audio(("loud", 1.0))) is not None
+    gate.clock.now += 3.0
+    assert not gate.window_open
+    assert gate.accept(audio(("loud", 1.0))) is None
+    stats = gate.stats()
+    assert (stats['phrases'], stats['detections'], stats['passed']) == (3, 1, 2)
+
+
+@pytest.mark.parametrize("text, stripped", [
+    ("Jarvis, what time is it", "what time is it"),
+    ("jarvis what time is it", "what time is it"),
+    ("Jarvis!", None),
+    ("what time is it", "what time is it"),
+    (None, None),
+])
+def test_strip_removes_a_leading_wake_word(text, stripped):
+    assert gate_for().strip(text) == stripped
+
+
+def with_templates_in(monkeypatch, directory):
+    load = TemplateDetector.from_directory.__func__
+    monkeypatch.setattr(TemplateDetector, "from_directory",
+                        classmethod(lambda cls, sensitivity: load(cls, str(directory), sensitivity)))
+
+
+def test_auto_mode_without_recordings_has_no_gate(tmp_path, monkeypatch):
+    with_templates_in(monkeypatch, tmp_path)
+    assert open_gate("") is None
+    assert open_gate("off") is None
+
+
+def test_auto_mode_with_recordings_uses_the_template_detector(tmp_path, monkeypatch):
+    wake_templates(str(tmp_path))
+    with_templates_in(monkeypatch, tmp_path)
+    gate = open_gate("", window=4.0)
+    assert gate.detector.name == "template" and gate.window == 4.0
+    assert open_gate("off") is None
+
+
+@pytest.mark.skipif(wake_word.audioop is None, reason="upsampling needs audioop")
+def test_features_upsample_low_rate_audio():
+    phrase = audio(("loud", 0.5))
+    low, _ = wake_word.audioop.ratecv(phrase.frame_data, 2, 1, RATE, 8000, None)
+    assert len(features(low, 8000)) == pytest.approx(len(features(phrase.frame_data)), abs=2)
+
+
+def test_features_refuse_audio_they_cannot_convert(monkeypatch):
+    monkeypatch.setattr(audio_prep, "np", None)
+    monkeypatch.setattr(audio_prep, "audioop", None)
+    monkeypatch.setattr(wake_word, "audioop", None)
+    with pytest.raises(ValueError):
+        features(audio(("loud", 0.5)).frame_data, 44100)
@@ -1,10 +1,13 @@
 # utils/api_manager.py - Functions for API interactions
 
-import requests
 import json
 import os
 from datetime import datetime
 import webbrowser
+from utils.health import CircuitOpenError, get_health
+from utils.http_client import RETRY_STATUSES, get_client
+from utils.instrumentation import traced
+from utils.response_cache import NO_STORE
 # Add your API keys here or load from environment variables
 # NEWS_API_KEY = os.environ.get("NEWS_API_KEY", "your_news_api_key")
 # WEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "your_weather_api_key")
@@ -13,6 +16,45 @@ import webbrowser
 NEWS_API_KEY = "Your API"
 WEATHER_API_KEY = "Your API"
 
+# Endpoints, overridable so the calls can be pointed at a local stub server
+NEWS_API_URL = os.environ.get("JARVIS_NEWS_API_URL", "https://newsapi.org/v2/top-headlines")
+WEATHER_API_URL = os.environ.get("JARVIS_WEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
+SEARCH_API_URL = os.environ.get("JARVIS_SEARCH_API_URL", "https://www.googleapis.com/customsearch/v1")
+
+# Backend names in the health registry
+NEWS_BACKEND = 'newsapi'
+WEATHER_BACKEND = 'openweathermap'
+SEARCH_BACKEND = 'customsearch'
+
+# Categories the News API accepts
+NEWS_CATEGORIES = ['business', 'entertainment', 'general', 'health', 'science', 'sports', 'technology']
+
+def _unavailable(response):
+    """True for responses meaning the service is down rather than the request being wrong."""
+    return response.status_code in RETRY_STATUSES
+
+def _request(backend, url, params):
+    """
+    GET url through the shared client, tracked by the backend's circuit breaker.
+    
+    Raises:
+        CircuitOpenError: The backend has been failing; no request was sent
+        requests.RequestException: If the request failed
+    """
+    return get_health().call(backend, get_client().get, url, params=params, failed=_unavailable)
+
+def _probe(url):
+    """Health probe: one request without retries; raises if the service is down."""
+    response = get_client().get(url, retries=0)
+    response.close()
+    if _unavailable(response):
+        raise RuntimeError(f"{url} answered {response.status_code}")
+
+get_health().register(NEWS_BACKEND, probe=lambda: _probe(NEWS_API_URL))
+get_health().register(WEATHER_BACKEND, probe=lambda: _probe(WEATHER_API_URL))
+get_health().register(SEARCH_BACKEND, probe=lambda: _probe(SEARCH_API_URL))
+
+@traced('http.news')
 def get_news(category='general'):
     """
     Fetch news from News API.
@@ -23,7 +65,7 @@ def get_news(category='general'):
     Returns:
         Dictionary with news data or None if request failed
     """
-    base_url = "https://newsapi.org/v2/top-headlines"
+    base_url = NEWS_API_URL
     
     params = {
         'country': 'us',
@@ -32,23 +74,28 @@ def get_news(category='general'):
     }
     
     try:
-        response = requests.get(base_url, params=params)
+        response = _request(NEWS_BACKEND, base_url, params)
         if response.status_code == 200:
             return response.json()
         else:
             print(f"News API request failed with status {response.status_code}: {response.text}")
-            # Return mock data for demonstration
+            # Return mock data for demonstration, never cached
             return {
+                NO_STORE: True,
                 'articles': [
                     {'title': 'This is a sample news headline for demonstration purposes.'},
                     {'title': 'Another sample headline since the actual API request failed.'},
                     {'title': 'A third sample news item. In production, use a valid API key.'}
                 ]
             }
+    except CircuitOpenError:
+        # News API has been failing; fall back without waiting for it
+        return None
     except Exception as e:
         print(f"Error fetching news: {str(e)}")
         return None
 
+@traced('http.weather')
 def get_weather(city):
     """
     Fetch weather data from OpenWeatherMap API.
@@ -59,7 +106,7 @@ def get_weather(city):
     Returns:
         Dictionary with weather data or None if request failed
     """
-    base_url = "https://api.openweathermap.org/data/2.5/weather"
+    base_url = WEATHER_API_URL
     
     params = {
         'q': city,
@@ -68,7 +115,7 @@ def get_weather(city):
     }
     
     try:
-        response = requests.get(base_url, params=params)
+        response = _request(WEATHER_BACKEND, base_url, params)
         if response.status_code == 200:
             data = response.json()
             return {
@@ -79,32 +126,36 @@ def get_weather(city):
             }
         else:
             print(f"Weather API request failed with status {response.status_code}: {response.text}")
-            # Return mock data for demonstration
+            # Return mock data for demonstration, never cached
             return {
+                NO_STORE: True,
                 'temperature': 22,
                 'description': 'partly cloudy',
                 'humidity': 65,
                 'wind_speed': 5.5
             }
+    except CircuitOpenError:
+        return None
     except Exception as e:
         print(f"Error fetching weather: {str(e)}")
         return None
 
-def search_web(query):
+@traced('http.search')
+def fetch_search_results(query):
     """
-    Search the web for information on a query using Google Search API.
+    Fetch search results for a query from the Google Custom Search API.
     
     Args:
         query: Search query
         
     Returns:
-        String with search information
+        List of result dictionaries (possibly empty), or None if the request failed
     """
     # You need to register for a Google API key and Custom Search Engine ID
     API_KEY = "YOUR_GOOGLE_API_KEY"  # Replace with your Google API key
     SEARCH_ENGINE_ID = "YOUR_SEARCH_ENGINE_ID"  # Replace with your Search Engine ID
     
-    base_url = "https://www.googleapis.com/customsearch/v1"
+    base_url = SEARCH_API_URL
     
     params = {
         'q': query,
@@ -114,33 +165,74 @@ def search_web(query):
     }
     
     try:
-        response = requests.get(base_url, params=params)
+        response = _request(SEARCH_BACKEND, base_url, params)
         if response.status_code == 200:
-            search_results = response.json()
-            
-            if 'items' in search_results and len(search_results['items']) > 0:
-                # Format the top 3 results
-                result_text = f"Here's what I found about {query}:\n\n"
-                
-                for i, item in enumerate(search_results['items'][:3], 1):
-                    title = item.get('title', 'No title')
-                    snippet = item.get('snippet', 'No description available')
-                    
-                    result_text += f"{i}. {title}\n"
-                    result_text += f"   {snippet}\n\n"
-                
-                return result_text
-            else:
-                return f"I couldn't find any information about {query}."
-                
+            return response.json().get('items', [])
         else:
-            # Fallback to browser search if API fails
-            return search_google_browser(query)
-            
+            print(f"Search API request failed with status {response.status_code}: {response.text}")
+            return None
+    except CircuitOpenError:
+        # The caller opens a browser search instead
+        return None
     except Exception as e:
         print(f"Error searching the web: {str(e)}")
-        # Fallback to browser search
+        return None
+
+def search_web(query):
+    """
+    Search the web for information on a query using Google Search API.
+    
+    Args:
+        query: Search query
+        
+    Returns:
+        String with search information
+    """
+    items = fetch_search_results(query)
+    return answer_from_results(query, items)
+
+def answer_from_results(query, items):
+    """
+    Turn search results into a spoken answer.
+    
+    Args:
+        query: Search query
+        items: Result list from fetch_search_results, or None if it failed
+        
+    Returns:
+        String with search information
+    """
+    if items is None:
+        # Fallback to browser search if API fails
         return search_google_browser(query)
+    
+    if len(items) > 0:
+        return format_search_results(query, items)
+    else:
+        return f"I couldn't find any information about {query}."
+
+def format_search_results(query, items):
+    """
+    Format search result items as a spoken answer.
+    
+    Args:
+        query: Search query
+        items: Result dictionaries with 'title' and 'snippet' keys
+        
+    Returns:
+        String listing the top 3 results
+    """
+    # Format the top 3 results
+    result_text = f"Here's what I found about {query}:\n\n"
+    
+    for i, item in enumerate(items[:3], 1):
+        title = item.get('title', 'No title')
+        snippet = item.get('snippet', 'No description available')
+        
+        result_text += f"{i}. {title}\n"
+        result_text += f"   {snippet}\n\n"
+    
+    return result_text
 
 def search_google_browser(query):
     """
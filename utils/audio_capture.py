@@ -0,0 +1,564 @@
+# utils/audio_capture.py - Long-lived audio capture with energy-based segmentation
+
+import array
+import collections
+import json
+import math
+import os
+import queue
+import threading
+import time
+import wave
+
+from utils.startup import lazy_import
+from utils.storage import data_path
+
+sr = lazy_import("speech_recognition")
+
+try:
+    import audioop
+except ImportError:  # Removed from the standard library in Python 3.13
+    audioop = None
+
+
+def frame_rms(frame, sample_width):
+    """
+    Root mean square energy of a block of little-endian PCM samples.
+
+    Args:
+        frame: Raw PCM bytes
+        sample_width: Bytes per sample
+
+    Returns:
+        RMS value on the same scale as audioop.rms
+    """
+    if audioop is not None:
+        return audioop.rms(frame, sample_width)
+
+    typecode = {1: 'b', 2: 'h', 4: 'i'}[sample_width]
+    samples = array.array(typecode, frame[:len(frame) - len(frame) % sample_width])
+    if not samples:
+        return 0
+    return int(math.sqrt(sum(s * s for s in samples) / len(samples)))
+
+
+def downmix(pcm, sample_width, channels):
+    """
+    Average interleaved channels into mono.
+
+    Args:
+        pcm: Raw little-endian PCM bytes, whole frames
+        sample_width: Bytes per sample
+        channels: Interleaved channels in pcm
+
+    Returns:
+        Mono PCM bytes
+
+    Raises:
+        ValueError: 24-bit audio without audioop, or more than two channels of it
+    """
+    if channels == 1:
+        return pcm
+    if audioop is not None and channels == 2:
+        return audioop.tomono(pcm, sample_width, 0.5, 0.5)
+
+    typecode = {1: 'B', 2: 'h', 4: 'i'}.get(sample_width)
+    if typecode is None:
+        raise ValueError(f"cannot downmix {sample_width * 8}-bit audio with {channels} channels")
+    step = sample_width * channels
+    samples = array.array(typecode, pcm[:len(pcm) - len(pcm) % step])
+    return array.array(typecode, (sum(samples[i:i + channels]) // channels
+                                  for i in range(0, len(samples), channels))).tobytes()
+
+
+class AudioSource:
+    """
+    Base class for anything that can feed mono PCM audio to AudioCapture.
+
+    Subclasses set sample_rate, sample_width and chunk_size, and implement
+    read() to return one chunk of raw audio, or b'' once the source has ended.
+    """
+
+    sample_rate = 16000
+    sample_width = 2
+    chunk_size = 1024
+    name = "audio"
+
+    def open(self):
+        """Acquire the underlying device or file."""
+
+    def read(self):
+        """Return the next chunk of PCM bytes, or b'' at end of stream."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the underlying device or file."""
+
+
+class MicrophoneSource(AudioSource):
+    """The default input device, opened once through speech_recognition."""
+
+    def __init__(self, device_index=None, sample_rate=None, chunk_size=1024):
+        """
+        Initialize the microphone source.
+
+        Args:
+            device_index: PyAudio device index, or None for the default device
+            sample_rate: Capture rate, or None for the device default
+            chunk_size: Frames per read
+        """
+        self._microphone = sr.Microphone(
+            device_index=device_index, sample_rate=sample_rate, chunk_size=chunk_size
+        )
+        self.sample_rate = self._microphone.SAMPLE_RATE
+        self.sample_width = self._microphone.SAMPLE_WIDTH
+        self.chunk_size = self._microphone.CHUNK
+        self.name = f"microphone:{device_index if device_index is not None else 'default'}"
+        self._open = False
+
+    def open(self):
+        self._microphone.__enter__()
+        self._open = True
+        try:
+            # Name the actual device, so calibration follows it when the default changes
+            audio = self._microphone.audio
+            if self._microphone.device_index is None:
+                info = audio.get_default_input_device_info()
+            else:
+                info = audio.get_device_info_by_index(self._microphone.device_index)
+            self.name = f"microphone:{info['name']}"
+        except Exception:
+            pass
+
+    def read(self):
+        return self._microphone.stream.read(self.chunk_size)
+
+    def close(self):
+        if self._open:
+            self._open = False
+            self._microphone.__exit__(None, None, None)
+
+
+class WavFileSource(AudioSource):
+    """Plays a WAV file into the capture pipeline, e.g. as a test fixture."""
+
+    def __init__(self, path, chunk_size=1024, realtime=False):
+        """
+        Initialize the WAV source.
+
+        Args:
+            path: Path to a PCM WAV file (stereo is downmixed to mono)
+            chunk_size: Frames per read
+            realtime: Sleep between reads to mimic a live device
+
+        Raises:
+            ValueError: The file has channels that cannot be downmixed here
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        self.name = f"wav:{path}"
+
+        with wave.open(path, "rb") as wav:
+            self.sample_rate = wav.getframerate()
+            self.sample_width = wav.getsampwidth()
+            self.channels = wav.getnchannels()
+        if self.channels > 1 and self.sample_width == 3 and (audioop is None or self.channels > 2):
+            raise ValueError(f"{path}: cannot downmix {self.channels}-channel 24-bit audio"
+                             f"{'' if audioop is not None else ' without audioop'}")
+        self._wav = None
+
+    def open(self):
+        self._wav = wave.open(self.path, "rb")
+
+    def read(self):
+        data = self._wav.readframes(self.chunk_size)
+        if data and self.channels > 1:
+            data = downmix(data, self.sample_width, self.channels)
+        if data and self.realtime:
+            time.sleep(self.chunk_size / self.sample_rate)
+        return data
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class SyntheticSource(AudioSource):
+    """
+    Generates a scripted sequence of silence, noise and tones.
+
+    Useful as a stand-in for speech on machines without audio hardware:
+    tones are loud enough to be segmented as utterances.
+    """
+
+    def __init__(self, script, sample_rate=16000, chunk_size=1024, realtime=False,
+                 amplitude=8000, noise=50):
+        """
+        Initialize the synthetic source.
+
+        Args:
+            script: List of (kind, seconds) with kind 'silence' or 'tone'
+            sample_rate: Samples per second
+            chunk_size: Frames per read
+            realtime: Sleep between reads to mimic a live device
+            amplitude: Peak amplitude of tones
+            noise: Peak amplitude of the background noise floor
+        """
+        self.script = list(script)
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        self.amplitude = amplitude
+        self.noise = noise
+        self.name = "synthetic"
+        self._samples = None
+
+    def _generate(self):
+        """Yield 16-bit samples for the whole script."""
+        n = 0
+        for kind, seconds in self.script:
+            for _ in range(int(seconds * self.sample_rate)):
+                # Deterministic low-level hiss so the floor is not digital silence
+                value = ((n * 7919) % (2 * self.noise + 1)) - self.noise
+                if kind == "tone":
+                    value += int(self.amplitude * math.sin(2 * math.pi * 440 * n / self.sample_rate))
+                n += 1
+                yield value
+
+    def open(self):
+        self._samples = self._generate()
+
+    def read(self):
+        chunk = array.array('h')
+        for value in self._samples:
+            chunk.append(value)
+            if len(chunk) == self.chunk_size:
+                break
+        if chunk and self.realtime:
+            time.sleep(len(chunk) / self.sample_rate)
+        return chunk.tobytes()
+
+
+class CalibrationStore:
+    """
+    Energy thresholds per input device, saved across runs.
+
+    With a saved threshold start-up skips the blocking ambient-noise
+    measurement; the segmenter keeps refining the threshold while it runs
+    and the refined value is saved again on shutdown.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the store.
+
+        Args:
+            path: JSON file; defaults to calibration.json in the data directory
+        """
+        self.path = path or data_path("calibration.json")
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._thresholds = json.load(f)
+        except (OSError, ValueError):
+            self._thresholds = {}
+
+    def get(self, device):
+        """Saved threshold for a device name, or None."""
+        entry = self._thresholds.get(device)
+        return entry['threshold'] if entry else None
+
+    def put(self, device, threshold):
+        """Save the threshold for a device name."""
+        self._thresholds[device] = {'threshold': round(threshold, 2), 'saved_at': time.time()}
+        partial = f"{self.path}.tmp"
+        try:
+            with open(partial, "w", encoding="utf-8") as f:
+                json.dump(self._thresholds, f, indent=2)
+            os.replace(partial, self.path)
+        except OSError as e:
+            print(f"Could not save calibration: {e}")
+
+
+class RingBuffer:
+    """
+    Bounded single-producer/single-consumer buffer of audio chunks.
+
+    Backed by a deque with maxlen, whose append and popleft are atomic, so
+    the capture thread never blocks or takes a lock. When the consumer falls
+    behind the oldest chunks are overwritten and counted as overruns.
+    """
+
+    def __init__(self, capacity):
+        self._chunks = collections.deque(maxlen=capacity)
+        self._ready = threading.Event()
+        self.capacity = capacity
+        self.written = 0
+        self.read_count = 0
+
+    def write(self, item):
+        self._chunks.append(item)
+        self.written += 1
+        self._ready.set()
+
+    def read(self, timeout=None):
+        """Return the oldest item, or None if nothing arrived within timeout."""
+        while True:
+            try:
+                item = self._chunks.popleft()
+                self.read_count += 1
+                return item
+            except IndexError:
+                self._ready.clear()
+                # Re-check after clearing so a write in between is not missed
+                if self._chunks:
+                    continue
+                if not self._ready.wait(timeout):
+                    return None
+
+    @property
+    def overruns(self):
+        return self.written - self.read_count - len(self._chunks)
+
+
+class AudioCapture:
+    """
+    Keeps one input stream open and turns it into utterances.
+
+    A capture thread reads the source into a RingBuffer; a segmenter thread
+    tracks the energy of each chunk and hands complete phrases to listen()
+    as speech_recognition AudioData. Speech that arrives while Jarvis is
+    busy is queued instead of lost.
+    """
+
+    def __init__(self, source, energy_threshold=300, dynamic_energy_threshold=True,
+                 pause_threshold=0.8, phrase_threshold=0.3, phrase_time_limit=5,
+                 pre_roll=0.5, buffer_seconds=10, max_pending=8):
+        """
+        Initialize capture for a source.
+
+        Args:
+            source: AudioSource to read from
+            energy_threshold: RMS level above which audio counts as speech
+            dynamic_energy_threshold: Track the noise floor between phrases
+            pause_threshold: Seconds of quiet that end a phrase
+            phrase_threshold: Minimum seconds of speech for a phrase to count
+            phrase_time_limit: Maximum phrase length in seconds
+            pre_roll: Seconds of audio kept from before the speech onset
+            buffer_seconds: Ring buffer capacity
+            max_pending: Utterances kept for listen() before the oldest is dropped
+        """
+        self.source = source
+        self.energy_threshold = energy_threshold
+        self.dynamic_energy_threshold = dynamic_energy_threshold
+        self.dynamic_energy_adjustment_damping = 0.15
+        self.dynamic_energy_ratio = 1.5
+        self.pause_threshold = pause_threshold
+        self.phrase_threshold = phrase_threshold
+        self.phrase_time_limit = phrase_time_limit
+        self.pre_roll = pre_roll
+
+        self.seconds_per_chunk = source.chunk_size / source.sample_rate
+        capacity = max(1, int(buffer_seconds / self.seconds_per_chunk))
+        self.buffer = RingBuffer(capacity)
+
+        self._utterances = queue.Queue(maxsize=max_pending)
+        self._opened = False
+        self._stop = threading.Event()
+        self._source_done = threading.Event()
+        self._ended = threading.Event()
+        self._threads = []
+        self._listeners = []
+        self._store = None
+        self.dropped_utterances = 0
+
+    def calibrate(self, duration=1, store=None):
+        """
+        Set the energy threshold from ambient noise, like adjust_for_ambient_noise.
+
+        Must be called before start(), while nothing else reads the source.
+
+        Args:
+            duration: Seconds of audio to measure
+            store: CalibrationStore; a threshold saved for this device is used
+                   instead of measuring, and the final threshold is saved on stop()
+
+        Returns:
+            The energy threshold
+        """
+        self._open_source()
+        self._store = store
+        if store is not None:
+            saved = store.get(self.source.name)
+            if saved is not None:
+                # The segmenter refines it from the live stream
+                self.energy_threshold = saved
+                return saved
+
+        elapsed = 0
+        while elapsed < duration:
+            chunk = self.source.read()
+            if not chunk:
+                break
+            elapsed += self.seconds_per_chunk
+            self._adjust_threshold(frame_rms(chunk, self.source.sample_width))
+        if store is not None:
+            store.put(self.source.name, self.energy_threshold)
+        return self.energy_threshold
+
+    def _adjust_threshold(self, energy):
+        damping = self.dynamic_energy_adjustment_damping ** self.seconds_per_chunk
+        target = energy * self.dynamic_energy_ratio
+        self.energy_threshold = self.energy_threshold * damping + target * (1 - damping)
+
+    def add_listener(self, callback):
+        """
+        Call callback(energy, stamp) for every chunk the segmenter sees.
+
+        Runs on the segmenter thread, so callbacks must return quickly.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _open_source(self):
+        if not self._opened:
+            self.source.open()
+            self._opened = True
+
+    def start(self):
+        """Open the source and start the capture and segmenter threads."""
+        if self._threads:
+            return
+        self._open_source()
+        for target, name in ((self._capture_loop, "jarvis-capture"),
+                             (self._segment_loop, "jarvis-segmenter")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop both threads and close the source."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        if self._opened:
+            self._opened = False
+            self.source.close()
+        if self._store is not None:
+            self._store.put(self.source.name, self.energy_threshold)
+            self._store = None
+
+    def _capture_loop(self):
+        """Read the source as fast as it produces audio."""
+        while not self._stop.is_set():
+            try:
+                chunk = self.source.read()
+            except Exception as e:
+                print(f"Audio capture error: {e}")
+                chunk = b""
+            if not chunk:
+                break
+            self.buffer.write((time.perf_counter(), chunk))
+        self._source_done.set()
+
+    def _segment_loop(self):
+        """Split the chunk stream into phrases on energy."""
+        width = self.source.sample_width
+        pre_roll = collections.deque(maxlen=max(1, int(self.pre_roll / self.seconds_per_chunk)))
+        frames = []
+        speech_time = 0.0
+        quiet_time = 0.0
+        started_at = None
+
+        while not self._stop.is_set():
+            item = self.buffer.read(timeout=0.1)
+            if item is None:
+                if self._source_done.is_set():
+                    break
+                continue
+
+            stamp, chunk = item
+            energy = frame_rms(chunk, width)
+            for listener in self._listeners:
+                try:
+                    listener(energy, stamp)
+                except Exception as e:
+                    print(f"Audio listener error: {e}")
+
+            if not frames:
+                if energy > self.energy_threshold:
+                    frames = list(pre_roll) + [chunk]
+                    pre_roll.clear()
+                    speech_time = self.seconds_per_chunk
+                    quiet_time = 0.0
+                    started_at = stamp
+                else:
+                    pre_roll.append(chunk)
+                    if self.dynamic_energy_threshold:
+                        self._adjust_threshold(energy)
+                continue
+
+            frames.append(chunk)
+            if energy > self.energy_threshold:
+                speech_time += self.seconds_per_chunk
+                quiet_time = 0.0
+            else:
+                quiet_time += self.seconds_per_chunk
+
+            duration = len(frames) * self.seconds_per_chunk
+            if quiet_time >= self.pause_threshold or duration >= self.phrase_time_limit:
+                if speech_time >= self.phrase_threshold:
+                    self._emit(frames, started_at, stamp)
+                frames = []
+
+        if frames and speech_time >= self.phrase_threshold:
+            self._emit(frames, started_at, time.perf_counter())
+        self._ended.set()
+
+    def _emit(self, frames, started_at, ended_at):
+        """Queue a finished phrase, dropping the oldest one if nobody is listening."""
+        audio = sr.AudioData(b"".join(frames), self.source.sample_rate, self.source.sample_width)
+        audio.started_at = started_at
+        audio.ended_at = ended_at
+        while True:
+            try:
+                self._utterances.put_nowait(audio)
+                return
+            except queue.Full:
+                try:
+                    self._utterances.get_nowait()
+                    self.dropped_utterances += 1
+                except queue.Empty:
+                    pass
+
+    def listen(self, timeout=None):
+        """
+        Wait for the next utterance.
+
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            AudioData for the phrase, or None on timeout or end of stream
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if remaining <= 0:
+                return None
+            try:
+                return self._utterances.get(timeout=remaining)
+            except queue.Empty:
+                if self._ended.is_set() and self._utterances.empty():
+                    return None
+
+    @property
+    def ended(self):
+        """True once a finite source has been fully segmented and drained."""
+        return self._ended.is_set() and self._utterances.empty()
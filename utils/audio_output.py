@@ -0,0 +1,399 @@
+# utils/audio_output.py - Speech audio held in memory and played through a long-lived output
+
+import collections
+import importlib.util
+import io
+import os
+import threading
+import time
+import wave
+
+from utils.startup import lazy_import
+
+# Optional: decodes gTTS mp3 in memory and drives the sound card directly
+miniaudio = lazy_import("miniaudio")
+
+# Where speech goes: 'device', 'wav:<path>', 'null', or 'process' for the
+# older playsound helper process. Empty picks 'device' when miniaudio is
+# installed and 'process' otherwise.
+AUDIO_OUTPUT = os.environ.get("JARVIS_AUDIO_OUTPUT", "")
+
+# gTTS speaks 24 kHz mono; the device is opened in that format up front
+SPEECH_RATE = 24000
+SPEECH_CHANNELS = 1
+
+# Seconds of audio handed to a sink at a time; a cut-off lands within one block
+BLOCK_SECONDS = 0.02
+
+# How often a playing clip checks for interrupts on the device
+POLL_INTERVAL = 0.01
+
+# Device buffer; smaller starts sooner, larger survives a busy CPU
+DEVICE_BUFFER_MS = int(os.environ.get("JARVIS_AUDIO_BUFFER_MS", "20"))
+
+# Decoded speech kept in memory for repeated phrases
+CLIP_CACHE_BYTES = int(os.environ.get("JARVIS_CLIP_CACHE_MB", "32")) * 1024 * 1024
+
+
+class PcmAudio:
+    """Decoded 16-bit little-endian PCM."""
+
+    def __init__(self, frames, sample_rate, channels):
+        self.frames = frames
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    @property
+    def frame_bytes(self):
+        return 2 * self.channels
+
+    @property
+    def duration(self):
+        return len(self.frames) / (self.frame_bytes * self.sample_rate)
+
+
+def decode(data):
+    """
+    Decode encoded speech to PCM.
+
+    Args:
+        data: mp3 bytes as gTTS produces them, or a 16-bit WAV file
+
+    Returns:
+        PcmAudio
+
+    Raises:
+        RuntimeError: The data is mp3 and miniaudio is not installed
+    """
+    if data[:4] == b"RIFF":
+        with wave.open(io.BytesIO(data), "rb") as w:
+            if w.getsampwidth() != 2:
+                raise ValueError("only 16-bit WAV is supported")
+            return PcmAudio(w.readframes(w.getnframes()), w.getframerate(), w.getnchannels())
+    if not available():
+        raise RuntimeError("decoding mp3 speech needs the miniaudio package")
+    sound = miniaudio.decode(data, output_format=miniaudio.SampleFormat.SIGNED16)
+    return PcmAudio(sound.samples.tobytes(), sound.sample_rate, sound.nchannels)
+
+
+def available():
+    """True if miniaudio is installed."""
+    return importlib.util.find_spec("miniaudio") is not None
+
+
+class AudioClip:
+    """
+    One synthesized utterance in memory: its encoded bytes and, once
+    decoded, its PCM. Decoding happens at most once per clip.
+    """
+
+    def __init__(self, data):
+        """
+        Args:
+            data: Encoded audio (mp3 from gTTS)
+        """
+        self.data = data
+        self._pcm = None
+        self._lock = threading.Lock()
+
+    def pcm(self):
+        """The decoded audio, decoding it on first use."""
+        with self._lock:
+            if self._pcm is None:
+                self._pcm = decode(self.data)
+            return self._pcm
+
+    @property
+    def decoded(self):
+        return self._pcm is not None
+
+    @property
+    def size(self):
+        """Bytes held, encoded plus decoded."""
+        return len(self.data) + (len(self._pcm.frames) if self._pcm is not None else 0)
+
+
+class ClipCache:
+    """Byte-bounded LRU of AudioClips by speech key."""
+
+    def __init__(self, max_bytes=CLIP_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._clips = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is None:
+                self.misses += 1
+                return None
+            self._clips.move_to_end(key)
+            self.hits += 1
+            return clip
+
+    def put(self, key, clip):
+        """Keep a clip; sizes are re-read here, so put it again after decoding."""
+        with self._lock:
+            old = self._clips.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._clips[key] = clip
+            self._bytes += clip.size
+            while self._bytes > self.max_bytes and len(self._clips) > 1:
+                _, evicted = self._clips.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'clips': len(self._clips), 'bytes': self._bytes}
+
+
+class AudioOutput:
+    """
+    Where speech is played: opened once, then fed one clip after another.
+
+    play() has the same contract as ProcessPlayer.play(), taking an
+    AudioClip instead of a path. Each call records its startup latency,
+    from the call to the first audio accepted by the sink.
+    """
+
+    # SpeechView hands this player AudioClips rather than file paths
+    accepts_clips = True
+    # Clips are decoded before play(); a null sink does not need them to be
+    needs_pcm = True
+
+    def __init__(self, block_seconds=BLOCK_SECONDS):
+        self.block_seconds = block_seconds
+        self.utterances = 0
+        self.bytes_played = 0
+        self.startup = collections.deque(maxlen=1000)
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def play(self, clip, cancel):
+        """
+        Play a clip until it ends or cancel is set.
+
+        Args:
+            clip: AudioClip
+            cancel: threading.Event that cuts playback off when set
+
+        Returns:
+            True if the clip played to the end, False if it was cut off
+        """
+        raise NotImplementedError
+
+    def _blocks(self, pcm):
+        """Split PCM into block_seconds pieces."""
+        size = max(pcm.frame_bytes, int(pcm.sample_rate * self.block_seconds) * pcm.frame_bytes)
+        for start in range(0, len(pcm.frames), size):
+            yield pcm.frames[start:start + size]
+
+    def stats(self):
+        """Utterances played, bytes of PCM written and startup latency percentiles in seconds."""
+        startup = sorted(self.startup)
+        return {
+            'utterances': self.utterances,
+            'bytes_played': self.bytes_played,
+            'startup_p50': startup[len(startup) // 2] if startup else None,
+            'startup_max': startup[-1] if startup else None,
+        }
+
+
+class NullOutput(AudioOutput):
+    """
+    Discards audio, for runs with nobody listening.
+
+    With realtime, play() takes as long as the clip would, in blocks, so
+    interrupts behave as on a device.
+    """
+
+    def __init__(self, realtime=False, block_seconds=BLOCK_SECONDS):
+        super().__init__(block_seconds)
+        self.realtime = realtime
+        self.needs_pcm = realtime
+
+    def play(self, clip, cancel):
+        started = time.perf_counter()
+        if cancel.is_set():
+            return False
+        self.utterances += 1
+        self.startup.append(time.perf_counter() - started)
+        if not self.realtime:
+            return True
+        for block in self._blocks(clip.pcm()):
+            self.bytes_played += len(block)
+            if cancel.wait(self.block_seconds):
+                return False
+        return True
+
+
+class WavOutput(AudioOutput):
+    """Appends everything spoken to one WAV file, kept open for the session."""
+
+    def __init__(self, path, block_seconds=BLOCK_SECONDS):
+        """
+        Args:
+            path: WAV file to write; replaced if it exists
+        """
+        super().__init__(block_seconds)
+        self.path = path
+        self._wav = None
+        self._format = None
+        self._lock = threading.Lock()
+
+    def _open(self, pcm):
+        if self._wav is None:
+            self._wav = wave.open(self.path, "wb")
+            self._wav.setnchannels(pcm.channels)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(pcm.sample_rate)
+            self._format = (pcm.sample_rate, pcm.channels)
+        elif self._format != (pcm.sample_rate, pcm.channels):
+            raise RuntimeError(f"{self.path} is {self._format[0]} Hz x{self._format[1]}, "
+                               f"clip is {pcm.sample_rate} Hz x{pcm.channels}")
+
+    def play(self, clip, cancel):
+        started = time.perf_counter()
+        pcm = clip.pcm()
+        with self._lock:
+            self._open(pcm)
+            self.utterances += 1
+            first = True
+            for block in self._blocks(pcm):
+                if cancel.is_set():
+                    return False
+                self._wav.writeframesraw(block)
+                self.bytes_played += len(block)
+                if first:
+                    self.startup.append(time.perf_counter() - started)
+                    first = False
+        return not cancel.is_set()
+
+    def close(self):
+        with self._lock:
+            if self._wav is not None:
+                self._wav.close()
+                self._wav = None
+
+
+class DeviceOutput(AudioOutput):
+    """
+    Plays through one miniaudio playback device opened for the whole session.
+
+    The device pulls PCM from a buffer on its own audio thread and plays
+    silence while the buffer is empty, so starting an utterance is only a
+    matter of appending to the buffer. An interrupt drops what is left.
+    """
+
+    def __init__(self, sample_rate=SPEECH_RATE, channels=SPEECH_CHANNELS, buffer_ms=DEVICE_BUFFER_MS,
+                 poll_interval=POLL_INTERVAL):
+        """
+        Args:
+            sample_rate, channels: Format the device is opened in; reopened if a clip differs
+            buffer_ms: Device buffer size
+            poll_interval: Seconds between interrupt checks while playing
+        """
+        super().__init__()
+        self.format = (sample_rate, channels)
+        self.buffer_ms = buffer_ms
+        self.poll_interval = poll_interval
+        self._device = None
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        # Byte positions in the stream of everything ever queued and pulled
+        self._queued = 0
+        self._pulled = 0
+        # (position, time of the play() call) for the clip waiting to start
+        self._waiting = None
+
+    def start(self):
+        self._open(*self.format)
+
+    def _open(self, sample_rate, channels):
+        if self._device is not None:
+            self._device.close()
+        stream = self._stream(2 * channels)
+        next(stream)
+        device = miniaudio.PlaybackDevice(
+            output_format=miniaudio.SampleFormat.SIGNED16, nchannels=channels,
+            sample_rate=sample_rate, buffersize_msec=self.buffer_ms
+        )
+        device.start(stream)
+        self._device = device
+        self.format = (sample_rate, channels)
+
+    def _stream(self, frame_bytes):
+        """Generator the device pulls from, on the device's own thread."""
+        frames = yield b""
+        while True:
+            wanted = frames * frame_bytes
+            with self._lock:
+                data = bytes(self._buffer[:wanted])
+                del self._buffer[:wanted]
+                self._pulled += len(data)
+                if self._waiting is not None and self._pulled > self._waiting[0]:
+                    self.startup.append(time.perf_counter() - self._waiting[1])
+                    self._waiting = None
+            if len(data) < wanted:
+                data += bytes(wanted - len(data))
+            frames = yield data
+
+    def play(self, clip, cancel):
+        started = time.perf_counter()
+        if cancel.is_set():
+            return False
+        pcm = clip.pcm()
+        if self._device is None or self.format != (pcm.sample_rate, pcm.channels):
+            self._open(pcm.sample_rate, pcm.channels)
+
+        with self._lock:
+            self._waiting = (self._queued, started)
+            self._buffer += pcm.frames
+            self._queued += len(pcm.frames)
+            end = self._queued
+            self.utterances += 1
+            self.bytes_played += len(pcm.frames)
+
+        while True:
+            with self._lock:
+                if self._pulled >= end:
+                    return True
+            if cancel.wait(self.poll_interval):
+                with self._lock:
+                    self._queued -= len(self._buffer)
+                    del self._buffer[:]
+                    self._waiting = None
+                return False
+
+    def close(self):
+        if self._device is not None:
+            self._device.close()
+            self._device = None
+
+
+def open_output(spec=AUDIO_OUTPUT):
+    """
+    Build the speech output named by spec.
+
+    Args:
+        spec: 'device', 'wav:<path>', 'null', 'process' or '' for the default
+
+    Returns:
+        AudioOutput, or None to use the playsound helper process
+    """
+    if spec == "null":
+        return NullOutput()
+    if spec.startswith("wav:"):
+        return WavOutput(spec[4:])
+    if spec == "device" or (spec == "" and available()):
+        return DeviceOutput()
+    return None
@@ -0,0 +1,171 @@
+# utils/audio_prep.py - Trim and downsample captured phrases before they are uploaded for recognition
+
+import os
+
+from utils.audio_capture import frame_rms
+from utils.startup import lazy_import
+
+sr = lazy_import("speech_recognition")
+
+try:
+    import numpy as np
+except ImportError:  # Optional: vectorized trimming and resampling
+    np = None
+
+try:
+    import audioop
+except ImportError:  # Removed from the standard library in Python 3.13
+    audioop = None
+
+# Sample rate sent to the recognizers. Google and Sphinx both work at
+# 16 kHz; speech_recognition FLAC-encodes at whatever rate it is given.
+UPLOAD_RATE = int(os.environ.get("JARVIS_UPLOAD_RATE", "16000"))
+
+# Set JARVIS_TRIM_SILENCE=0 to upload phrases with their leading and trailing silence
+TRIM_SILENCE = os.environ.get("JARVIS_TRIM_SILENCE", "1") != "0"
+
+# Voice activity is decided over 20 ms frames
+VAD_FRAME = 0.02
+
+# Silence kept around the speech, so soft onsets and word endings survive
+PAD_BEFORE = 0.1
+PAD_AFTER = 0.25
+
+# Without a capture threshold, speech is this many times the quietest
+# frames, but never more than this share of the loudest, so a clip that
+# is speech throughout does not lose its softer ends
+NOISE_FACTOR = 3.0
+PEAK_SHARE = 0.1
+MIN_THRESHOLD = 100
+
+
+def frame_energies(pcm, sample_width, frame):
+    """
+    RMS energy of each whole frame of PCM.
+
+    With numpy the samples are viewed in place and summed in one pass;
+    otherwise each frame goes through frame_rms.
+
+    Args:
+        pcm: Raw little-endian PCM bytes
+        sample_width: Bytes per sample
+        frame: Samples per frame
+
+    Returns:
+        Sequence of RMS values on the same scale as frame_rms
+    """
+    count = len(pcm) // (sample_width * frame)
+    if np is not None and sample_width in (2, 4) and count:
+        samples = np.frombuffer(pcm, dtype='<i2' if sample_width == 2 else '<i4', count=count * frame)
+        frames = samples.reshape(count, frame)
+        return np.sqrt(np.einsum('ij,ij->i', frames, frames, dtype=np.float64) / frame)
+    step = frame * sample_width
+    return [frame_rms(pcm[i * step:(i + 1) * step], sample_width) for i in range(count)]
+
+
+def _estimate(floor, peak):
+    return max(MIN_THRESHOLD, min(floor * NOISE_FACTOR, peak * PEAK_SHARE))
+
+
+def speech_bounds(energies, threshold=None):
+    """
+    First and last frame of speech.
+
+    Args:
+        energies: Per-frame RMS values
+        threshold: RMS above which a frame is speech; estimated from the
+                   quietest frames when None
+
+    Returns:
+        (first, last) frame indexes, or None if no frame is speech
+    """
+    if len(energies) == 0:
+        return None
+    if np is not None and isinstance(energies, np.ndarray):
+        if threshold is None:
+            threshold = _estimate(float(np.percentile(energies, 10)), float(energies.max()))
+        loud = np.flatnonzero(energies > threshold)
+        return (int(loud[0]), int(loud[-1])) if len(loud) else None
+    if threshold is None:
+        threshold = _estimate(sorted(energies)[len(energies) // 10], max(energies))
+    loud = [i for i, energy in enumerate(energies) if energy > threshold]
+    return (loud[0], loud[-1]) if loud else None
+
+
+def resample(pcm, sample_width, sample_rate, target_rate):
+    """
+    Convert mono PCM to 16-bit at target_rate.
+
+    With numpy, whole-number ratios (48 kHz, 32 kHz to 16 kHz) are
+    averaged in blocks, which also filters out what the lower rate cannot
+    hold, and other ratios are interpolated. Without it audioop does the
+    work. Audio already at or below the target rate keeps its rate.
+
+    Returns:
+        (pcm, sample_rate, sample_width); the input unchanged when neither
+        numpy nor audioop is available
+    """
+    target_rate = min(target_rate, sample_rate)
+    if sample_width == 2 and target_rate == sample_rate:
+        return pcm, sample_rate, 2
+
+    if np is not None and sample_width in (2, 4):
+        samples = np.frombuffer(pcm, dtype='<i2' if sample_width == 2 else '<i4',
+                                count=len(pcm) // sample_width)
+        if sample_width == 4:
+            samples = samples >> 16
+        if target_rate != sample_rate:
+            if sample_rate % target_rate == 0:
+                factor = sample_rate // target_rate
+                usable = len(samples) - len(samples) % factor
+                samples = samples[:usable].reshape(-1, factor).mean(axis=1)
+            else:
+                count = int(len(samples) * target_rate / sample_rate)
+                positions = np.arange(count) * (sample_rate / target_rate)
+                samples = np.interp(positions, np.arange(len(samples)), samples)
+        return samples.astype('<i2').tobytes(), target_rate, 2
+
+    if audioop is None:
+        return pcm, sample_rate, sample_width
+    if sample_width != 2:
+        pcm = audioop.lin2lin(pcm, sample_width, 2)
+    if target_rate != sample_rate:
+        pcm, _ = audioop.ratecv(pcm, 2, 1, sample_rate, target_rate, None)
+    return pcm, target_rate, 2
+
+
+def prepare(audio, energy_threshold=None, rate=UPLOAD_RATE, trim=TRIM_SILENCE):
+    """
+    Cut the silence off a phrase and bring it down to the upload rate.
+
+    The capture segmenter hands over half a second of pre-roll and the
+    closing pause with every phrase; neither helps the recognizer, and both
+    are uploaded and decoded. A phrase with no frame above the threshold is
+    left whole, so the recognizer still gets to judge it.
+
+    Args:
+        audio: Mono sr.AudioData from the capture segmenter
+        energy_threshold: The capture's speech threshold, on the audio's
+                          own sample scale
+        rate: Sample rate to send
+        trim: Trim leading and trailing silence
+
+    Returns:
+        sr.AudioData at no more than rate, with the capture timestamps
+    """
+    pcm = audio.frame_data
+    width = audio.sample_width
+    if trim:
+        frame = max(1, int(audio.sample_rate * VAD_FRAME))
+        bounds = speech_bounds(frame_energies(pcm, width, frame), energy_threshold)
+        if bounds is not None:
+            first = max(0, bounds[0] * frame - int(PAD_BEFORE * audio.sample_rate))
+            last = (bounds[1] + 1) * frame + int(PAD_AFTER * audio.sample_rate)
+            # A memoryview slice, so only the resampler's output is a new buffer
+            pcm = memoryview(pcm)[first * width:last * width]
+
+    pcm, sample_rate, width = resample(pcm, width, audio.sample_rate, rate)
+    prepared = sr.AudioData(bytes(pcm), sample_rate, width)
+    prepared.started_at = getattr(audio, 'started_at', None)
+    prepared.ended_at = getattr(audio, 'ended_at', None)
+    return prepared
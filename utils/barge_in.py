@@ -0,0 +1,105 @@
+# utils/barge_in.py - Detects the user talking over Jarvis
+
+import threading
+
+
+class BargeInMonitor:
+    """
+    Watches capture energy while Jarvis speaks and reports when the user talks.
+
+    Registered as an AudioCapture listener, so it sees every chunk as the
+    segmenter does. While armed, a run of chunks louder than the capture's
+    energy threshold (times ratio, to ride over Jarvis's own voice leaking
+    from the speaker into the microphone) lasting min_speech seconds fires
+    on_barge_in once. The segmenter keeps collecting the same audio, so the
+    interrupting phrase still reaches recognition in full.
+    """
+
+    def __init__(self, capture, on_barge_in, ratio=1.5, min_speech=0.1):
+        """
+        Initialize the monitor.
+
+        Args:
+            capture: AudioCapture to listen to
+            on_barge_in: Callable(onset) run on the segmenter thread, where
+                         onset is the perf_counter time the speech started
+            ratio: Multiple of the capture energy threshold that counts as
+                   the user talking during playback
+            min_speech: Seconds of loud audio needed before firing
+        """
+        self.capture = capture
+        self.on_barge_in = on_barge_in
+        self.ratio = ratio
+        self.min_speech = min_speech
+
+        self._armed = threading.Event()
+        self._onset = None
+        self._loud_time = 0.0
+        self.detections = 0
+
+    def start(self):
+        self.capture.add_listener(self._on_chunk)
+
+    def stop(self):
+        self.disarm()
+        self.capture.remove_listener(self._on_chunk)
+
+    def arm(self):
+        """Start watching; call when Jarvis begins speaking."""
+        self._onset = None
+        self._loud_time = 0.0
+        self._armed.set()
+
+    def disarm(self):
+        """Stop watching; call when Jarvis has finished speaking."""
+        self._armed.clear()
+
+    @property
+    def armed(self):
+        return self._armed.is_set()
+
+    def _on_chunk(self, energy, stamp):
+        if not self._armed.is_set():
+            return
+
+        if energy <= self.capture.energy_threshold * self.ratio:
+            self._onset = None
+            self._loud_time = 0.0
+            return
+
+        if self._onset is None:
+            self._onset = stamp
+        self._loud_time += self.capture.seconds_per_chunk
+        if self._loud_time >= self.min_speech:
+            # One interrupt per utterance of Jarvis's
+            self._armed.clear()
+            self.detections += 1
+            self.on_barge_in(self._onset)
+
+
+def cutoff_summary(turns):
+    """
+    Summarize barge-in timings over pipeline turns.
+
+    Args:
+        turns: Turns with 'voice_onset', 'interrupted' and 'cut' marks
+
+    Returns:
+        Dictionary with the number of interruptions and the mean and worst
+        detection delay (onset to interrupt) and cut-off latency (interrupt
+        to silence), in seconds
+    """
+    # Playback can stop short for other reasons; only barge-ins are timed
+    cut = [t for t in turns if 'interrupted' in t.times and 'cut' in t.times]
+    if not cut:
+        return {'interruptions': 0, 'detect_mean': None, 'detect_max': None,
+                'cutoff_mean': None, 'cutoff_max': None}
+    detect = [t.times['interrupted'] - t.times['voice_onset'] for t in cut]
+    cutoff = [t.times['cut'] - t.times['interrupted'] for t in cut]
+    return {
+        'interruptions': len(cut),
+        'detect_mean': sum(detect) / len(detect),
+        'detect_max': max(detect),
+        'cutoff_mean': sum(cutoff) / len(cutoff),
+        'cutoff_max': max(cutoff),
+    }
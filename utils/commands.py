@@ -2,10 +2,26 @@
 
 import webbrowser
 import datetime
-import platform
-import psutil
 import os
 import subprocess
+from utils.system_monitor import get_sampler, parse_duration, describe_duration
+from utils.reminders import get_scheduler, parse_reminder, describe_due
+
+# Websites that can be opened by name
+SITE_URLS = {
+    'youtube': 'https://www.youtube.com',
+    'google': 'https://www.google.com',
+    'linkedin': 'https://www.linkedin.com',
+    'gmail': 'https://mail.google.com',
+    'github': 'https://github.com'
+}
+
+# Spoken resource names -> sampler metric
+RESOURCE_METRICS = {
+    'cpu': 'cpu', 'processor': 'cpu',
+    'memory': 'memory', 'ram': 'memory',
+    'disk': 'disk', 'storage': 'disk',
+}
 
 def open_website(site):
     """
@@ -17,18 +33,10 @@ def open_website(site):
     Returns:
         Response message
     """
-    site_urls = {
-        'youtube': 'https://www.youtube.com',
-        'google': 'https://www.google.com',
-        'linkedin': 'https://www.linkedin.com',
-        'gmail': 'https://mail.google.com',
-        'github': 'https://github.com'
-    }
-    
     site = site.lower()
-    if site in site_urls:
+    if site in SITE_URLS:
         try:
-            webbrowser.open(site_urls[site])
+            webbrowser.open(SITE_URLS[site])
             return f"Opening {site.capitalize()}"
         except Exception as e:
             return f"Failed to open {site}. Error: {str(e)}"
@@ -81,46 +89,156 @@ def play_music(music_type, artist=None):
     except Exception as e:
         return f"Failed to play music. Error: {str(e)}"
 
-def get_system_info():
+def get_system_info(sampler=None):
     """
     Get system information.
     
+    Answers at once from the background sampler's latest sample instead of
+    measuring CPU usage for a second.
+    
+    Args:
+        sampler: SystemSampler to read; defaults to the process-wide one
+    
     Returns:
         String with system information
     """
-    system = platform.system()
-    processor = platform.processor()
-    memory = psutil.virtual_memory()
-    memory_gb = round(memory.total / (1024**3), 2)
+    sampler = sampler or get_sampler()
+    sample = sampler.latest()
+    memory_gb = round(sampler.memory_total / (1024**3), 2)
+    disk_gb = round(sampler.disk_total / (1024**3), 2)
+    
+    info = f"You're running {sampler.system} with a {sampler.processor} processor. "
+    info += f"You have {memory_gb} GB of RAM with {sample['memory']}% in use. "
+    info += f"Your CPU is at {sample['cpu']}% capacity. "
+    info += f"Your main disk has {disk_gb} GB total with {sample['disk']}% used."
+    
+    return info
+
+def get_system_trend(resource, window, sampler=None):
+    """
+    Describe how CPU, memory or disk usage has moved recently.
     
-    # Get CPU usage
-    cpu_percent = psutil.cpu_percent(interval=1)
+    Args:
+        resource: Spoken resource name, e.g. 'cpu', 'processor', 'ram', 'disk'
+        window: Spoken window, e.g. 'five minutes'; defaults to five minutes
+        sampler: SystemSampler to read; defaults to the process-wide one
+        
+    Returns:
+        Response message
+    """
+    sampler = sampler or get_sampler()
+    metric = RESOURCE_METRICS.get(resource, 'cpu')
+    label = "CPU" if metric == 'cpu' else metric
+    seconds = parse_duration(window or "") or 300
     
-    # Get disk usage
-    disk = psutil.disk_usage('/')
-    disk_gb = round(disk.total / (1024**3), 2)
+    trend = sampler.trend(metric, seconds)
+    if not trend or trend['count'] < 2:
+        latest = sampler.latest()
+        return f"I don't have any history yet. Your {label} is at {latest[metric]}% right now."
     
-    info = f"You're running {system} with a {processor} processor. "
-    info += f"You have {memory_gb} GB of RAM with {memory.percent}% in use. "
-    info += f"Your CPU is at {cpu_percent}% capacity. "
-    info += f"Your main disk has {disk_gb} GB total with {disk.percent}% used."
+    # Say how much was actually watched when the history is shorter than asked
+    span = seconds if trend['covered'] >= seconds * 0.9 else trend['covered']
+    return (f"Over the last {describe_duration(span)}, your {label} usage averaged {trend['mean']:.0f}%, "
+            f"ranging from {trend['min']:.0f}% to {trend['max']:.0f}%. It's at {trend['latest']:.0f}% now.")
+
+def get_top_process(resource, sampler=None):
+    """
+    Name the process using the most memory or CPU.
     
-    return info
+    Args:
+        resource: Spoken resource name, e.g. 'memory', 'ram', 'cpu'
+        sampler: SystemSampler to read; defaults to the process-wide one
+        
+    Returns:
+        Response message
+    """
+    sampler = sampler or get_sampler()
+    metric = 'cpu' if RESOURCE_METRICS.get(resource) == 'cpu' else 'memory'
+    top = sampler.top_process(metric)
+    if top is None:
+        return "I couldn't read the process list."
+    
+    name, pid, value = top
+    if metric == 'memory':
+        return f"{name} is using the most memory, {value / (1024**2):.0f} MB."
+    return f"{name} is using the most CPU, {value:.0f}% of the processor."
+
+def create_reminder(reminder_text, scheduler=None):
+    """
+    Create a reminder from what the user said after "remind me".
+    
+    Args:
+        reminder_text: Message and time, e.g. "call mom at 6 pm tomorrow"
+        scheduler: ReminderScheduler; defaults to the process-wide one
+        
+    Returns:
+        Response message
+    """
+    scheduler = scheduler or get_scheduler()
+    now = scheduler.clock()
+    message, due = parse_reminder(reminder_text, now)
+    if not message:
+        return "What would you like me to remind you about?"
+    if due is None:
+        return (f"When should I remind you to {message}? "
+                f"Say, for example, 'remind me to {message} in 20 minutes'.")
+    if due <= now:
+        return "That time has already passed."
+    
+    scheduler.add(message, due)
+    return f"OK, I'll remind you {describe_due(due, now)}: {message}."
+
+def list_reminders(scheduler=None, limit=3):
+    """
+    Describe the next pending reminders.
+    
+    Args:
+        scheduler: ReminderScheduler; defaults to the process-wide one
+        limit: Reminders to read out at most
+        
+    Returns:
+        Response message
+    """
+    scheduler = scheduler or get_scheduler()
+    now = scheduler.clock()
+    upcoming = scheduler.pending(limit)
+    if not upcoming:
+        return "You have no reminders."
+    count = scheduler.stats()['pending']
+    parts = [f"{message} {describe_due(due_at, now)}" for due_at, _, message in upcoming]
+    if count == 1:
+        intro = "You have one reminder"
+    elif count <= limit:
+        intro = f"You have {count} reminders"
+    else:
+        intro = f"You have {count} reminders; the next {limit} are"
+    return f"{intro}: " + "; ".join(parts) + "."
 
-def create_reminder(reminder_text):
+def cancel_reminder(reminder_text=None, scheduler=None):
     """
-    Create a reminder with the given text.
+    Cancel reminders whose message contains the given words.
     
     Args:
-        reminder_text: Text for the reminder
+        reminder_text: Words from the reminder; may be omitted if only one is pending
+        scheduler: ReminderScheduler; defaults to the process-wide one
         
     Returns:
         Response message
     """
-    # For a full implementation, this would integrate with a calendar or reminder app
-    # For demonstration, we'll just acknowledge the reminder
+    scheduler = scheduler or get_scheduler()
+    if not reminder_text:
+        upcoming = scheduler.pending(2)
+        if len(upcoming) != 1:
+            return "Which reminder should I cancel?" if upcoming else "You have no reminders."
+        scheduler.cancel(upcoming[0][1])
+        return f"Cancelled your reminder to {upcoming[0][2]}."
     
-    return f"I've set a reminder: {reminder_text}"
+    cancelled = scheduler.cancel_matching(reminder_text)
+    if not cancelled:
+        return f"I couldn't find a reminder about {reminder_text}."
+    if len(cancelled) == 1:
+        return f"Cancelled your reminder to {cancelled[0]}."
+    return f"Cancelled {len(cancelled)} reminders about {reminder_text}."
 
 def tell_time():
     """
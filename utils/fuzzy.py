@@ -0,0 +1,217 @@
+# utils/fuzzy.py - Approximate matching of misrecognized command words
+
+import functools
+import re
+
+# Corrections are only accepted if the whole utterance scores at least this
+FUZZY_THRESHOLD = 0.6
+
+# Cities recognized in weather requests, on top of JARVIS_PREFETCH_CITIES
+KNOWN_CITIES = [
+    "london", "paris", "new york", "los angeles", "chicago", "houston", "toronto",
+    "san francisco", "seattle", "boston", "miami", "mumbai", "delhi", "bangalore",
+    "tokyo", "beijing", "shanghai", "singapore", "sydney", "melbourne", "dubai",
+    "berlin", "madrid", "rome", "moscow", "cairo", "lagos", "nairobi", "mexico city",
+    "sao paulo", "karachi", "lahore", "istanbul", "amsterdam", "dublin",
+]
+
+# Words shorter than this are never corrected, nor corrected into
+MIN_WORD_LENGTH = 3
+
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(
+    ["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for c in letters}
+
+
+def soundex(word):
+    """
+    Phonetic key of a word: its first letter and up to three consonant classes.
+
+    Words that sound alike ("weather", "whether") share a key.
+    """
+    if not word:
+        return ""
+    codes = []
+    previous = _SOUNDEX_CODES.get(word[0])
+    for c in word[1:]:
+        code = _SOUNDEX_CODES.get(c)
+        if code is None:
+            continue
+        if code != '0' and code != previous:
+            codes.append(code)
+        if c not in "hw":
+            previous = code
+    return (word[0] + "".join(codes) + "000")[:4]
+
+
+def edit_distance(a, b, bound):
+    """
+    Damerau-Levenshtein distance (adjacent transpositions count as one edit).
+
+    Args:
+        a, b: Words to compare
+        bound: Give up once the distance is certain to exceed this
+
+    Returns:
+        The distance, or bound + 1 if it is larger than bound
+    """
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > bound:
+            return bound + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _trigrams(word):
+    padded = f"^{word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def pattern_words(pattern):
+    """
+    Literal words a command pattern matches, e.g. 'open', 'youtube', 'weather'.
+
+    Args:
+        pattern: Regular expression string from the command table
+
+    Returns:
+        Set of lowercase words
+    """
+    # Drop escapes such as \s and \' so they do not leave stray letters
+    literal = re.sub(r'\\.', ' ', pattern)
+    return {word for word in re.findall(r'[a-z]+', literal) if len(word) >= 2}
+
+
+class FuzzyMatcher:
+    """
+    Corrects near-miss words in an utterance against a fixed vocabulary.
+
+    The vocabulary is every literal word in the command patterns plus
+    known entities (site names, cities, news categories). It is indexed
+    once by character trigram and by Soundex key. A word is only compared
+    with the handful of vocabulary words that share a trigram or a key,
+    using a bounded edit distance. Split words are rejoined first ("you
+    tube" -> "youtube"). Corrections of the same word are memoized, so a
+    repeated mishearing costs a dictionary lookup.
+    """
+
+    def __init__(self, vocabulary, entities=(), threshold=FUZZY_THRESHOLD):
+        """
+        Build the index.
+
+        Args:
+            vocabulary: Words the command patterns are made of
+            entities: Known names, possibly several words ("new york")
+            threshold: Lowest overall confidence at which correct() returns a result
+        """
+        self.threshold = threshold
+        self.keywords = set(vocabulary)
+        self.words = set(vocabulary)
+        for entity in entities:
+            self.words.update(entity.lower().split())
+
+        self._by_trigram = {}
+        self._by_sound = {}
+        for word in self.words:
+            if len(word) < MIN_WORD_LENGTH:
+                continue
+            for gram in _trigrams(word):
+                self._by_trigram.setdefault(gram, []).append(word)
+            self._by_sound.setdefault(soundex(word), []).append(word)
+
+        # Per-instance memo of single-word corrections
+        self.correct_word = functools.lru_cache(maxsize=4096)(self._correct_word)
+
+    @classmethod
+    def from_patterns(cls, patterns, entities=(), threshold=FUZZY_THRESHOLD):
+        """Build a matcher from command pattern strings."""
+        vocabulary = set()
+        for pattern in patterns:
+            vocabulary |= pattern_words(pattern)
+        return cls(vocabulary, entities, threshold)
+
+    def _correct_word(self, word):
+        """
+        Find the vocabulary word a misheard word was meant to be.
+
+        Returns:
+            (replacement, score between 0 and 1), or None to leave it alone
+        """
+        if word in self.words or len(word) < MIN_WORD_LENGTH or not word.isalpha():
+            return None
+        bound = 1 if len(word) <= 5 else 2
+
+        candidates = set(self._by_sound.get(soundex(word), ()))
+        for gram in _trigrams(word):
+            candidates.update(self._by_trigram.get(gram, ()))
+
+        best = None
+        key = soundex(word)
+        for candidate in candidates:
+            # Sounding alike buys one extra edit ("whether" -> "weather")
+            alike = soundex(candidate) == key
+            distance = edit_distance(word, candidate, bound + alike)
+            if distance > bound + alike:
+                continue
+            score = 1.0 - distance / max(len(word), len(candidate))
+            if alike:
+                score = min(1.0, score + 0.1)
+            if best is None or score > best[1]:
+                best = (candidate, score)
+        return best
+
+    def correct(self, text):
+        """
+        Rewrite an utterance with misheard words replaced.
+
+        Args:
+            text: Lowercase utterance
+
+        Returns:
+            (corrected text, confidence), or None if nothing was changed,
+            no correction landed on a command word (entities alone do not
+            make a command), or the confidence is below the threshold
+        """
+        tokens = text.split()
+        corrected = []
+        confidence = 1.0
+        changed = False
+        keyword = False
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            # "you tube", "git hub": two words that belong together
+            if i + 1 < len(tokens):
+                joined = token + tokens[i + 1]
+                if joined in self.words:
+                    corrected.append(joined)
+                    confidence *= 0.95
+                    changed = True
+                    keyword = keyword or joined in self.keywords
+                    i += 2
+                    continue
+            # "tdoay's" is corrected as "tdoay" and keeps its "'s"
+            stem, suffix = (token[:-2], token[-2:]) if token.endswith("'s") else (token, "")
+            replacement = self.correct_word(stem)
+            if replacement is None:
+                corrected.append(token)
+            else:
+                word, score = replacement
+                corrected.append(word + suffix)
+                confidence *= score
+                changed = True
+                keyword = keyword or word in self.keywords
+            i += 1
+
+        if not changed or not keyword or confidence < self.threshold:
+            return None
+        return " ".join(corrected), confidence
@@ -0,0 +1,253 @@
+# utils/handler_pool.py - Command handlers on a worker pool, with acknowledgements and deadlines
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+from utils.instrumentation import get_tracer
+
+# Seconds a slow handler may run before Jarvis says it is working on it
+ACK_AFTER = float(os.environ.get("JARVIS_ACK_AFTER", "0.7"))
+
+# Seconds after which a handler's answer is given up on
+DEADLINE = float(os.environ.get("JARVIS_HANDLER_DEADLINE", "10"))
+
+# Handlers running at once; a handler past its deadline keeps its worker
+# until its own timeouts end it, so there is room for a few of those
+WORKERS = int(os.environ.get("JARVIS_HANDLER_WORKERS", "4"))
+
+DEFAULT_FALLBACK = "Sorry, that is taking too long. Please try again in a moment."
+
+
+class HandlerPolicy:
+    """How a handler is run: inline, or on the pool with an acknowledgement and deadline."""
+
+    def __init__(self, local=False, ack=None, ack_after=ACK_AFTER, deadline=DEADLINE,
+                 fallback=DEFAULT_FALLBACK):
+        """
+        Args:
+            local: Run on the calling thread; for handlers that never wait on I/O
+            ack: Spoken if the handler is still running after ack_after seconds
+            ack_after: Seconds before the acknowledgement
+            deadline: Seconds before the handler is abandoned
+            fallback: Spoken instead of the answer when the deadline passes
+        """
+        self.local = local
+        self.ack = ack
+        self.ack_after = ack_after
+        self.deadline = deadline
+        self.fallback = fallback
+
+
+# Handlers that declare nothing are treated as slow
+DEFAULT_POLICY = HandlerPolicy()
+
+# Per worker thread: the Event set when the pool gives up on its handler
+_worker = threading.local()
+
+
+def abandoned():
+    """
+    True inside a pooled handler whose deadline has passed.
+
+    The caller has already spoken the fallback by then, so a handler about
+    to do something the user would notice (open a browser tab) checks this
+    first. Always False outside the pool.
+    """
+    event = getattr(_worker, 'abandoned', None)
+    return event is not None and event.is_set()
+
+
+def local(func):
+    """
+    Declare a handler fast and local (clock, memory, launching the browser):
+    it runs inline and skips the pool.
+
+    Handlers with side effects belong here: one abandoned at its deadline
+    would still open a page or start music after the fallback was spoken.
+    """
+    func.policy = HandlerPolicy(local=True)
+    return func
+
+
+def slow(ack=None, ack_after=ACK_AFTER, deadline=DEADLINE, fallback=DEFAULT_FALLBACK):
+    """
+    Declare a handler slow (network, process scans): it runs on the pool.
+
+        @slow("Checking the weather.", fallback="The weather service isn't answering.")
+        def get_weather(self, city=None):
+            ...
+    """
+    def decorate(func):
+        func.policy = HandlerPolicy(ack=ack, ack_after=ack_after, deadline=deadline, fallback=fallback)
+        return func
+    return decorate
+
+
+def policy_of(handler):
+    return getattr(handler, 'policy', DEFAULT_POLICY)
+
+
+class HandlerPool:
+    """
+    Runs command handlers on worker threads so a slow one cannot leave
+    the user in silence or stall the assistant.
+
+    run() waits for the answer. If the handler is still busy after its
+    ack_after seconds, its acknowledgement is passed to the caller to speak
+    right away, and the wait goes on up to the deadline. A handler that
+    misses the deadline is abandoned: it is cancelled if it has not started,
+    and otherwise left to finish on its worker with its answer discarded,
+    since Python threads cannot be stopped from outside; abandoned() tells
+    it so. The caller gets the handler's fallback to speak instead.
+    """
+
+    def __init__(self, workers=WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pooled = 0
+        self.acknowledged = 0
+        self.abandoned = 0
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="jarvis-handler")
+            return self._executor
+
+    def run(self, handler, args, acknowledge=None):
+        """
+        Run a handler under its policy.
+
+        Args:
+            handler: Bound controller method
+            args: Arguments from the router
+            acknowledge: Called with the acknowledgement text once the
+                         handler has run past ack_after; None to stay silent
+
+        Returns:
+            The handler's response, or its fallback if it missed the deadline
+
+        Raises:
+            Whatever the handler raises
+        """
+        policy = policy_of(handler)
+        if policy.local:
+            return handler(*args)
+
+        tracer = get_tracer()
+        # Worker threads do not inherit the caller's turn, so pass it along
+        turn = tracer.current_turn()
+        given_up = threading.Event()
+        future = self.executor.submit(self._call, tracer, turn, given_up, handler, args)
+        with self._lock:
+            self.pooled += 1
+
+        waited = 0.0
+        if acknowledge is not None and policy.ack and policy.ack_after < policy.deadline:
+            try:
+                return future.result(timeout=policy.ack_after)
+            except FutureTimeout:
+                waited = policy.ack_after
+            with self._lock:
+                self.acknowledged += 1
+            tracer.event('handler.ack', handler=handler.__name__)
+            acknowledge(policy.ack)
+
+        try:
+            return future.result(timeout=policy.deadline - waited)
+        except FutureTimeout:
+            given_up.set()
+            future.cancel()
+            with self._lock:
+                self.abandoned += 1
+            tracer.event('handler.deadline', handler=handler.__name__, deadline=policy.deadline)
+            return policy.fallback
+
+    def run_all(self, calls, acknowledge=None):
+        """
+        Run several handlers at once, each under its own policy.
+
+        Slow handlers go to the pool together and local ones run inline
+        meanwhile. One acknowledgement at most is passed on, that of the
+        first slow handler still running once its ack_after has passed.
+
+        Args:
+            calls: List of (handler, args)
+            acknowledge: As for run()
+
+        Returns:
+            List in the order of calls, holding each handler's response,
+            its fallback if it missed its deadline, or the exception it raised
+        """
+        started = time.monotonic()
+        tracer = get_tracer()
+        turn = tracer.current_turn()
+        policies = [policy_of(handler) for handler, _ in calls]
+        futures = {}
+        given_up = {}
+        for i, (handler, args) in enumerate(calls):
+            if not policies[i].local:
+                given_up[i] = threading.Event()
+                futures[i] = self.executor.submit(self._call, tracer, turn, given_up[i], handler, args)
+        with self._lock:
+            self.pooled += len(futures)
+
+        results = [None] * len(calls)
+        for i, (handler, args) in enumerate(calls):
+            if policies[i].local:
+                try:
+                    results[i] = handler(*args)
+                except Exception as e:
+                    results[i] = e
+
+        acked = [i for i in futures if policies[i].ack]
+        if acknowledge is not None and acked:
+            ack_at = started + min(policies[i].ack_after for i in acked)
+            pending = {futures[i] for i in acked}
+            while pending and time.monotonic() < ack_at:
+                _, pending = wait(pending, timeout=ack_at - time.monotonic(), return_when=FIRST_COMPLETED)
+            waiting = [i for i in acked if not futures[i].done()]
+            if waiting:
+                with self._lock:
+                    self.acknowledged += 1
+                tracer.event('handler.ack', handler=calls[waiting[0]][0].__name__)
+                acknowledge(policies[waiting[0]].ack)
+
+        for i, future in futures.items():
+            remaining = started + policies[i].deadline - time.monotonic()
+            try:
+                results[i] = future.result(timeout=max(0.0, remaining))
+            except FutureTimeout:
+                given_up[i].set()
+                future.cancel()
+                with self._lock:
+                    self.abandoned += 1
+                tracer.event('handler.deadline', handler=calls[i][0].__name__, deadline=policies[i].deadline)
+                results[i] = policies[i].fallback
+            except Exception as e:
+                results[i] = e
+        return results
+
+    @staticmethod
+    def _call(tracer, turn, given_up, handler, args):
+        _worker.abandoned = given_up
+        try:
+            with tracer.turn(turn):
+                return handler(*args)
+        finally:
+            _worker.abandoned = None
+
+    def stats(self):
+        with self._lock:
+            return {'pooled': self.pooled, 'acknowledged': self.acknowledged, 'abandoned': self.abandoned}
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
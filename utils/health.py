@@ -0,0 +1,321 @@
+# utils/health.py - Backend health tracking, circuit breakers and fallback routing
+
+import collections
+import os
+import threading
+import time
+
+from utils.instrumentation import get_tracer
+
+# Consecutive failed (or too slow) calls that open a backend's circuit
+FAILURE_THRESHOLD = int(os.environ.get("JARVIS_BREAKER_FAILURES", "3"))
+
+# Seconds an open circuit sends traffic to the fallback before a probe is
+# tried; doubled after each failed probe, up to MAX_OPEN_SECONDS
+OPEN_SECONDS = float(os.environ.get("JARVIS_BREAKER_OPEN_SECONDS", "30"))
+MAX_OPEN_SECONDS = 300
+
+# Outcomes kept per backend for the success rate
+WINDOW = 50
+
+# Weight of the newest call in the smoothed latency
+LATENCY_ALPHA = 0.2
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised by HealthRegistry.call() instead of calling a backend whose circuit is open."""
+
+    def __init__(self, name):
+        super().__init__(f"{name} is unavailable")
+        self.name = name
+
+
+class BackendHealth:
+    """Recent outcomes, latency and circuit state of one backend."""
+
+    def __init__(self, name, probe=None, latency_budget=None):
+        """
+        Args:
+            name: Backend name, e.g. 'gtts' or 'newsapi'
+            probe: Callable checking the backend off the hot path; returns
+                   normally if it is up and raises if not
+            latency_budget: Seconds; slower successful calls count towards
+                            opening the circuit
+        """
+        self.name = name
+        self.probe = probe
+        self.latency_budget = latency_budget
+
+        self.state = CLOSED
+        self.failures = 0  # consecutive
+        self.opened_at = None
+        self.open_for = None
+        self.trial = False  # a half-open call is in flight
+
+        self.outcomes = collections.deque(maxlen=WINDOW)
+        self.latency = None  # smoothed seconds per successful call
+        self.calls = 0
+        self.slow_calls = 0
+        self.short_circuits = 0
+        self.trips = 0
+        self.probes = 0
+
+    @property
+    def success_rate(self):
+        if not self.outcomes:
+            return None
+        return sum(self.outcomes) / len(self.outcomes)
+
+    def snapshot(self):
+        return {
+            'state': self.state,
+            'success_rate': self.success_rate,
+            'latency': self.latency,
+            'calls': self.calls,
+            'slow_calls': self.slow_calls,
+            'short_circuits': self.short_circuits,
+            'trips': self.trips,
+            'probes': self.probes,
+        }
+
+
+class HealthRegistry:
+    """
+    Tracks every backend Jarvis depends on and decides which one to use.
+
+    Each backend has a circuit breaker. After failure_threshold failures
+    in a row the circuit opens: calls fail fast with CircuitOpenError so
+    the caller goes straight to its fallback, instead of waiting for the
+    backend to time out on every request. Once the open period is over,
+    the backend's probe runs on a background thread while traffic keeps
+    going to the fallback; if it passes, the circuit closes again. A
+    backend without a probe lets a single real call through instead.
+
+    State changes and short-circuited calls are written to the trace file
+    as 'health' events.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, open_seconds=OPEN_SECONDS,
+                 max_open_seconds=MAX_OPEN_SECONDS, clock=time.monotonic):
+        """
+        Initialize the registry.
+
+        Args:
+            failure_threshold: Consecutive failures that open a circuit
+            open_seconds: First open period, in seconds
+            max_open_seconds: Longest open period after repeated failed probes
+            clock: Monotonic time source
+        """
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.clock = clock
+        self._backends = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, probe=None, latency_budget=None):
+        """
+        Add a backend, or update its probe and latency budget.
+
+        Args:
+            name: Backend name
+            probe: Callable run off the hot path to test a backend whose circuit is open
+            latency_budget: Seconds; successful calls slower than this count as failures
+        """
+        with self._lock:
+            backend = self._backends.get(name)
+            if backend is None:
+                self._backends[name] = BackendHealth(name, probe, latency_budget)
+            else:
+                backend.probe = probe or backend.probe
+                backend.latency_budget = latency_budget or backend.latency_budget
+
+    def _backend(self, name):
+        backend = self._backends.get(name)
+        if backend is None:
+            backend = self._backends[name] = BackendHealth(name)
+        return backend
+
+    # Routing
+
+    def allow(self, name):
+        """
+        Whether a call to name should be made now.
+
+        Returns False while the circuit is open; the caller should use its
+        fallback. May start a background probe.
+        """
+        probe = None
+        with self._lock:
+            backend = self._backend(name)
+            if backend.state == CLOSED:
+                return True
+            if backend.state == OPEN and self.clock() - backend.opened_at >= backend.open_for:
+                self._transition(backend, HALF_OPEN)
+                if backend.probe is not None:
+                    probe = backend.probe
+                else:
+                    backend.trial = True
+                    return True
+            backend.short_circuits += 1
+            state = backend.state
+        if probe is not None:
+            threading.Thread(target=self._run_probe, args=(name, probe),
+                             name=f"jarvis-probe-{name}", daemon=True).start()
+        get_tracer().event('health', backend=name, state=state, route='fallback')
+        return False
+
+    def record(self, name, ok, latency=None):
+        """
+        Record the outcome of a call that allow() let through.
+
+        Args:
+            name: Backend name
+            ok: The call succeeded
+            latency: Seconds the call took
+        """
+        with self._lock:
+            backend = self._backend(name)
+            backend.calls += 1
+            if ok and latency is not None:
+                backend.latency = latency if backend.latency is None else (
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * backend.latency)
+                if backend.latency_budget is not None and latency > backend.latency_budget:
+                    backend.slow_calls += 1
+                    ok = False
+            backend.outcomes.append(ok)
+
+            if backend.state == HALF_OPEN and backend.trial:
+                backend.trial = False
+                self._settle(backend, ok)
+            elif ok:
+                backend.failures = 0
+            else:
+                backend.failures += 1
+                if backend.state == CLOSED and backend.failures >= self.failure_threshold:
+                    self._open(backend, self.open_seconds)
+
+    def call(self, name, func, *args, failed=None, **kwargs):
+        """
+        Call func if name's circuit allows it and record the outcome.
+
+        Args:
+            name: Backend name
+            func: The call to make
+            failed: Optional predicate on the result marking it a failure,
+                    e.g. a 503 response
+            args, kwargs: Passed to func
+
+        Returns:
+            func's result
+
+        Raises:
+            CircuitOpenError: The circuit is open; func was not called
+            Whatever func raises, after recording it as a failure
+        """
+        if not self.allow(name):
+            raise CircuitOpenError(name)
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            self.record(name, False)
+            raise
+        self.record(name, not (failed and failed(result)), time.perf_counter() - started)
+        return result
+
+    # State changes; called with the lock held
+
+    def _open(self, backend, seconds):
+        backend.opened_at = self.clock()
+        backend.open_for = min(seconds, self.max_open_seconds)
+        backend.trips += 1
+        self._transition(backend, OPEN)
+
+    def _settle(self, backend, ok):
+        """End a half-open test: close on success, reopen for longer on failure."""
+        if ok:
+            backend.failures = 0
+            self._transition(backend, CLOSED)
+        else:
+            self._open(backend, backend.open_for * 2)
+
+    def _transition(self, backend, state):
+        backend.state = state
+        get_tracer().event('health', backend=backend.name, state=state,
+                           success_rate=backend.success_rate, latency=backend.latency)
+
+    def _run_probe(self, name, probe):
+        started = time.perf_counter()
+        try:
+            probe()
+            ok = True
+        except Exception:
+            ok = False
+        latency = time.perf_counter() - started
+        with self._lock:
+            backend = self._backend(name)
+            backend.probes += 1
+            if ok and backend.latency_budget is not None and latency > backend.latency_budget:
+                ok = False
+            if ok:
+                backend.latency = latency if backend.latency is None else (
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * backend.latency)
+            if backend.state == HALF_OPEN:
+                self._settle(backend, ok)
+
+    # Reporting
+
+    def state(self, name):
+        with self._lock:
+            return self._backend(name).state
+
+    def snapshot(self):
+        """Dict of backend name -> state, success rate, smoothed latency and counters."""
+        with self._lock:
+            return {name: backend.snapshot() for name, backend in self._backends.items()}
+
+    def unavailable(self):
+        """Names of backends whose circuit is not closed."""
+        with self._lock:
+            return [name for name, backend in self._backends.items() if backend.state != CLOSED]
+
+    def report(self):
+        """Printable table of every backend."""
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "No backends tracked yet."
+        width = max(len(name) for name in snapshot)
+        lines = [f"{'backend':<{width}} {'state':<9} {'success':>8} {'latency ms':>10} {'calls':>6} "
+                 f"{'slow':>5} {'skipped':>8} {'trips':>6}"]
+        for name, s in sorted(snapshot.items()):
+            rate = f"{s['success_rate']:.0%}" if s['success_rate'] is not None else "-"
+            latency = f"{s['latency'] * 1000:.0f}" if s['latency'] is not None else "-"
+            lines.append(f"{name:<{width}} {s['state']:<9} {rate:>8} {latency:>10} {s['calls']:>6} "
+                         f"{s['slow_calls']:>5} {s['short_circuits']:>8} {s['trips']:>6}")
+        return "\n".join(lines)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_health():
+    """Return the process-wide HealthRegistry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = HealthRegistry()
+    return _registry
+
+
+def set_health(registry):
+    """Replace the process-wide registry, e.g. with a fresh one per benchmark run."""
+    global _registry
+    with _registry_lock:
+        _registry = registry
@@ -0,0 +1,171 @@
+# utils/http_client.py - Shared pooled HTTP client for API calls
+
+import asyncio
+import functools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.startup import lazy_import
+
+# requests takes ~0.1 s to import; it is loaded when the first client is built
+requests = lazy_import("requests")
+
+# Seconds allowed to establish a connection and to wait for response data.
+# Keeping both short means a hung endpoint cannot freeze the voice loop.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 8
+
+# Seconds one get() may take over all its attempts and backoff delays;
+# each attempt's timeouts are cut to what is left of it
+TOTAL_TIMEOUT = float(os.environ.get("JARVIS_HTTP_BUDGET", "10"))
+
+# An attempt is not started with less time than this left
+MIN_ATTEMPT = 0.1
+
+# Status codes worth retrying; anything else is returned to the caller as is
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """
+    requests.Session wrapper with keep-alive pooling, deadlines and retries.
+
+    One session is shared by every API call, so repeated requests to the
+    same host reuse an open connection instead of paying a fresh TCP and TLS
+    handshake each time.
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retries=2, backoff=0.25, pool_connections=8, pool_maxsize=8, budget=TOTAL_TIMEOUT):
+        """
+        Initialize the client.
+
+        Args:
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait between bytes of the response
+            retries: Extra attempts after a connection error, timeout or retryable status
+            backoff: Base delay for exponential backoff, randomized with full jitter
+            pool_connections: Number of hosts to keep connection pools for
+            pool_maxsize: Connections kept open per host
+            budget: Seconds a get() may take over all attempts
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.budget = budget
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _delay(self, attempt):
+        """Full-jitter exponential backoff for the given retry attempt."""
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def get(self, url, params=None, timeout=None, retries=None, budget=None, **kwargs):
+        """
+        Send a GET request with retries, within an overall time budget.
+
+        Each attempt's connect and read timeouts are capped at what is left
+        of the budget, and no retry is made once too little is left. The read
+        timeout bounds the wait between bytes, so a server trickling a
+        response can still run an attempt past the budget.
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            timeout: (connect, read) tuple overriding the client default
+            retries: Override the number of retries for this call
+            budget: Override the seconds allowed over all attempts
+
+        Returns:
+            requests.Response from the last attempt
+
+        Raises:
+            requests.RequestException: If every attempt failed to get a response
+        """
+        retries = self.retries if retries is None else retries
+        connect, read = timeout or self.timeout
+        deadline = time.monotonic() + (self.budget if budget is None else budget)
+
+        for attempt in range(retries + 1):
+            remaining = deadline - time.monotonic()
+            error = response = None
+            try:
+                response = self.session.get(url, params=params, timeout=(min(connect, remaining), min(read, remaining)),
+                                            **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last = attempt == retries
+                error = e
+            else:
+                last = attempt == retries or response.status_code not in RETRY_STATUSES
+            delay = self._delay(attempt)
+            if not last and deadline - time.monotonic() - delay < MIN_ATTEMPT:
+                # Not enough budget left for another attempt
+                last = True
+            if last:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpClient:
+    """
+    asyncio front end for HttpClient.
+
+    Requests run on a small thread pool over the same pooled session, so
+    several API calls can be in flight at once from a coroutine.
+    """
+
+    def __init__(self, client=None, max_in_flight=8):
+        """
+        Initialize the async client.
+
+        Args:
+            client: HttpClient to share; defaults to the process-wide client
+            max_in_flight: Maximum concurrent requests
+        """
+        self.client = client or get_client()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="jarvis-http"
+        )
+
+    async def call(self, func, *args, **kwargs):
+        """Run a blocking function (such as an api_manager call) on the pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def get(self, url, params=None, **kwargs):
+        """Async version of HttpClient.get."""
+        return await self.call(self.client.get, url, params=params, **kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide HttpClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
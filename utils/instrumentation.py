@@ -0,0 +1,333 @@
+# utils/instrumentation.py - Per-stage timing spans, rolling percentiles and a JSONL trace
+
+import collections
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.storage import data_path
+
+# JARVIS_TRACE=0 turns timing off entirely; JARVIS_TRACE_FILE="" keeps the
+# in-memory histograms but writes no trace file
+TRACE_ENABLED = os.environ.get("JARVIS_TRACE", "1") != "0"
+TRACE_FILE = os.environ.get("JARVIS_TRACE_FILE")
+
+# The trace file is rotated to <name>.1 once it grows past this size
+MAX_TRACE_BYTES = 5 * 1024 * 1024
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class _Span:
+    """Context manager timing one stage; created by Tracer.span()."""
+
+    __slots__ = ('tracer', 'stage', 'fields', 'turn', 'started', 'wall')
+
+    def __init__(self, tracer, stage, turn, fields):
+        self.tracer = tracer
+        self.stage = stage
+        self.turn = turn
+        self.fields = fields
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        self.tracer._add(self.stage, duration, self.turn, self.wall, self.fields)
+        return False
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is disabled."""
+
+    fields = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _TurnContext(threading.local):
+    # A class default, so reading it never goes through a failed attribute lookup
+    turn = None
+
+
+class Tracer:
+    """
+    Records how long each stage of each voice turn takes.
+
+    Every span lands in a rolling window per stage, from which the report
+    computes p50/p95/p99, and is queued for the JSONL trace file. The file
+    is written by a background thread, so the cost on the hot path is two
+    clock reads, a lock and two deque appends.
+
+    Spans are tagged with the turn the current thread is working on (see
+    turn()), so one turn can be followed across the pipeline's threads.
+    """
+
+    def __init__(self, trace_path=None, enabled=TRACE_ENABLED, window=1000,
+                 flush_interval=1.0, max_trace_bytes=MAX_TRACE_BYTES):
+        """
+        Initialize the tracer.
+
+        Args:
+            trace_path: JSONL file for spans, or '' for none; defaults to
+                        JARVIS_TRACE_FILE, then trace.jsonl in the data directory
+            enabled: Record anything at all
+            window: Most recent spans kept per stage for percentiles
+            flush_interval: Seconds between trace file writes
+            max_trace_bytes: Size at which the trace file is rotated
+        """
+        if trace_path is None:
+            trace_path = TRACE_FILE if TRACE_FILE is not None else data_path("trace.jsonl")
+        self.trace_path = trace_path
+        self.enabled = enabled
+        self.window = window
+        self.flush_interval = flush_interval
+        self.max_trace_bytes = max_trace_bytes
+
+        self._stages = {}  # stage -> deque of recent durations
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._local = _TurnContext()
+
+        self._pending = collections.deque()
+        self._writer = None
+        self._stop = threading.Event()
+
+    # Turn context
+
+    def current_turn(self):
+        """Id of the turn this thread is working on, or None."""
+        return self._local.turn
+
+    @contextmanager
+    def turn(self, turn_id):
+        """Tag spans recorded by this thread with turn_id for the duration."""
+        previous = self._local.turn
+        self._local.turn = turn_id
+        try:
+            yield
+        finally:
+            self._local.turn = previous
+
+    # Recording
+
+    def span(self, stage, **fields):
+        """
+        Time a block as one stage.
+
+            with tracer.span('synthesize', cached=False):
+                ...
+
+        Extra keyword fields are written to the trace file with the span.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, self._local.turn, fields)
+
+    def record(self, stage, duration, turn=None, wall=None, **fields):
+        """
+        Record a duration measured elsewhere.
+
+        Args:
+            stage: Stage name, e.g. 'recognize' or 'http.weather'
+            duration: Seconds
+            turn: Turn id; defaults to the current thread's turn
+            wall: Wall-clock start time for the trace file
+            fields: Extra values written to the trace file
+        """
+        if not self.enabled:
+            return
+        if turn is None:
+            turn = self._local.turn
+        self._add(stage, duration, turn, wall or time.time() - duration, fields)
+
+    def event(self, stage, **fields):
+        """
+        Write a point-in-time entry, such as a state change, to the trace file.
+
+        Events have no duration and are left out of the percentiles.
+        """
+        if not self.enabled or not self.trace_path:
+            return
+        self._pending.append((time.time(), self._local.turn, stage, None, fields))
+        if self._writer is None:
+            self._start_writer()
+
+    def _add(self, stage, duration, turn, wall, fields):
+        with self._lock:
+            samples = self._stages.get(stage)
+            if samples is None:
+                samples = self._stages[stage] = collections.deque(maxlen=self.window)
+                self._counts[stage] = 0
+            samples.append(duration)
+            self._counts[stage] += 1
+
+        if self.trace_path:
+            self._pending.append((wall, turn, stage, duration, fields))
+            if self._writer is None:
+                self._start_writer()
+
+    # Trace file
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._write_loop, name="jarvis-trace", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Append queued spans to the trace file."""
+        if not self._pending:
+            return
+        lines = []
+        while self._pending:
+            wall, turn, stage, duration, fields = self._pending.popleft()
+            entry = {'ts': round(wall, 6), 'turn': turn, 'stage': stage}
+            if duration is not None:
+                entry['ms'] = round(duration * 1000, 3)
+            entry.update(fields)
+            lines.append(json.dumps(entry, default=str))
+        try:
+            if os.path.exists(self.trace_path) and os.path.getsize(self.trace_path) > self.max_trace_bytes:
+                os.replace(self.trace_path, self.trace_path + ".1")
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"Could not write trace file: {e}")
+
+    def close(self):
+        """Stop the writer thread and write out what is queued."""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout=2)
+            self._writer = None
+        self.flush()
+
+    # Reporting
+
+    def summary(self):
+        """
+        Percentiles per stage over the rolling window.
+
+        Returns:
+            Dict of stage -> {'count', 'p50', 'p95', 'p99', 'max'} in seconds,
+            where count is the total number of spans since start
+        """
+        with self._lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self._stages.items()}
+            counts = dict(self._counts)
+        return {
+            stage: {
+                'count': counts[stage],
+                'p50': percentile(ordered, 0.50),
+                'p95': percentile(ordered, 0.95),
+                'p99': percentile(ordered, 0.99),
+                'max': ordered[-1],
+            }
+            for stage, ordered in snapshot.items() if ordered
+        }
+
+    def report(self):
+        """Printable table of every stage, slowest p95 first."""
+        stats = self.summary()
+        if not stats:
+            return "No timings recorded yet."
+        width = max(len(stage) for stage in stats)
+        lines = [f"{'stage':<{width}} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+        for stage, s in sorted(stats.items(), key=lambda item: item[1]['p95'], reverse=True):
+            lines.append(f"{stage:<{width}} {s['count']:>6} {s['p50'] * 1000:>8.1f} {s['p95'] * 1000:>8.1f} "
+                         f"{s['p99'] * 1000:>8.1f} {s['max'] * 1000:>8.1f}")
+        return "\n".join(lines)
+
+    def spoken_report(self, stages=('turn', 'recognize', 'command', 'synthesize'), slowest=1):
+        """
+        A short summary to be read out: the headline stages plus the slowest other one.
+
+        listen and play are left out of the comparison, since they mostly
+        measure how long the user and Jarvis talk.
+
+        Returns:
+            Sentence describing median and 95th percentile times
+        """
+        stats = self.summary()
+        if not stats:
+            return "I haven't timed anything yet."
+
+        chosen = [s for s in stages if s in stats]
+        others = sorted((s for s in stats
+                         if s not in chosen and s not in ('listen', 'play')
+                         and not any(s.startswith(c + '.') for c in chosen)),
+                        key=lambda s: stats[s]['p95'], reverse=True)
+        chosen += others[:slowest]
+
+        parts = []
+        for stage in chosen:
+            s = stats[stage]
+            parts.append(f"{stage.replace('.', ' ').replace('_', ' ')} takes {_spoken_seconds(s['p50'])} "
+                         f"typically and {_spoken_seconds(s['p95'])} at the 95th percentile")
+        return "Performance report: " + "; ".join(parts) + "."
+
+
+def _spoken_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} milliseconds"
+    return f"{seconds:.1f} seconds"
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Return the process-wide tracer, creating it on first use."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
+
+
+def set_tracer(tracer):
+    """Replace the process-wide tracer, e.g. with a fresh one per benchmark run."""
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer
+
+
+def traced(stage):
+    """Decorator timing a function as stage on the process-wide tracer."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
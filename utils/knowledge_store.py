@@ -0,0 +1,301 @@
+# utils/knowledge_store.py - Full-text index of search results for answering offline
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils.storage import data_path
+
+# Indexed results older than this are not used to answer
+MAX_AGE = float(os.environ.get("JARVIS_KNOWLEDGE_MAX_AGE", 30 * 24 * 60 * 60))
+# Questions about things that change ("latest", "today") need recent results
+VOLATILE_MAX_AGE = 6 * 60 * 60
+VOLATILE_WORDS = {
+    "latest", "today", "todays", "tonight", "now", "current", "currently", "live",
+    "score", "scores", "price", "prices", "stock", "stocks", "news", "weather", "yesterday",
+}
+# Results older than this are deleted by purge()
+PURGE_AGE = float(os.environ.get("JARVIS_KNOWLEDGE_PURGE_AGE", 180 * 24 * 60 * 60))
+# Rows kept at most; the oldest go first
+MAX_SNIPPETS = int(os.environ.get("JARVIS_KNOWLEDGE_MAX_SNIPPETS", 500000))
+
+# Words that carry no topic and are left out of the full-text query
+STOP_WORDS = {
+    "a", "an", "and", "are", "about", "as", "at", "be", "by", "can", "could", "did", "do",
+    "does", "for", "from", "how", "i", "in", "is", "it", "its", "me", "mean", "means", "of",
+    "on", "or", "please", "tell", "that", "the", "their", "there", "this", "to", "was",
+    "were", "what", "whats", "when", "where", "which", "who", "whom", "whose", "why",
+    "will", "with", "would", "you", "your",
+}
+
+# Best BM25 score (negated, so higher is better) a local answer needs. fts5
+# gives a word found in half the index or more almost no weight, so a
+# match on such words alone says little and goes to the network instead.
+MIN_SCORE = float(os.environ.get("JARVIS_KNOWLEDGE_MIN_SCORE", "0.001"))
+
+# BM25 column weights: title, snippet, the query the result was found for
+TITLE_WEIGHT = 3.0
+SNIPPET_WEIGHT = 1.0
+QUERY_WEIGHT = 2.0
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS snippets ("
+    " id INTEGER PRIMARY KEY, query TEXT NOT NULL, title TEXT NOT NULL,"
+    " snippet TEXT NOT NULL, link TEXT NOT NULL UNIQUE, fetched_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS snippets_fetched_at ON snippets (fetched_at)",
+    # External-content index: the text lives once, in snippets
+    "CREATE VIRTUAL TABLE IF NOT EXISTS snippets_fts USING fts5("
+    " title, snippet, query, content='snippets', content_rowid='id',"
+    " tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS snippets_ai AFTER INSERT ON snippets BEGIN"
+    " INSERT INTO snippets_fts (rowid, title, snippet, query)"
+    " VALUES (new.id, new.title, new.snippet, new.query); END",
+    "CREATE TRIGGER IF NOT EXISTS snippets_ad AFTER DELETE ON snippets BEGIN"
+    " INSERT INTO snippets_fts (snippets_fts, rowid, title, snippet, query)"
+    " VALUES ('delete', old.id, old.title, old.snippet, old.query); END",
+    "CREATE TRIGGER IF NOT EXISTS snippets_au AFTER UPDATE ON snippets BEGIN"
+    " INSERT INTO snippets_fts (snippets_fts, rowid, title, snippet, query)"
+    " VALUES ('delete', old.id, old.title, old.snippet, old.query);"
+    " INSERT INTO snippets_fts (rowid, title, snippet, query)"
+    " VALUES (new.id, new.title, new.snippet, new.query); END",
+]
+
+
+def query_terms(text):
+    """
+    Topic words of a question, e.g. 'tell me about the moon landing' -> ['moon', 'landing'].
+
+    Args:
+        text: Question or search query
+
+    Returns:
+        List of lowercase words, in order, without stop words or repeats
+    """
+    terms = []
+    for word in re.findall(r"\w+", text.casefold().replace("'", "")):
+        if word not in STOP_WORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def _stem(word):
+    """Fold a plain plural, so 'moon landings' covers a search for 'moon landing'."""
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def covers(question, query):
+    """True if every topic word of an earlier search query is in the question."""
+    asked = {_stem(term) for term in query_terms(question)}
+    return all(_stem(term) in asked for term in query_terms(query))
+
+
+class KnowledgeStore:
+    """
+    SQLite FTS5 index of every search result Jarvis has fetched.
+
+    Each title and snippet is stored with the query it was found for and
+    when. A later question is answered from the index when every one of
+    its topic words appears in the title or the original query of a result
+    fresh enough for the question, and every topic word of that original
+    query is in the question too: after a search for "bruno mars", "tell
+    me about mars" is a different question. Results are ranked by BM25 and
+    the best must reach MIN_SCORE. Otherwise the caller goes to the
+    network and adds what it finds.
+    """
+
+    def __init__(self, path=None, max_age=MAX_AGE, purge_age=PURGE_AGE, max_rows=MAX_SNIPPETS, clock=time.time):
+        """
+        Open or create the index.
+
+        Args:
+            path: SQLite file, ':memory:' for a throwaway index, or None for the default
+            max_age: Oldest result, in seconds, used to answer a question
+            purge_age: Results older than this are deleted by purge()
+            max_rows: Results kept at most
+            clock: Function returning the current time in seconds
+        """
+        self.max_age = max_age
+        self.purge_age = purge_age
+        self.max_rows = max_rows
+        self.clock = clock
+        self._lock = threading.RLock()
+
+        self._db = sqlite3.connect(path or data_path("knowledge.sqlite3"), check_same_thread=False)
+        # Only takes effect on a new file; lets compact() return freed pages
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.execute(
+            "INSERT INTO snippets_fts (snippets_fts, rank) VALUES ('rank', ?)",
+            (f"bm25({TITLE_WEIGHT}, {SNIPPET_WEIGHT}, {QUERY_WEIGHT})",)
+        )
+        self._db.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.added = 0
+
+    def add(self, query, items):
+        """
+        Index search results.
+
+        A result already indexed (same link) is replaced and counts as fresh.
+
+        Args:
+            query: Query the results were found for
+            items: Result dictionaries with 'title', 'snippet' and optionally 'link'
+
+        Returns:
+            Number of results indexed
+        """
+        now = self.clock()
+        rows = []
+        for item in items or []:
+            title = (item.get('title') or "").strip()
+            snippet = (item.get('snippet') or "").strip()
+            if not title and not snippet:
+                continue
+            link = item.get('link') or f"title:{title}"
+            rows.append((query, title, snippet, link, now))
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO snippets (query, title, snippet, link, fetched_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (link) DO UPDATE SET query = excluded.query, title = excluded.title,"
+                " snippet = excluded.snippet, fetched_at = excluded.fetched_at",
+                rows
+            )
+            self._db.commit()
+            self.added += len(rows)
+        return len(rows)
+
+    def max_age_for(self, query):
+        """Oldest result, in seconds, that may answer this question."""
+        if VOLATILE_WORDS.intersection(query_terms(query)):
+            return min(self.max_age, VOLATILE_MAX_AGE)
+        return self.max_age
+
+    def search(self, query, limit=3, max_age=None, min_score=MIN_SCORE):
+        """
+        Find indexed results that answer a question.
+
+        Args:
+            query: Question or search query
+            limit: Results to return at most
+            max_age: Oldest result to use, in seconds; defaults to max_age_for(query)
+            min_score: BM25 score the best result must reach
+
+        Returns:
+            Best results first, as dictionaries with 'title', 'snippet', 'link'
+            and 'fetched_at'; an empty list if none are relevant and fresh
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        if max_age is None:
+            max_age = self.max_age_for(query)
+        # Every topic word must appear in the title or the original query;
+        # a passing mention in a snippet is not an answer
+        match = "{title query} : (" + " ".join('"' + term + '"' for term in terms) + ")"
+        oldest = self.clock() - max_age
+
+        with self._lock:
+            # Extra rows, since some are dropped below for a narrower search
+            rows = self._db.execute(
+                "SELECT s.title, s.snippet, s.link, s.fetched_at, s.query, rank FROM snippets_fts"
+                " JOIN snippets s ON s.id = snippets_fts.rowid"
+                " WHERE snippets_fts MATCH ? AND s.fetched_at >= ?"
+                " ORDER BY rank LIMIT ?",
+                (match, oldest, limit * 4)
+            ).fetchall()
+            # The found-for query must not be about more than the question
+            rows = [row for row in rows if covers(query, row[4])][:limit]
+            # bm25() is negative, lower being better
+            if rows and -rows[0][5] < min_score:
+                rows = []
+            if rows:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return [{'title': title, 'snippet': snippet, 'link': link, 'fetched_at': fetched_at}
+                for title, snippet, link, fetched_at, _, _ in rows]
+
+    def purge(self, older_than=None):
+        """
+        Delete old results, then the oldest beyond max_rows.
+
+        Args:
+            older_than: Age in seconds; defaults to purge_age
+
+        Returns:
+            Number of results deleted
+        """
+        cutoff = self.clock() - (self.purge_age if older_than is None else older_than)
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM snippets WHERE fetched_at < ?", (cutoff,)).rowcount
+            excess = self.count() - self.max_rows
+            if excess > 0:
+                deleted += self._db.execute(
+                    "DELETE FROM snippets WHERE id IN ("
+                    " SELECT id FROM snippets ORDER BY fetched_at LIMIT ?)",
+                    (excess,)
+                ).rowcount
+            self._db.commit()
+        return deleted
+
+    def compact(self):
+        """Merge the index into one segment and return free pages to the file system."""
+        with self._lock:
+            self._db.execute("INSERT INTO snippets_fts (snippets_fts) VALUES ('optimize')")
+            self._db.commit()
+            # execute() would step it once and free a single page
+            self._db.executescript("PRAGMA incremental_vacuum;")
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+    def maintain(self, background=True):
+        """
+        Purge and compact, by default on a background thread.
+
+        Returns:
+            The thread, or None when run in the foreground
+        """
+        def run():
+            try:
+                deleted = self.purge()
+                self.compact()
+                if deleted:
+                    print(f"Knowledge store: purged {deleted} old results")
+            except sqlite3.Error as e:
+                print(f"Knowledge store maintenance failed: {e}")
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="jarvis-knowledge-maintenance", daemon=True)
+        thread.start()
+        return thread
+
+    def count(self):
+        """Number of results indexed."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM snippets").fetchone()[0]
+
+    def stats(self):
+        """Counters for questions answered locally, misses and results added."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'added': self.added,
+                'snippets': self.count(),
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
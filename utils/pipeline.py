@@ -0,0 +1,404 @@
+# utils/pipeline.py - Staged listen/recognize/dispatch/synthesize/play loop
+
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from utils.barge_in import BargeInMonitor
+from utils.instrumentation import get_tracer
+
+# Marks the end of the stream on every queue
+_STOP = object()
+
+# Set JARVIS_BARGE_IN=0 when the speaker is loud enough to set off barge-in
+BARGE_IN = os.environ.get("JARVIS_BARGE_IN", "1") != "0"
+
+# Phrases overlapping Jarvis's own playback are dropped unless they set off
+# barge-in. Set JARVIS_ECHO_GATE=0 with a headset, where the microphone
+# cannot hear the speaker, to let commands be spoken over answers.
+ECHO_GATE = os.environ.get("JARVIS_ECHO_GATE", "1") != "0"
+
+# Spans of Jarvis's own playback remembered for echo gating
+PLAYBACK_HISTORY = 32
+
+
+class Turn:
+    """One user utterance travelling through the pipeline, with its timestamps."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, audio=None, text=None, response=None, final=False):
+        self.id = next(self._ids)
+        self.audio = audio
+        self.text = text
+        self.response = response
+        self.final = final
+        self.chunks_pending = 0
+
+        now = time.perf_counter()
+        # perf_counter timestamps; speech_end comes from the capture thread
+        self.times = {'speech_end': getattr(audio, 'ended_at', None) or now}
+
+    def mark(self, stage):
+        self.times[stage] = time.perf_counter()
+
+    @property
+    def interrupted(self):
+        return 'interrupted' in self.times
+
+    def latency(self):
+        """Seconds from the end of the user's speech to the start of Jarvis's answer."""
+        if 'first_audio' not in self.times:
+            return None
+        return self.times['first_audio'] - self.times['speech_end']
+
+
+class AssistantPipeline:
+    """
+    Runs Jarvis as concurrent stages connected by bounded queues.
+
+    Capture already runs on its own threads inside SpeechModel. On top of it:
+
+        recognize -> dispatch -> synthesize -> play
+
+    each on its own worker. Jarvis keeps listening and recognizing while it
+    speaks, the next answer is synthesized while the current one plays, and
+    a full queue blocks the stage upstream of it (backpressure) instead of
+    letting work pile up.
+
+    With barge-in, the user talking over an answer cuts it off: the rest of
+    that answer is dropped, and the interrupting phrase is recognized as the
+    next turn like any other. Any other phrase that overlaps Jarvis's own
+    playback is taken for its voice coming back through the microphone
+    and dropped before recognition.
+    """
+
+    def __init__(self, model, view, controller, exit_phrases, queue_size=2,
+                 goodbye="Shutting down. Goodbye!", barge_in=BARGE_IN, echo_gate=ECHO_GATE):
+        """
+        Initialize the pipeline.
+
+        Args:
+            model: SpeechModel (listen/transcribe)
+            view: SpeechView (split/render_chunk/play_chunk)
+            controller: CommandController (process_command)
+            exit_phrases: Phrases that end the session
+            queue_size: Capacity of each inter-stage queue
+            goodbye: Spoken when an exit phrase is heard
+            barge_in: Let the user interrupt answers by talking
+            echo_gate: Drop phrases heard during playback that did not
+                       set off barge-in
+        """
+        self.model = model
+        self.view = view
+        self.controller = controller
+        self.exit_phrases = exit_phrases
+        self.goodbye = goodbye
+        self.echo_gate = echo_gate
+
+        self._dispatch_q = queue.Queue(maxsize=queue_size)
+        self._synth_q = queue.Queue(maxsize=queue_size)
+        self._play_q = queue.Queue(maxsize=queue_size)
+
+        self._stop = threading.Event()
+        self._finished = threading.Event()
+        self._threads = []
+
+        # Spans recorded by the stages are tagged with the turn they serve
+        self.tracer = get_tracer()
+
+        # The turn being spoken, which a barge-in interrupts. Changing it,
+        # clearing the view's interrupt and marking a turn interrupted all
+        # happen under the lock, so a barge-in lands on the turn it heard.
+        self._speaking = None
+        self._speaking_lock = threading.Lock()
+        self.monitor = BargeInMonitor(model.capture, self._on_barge_in) if barge_in else None
+
+        # Completed turns, newest last, for latency reporting
+        self.turns = deque(maxlen=200)
+
+        # (start, end) perf_counter spans of playback, the one in progress
+        # (end None) last, and the onsets of barge-ins, for echo gating
+        self._echo_lock = threading.Lock()
+        self._playback = deque(maxlen=PLAYBACK_HISTORY)
+        self._barge_onsets = deque(maxlen=PLAYBACK_HISTORY)
+        self.echoes_dropped = 0
+
+    def _put(self, q, item):
+        """
+        Put with backpressure.
+
+        Only new input is abandoned once the pipeline is stopping; answers
+        already past dispatch always drain through to playback.
+        """
+        while True:
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self._stop.is_set() and q is self._dispatch_q and item is not _STOP:
+                    return False
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set() and q is self._dispatch_q:
+                    return _STOP
+
+    def _is_echo(self, audio):
+        """
+        True if a phrase overlaps Jarvis's playback and no barge-in fired in it.
+
+        The capture keeps segmenting while Jarvis speaks, and its voice from
+        the speaker can be loud enough to form a phrase of its own.
+        """
+        started = getattr(audio, 'started_at', None)
+        ended = getattr(audio, 'ended_at', None)
+        if started is None or ended is None:
+            return False
+        with self._echo_lock:
+            overlaps = any(start <= ended and (end is None or end >= started) for start, end in self._playback)
+            if not overlaps:
+                return False
+            return not any(started <= onset <= ended for onset in self._barge_onsets)
+
+    # Stages
+
+    def _recognize_stage(self):
+        announced = False
+        while not self._stop.is_set():
+            if not announced:
+                self.view.speak_action("Listening...")
+                announced = True
+
+            audio = self.model.listen(timeout=0.5)
+            if audio is None:
+                if getattr(self.model.capture, 'ended', False):
+                    # A finite source (fixture) has run out
+                    self._put(self._dispatch_q, Turn(text=None, final=True))
+                    break
+                continue
+
+            if self.echo_gate and self._is_echo(audio):
+                self.echoes_dropped += 1
+                continue
+
+            announced = False
+            turn = Turn(audio=audio)
+            try:
+                with self.tracer.turn(turn.id):
+                    turn.text = self.model.transcribe(audio)
+            except Exception as e:
+                # The next phrase gets another try; the stage must not die
+                print(f"Speech recognition error: {e}")
+                turn.text = None
+            turn.mark('recognized')
+            if turn.text is None:
+                turn.response = self.model.last_error or "I didn't catch that. Could you repeat?"
+            if not self._put(self._dispatch_q, turn):
+                break
+        self._put(self._dispatch_q, _STOP)
+
+    def _dispatch_stage(self):
+        while True:
+            turn = self._get(self._dispatch_q)
+            if turn is _STOP:
+                break
+
+            if turn.final and turn.text is None:
+                self.stop()
+                continue
+
+            if turn.text and turn.response is None:
+                if any(phrase in turn.text.lower() for phrase in self.exit_phrases):
+                    turn.response = self.goodbye
+                    turn.final = True
+                else:
+                    self.view.speak_action(f"Processing: {turn.text}")
+                    try:
+                        # Hold off background prefetches while the command runs
+                        with self.model.prefetcher.paused(), self.tracer.turn(turn.id):
+                            turn.response = self.controller.process_command(
+                                turn.text, acknowledge=lambda text, turn=turn: self._acknowledge(turn, text))
+                    except Exception as e:
+                        print(f"Command error: {e}")
+                        turn.response = "Sorry I didn't catch that. Could you repeat?"
+            turn.mark('dispatched')
+
+            if turn.response:
+                self._put(self._synth_q, turn)
+            else:
+                self.turns.append(turn)
+
+            if turn.final:
+                # Stop listening; what is already queued still gets spoken
+                self.stop()
+        self._put(self._synth_q, _STOP)
+
+    def _synthesize_stage(self):
+        while True:
+            turn = self._synth_q.get()
+            if turn is _STOP:
+                break
+
+            print(f"Jarvis: {turn.response}")
+            chunks = self.view.split(turn.response)
+            turn.chunks_pending = len(chunks)
+            for chunk in chunks:
+                if turn.interrupted:
+                    # Still passed on, so the play stage can account for it
+                    self._put(self._play_q, (turn, chunk, None))
+                    continue
+                try:
+                    with self.tracer.turn(turn.id):
+                        audio_file = self.view.render_chunk(chunk)
+                except Exception as e:
+                    print(f"Synthesis error: {e}")
+                    audio_file = None
+                if 'synthesized' not in turn.times:
+                    turn.mark('synthesized')
+                self._put(self._play_q, (turn, chunk, audio_file))
+        self._put(self._play_q, _STOP)
+
+    def _play_stage(self):
+        while True:
+            item = self._play_q.get()
+            if item is _STOP:
+                break
+
+            turn, chunk, audio_file = item
+            # A barge-in either marked this turn before the check, and the
+            # chunk is skipped, or comes after it and cuts the chunk off
+            with self._speaking_lock:
+                if not turn.interrupted:
+                    self.view.clear_interrupt()
+                    self._speaking = turn
+                skip = turn.interrupted
+            if not skip:
+                if 'first_audio' not in turn.times:
+                    turn.mark('first_audio')
+                    if turn.audio is not None:
+                        self.tracer.record('turn', turn.latency(), turn=turn.id)
+                    if self.monitor is not None:
+                        self.monitor.arm()
+                with self._echo_lock:
+                    self._playback.append([time.perf_counter(), None])
+                try:
+                    with self.tracer.turn(turn.id):
+                        completed = self.view.play_chunk(chunk, audio_file)
+                    if not completed:
+                        turn.mark('cut')
+                        if turn.interrupted:
+                            self.tracer.record('barge_in.cutoff', turn.times['cut'] - turn.times['interrupted'],
+                                               turn=turn.id)
+                except Exception as e:
+                    print(f"Playback error: {e}")
+                finally:
+                    with self._echo_lock:
+                        self._playback[-1][1] = time.perf_counter()
+
+            turn.chunks_pending -= 1
+            if turn.chunks_pending == 0:
+                with self._speaking_lock:
+                    if self._speaking is turn:
+                        self._speaking = None
+                if self.monitor is not None:
+                    self.monitor.disarm()
+                turn.mark('done')
+                self.turns.append(turn)
+        self._finished.set()
+
+    def _on_barge_in(self, onset):
+        """Runs on the segmenter thread when the user talks over an answer."""
+        with self._speaking_lock:
+            turn = self._speaking
+            if turn is None or turn.interrupted:
+                return
+            turn.times['voice_onset'] = onset
+            turn.mark('interrupted')
+            self.view.interrupt()
+        with self._echo_lock:
+            self._barge_onsets.append(onset)
+
+    def _acknowledge(self, turn, text):
+        """
+        Speak a holding phrase for a turn whose command is slow to answer.
+
+        It goes straight to synthesis, ahead of the answer, while the
+        dispatch stage keeps waiting for the handler.
+        """
+        turn.mark('acknowledged')
+        self._put(self._synth_q, Turn(response=text))
+
+    def announce(self, text):
+        """
+        Speak something Jarvis brings up itself, such as a due reminder.
+
+        It joins the dispatch queue like a recognized turn that already has
+        its answer, so it is spoken after the turn in progress instead of
+        over it. Safe to call from any thread.
+        """
+        if not self._put(self._dispatch_q, Turn(response=text)):
+            print(f"Jarvis: {text}")
+
+    # Lifecycle
+
+    def start(self):
+        """Start all stage workers."""
+        if self.monitor is not None:
+            self.monitor.start()
+        stages = (
+            (self._recognize_stage, "jarvis-recognize"),
+            (self._dispatch_stage, "jarvis-dispatch"),
+            (self._synthesize_stage, "jarvis-synthesize"),
+            (self._play_stage, "jarvis-play"),
+        )
+        for target, name in stages:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop taking new input; queued answers drain through to playback."""
+        self._stop.set()
+
+    def wait(self, timeout=None):
+        """
+        Block until playback has drained after stop().
+
+        Uses short waits so KeyboardInterrupt reaches the calling thread.
+
+        Returns:
+            True if the pipeline finished
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._finished.wait(timeout=0.2):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        for thread in self._threads:
+            thread.join(timeout=1)
+        if self.monitor is not None:
+            self.monitor.stop()
+        return True
+
+    def latency_summary(self):
+        """
+        Summarize end-of-speech to first-audio latency over completed turns.
+
+        Returns:
+            Dictionary with turns, mean, p50 and max latency in seconds
+        """
+        latencies = sorted(t.latency() for t in self.turns if t.audio is not None and t.latency() is not None)
+        if not latencies:
+            return {'turns': 0, 'mean': None, 'p50': None, 'max': None}
+        return {
+            'turns': len(latencies),
+            'mean': sum(latencies) / len(latencies),
+            'p50': latencies[len(latencies) // 2],
+            'max': latencies[-1],
+        }
@@ -0,0 +1,129 @@
+# utils/playback.py - Audio file playback that can be cut off mid-file
+
+import multiprocessing
+import threading
+
+# How often a playing file checks whether it has been interrupted
+POLL_INTERVAL = 0.01
+
+
+def _player_main(conn):
+    """Helper process: play each path received on conn and report back."""
+    import playsound
+
+    while True:
+        path = conn.recv()
+        if path is None:
+            break
+        try:
+            playsound.playsound(path, True)
+            conn.send(None)
+        except Exception as e:
+            conn.send(str(e))
+
+
+class ProcessPlayer:
+    """
+    Plays audio files with playsound in a long-lived helper process.
+
+    playsound blocks until the file ends and has no way to stop it. Playing
+    in a child process means an interrupt can terminate the process, which
+    silences the output at once. A replacement is started in the background
+    right away, so only the file after a cut-off waits for a new process.
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        """
+        Initialize the player.
+
+        Args:
+            poll_interval: Seconds between interrupt checks while playing
+        """
+        self.poll_interval = poll_interval
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._process = None
+        self._conn = None
+
+    def _ready(self):
+        """Return the helper process and its pipe, starting one if needed."""
+        with self._lock:
+            if self._process is None or not self._process.is_alive():
+                parent, child = self._context.Pipe()
+                self._process = self._context.Process(
+                    target=_player_main, args=(child,), name="jarvis-player", daemon=True
+                )
+                self._process.start()
+                child.close()
+                self._conn = parent
+            return self._process, self._conn
+
+    def start(self):
+        """Start the helper process in the background, ahead of the first file."""
+        threading.Thread(target=self._ready, name="jarvis-player-start", daemon=True).start()
+
+    def _kill(self, process):
+        process.terminate()
+
+        def replace():
+            process.join(timeout=2)
+            self._ready()
+
+        threading.Thread(target=replace, name="jarvis-player-restart", daemon=True).start()
+
+    def _discard(self, process):
+        """Forget a dead helper so _ready() starts a new one."""
+        process.join(timeout=1)
+        with self._lock:
+            if self._process is process:
+                self._process = self._conn = None
+
+    def play(self, path, cancel):
+        """
+        Play a file until it ends or cancel is set.
+
+        Args:
+            path: Audio file to play
+            cancel: threading.Event that cuts playback off when set
+
+        Returns:
+            True if the file played to the end, False if it was cut off
+
+        Raises:
+            RuntimeError: The helper process could not play the file
+        """
+        if cancel.is_set():
+            return False
+
+        process, conn = self._ready()
+        try:
+            conn.send(path)
+            while not conn.poll(self.poll_interval):
+                if cancel.is_set():
+                    self._kill(process)
+                    return False
+                if not process.is_alive():
+                    break
+            error = conn.recv()
+        except (EOFError, OSError):
+            # The helper died (playsound missing or crashed); the next play starts a new one
+            self._discard(process)
+            raise RuntimeError(f"audio player process exited with code {process.exitcode}")
+        if error is not None:
+            raise RuntimeError(error)
+        return True
+
+    def close(self):
+        """Stop the helper process."""
+        with self._lock:
+            process, conn = self._process, self._conn
+            self._process = self._conn = None
+        if process is None:
+            return
+        try:
+            conn.send(None)
+        except OSError:
+            pass
+        process.join(timeout=1)
+        if process.is_alive():
+            process.terminate()
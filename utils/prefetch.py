@@ -0,0 +1,231 @@
+# utils/prefetch.py - Idle-time background prefetch of predictable queries
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from utils.response_cache import normalize_key
+from utils.storage import data_path
+
+# Targets that are always kept warm, e.g. JARVIS_PREFETCH_CITIES="london,paris"
+PREFETCH_CITIES = [c for c in os.environ.get("JARVIS_PREFETCH_CITIES", "").split(",") if c.strip()]
+PREFETCH_CATEGORIES = [c for c in os.environ.get("JARVIS_PREFETCH_CATEGORIES", "general").split(",") if c.strip()]
+
+# A target whose prefetch fails (or is never cacheable, like sample data)
+# waits this long before the next try, doubling with each failure up to
+# MAX_BACKOFF, so it does not spend the HTTP budget on every idle tick
+RETRY_BACKOFF = 60.0
+MAX_BACKOFF = 3600.0
+
+
+class PrefetchScheduler:
+    """
+    Keeps frequently requested answers warm in the ResponseCache while Jarvis is idle.
+
+    Targets are the configured cities and news categories plus the ones
+    asked for most often, learned from record() and persisted across runs.
+    Each target is refreshed shortly before its cache TTL runs out, with a
+    cap on concurrent fetches, and nothing new is started while a command
+    is being processed. Targets that fail are backed off exponentially.
+    """
+
+    def __init__(self, cache, fetchers, targets=None, top_n=3, refresh_ratio=0.8,
+                 tick=30, max_concurrency=2, usage_path=None, clock=time.monotonic):
+        """
+        Initialize the scheduler.
+
+        Args:
+            cache: ResponseCache to fill
+            fetchers: Dict of namespace -> callable(key) returning a fresh answer
+            targets: Dict of namespace -> list of keys always kept warm
+            top_n: Most frequently used keys per namespace added to the targets
+            refresh_ratio: Refresh once an entry is this fraction of its TTL old
+            tick: Seconds between checks
+            max_concurrency: Maximum prefetches in flight
+            usage_path: JSON file for learned usage counts
+            clock: Function returning seconds, for failure backoff
+        """
+        self.cache = cache
+        self.fetchers = fetchers
+        self.targets = {ns: [normalize_key(k) for k in keys] for ns, keys in (targets or {}).items()}
+        self.top_n = top_n
+        self.refresh_ratio = refresh_ratio
+        self.tick = tick
+        self.max_concurrency = max_concurrency
+        self.usage_path = usage_path or data_path("prefetch_usage.json")
+        self.clock = clock
+
+        self.usage = {ns: Counter() for ns in fetchers}
+        self._load_usage()
+
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._busy = 0  # paused() blocks in progress
+        self._stop = threading.Event()
+        self._slots = threading.Semaphore(max_concurrency)
+        self._pending = set()
+        self._failures = {}  # (namespace, key) -> (failures in a row, retry time)
+        self._executor = None
+        self._thread = None
+
+        self.prefetches = 0
+        self.failures = 0
+
+    def _load_usage(self):
+        try:
+            with open(self.usage_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for namespace, counts in saved.items():
+            if namespace in self.usage:
+                self.usage[namespace].update(counts)
+
+    def _save_usage(self):
+        with self._lock:
+            snapshot = {ns: dict(counts) for ns, counts in self.usage.items()}
+        try:
+            with open(self.usage_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+        except OSError as e:
+            print(f"Could not save prefetch usage: {e}")
+
+    def record(self, namespace, key):
+        """Note a foreground request so frequent ones get prefetched."""
+        if namespace not in self.usage:
+            return
+        with self._lock:
+            self.usage[namespace][normalize_key(key)] += 1
+
+    def due_targets(self):
+        """
+        List the (namespace, key) pairs that should be refreshed now.
+
+        Returns:
+            Targets that are missing from the cache or close to expiring,
+            except those backing off after failures
+        """
+        due = []
+        now = self.clock()
+        with self._lock:
+            learned = {ns: [k for k, _ in counts.most_common(self.top_n)]
+                       for ns, counts in self.usage.items()}
+            backing_off = {target for target, (_, retry_at) in self._failures.items() if retry_at > now}
+
+        for namespace in self.fetchers:
+            keys = list(dict.fromkeys(self.targets.get(namespace, []) + learned.get(namespace, [])))
+            ttl = self.cache.policy(namespace)['ttl']
+            for key in keys:
+                if (namespace, key) in backing_off:
+                    continue
+                if self._stale(namespace, key, ttl):
+                    due.append((namespace, key))
+        return due
+
+    def _stale(self, namespace, key, ttl=None):
+        age = self.cache.age(namespace, key)
+        if ttl is None:
+            ttl = self.cache.policy(namespace)['ttl']
+        return age is None or age >= ttl * self.refresh_ratio
+
+    @contextmanager
+    def paused(self):
+        """
+        Hold off new prefetches while the foreground path is busy.
+
+        Commands may overlap; prefetching resumes when the last one is done.
+        """
+        with self._lock:
+            self._busy += 1
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._busy -= 1
+                if self._busy == 0:
+                    self._idle.set()
+
+    def _prefetch(self, namespace, key):
+        try:
+            fetch = self.fetchers[namespace]
+            stored = self.cache.refresh(namespace, key, lambda: fetch(key), origin='prefetch', background=False)
+            # Not stored because a foreground fetch got there first is no failure
+            failed = not stored and self._stale(namespace, key)
+            with self._lock:
+                if failed:
+                    self.failures += 1
+                    count = self._failures.get((namespace, key), (0, 0))[0] + 1
+                    backoff = min(MAX_BACKOFF, RETRY_BACKOFF * 2 ** (count - 1))
+                    self._failures[(namespace, key)] = (count, self.clock() + backoff)
+                else:
+                    self._failures.pop((namespace, key), None)
+                    if stored:
+                        self.prefetches += 1
+        finally:
+            with self._lock:
+                self._pending.discard((namespace, key))
+            self._slots.release()
+
+    def run_once(self):
+        """Start refreshes for every due target, respecting pauses and the concurrency cap."""
+        started = 0
+        for namespace, key in self.due_targets():
+            with self._lock:
+                if (namespace, key) in self._pending:
+                    continue
+            # Never compete with a command that is being processed
+            while not self._idle.wait(timeout=0.5):
+                if self._stop.is_set():
+                    return started
+            if self._stop.is_set():
+                return started
+            self._slots.acquire()
+            with self._lock:
+                self._pending.add((namespace, key))
+            self._executor.submit(self._prefetch, namespace, key)
+            started += 1
+        return started
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Prefetch error: {e}")
+            self._stop.wait(self.tick)
+
+    def start(self):
+        """Start the background scheduler thread."""
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="jarvis-prefetch"
+        )
+        self._thread = threading.Thread(target=self._loop, name="jarvis-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop scheduling, and persist what was learned."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._save_usage()
+
+    def stats(self):
+        """Successful and failed prefetches and how many foreground requests they served."""
+        cache_stats = self.cache.stats()
+        return {
+            'prefetches': self.prefetches,
+            'failures': self.failures,
+            'served_from_prefetch': cache_stats['prefetch_hits'],
+            'foreground_requests': cache_stats['hits'] + cache_stats['stale_hits'] + cache_stats['misses'],
+        }
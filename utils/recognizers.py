@@ -0,0 +1,263 @@
+# utils/recognizers.py - Speech recognition backends and a racing front end
+
+import collections
+import importlib.util
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from utils.instrumentation import get_tracer
+from utils.startup import lazy_import
+
+sr = lazy_import("speech_recognition")
+
+
+class RecognizerBackend:
+    """
+    Base class for a speech-to-text engine.
+
+    Subclasses implement transcribe() and return (text, confidence) with
+    confidence in [0, 1], or raise sr.UnknownValueError / sr.RequestError.
+    """
+
+    name = "backend"
+    local = False
+
+    # Used when an engine does not report a confidence of its own
+    default_confidence = 0.7
+
+    # Whether the engine's confidence can be compared with the threshold;
+    # a result from an engine without one never ends a race early
+    calibrated = True
+
+    def __init__(self, recognizer=None, operation_timeout=None):
+        """
+        Initialize the backend.
+
+        Args:
+            recognizer: sr.Recognizer to use; one is created on first use if omitted
+            operation_timeout: Seconds a network engine may take before
+                               speech_recognition gives up on the request
+        """
+        self._recognizer = recognizer
+        self.operation_timeout = operation_timeout
+
+    @property
+    def recognizer(self):
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        if self.operation_timeout is not None:
+            self._recognizer.operation_timeout = self.operation_timeout
+        return self._recognizer
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API through speech_recognition (network)."""
+
+    name = "google"
+
+    def transcribe(self, audio):
+        result = self.recognizer.recognize_google(audio, show_all=True)
+        alternatives = result.get('alternative') if isinstance(result, dict) else None
+        if not alternatives:
+            raise sr.UnknownValueError()
+
+        best = alternatives[0]
+        return best['transcript'], best.get('confidence', self.default_confidence)
+
+
+class SphinxBackend(RecognizerBackend):
+    """
+    CMU Sphinx through speech_recognition (offline, needs pocketsphinx).
+
+    Sphinx has no usable confidence: the hypothesis' log probability is
+    often 0 (which reads as certainty) and its score grows with the length
+    of the audio. Its results are therefore only used when no calibrated
+    engine (Google) answers before the race deadline.
+    """
+
+    name = "sphinx"
+    local = True
+    calibrated = False
+
+    @staticmethod
+    def available():
+        """True if pocketsphinx is installed."""
+        return importlib.util.find_spec("pocketsphinx") is not None
+
+    def transcribe(self, audio):
+        decoder = self.recognizer.recognize_sphinx(audio, show_all=True)
+        hypothesis = decoder.hyp()
+        if hypothesis is None or not hypothesis.hypstr:
+            raise sr.UnknownValueError()
+        return hypothesis.hypstr, self.default_confidence
+
+
+class BackendStats:
+    """Latency and outcome counters for one backend."""
+
+    def __init__(self, window=200):
+        self.calls = 0
+        self.wins = 0
+        self.errors = 0
+        self.skipped = 0
+        self.latencies = collections.deque(maxlen=window)
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        return {
+            'calls': self.calls,
+            'wins': self.wins,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'win_rate': self.wins / self.calls if self.calls else 0.0,
+            'p50_latency': latencies[len(latencies) // 2] if latencies else None,
+            'mean_latency': sum(latencies) / len(latencies) if latencies else None,
+        }
+
+
+class RacingRecognizer:
+    """
+    Sends the same audio to several backends at once and keeps the first good answer.
+
+    The first result whose confidence reaches the threshold wins and the
+    remaining requests are abandoned. If nothing clears the threshold before
+    the deadline, the most confident result that did arrive is used.
+    Results from engines without a calibrated confidence (Sphinx) never win
+    early, and are used only when no calibrated engine answered at all.
+
+    An abandoned request that is already running cannot be stopped, so
+    each backend's network calls time out at the deadline, and a backend
+    with max_in_flight calls still running is left out of the next race
+    instead of queueing behind them.
+    """
+
+    def __init__(self, backends, confidence_threshold=0.6, deadline=4.0, max_in_flight=2):
+        """
+        Initialize the racer.
+
+        Args:
+            backends: RecognizerBackend instances, local ones first
+            confidence_threshold: Minimum confidence for an early win
+            deadline: Seconds to wait for any backend
+            max_in_flight: Calls a backend may have running before it sits out
+        """
+        self.backends = list(backends)
+        self.confidence_threshold = confidence_threshold
+        self.deadline = deadline
+        self.max_in_flight = max_in_flight
+        self.stats = {backend.name: BackendStats() for backend in self.backends}
+        self.last_error = None
+        for backend in self.backends:
+            if not backend.local and getattr(backend, 'operation_timeout', None) is None:
+                backend.operation_timeout = deadline
+
+        # Losers keep running until their engine returns, so leave headroom
+        # for them without delaying the next turn
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.backends) * max_in_flight, thread_name_prefix="jarvis-recognizer"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = {backend.name: 0 for backend in self.backends}
+
+    def _run(self, backend, audio, turn=None):
+        """Call one backend and record its latency."""
+        started = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return backend.transcribe(audio)
+        except Exception as e:
+            outcome = type(e).__name__
+            with self._lock:
+                self.stats[backend.name].errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.stats[backend.name].latencies.append(elapsed)
+            get_tracer().record(f"recognize.{backend.name}", elapsed, turn=turn, outcome=outcome)
+
+    def _finished(self, name):
+        with self._lock:
+            self._in_flight[name] -= 1
+
+    def recognize(self, audio):
+        """
+        Transcribe audio with whichever backend answers first and well enough.
+
+        Args:
+            audio: sr.AudioData
+
+        Returns:
+            Recognized text, or None if no backend understood the audio.
+            last_error is set when the failure was a service error.
+        """
+        self.last_error = None
+        futures = {}
+        # Worker threads do not inherit the caller's turn, so pass it along
+        turn = get_tracer().current_turn()
+        for backend in self.backends:
+            with self._lock:
+                if self._in_flight[backend.name] >= self.max_in_flight:
+                    # Earlier calls are still hung; every worker it may use is taken
+                    self.stats[backend.name].skipped += 1
+                    continue
+                self._in_flight[backend.name] += 1
+                self.stats[backend.name].calls += 1
+            future = self._executor.submit(self._run, backend, audio, turn)
+            # Also called for a request cancelled before it started
+            future.add_done_callback(lambda _, name=backend.name: self._finished(name))
+            futures[future] = backend
+        if not futures:
+            self.last_error = sr.RequestError("every recognizer is still busy with earlier requests")
+            return None
+
+        best = None  # (confidence, text, backend), calibrated engines only
+        uncalibrated = None
+        pending = set(futures)
+        deadline = time.monotonic() + self.deadline
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = futures[future]
+                try:
+                    text, confidence = future.result()
+                except sr.RequestError as e:
+                    self.last_error = e
+                    continue
+                except Exception:
+                    continue
+
+                if not backend.calibrated:
+                    uncalibrated = uncalibrated or (confidence, text, backend)
+                    continue
+                if best is None or confidence > best[0]:
+                    best = (confidence, text, backend)
+                if confidence >= self.confidence_threshold:
+                    pending = set()
+                    break
+
+        # Abandon the slower requests; ones already running finish in the
+        # background, bounded by their operation timeout
+        for future in futures:
+            future.cancel()
+
+        best = best or uncalibrated
+        if best is None:
+            return None
+
+        with self._lock:
+            self.stats[best[2].name].wins += 1
+        self.last_error = None
+        return best[1]
+
+    def summary(self):
+        """Per-backend latency and win-rate summary."""
+        with self._lock:
+            return {name: stats.summary() for name, stats in self.stats.items()}
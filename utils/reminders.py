@@ -0,0 +1,417 @@
+# utils/reminders.py - Persistent reminders with a single heap-driven timer thread
+
+import datetime
+import heapq
+import re
+import sqlite3
+import threading
+import time
+
+from utils.storage import data_path
+from utils.system_monitor import parse_duration, describe_duration
+
+# Hour used for a day without a time, e.g. "remind me tomorrow to ..."
+DEFAULT_HOUR = 9
+
+# Longest single wait of the timer thread. Waits run on the monotonic clock,
+# which stands still while the machine sleeps; waking at least this often
+# keeps a reminder from being late by the length of a suspend.
+MAX_WAIT = 60.0
+
+# Reminders delivered later than this are announced with their due time
+LATE_AFTER = 60.0
+
+# Cancelled entries left in the heap before it is rebuilt without them
+REBUILD_AFTER = 1024
+
+# Seconds before reminders whose announcement failed are tried again
+RETRY_AFTER = 30.0
+
+_IN = re.compile(
+    r'\b(?:in|after)\s+((?:a\s+)?(?:\d+(?:\.\d+)?|[a-z]+(?:\s+(?:an|of))?)\s+(?:second|minute|hour|day)s?)\b'
+)
+_AT = re.compile(
+    r'\bat\s+(?:(noon|midday|midnight)'
+    r'|(\d{1,2})(?::(\d{2}))?\s*(a\.?\s?m\.?|p\.?\s?m\.?|o\'?clock)?)(?=\W|$)'
+)
+_DAY = re.compile(r'\b(today|tonight|tomorrow)\b')
+
+
+def parse_reminder(text, now):
+    """
+    Split a spoken reminder into what to say and when.
+
+    Understands relative times ("in 20 minutes", "in half an hour") and
+    clock times with an optional day ("at 6 pm tomorrow", "tomorrow at
+    7:30", "at noon"). A clock time without am/pm is the next time the
+    clock shows it.
+
+    Args:
+        text: e.g. "call mom at 6 pm tomorrow" or "in 20 minutes to stretch"
+        now: Current time in seconds since the epoch
+
+    Returns:
+        (message, due time in seconds since the epoch); the due time is
+        None if the text names no time
+    """
+    text = " ".join(text.lower().split())
+    base = datetime.datetime.fromtimestamp(now)
+    due = None
+
+    relative = _IN.search(text)
+    if relative:
+        seconds = parse_duration(relative.group(1))
+        if seconds:
+            due = now + seconds
+            text = text[:relative.start()] + text[relative.end():]
+
+    if due is None:
+        day = _DAY.search(text)
+        clock = _AT.search(text)
+        if clock or day:
+            due = _resolve_clock(base, clock, day.group(1) if day else None)
+            for match in sorted(filter(None, (clock, day)), key=lambda m: m.start(), reverse=True):
+                text = text[:match.start()] + text[match.end():]
+
+    message = " ".join(text.split()).strip(" ,.")
+    message = re.sub(r'^(?:to|that|about|me to)\s+', '', message)
+    message = re.sub(r'\s+(?:to|at|on)$', '', message)
+    return message, due
+
+
+def _resolve_clock(base, clock, day):
+    """Due timestamp for an "at ..." match and/or a day word, or None if impossible."""
+    date = base.date() + datetime.timedelta(days=1 if day == 'tomorrow' else 0)
+    meridiem = None
+    if clock is None:
+        hour, minute = DEFAULT_HOUR, 0
+        if day == 'tonight':
+            hour = 20
+        elif day == 'today':
+            return None
+    elif clock.group(1):
+        hour, minute = (0, 0) if clock.group(1) == 'midnight' else (12, 0)
+        meridiem = 'fixed'
+        if clock.group(1) == 'midnight' and day is None:
+            date += datetime.timedelta(days=1)
+    else:
+        hour, minute = int(clock.group(2)), int(clock.group(3) or 0)
+        suffix = (clock.group(4) or "").replace(".", "").replace(" ", "")
+        if suffix in ('am', 'pm'):
+            if not 1 <= hour <= 12:
+                return None
+            meridiem = suffix
+            hour = hour % 12 + (12 if suffix == 'pm' else 0)
+        elif hour > 12:
+            meridiem = '24h'
+        elif day == 'tonight' and hour < 12:
+            hour += 12
+    if hour > 23 or minute > 59:
+        return None
+
+    due = datetime.datetime.combine(date, datetime.time(hour, minute))
+    if day is None:
+        if due <= base and meridiem is None and hour < 12 and due + datetime.timedelta(hours=12) > base:
+            # "at 6" at 3 pm means 6 pm
+            due += datetime.timedelta(hours=12)
+        elif due <= base:
+            due += datetime.timedelta(days=1)
+    return due.timestamp()
+
+
+def describe_due(due, now):
+    """Spoken form of when a reminder is due, e.g. "in 20 minutes" or "at 6:00 PM tomorrow"."""
+    if due - now < 3600:
+        seconds = due - now
+        # Whole minutes: "in 19.9 minutes" is not how anyone says it
+        return "in " + describe_duration(round(seconds / 60) * 60 if seconds >= 60 else max(1, round(seconds)))
+    moment = datetime.datetime.fromtimestamp(due)
+    days = (moment.date() - datetime.datetime.fromtimestamp(now).date()).days
+    at = "at " + moment.strftime("%I:%M %p").lstrip("0")
+    if days == 0:
+        return at + " today"
+    if days == 1:
+        return at + " tomorrow"
+    if days < 7:
+        return at + moment.strftime(" on %A")
+    return at + moment.strftime(" on %B %d")
+
+
+class ReminderScheduler:
+    """
+    Stores reminders in SQLite and delivers each one when it is due.
+
+    Pending reminders are also kept in a min-heap of (due time, id). One
+    timer thread sleeps until the head of the heap is due, or until a new
+    reminder goes in front of it, so there is no polling however many
+    reminders are pending. Cancelling only drops the reminder from the
+    pending map; its heap entry is skipped when it comes up (lazy
+    deletion), and the heap is rebuilt once too many have piled up.
+
+    Reminders that came due while Jarvis was not running are loaded at
+    start() and delivered straight away.
+    """
+
+    def __init__(self, path=None, clock=time.time, deliver=None):
+        """
+        Open or create the reminder store.
+
+        Args:
+            path: SQLite file, ':memory:' for a throwaway store, or None for the default
+            clock: Function returning the current time in seconds since the epoch
+            deliver: Called with the text to announce; defaults to printing it
+        """
+        self.clock = clock
+        self.deliver = deliver or (lambda text: print(f"Jarvis: {text}"))
+
+        self._cond = threading.Condition()
+        self._heap = []
+        self._pending = {}  # id -> (due_at, message)
+        self._stale = 0
+        self._thread = None
+        self._stopped = False
+        self.delivered = 0
+
+        self._db = sqlite3.connect(path or data_path("reminders.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reminders ("
+            " id INTEGER PRIMARY KEY, message TEXT NOT NULL, due_at REAL NOT NULL,"
+            " created_at REAL NOT NULL, delivered_at REAL, cancelled INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS reminders_pending ON reminders (due_at)"
+            " WHERE delivered_at IS NULL AND cancelled = 0"
+        )
+        self._db.commit()
+
+        for reminder_id, message, due_at in self._db.execute(
+                "SELECT id, message, due_at FROM reminders WHERE delivered_at IS NULL AND cancelled = 0"):
+            self._pending[reminder_id] = (due_at, message)
+            self._heap.append((due_at, reminder_id))
+        heapq.heapify(self._heap)
+
+    def add(self, message, due_at):
+        """
+        Schedule a reminder.
+
+        Args:
+            message: What to remind about
+            due_at: When, in seconds since the epoch
+
+        Returns:
+            The reminder's id
+        """
+        with self._cond:
+            reminder_id = self._db.execute(
+                "INSERT INTO reminders (message, due_at, created_at) VALUES (?, ?, ?)",
+                (message, due_at, self.clock())
+            ).lastrowid
+            self._db.commit()
+            self._pending[reminder_id] = (due_at, message)
+            heapq.heappush(self._heap, (due_at, reminder_id))
+            if self._heap[0][1] == reminder_id:
+                # Due before whatever the timer is waiting for
+                self._cond.notify()
+        return reminder_id
+
+    def cancel(self, reminder_id):
+        """
+        Cancel a pending reminder.
+
+        Returns:
+            True if it was pending
+        """
+        with self._cond:
+            if self._pending.pop(reminder_id, None) is None:
+                return False
+            self._db.execute("UPDATE reminders SET cancelled = 1 WHERE id = ?", (reminder_id,))
+            self._db.commit()
+            self._stale += 1
+            if self._stale > REBUILD_AFTER and self._stale > len(self._pending):
+                self._heap = [(due_at, i) for i, (due_at, _) in self._pending.items()]
+                heapq.heapify(self._heap)
+                self._stale = 0
+        return True
+
+    def cancel_matching(self, text):
+        """
+        Cancel every pending reminder whose message contains text.
+
+        Returns:
+            Messages of the cancelled reminders, soonest first
+        """
+        text = text.lower()
+        with self._cond:
+            found = sorted((due_at, i, message) for i, (due_at, message) in self._pending.items()
+                           if text in message.lower())
+            for _, reminder_id, _ in found:
+                self.cancel(reminder_id)
+        return [message for _, _, message in found]
+
+    def pending(self, limit=None):
+        """
+        Pending reminders, soonest first.
+
+        Returns:
+            List of (due_at, id, message)
+        """
+        with self._cond:
+            items = [(due_at, i, message) for i, (due_at, message) in self._pending.items()]
+        if limit is None:
+            return sorted(items)
+        return heapq.nsmallest(limit, items)
+
+    def next_due(self):
+        """Due time of the soonest pending reminder, or None."""
+        with self._cond:
+            self._drop_cancelled_head()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_cancelled_head(self):
+        while self._heap and self._heap[0][1] not in self._pending:
+            heapq.heappop(self._heap)
+            self._stale -= 1
+
+    def run_due(self):
+        """
+        Deliver every reminder due by now.
+
+        The timer thread calls this when it wakes; with an injected clock
+        it can be called directly instead. Reminders are only marked
+        delivered once the announcement has gone out; if it fails they stay
+        pending, here and on disk, and are tried again RETRY_AFTER seconds
+        later.
+
+        Returns:
+            Number of reminders delivered
+        """
+        now = self.clock()
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                _, reminder_id = heapq.heappop(self._heap)
+                if reminder_id not in self._pending:
+                    self._stale -= 1
+                    continue
+                due_at, message = self._pending[reminder_id]
+                due.append((due_at, reminder_id, message))
+        if not due:
+            return 0
+
+        try:
+            self.deliver(self._announcement(due, now))
+        except Exception as e:
+            print(f"Reminder delivery failed, retrying in {RETRY_AFTER:.0f}s: {e}")
+            with self._cond:
+                for _, reminder_id, _ in due:
+                    if reminder_id in self._pending:
+                        heapq.heappush(self._heap, (now + RETRY_AFTER, reminder_id))
+                    else:
+                        self._unstale()
+            return 0
+
+        with self._cond:
+            delivered = []
+            for _, reminder_id, _ in due:
+                if self._pending.pop(reminder_id, None) is not None:
+                    delivered.append(reminder_id)
+                else:
+                    self._unstale()
+            self._db.executemany("UPDATE reminders SET delivered_at = ? WHERE id = ?",
+                                 [(now, reminder_id) for reminder_id in delivered])
+            self._db.commit()
+            self.delivered += len(delivered)
+        return len(delivered)
+
+    def _unstale(self):
+        # Cancelled while out of the heap for delivery: cancel() counted a
+        # heap entry that is not there
+        self._stale = max(0, self._stale - 1)
+
+    def _announcement(self, due, now):
+        """One spoken text for every reminder that came due together."""
+        texts = []
+        for due_at, _, message in due:
+            if now - due_at > LATE_AFTER:
+                moment = datetime.datetime.fromtimestamp(due_at).strftime("%I:%M %p").lstrip("0")
+                texts.append(f"{message} (due at {moment})")
+            else:
+                texts.append(message)
+        if len(texts) == 1:
+            return f"Reminder: {texts[0]}."
+        return f"You have {len(texts)} reminders: " + "; ".join(texts) + "."
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                self._drop_cancelled_head()
+                if not self._heap:
+                    self._cond.wait(MAX_WAIT)
+                    continue
+                delay = self._heap[0][0] - self.clock()
+                if delay > 0:
+                    self._cond.wait(min(delay, MAX_WAIT))
+                    continue
+            self.run_due()
+
+    def start(self, deliver=None):
+        """
+        Start the timer thread; anything already overdue is delivered at once.
+
+        Args:
+            deliver: Replaces the delivery callback, e.g. the pipeline's announce
+        """
+        if deliver is not None:
+            self.deliver = deliver
+        if self._thread is not None:
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name="jarvis-reminders", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Make the timer thread re-check the clock, e.g. after an injected clock moved."""
+        with self._cond:
+            self._cond.notify()
+
+    def stop(self):
+        """Stop the timer thread; pending reminders stay stored."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def stats(self):
+        """Counts of pending and delivered reminders and of heap entries."""
+        with self._cond:
+            return {
+                'pending': len(self._pending),
+                'delivered': self.delivered,
+                'heap': len(self._heap),
+                'stale': self._stale,
+            }
+
+    def close(self):
+        self.stop()
+        with self._cond:
+            self._db.close()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide reminder scheduler, creating it on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = ReminderScheduler()
+    return _scheduler
@@ -0,0 +1,253 @@
+# utils/response_cache.py - TTL cache with stale-while-revalidate for API responses
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.storage import data_path
+
+# Per-source freshness: answers younger than ttl are served as is, answers
+# within the following grace window are served immediately and refreshed
+# in the background, and anything older is fetched in the foreground.
+POLICIES = {
+    'weather': {'ttl': 10 * 60, 'grace': 50 * 60},
+    'news': {'ttl': 15 * 60, 'grace': 45 * 60},
+    'search': {'ttl': 24 * 60 * 60, 'grace': 6 * 24 * 60 * 60},
+}
+DEFAULT_POLICY = {'ttl': 5 * 60, 'grace': 0}
+
+# Answers (dicts) with this key set are passed on but never stored, e.g.
+# the sample data shown while an API key is missing or wrong
+NO_STORE = 'no_store'
+
+
+def normalize_key(value):
+    """Case-fold and collapse whitespace so equivalent requests share an entry."""
+    return " ".join(str(value).casefold().split())
+
+
+def storable(value):
+    """True for a real answer that may be cached."""
+    return value is not None and not (isinstance(value, dict) and value.get(NO_STORE))
+
+
+class ResponseCache:
+    """
+    Two-level (memory LRU + SQLite) cache of API answers.
+
+    The memory level is bounded by entry count; the SQLite file keeps warm
+    answers across restarts and is trimmed per source to max_rows.
+    """
+
+    def __init__(self, path=None, policies=None, max_entries=512, max_rows=5000, clock=time.time):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file, ':memory:' for a throwaway cache, or None for the default
+            policies: Dict of namespace -> {'ttl': seconds, 'grace': seconds}
+            max_entries: Entries kept in memory
+            max_rows: Rows kept on disk per namespace
+            clock: Function returning the current time in seconds
+        """
+        self.policies = dict(POLICIES, **(policies or {}))
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.clock = clock
+
+        self._memory = OrderedDict()  # (namespace, key) -> (value, fetched_at, origin)
+        self._lock = threading.RLock()
+        self._refreshing = set()
+        self._fetching = {}  # (namespace, key) -> [Event, answer] of the foreground fetch
+
+        self._db = sqlite3.connect(path or data_path("responses.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        self._db.commit()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.prefetch_hits = 0
+        self.coalesced = 0
+
+    def policy(self, namespace):
+        return self.policies.get(namespace, DEFAULT_POLICY)
+
+    def _lookup(self, namespace, key):
+        """Find an entry in memory, then on disk."""
+        with self._lock:
+            entry = self._memory.get((namespace, key))
+            if entry is not None:
+                self._memory.move_to_end((namespace, key))
+                return entry
+
+            row = self._db.execute(
+                "SELECT value, fetched_at FROM responses WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+
+            entry = (json.loads(row[0]), row[1], 'disk')
+            self._remember(namespace, key, entry)
+            return entry
+
+    def _remember(self, namespace, key, entry):
+        self._memory[(namespace, key)] = entry
+        self._memory.move_to_end((namespace, key))
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, namespace, key, value, origin='fetch'):
+        """
+        Store a fresh answer.
+
+        Args:
+            namespace: Source name ('weather', 'news', 'search')
+            key: Normalized request key
+            value: JSON-serializable answer
+            origin: Who fetched it, e.g. 'fetch', 'refresh' or 'prefetch'
+        """
+        now = self.clock()
+        with self._lock:
+            self._remember(namespace, key, (value, now, origin))
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (namespace, key, value, fetched_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), now)
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE namespace = ? AND key NOT IN ("
+                " SELECT key FROM responses WHERE namespace = ? ORDER BY fetched_at DESC LIMIT ?)",
+                (namespace, namespace, self.max_rows)
+            )
+            self._db.commit()
+
+    def age(self, namespace, key):
+        """Seconds since the entry was fetched, or None if it is not cached."""
+        entry = self._lookup(namespace, key)
+        return None if entry is None else self.clock() - entry[1]
+
+    def get_or_fetch(self, namespace, key, fetch):
+        """
+        Get an answer, fetching or refreshing it as its age requires.
+
+        Concurrent misses for the same entry share one fetch. Answers
+        marked NO_STORE are returned without being cached.
+
+        Args:
+            namespace: Source name
+            key: Normalized request key
+            fetch: Callable returning a fresh answer, or None on failure
+
+        Returns:
+            The answer, or None if it is not cached and the fetch failed
+        """
+        policy = self.policy(namespace)
+        entry = self._lookup(namespace, key)
+
+        if entry is not None:
+            value, fetched_at, origin = entry
+            age = self.clock() - fetched_at
+            if age < policy['ttl']:
+                self._count_hit(origin)
+                return value
+            if age < policy['ttl'] + policy['grace']:
+                self._count_hit(origin, stale=True)
+                self.refresh(namespace, key, fetch)
+                return value
+
+        with self._lock:
+            pending = self._fetching.get((namespace, key))
+            leader = pending is None
+            if leader:
+                pending = self._fetching[(namespace, key)] = [threading.Event(), None]
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                value = fetch()
+                if storable(value):
+                    self.put(namespace, key, value)
+                pending[1] = value
+            finally:
+                with self._lock:
+                    del self._fetching[(namespace, key)]
+                pending[0].set()
+        else:
+            pending[0].wait()
+            value = pending[1]
+
+        if value is None:
+            # Better an old answer than none while the source is failing
+            return entry[0] if entry is not None else None
+        return value
+
+    def _count_hit(self, origin, stale=False):
+        with self._lock:
+            if origin == 'prefetch':
+                self.prefetch_hits += 1
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+
+    def refresh(self, namespace, key, fetch, origin='refresh', background=True):
+        """
+        Re-fetch an entry, by default on a background thread.
+
+        Concurrent refreshes of the same entry are collapsed into one.
+
+        Returns:
+            True if a refresh was started; when not in background, True
+            only if it stored a fresh answer
+        """
+        with self._lock:
+            if (namespace, key) in self._refreshing:
+                return False
+            self._refreshing.add((namespace, key))
+
+        def run():
+            try:
+                value = fetch()
+                if storable(value):
+                    self.put(namespace, key, value, origin=origin)
+                    with self._lock:
+                        self.refreshes += 1
+                    return True
+            except Exception as e:
+                print(f"Background refresh of {namespace} '{key}' failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard((namespace, key))
+            return False
+
+        if background:
+            threading.Thread(target=run, name="jarvis-cache-refresh", daemon=True).start()
+            return True
+        return run()
+
+    def stats(self):
+        """Counters for hits, stale hits, misses, shared fetches and background refreshes."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'prefetch_hits': self.prefetch_hits,
+                'coalesced': self.coalesced,
+                'entries': len(self._memory),
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,181 @@
+# utils/router.py - Compiled intent router for command dispatch
+
+import re
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Length of the literal slice used as an index key. Patterns whose leading
+# literal is shorter than this cannot be indexed and are always tried.
+KEY_LENGTH = 3
+
+
+def literal_prefixes(pattern):
+    """
+    Work out which literal strings every match of a pattern must start with.
+
+    Args:
+        pattern: Regular expression string
+
+    Returns:
+        Set of literal prefixes, or None if a match can start with anything
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return None
+
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+
+    return _prefixes(list(parsed))
+
+
+def _prefixes(items):
+    """Walk parsed regex items and collect the required leading literals."""
+    literal = ""
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            literal += chr(av)
+            continue
+        if literal:
+            return {literal}
+
+        if op is sre_parse.AT:
+            # Anchors are zero-width, keep looking
+            continue
+        if op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            if add_flags & re.IGNORECASE:
+                return None
+            return _prefixes(list(sub))
+        if op is sre_parse.BRANCH:
+            result = set()
+            for branch in av[1]:
+                found = _prefixes(list(branch))
+                if not found:
+                    return None
+                result |= found
+            return result
+        if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            return _prefixes(list(av[2]))
+        return None
+
+    return {literal} if literal else None
+
+
+class CommandRouter:
+    """
+    Prioritized router that maps an utterance to a handler.
+
+    Every pattern is validated and compiled once. Each pattern is also
+    indexed by the literal text its matches must begin with ('open', 'what',
+    'weather', ...), so a dispatch only runs the handful of patterns whose
+    keyword actually occurs in the utterance. Candidates are tried in
+    registration order, which gives exactly the same result as calling
+    ``re.search`` on every pattern in turn and taking the first hit.
+    """
+
+    def __init__(self, routes=None):
+        """
+        Initialize the router.
+
+        Args:
+            routes: Optional iterable of (pattern, handler) pairs in priority
+                    order, or a dict whose insertion order is the priority
+        """
+        self._routes = []
+        self._index = None
+
+        if routes is not None:
+            items = routes.items() if isinstance(routes, dict) else routes
+            for pattern, handler in items:
+                self.add(pattern, handler)
+
+    def add(self, pattern, handler):
+        """
+        Register a pattern at the lowest priority.
+
+        Args:
+            pattern: Regular expression string
+            handler: Callable receiving the pattern's capture groups
+
+        Raises:
+            ValueError: If the pattern does not compile
+        """
+        try:
+            compiled = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid command pattern {pattern!r}: {e}") from e
+
+        self._routes.append((pattern, compiled, handler))
+        self._index = None
+
+    def __len__(self):
+        return len(self._routes)
+
+    @property
+    def patterns(self):
+        """Registered pattern strings in priority order."""
+        return [pattern for pattern, _, _ in self._routes]
+
+    def compile(self):
+        """
+        Build the keyword index.
+
+        Called automatically on first dispatch after the table changes, but
+        can be called eagerly so construction cost is not paid on a turn.
+        """
+        by_key = {}
+        always = []
+        for priority, (pattern, _, _) in enumerate(self._routes):
+            prefixes = literal_prefixes(pattern)
+            if not prefixes or any(len(p) < KEY_LENGTH for p in prefixes):
+                always.append(priority)
+                continue
+            for prefix in prefixes:
+                by_key.setdefault(prefix[:KEY_LENGTH], []).append((prefix, priority))
+
+        self._index = (by_key, tuple(always))
+        return self._index
+
+    def candidates(self, text):
+        """
+        Get the priorities of the patterns that could match an utterance.
+
+        Args:
+            text: Normalized (lowercase) utterance
+
+        Returns:
+            Sorted list of route priorities
+        """
+        by_key, always = self._index or self.compile()
+
+        found = set(always)
+        for i in range(len(text) - KEY_LENGTH + 1):
+            entries = by_key.get(text[i:i + KEY_LENGTH])
+            if entries:
+                for prefix, priority in entries:
+                    if priority not in found and text.startswith(prefix, i):
+                        found.add(priority)
+        return sorted(found)
+
+    def dispatch(self, text):
+        """
+        Find the handler for an utterance.
+
+        Args:
+            text: Normalized (lowercase) utterance
+
+        Returns:
+            Tuple of (handler, args) for the highest priority match, or None
+        """
+        routes = self._routes
+        for priority in self.candidates(text):
+            _, compiled, handler = routes[priority]
+            match = compiled.search(text)
+            if match:
+                return handler, match.groups()
+        return None
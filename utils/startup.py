@@ -0,0 +1,92 @@
+# utils/startup.py - Deferred imports and the fast-start switch
+
+import importlib
+import os
+import threading
+import time
+
+# Set JARVIS_FAST_START=0 to import and initialize every engine up front and
+# to measure ambient noise on every start, as older versions did
+FAST_START = os.environ.get("JARVIS_FAST_START", "1") != "0"
+
+# perf_counter when this module was first imported, which jarvis.py does
+# before anything heavy, so it stands in for process launch
+LAUNCHED_AT = time.perf_counter()
+
+_registry = []
+
+
+class LazyModule:
+    """
+    Module stand-in that imports the real module on first attribute access.
+
+    Lets a heavy dependency be named at the top of a file, as usual, while
+    its import cost is paid the first time it is used rather than at start-up.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        """Import the module now, if it has not been already, and return it."""
+        if self._module is None:
+            # import_module holds the per-module import lock, so concurrent
+            # first uses from several threads import it once
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Get a LazyModule for name.
+
+    Args:
+        name: Dotted module name, e.g. 'speech_recognition'
+
+    Returns:
+        LazyModule, shared between callers asking for the same name
+    """
+    for module in _registry:
+        if module._name == name:
+            return module
+    module = LazyModule(name)
+    _registry.append(module)
+    return module
+
+
+def preload(names=None):
+    """
+    Import deferred modules now.
+
+    Args:
+        names: Module names to load, or None for every registered module
+
+    Returns:
+        Dict of module name -> seconds taken, or the exception it raised
+    """
+    timings = {}
+    for module in list(_registry):
+        if names is not None and module._name not in names:
+            continue
+        started = time.perf_counter()
+        try:
+            module.load()
+            timings[module._name] = time.perf_counter() - started
+        except Exception as e:
+            timings[module._name] = e
+    return timings
+
+
+def preload_in_background():
+    """Import every deferred module on a background thread, once Jarvis is ready."""
+    thread = threading.Thread(target=preload, name="jarvis-preload", daemon=True)
+    thread.start()
+    return thread
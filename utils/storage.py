@@ -0,0 +1,20 @@
+# utils/storage.py - Location of Jarvis's persistent local data
+
+import os
+
+# Caches, calibration and other state that should survive restarts
+DATA_DIR = os.environ.get("JARVIS_DATA_DIR", os.path.join(os.path.expanduser("~"), ".jarvis"))
+
+
+def data_path(name):
+    """
+    Get the path of a file in the data directory, creating the directory if needed.
+
+    Args:
+        name: File name
+
+    Returns:
+        Absolute path
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
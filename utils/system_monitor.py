@@ -0,0 +1,342 @@
+# utils/system_monitor.py - Background system metrics sampler with a rolling history
+
+import collections
+import os
+import platform
+import re
+import sys
+import threading
+import time
+
+from utils.startup import lazy_import
+
+psutil = lazy_import("psutil")
+
+# Seconds between samples, and how much history the ring buffer keeps
+SAMPLE_INTERVAL = float(os.environ.get("JARVIS_SAMPLE_INTERVAL", "5"))
+HISTORY_SECONDS = float(os.environ.get("JARVIS_METRICS_HISTORY", "900"))
+
+# Processes kept per sample: the heaviest by memory and by CPU
+TOP_PROCESSES = 5
+
+# Largest fraction of one core the sampler may use. If sampling gets more
+# expensive than this (thousands of processes, a slow /proc), the interval
+# is stretched until it fits.
+CPU_BUDGET = 0.01
+
+# Seconds the very first sample waits so its CPU figures mean something
+PRIME_WINDOW = 0.1
+
+# Word numbers accepted in spoken durations, e.g. "the last five minutes"
+WORD_NUMBERS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'fifteen': 15,
+    'twenty': 20, 'thirty': 30, 'forty': 40, 'forty five': 45, 'sixty': 60,
+    'half an': 0.5, 'a half': 0.5, 'couple of': 2, 'few': 3,
+}
+UNIT_SECONDS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+_DURATION = re.compile(r'\b(?:(\d+(?:\.\d+)?|[a-z]+(?:\s+(?:an|of|five))?)\s+)?(second|minute|hour|day)s?\b')
+
+
+def parse_duration(text):
+    """
+    Convert a spoken duration into seconds.
+
+    Args:
+        text: e.g. "five minutes", "10 minutes", "hour", "half an hour"
+
+    Returns:
+        Seconds as a float, or None if no duration was found
+    """
+    match = _DURATION.search(text.lower())
+    if not match:
+        return None
+    amount, unit = match.groups()
+    if amount is None:
+        count = 1
+    elif amount[0].isdigit():
+        count = float(amount)
+    elif amount in WORD_NUMBERS:
+        count = WORD_NUMBERS[amount]
+    else:
+        # "the last minute", "past hour": the word before the unit is not a number
+        count = WORD_NUMBERS.get(amount.split()[-1], 1)
+    return count * UNIT_SECONDS[unit]
+
+
+def describe_duration(seconds):
+    """Spoken form of a duration, e.g. 300 -> "5 minutes"."""
+    for unit in ('day', 'hour', 'minute'):
+        size = UNIT_SECONDS[unit]
+        if seconds >= size:
+            count = round(seconds / size, 1)
+            count = int(count) if count == int(count) else count
+            return f"{count} {unit}" + ("" if count == 1 else "s")
+    count = int(round(seconds))
+    return f"{count} second" + ("" if count == 1 else "s")
+
+
+class SystemSampler:
+    """
+    Samples CPU, memory, disk and the heaviest processes on a background thread.
+
+    Samples go into a fixed-size ring buffer, so questions about the system
+    are answered from memory at once instead of blocking on a measurement,
+    and trends over the last few minutes come from the same history. The
+    sampler times its own work with the thread's CPU clock and slows down
+    if it would use more than its CPU budget.
+
+    Each sample is a dict with 'time', 'cpu', 'memory', 'disk' (percentages)
+    and 'processes', a list of (pid, name, rss bytes, cpu percent of the
+    whole machine) tuples.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, history=HISTORY_SECONDS, top_n=TOP_PROCESSES,
+                 cpu_budget=CPU_BUDGET, disk_path=None, clock=time.time):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+            history: Seconds of samples kept; sets the ring buffer size
+            top_n: Processes kept per sample, by memory and by CPU
+            cpu_budget: Maximum fraction of one core spent sampling
+            disk_path: Filesystem to report; defaults to the system drive
+            clock: Wall clock for sample timestamps
+        """
+        self.interval = interval
+        self.capacity = max(1, int(history / interval))
+        self.top_n = top_n
+        self.cpu_budget = cpu_budget
+        self.disk_path = disk_path or os.path.abspath(os.sep)
+        self.clock = clock
+
+        self.samples = collections.deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._primed = False
+        self._cpu_count = 1
+
+        # Static facts, read once
+        self.system = platform.system()
+        self.processor = platform.processor()
+        self.memory_total = None
+        self.disk_total = None
+
+        # Cost of sampling, from the sampler thread's own CPU clock
+        self.sample_count = 0
+        self.sample_cpu_seconds = 0.0
+        self.started_at = None
+        self.effective_interval = interval
+
+    def _prime(self):
+        """Start the CPU counters; the first non-blocking reading covers the time since."""
+        psutil.cpu_percent(interval=None)
+        for process in psutil.process_iter(['cpu_percent']):
+            pass
+        self._cpu_count = psutil.cpu_count() or 1
+        self.memory_total = psutil.virtual_memory().total
+        self.disk_total = psutil.disk_usage(self.disk_path).total
+        self._primed = True
+
+    def sample(self):
+        """
+        Take one sample now and add it to the history.
+
+        CPU figures cover the time since the previous sample, so this does
+        not block on a measurement window, except for a PRIME_WINDOW wait
+        the first time.
+
+        Returns:
+            The new sample
+        """
+        started = time.thread_time()
+        if not self._primed:
+            # Counters started just now would read as 0% or 100%; only the
+            # very first sample, taken before the thread ever ran, waits
+            self._prime()
+            time.sleep(PRIME_WINDOW)
+
+        # Names are only read for the processes that are kept
+        processes = []
+        for process in psutil.process_iter(['memory_info', 'cpu_percent']):
+            info = process.info
+            memory = info['memory_info']
+            processes.append((process, memory.rss if memory else 0,
+                              min(100.0, (info['cpu_percent'] or 0.0) / self._cpu_count)))
+        by_memory = sorted(processes, key=lambda p: p[1], reverse=True)[:self.top_n]
+        by_cpu = sorted(processes, key=lambda p: p[2], reverse=True)[:self.top_n]
+        kept = []
+        for process, rss, cpu in dict.fromkeys(by_memory + by_cpu):
+            try:
+                name = process.name()
+            except psutil.Error:
+                name = None
+            kept.append((process.pid, name or f"process {process.pid}", rss, cpu))
+
+        sample = {
+            'time': self.clock(),
+            'cpu': psutil.cpu_percent(interval=None),
+            'memory': psutil.virtual_memory().percent,
+            'disk': psutil.disk_usage(self.disk_path).percent,
+            'processes': kept,
+        }
+        with self._lock:
+            self.samples.append(sample)
+            self.sample_count += 1
+            self.sample_cpu_seconds += time.thread_time() - started
+        return sample
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"System sampler error: {e}")
+            # Stay within the CPU budget however expensive a sample turns out to be
+            with self._lock:
+                cost = self.sample_cpu_seconds / self.sample_count if self.sample_count else 0.0
+            self.effective_interval = max(self.interval, cost / self.cpu_budget)
+            self._stop.wait(self.effective_interval)
+
+    def start(self):
+        """Start sampling on a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._loop, name="jarvis-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling; the history stays available."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def latest(self):
+        """
+        Get the most recent sample.
+
+        Returns:
+            Sample dict; one is taken now if there is no history yet
+        """
+        with self._lock:
+            if self.samples:
+                return self.samples[-1]
+        return self.sample()
+
+    def history(self, seconds=None):
+        """
+        Get the samples from the last seconds, oldest first.
+
+        Args:
+            seconds: Window length, or None for the whole buffer
+
+        Returns:
+            List of samples
+        """
+        with self._lock:
+            samples = list(self.samples)
+        if seconds is None or not samples:
+            return samples
+        cutoff = self.clock() - seconds
+        return [s for s in samples if s['time'] >= cutoff]
+
+    def trend(self, metric, seconds):
+        """
+        Summarize one metric over a window.
+
+        Args:
+            metric: 'cpu', 'memory' or 'disk'
+            seconds: Window length
+
+        Returns:
+            Dict with 'count', 'covered' (seconds of history actually
+            available), 'mean', 'min', 'max', 'first' and 'latest', or None
+            if there are no samples
+        """
+        samples = self.history(seconds)
+        if not samples:
+            return None
+        values = [s[metric] for s in samples]
+        return {
+            'count': len(values),
+            'covered': samples[-1]['time'] - samples[0]['time'],
+            'mean': sum(values) / len(values),
+            'min': min(values),
+            'max': max(values),
+            'first': values[0],
+            'latest': values[-1],
+        }
+
+    def top_process(self, resource='memory', seconds=None):
+        """
+        Find the process using the most of a resource.
+
+        Args:
+            resource: 'memory' or 'cpu'
+            seconds: Average over this window, or None for the latest sample
+
+        Returns:
+            (name, pid, value) where value is RSS bytes or percent of the
+            machine's CPU, or None if nothing was sampled
+        """
+        index = 2 if resource == 'memory' else 3
+        samples = self.history(seconds) if seconds else [self.latest()]
+        totals = collections.defaultdict(float)
+        for sample in samples:
+            for process in sample['processes']:
+                totals[(process[1], process[0])] += process[index]
+        if not totals:
+            return None
+        (name, pid), total = max(totals.items(), key=lambda item: item[1])
+        return name, pid, total / len(samples)
+
+    def overhead(self):
+        """
+        Measure what sampling costs.
+
+        Returns:
+            Dict with 'samples', 'capacity', 'interval' (seconds, after any
+            stretching), 'cpu_per_sample' (seconds), 'cpu_fraction' (of one
+            core, since start) and 'buffer_bytes' (approximate size of the
+            history)
+        """
+        with self._lock:
+            samples = list(self.samples)
+            count, cpu = self.sample_count, self.sample_cpu_seconds
+        running = time.perf_counter() - self.started_at if self.started_at else None
+        return {
+            'samples': count,
+            'capacity': self.capacity,
+            'interval': self.effective_interval,
+            'cpu_per_sample': cpu / count if count else 0.0,
+            'cpu_fraction': cpu / running if running else 0.0,
+            'buffer_bytes': sys.getsizeof(self.samples) + sum(_sample_size(s) for s in samples),
+        }
+
+
+def _sample_size(sample):
+    """Approximate memory held by one sample."""
+    size = sys.getsizeof(sample) + sum(sys.getsizeof(v) for v in sample.values())
+    for process in sample['processes']:
+        size += sys.getsizeof(process) + sum(sys.getsizeof(v) for v in process)
+    return size
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    """Return the process-wide sampler, creating it on first use."""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = SystemSampler()
+    return _sampler
@@ -0,0 +1,353 @@
+# utils/tts_cache.py - Content-addressed on-disk cache for synthesized speech
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+from utils.storage import DATA_DIR
+
+# Cache location and size budget, overridable from the environment. It
+# lives with Jarvis's other data, not in the temp directory, which many
+# systems clear on reboot.
+CACHE_DIR = os.environ.get("JARVIS_TTS_CACHE_DIR", os.path.join(DATA_DIR, "tts_cache"))
+CACHE_MAX_BYTES = int(os.environ.get("JARVIS_TTS_CACHE_MB", "64")) * 1024 * 1024
+
+INDEX_FILE = "index.json"
+
+# The index is rewritten after this many new files, or this many seconds
+# after the first unsaved one, and at exit. Files added in between are
+# found again by the directory scan on load if Jarvis dies first.
+FLUSH_EVERY = 32
+FLUSH_INTERVAL = 5.0
+
+
+def speech_key(text, lang, engine, **voice):
+    """
+    Build the cache key for a piece of synthesized speech.
+
+    Args:
+        text: Text being spoken
+        lang: Language code
+        engine: Name of the TTS engine
+        **voice: Any engine settings that change the audio (speed, voice id...)
+
+    Returns:
+        Hex digest identifying the audio
+    """
+    payload = json.dumps([engine, lang, sorted(voice.items()), text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SpeechCache:
+    """Byte-bounded LRU cache of audio files that persists across restarts."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, extension=".mp3"):
+        """
+        Initialize the cache and load its index from disk.
+
+        Args:
+            cache_dir: Directory holding the audio files and index
+            max_bytes: Total size budget; least recently used files go first
+            extension: File extension of the cached audio
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size, oldest first
+        self._bytes = 0
+        self._dirty = False
+        self._unsaved = 0
+        self._timer = None
+
+        # Audio handed over by put_later(), written by one background thread
+        self._pending = queue.Queue()
+        self._writer = None
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+        atexit.register(self.close)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def _load_index(self):
+        """Restore the LRU order from the index, dropping files that are gone."""
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+
+        for key, size in entries:
+            if os.path.exists(self._path(key)):
+                self._entries[key] = size
+                self._bytes += size
+
+        # Files added after the last index write count as least recently used
+        adopted = OrderedDict()
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".part"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            key = name[:-len(self.extension)] if name.endswith(self.extension) else None
+            if key and key not in self._entries:
+                try:
+                    adopted[key] = os.path.getsize(path)
+                except OSError:
+                    continue
+        if adopted:
+            self._bytes += sum(adopted.values())
+            adopted.update(self._entries)
+            self._entries = adopted
+            self._dirty = True
+
+    def flush(self):
+        """Write the index to disk if it changed."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            entries = list(self._entries.items())
+            self._dirty = False
+            self._unsaved = 0
+
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        temp_path = index_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"Speech cache index write failed: {e}")
+
+    def close(self):
+        """Write out audio still waiting for the background writer, then the index."""
+        while True:
+            try:
+                key, data = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            self._store(key, data)
+        self.flush()
+
+    def get(self, key):
+        """
+        Look up cached audio.
+
+        Args:
+            key: Key from speech_key()
+
+        Returns:
+            Path to the audio file, or None on a miss
+        """
+        with self._lock:
+            size = self._entries.get(key)
+            if size is None or not os.path.exists(self._path(key)):
+                if size is not None:
+                    del self._entries[key]
+                    self._bytes -= size
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self.hits += 1
+            self.bytes_saved += size
+            return self._path(key)
+
+    def touch(self, key):
+        """
+        Count a hit for audio served from a copy held elsewhere (in memory).
+
+        Returns:
+            True if the key is cached
+        """
+        with self._lock:
+            size = self._entries.get(key)
+            if size is None:
+                return False
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self.hits += 1
+            self.bytes_saved += size
+            return True
+
+    def read(self, key):
+        """
+        Look up cached audio and read it.
+
+        Returns:
+            The audio bytes, or None on a miss
+        """
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            # Evicted between the lookup and the read
+            return None
+
+    def put_bytes(self, key, data):
+        """
+        Store synthesized audio held in memory.
+
+        Args:
+            key: Key from speech_key()
+            data: Audio bytes
+
+        Returns:
+            Path of the cached file
+        """
+        temp_path = os.path.join(self.cache_dir, f"{key}.{threading.get_ident()}.part")
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        return self.put(key, temp_path)
+
+    def put_later(self, key, data):
+        """
+        Store synthesized audio held in memory from a background thread.
+
+        The caller keeps playing from its own copy, so the file write,
+        rename and index update stay off the synthesis path.
+
+        Args:
+            key: Key from speech_key()
+            data: Audio bytes
+        """
+        self._pending.put((key, data))
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, name="jarvis-tts-writer",
+                                                daemon=True)
+                self._writer.start()
+
+    def _write_pending(self):
+        while True:
+            key, data = self._pending.get()
+            self._store(key, data)
+
+    def _store(self, key, data):
+        try:
+            self.put_bytes(key, data)
+        except OSError as e:
+            print(f"Speech cache write failed: {e}")
+
+    def put(self, key, source_path):
+        """
+        Move a freshly synthesized file into the cache.
+
+        Args:
+            key: Key from speech_key()
+            source_path: File to adopt; it is moved, not copied
+
+        Returns:
+            Path of the cached file
+        """
+        path = self._path(key)
+        size = os.path.getsize(source_path)
+        os.replace(source_path, path)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old
+            self._entries[key] = size
+            self._bytes += size
+            self._evict(keep=key)
+            self._dirty = True
+            self._unsaved += 1
+            due = self._unsaved >= FLUSH_EVERY
+            if not due and self._timer is None:
+                self._timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if due:
+            self.flush()
+        return path
+
+    def _evict(self, keep=None):
+        """Drop least recently used files until the budget is met."""
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self._bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def warm(self, items, synthesize):
+        """
+        Synthesize any items that are not cached yet.
+
+        Args:
+            items: Iterable of (key, text) pairs
+            synthesize: Callable(text, path) that writes audio to path
+
+        Returns:
+            Number of entries that were synthesized
+        """
+        added = 0
+        for key, text in items:
+            with self._lock:
+                if key in self._entries and os.path.exists(self._path(key)):
+                    continue
+            temp_path = os.path.join(self.cache_dir, f"{key}.{threading.get_ident()}.part")
+            try:
+                synthesize(text, temp_path)
+                self.put(key, temp_path)
+                added += 1
+            except Exception as e:
+                print(f"Speech cache warm-up failed for '{text[:40]}': {e}")
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+        return added
+
+    def stats(self):
+        """
+        Get cache effectiveness counters.
+
+        Returns:
+            Dictionary with hits, misses, hit_rate, bytes_saved, bytes_used and entries
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'bytes_used': self._bytes,
+                'entries': len(self._entries),
+            }
+
+    def describe(self):
+        """Human readable summary of stats()."""
+        s = self.stats()
+        return (f"Speech cache: {s['hits']} hits / {s['misses']} misses "
+                f"({s['hit_rate']:.0%}), {s['bytes_saved'] // 1024} KB of synthesis saved, "
+                f"{s['entries']} phrases using {s['bytes_used'] // 1024} KB")
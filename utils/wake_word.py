@@ -0,0 +1,433 @@
+# utils/wake_word.py - On-device wake word spotting in front of the cloud recognizer
+
+import array
+import glob
+import importlib.util
+import math
+import os
+import threading
+import time
+import wave
+
+from utils import audio_prep
+from utils.audio_capture import downmix, frame_rms
+from utils.startup import lazy_import
+from utils.storage import DATA_DIR
+
+sr = lazy_import("speech_recognition")
+
+try:
+    import audioop
+except ImportError:  # Removed from the standard library in Python 3.13
+    audioop = None
+
+# 'template' (recordings of the user saying the wake word, matched with
+# DTW), 'sphinx' (pocketsphinx keyphrase search), 'off', or '' to use
+# template when recordings exist, else off. Sphinx is only used when asked
+# for, so installing pocketsphinx does not turn the gate on by itself
+WAKE_MODE = os.environ.get("JARVIS_WAKE", "")
+WAKE_WORD = os.environ.get("JARVIS_WAKE_WORD", "jarvis")
+
+# 0 accepts only close matches, 1 accepts loose ones (more false accepts)
+SENSITIVITY = float(os.environ.get("JARVIS_WAKE_SENSITIVITY", "0.5"))
+
+# Seconds after the wake word (or the last command) in which phrases go
+# to the recognizer without it
+COMMAND_WINDOW = float(os.environ.get("JARVIS_COMMAND_WINDOW", "8"))
+
+# Wake word recordings for the template detector
+TEMPLATE_DIR = os.path.join(DATA_DIR, "wake")
+
+# Features are computed at 16 kHz over 20 ms frames every 10 ms
+FEATURE_RATE = 16000
+FRAME = 320
+HOP = 160
+
+# The wake word is looked for in the first template length times this,
+# plus the pre-roll; that caps the work per phrase whatever its length
+SEARCH_STRETCH = 1.6
+
+# Template cost at sensitivity 0.5 when there is only one recording to
+# compare against
+DEFAULT_REFERENCE_COST = 0.6
+
+# Speech needed after the wake word for a phrase to count as a command too
+MIN_COMMAND_SECONDS = 0.3
+
+
+def _rms(frame):
+    return frame_rms(frame, 2)
+
+
+def _crossings(frame):
+    if audioop is not None:
+        return audioop.cross(frame, 2)
+    samples = array.array('h', frame)
+    return sum(1 for a, b in zip(samples, samples[1:]) if (a < 0) != (b < 0))
+
+
+def _difference(frame):
+    """First difference of the samples, a crude high-pass filter."""
+    if audioop is not None:
+        return audioop.add(frame[2:], audioop.mul(frame[:-2], 2, -1.0), 2)
+    samples = array.array('h', frame)
+    return array.array('h', (max(-32768, min(32767, b - a)) for a, b in zip(samples, samples[1:]))).tobytes()
+
+
+def features(pcm, sample_rate=FEATURE_RATE, sample_width=2):
+    """
+    Per-frame features of mono PCM.
+
+    Each 20 ms frame gives loudness (log RMS), zero-crossing rate, and the
+    log ratio of high-passed to plain energy once and twice over, which
+    together follow pitch and the voiced/unvoiced shape of a word. Loudness
+    is taken relative to the loudest frame, so the microphone's gain does
+    not matter.
+
+    Returns:
+        List of 4-tuples, one per frame
+
+    Raises:
+        ValueError: The PCM is not 16 kHz 16-bit and neither numpy nor
+                    audioop is there to convert it
+    """
+    if sample_width != 2 or sample_rate != FEATURE_RATE:
+        pcm, sample_rate, sample_width = audio_prep.resample(pcm, sample_width, sample_rate, FEATURE_RATE)
+        if sample_rate != FEATURE_RATE and sample_width == 2 and audioop is not None:
+            # resample() does not raise the rate of audio below the target
+            pcm, _ = audioop.ratecv(pcm, 2, 1, sample_rate, FEATURE_RATE, None)
+            sample_rate = FEATURE_RATE
+        if sample_width != 2 or sample_rate != FEATURE_RATE:
+            raise ValueError(f"wake word features need 16 kHz 16-bit audio, got {sample_rate} Hz "
+                             f"{sample_width * 8}-bit; install numpy to convert it")
+
+    rows = []
+    for start in range(0, len(pcm) // 2 - FRAME + 1, HOP):
+        frame = pcm[start * 2:(start + FRAME) * 2]
+        energy = math.log(_rms(frame) + 1.0)
+        high = _difference(frame)
+        high_energy = math.log(_rms(high) + 1.0)
+        higher_energy = math.log(_rms(_difference(high)) + 1.0)
+        rows.append((energy, _crossings(frame) / FRAME * 10.0,
+                     high_energy - energy, higher_energy - high_energy))
+    if rows:
+        peak = max(row[0] for row in rows)
+        rows = [(row[0] - peak,) + row[1:] for row in rows]
+    return rows
+
+
+def _distance(a, b):
+    return (abs(a[0] - b[0]) * 0.5 + abs(a[1] - b[1]) + abs(a[2] - b[2]) + abs(a[3] - b[3])) / 4
+
+
+def match(template, query):
+    """
+    Find a template in a query with subsequence DTW (free start and end).
+
+    Returns:
+        (cost per template frame, index of the query frame where the match ends)
+    """
+    n = len(template)
+    inf = float('inf')
+    previous = [0.0] * (len(query) + 1)  # free start anywhere in the query
+    for i in range(n):
+        row = template[i]
+        current = [inf] * (len(query) + 1)
+        for j, frame in enumerate(query, 1):
+            best = previous[j - 1]
+            if previous[j] < best:
+                best = previous[j]
+            if current[j - 1] < best:
+                best = current[j - 1]
+            current[j] = best + _distance(row, frame)
+        previous = current
+    end = min(range(1, len(query) + 1), key=previous.__getitem__)
+    return previous[end] / n, end
+
+
+class TemplateDetector:
+    """
+    Spots the wake word by comparing the start of each phrase with a few
+    recordings of the user saying it.
+
+    Pure Python over audioop: features cost a few audioop calls per 10 ms
+    of audio, and the comparison is a DTW over a window of fixed size.
+    """
+
+    name = "template"
+
+    def __init__(self, templates, sensitivity=SENSITIVITY):
+        """
+        Args:
+            templates: Feature lists (see features()) of the wake word
+            sensitivity: 0 to 1; higher accepts looser matches
+        """
+        if not templates:
+            raise ValueError("the template detector needs at least one recording")
+        self.templates = templates
+        self.sensitivity = sensitivity
+        costs = [match(a, b)[0] for a in templates for b in templates if a is not b]
+        self.reference_cost = sorted(costs)[len(costs) // 2] if costs else DEFAULT_REFERENCE_COST
+        self.window = int(max(len(t) for t in templates) * SEARCH_STRETCH)
+
+    @classmethod
+    def from_directory(cls, directory=TEMPLATE_DIR, sensitivity=SENSITIVITY):
+        """Load every WAV in directory as a template; None if there are none."""
+        paths = sorted(glob.glob(os.path.join(directory, "*.wav")))
+        if not paths:
+            return None
+        templates = []
+        for path in paths:
+            with wave.open(path, "rb") as w:
+                pcm = w.readframes(w.getnframes())
+                if w.getnchannels() > 1:
+                    pcm = downmix(pcm, w.getsampwidth(), w.getnchannels())
+                templates.append(trim_silence(features(pcm, w.getframerate(), w.getsampwidth())))
+        return cls(templates, sensitivity)
+
+    @property
+    def threshold(self):
+        return self.reference_cost * (0.75 + self.sensitivity)
+
+    def detect(self, audio, skip_seconds=0.0):
+        """
+        Look for the wake word at the start of a phrase.
+
+        Args:
+            audio: sr.AudioData
+            skip_seconds: Leading audio that cannot hold the word (pre-roll)
+
+        Returns:
+            (detected, score, end) where score is the best cost over the
+            threshold (below 1 is a match) and end the offset in seconds
+            at which the word ends
+        """
+        seconds = skip_seconds + (self.window * HOP + FRAME) / FEATURE_RATE
+        limit = int(seconds * audio.sample_rate) * audio.sample_width
+        query = features(audio.frame_data[:limit], audio.sample_rate, audio.sample_width)
+        if len(query) < min(len(t) for t in self.templates) // 2:
+            return False, math.inf, 0.0
+        best = (math.inf, 0)
+        for template in self.templates:
+            best = min(best, match(template, query))
+        score = best[0] / self.threshold
+        return score < 1.0, score, best[1] * HOP / FEATURE_RATE
+
+
+class SphinxDetector:
+    """Spots the wake word with pocketsphinx in keyphrase search mode."""
+
+    name = "sphinx"
+
+    def __init__(self, word=WAKE_WORD, sensitivity=SENSITIVITY):
+        self.word = word
+        self.sensitivity = sensitivity
+        self._recognizer = None
+
+    @staticmethod
+    def available():
+        """True if pocketsphinx is installed."""
+        return importlib.util.find_spec("pocketsphinx") is not None
+
+    def detect(self, audio, skip_seconds=0.0):
+        """As TemplateDetector.detect(); the end is unknown, so it is 0."""
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        try:
+            heard = self._recognizer.recognize_sphinx(audio, keyword_entries=[(self.word, self.sensitivity)])
+        except sr.UnknownValueError:
+            return False, math.inf, 0.0
+        detected = self.word in heard.lower()
+        return detected, 0.0 if detected else math.inf, 0.0
+
+
+def trim_silence(rows, floor=-3.0):
+    """Drop frames quieter than floor (log units below the peak) from both ends."""
+    loud = [i for i, row in enumerate(rows) if row[0] > floor]
+    if not loud:
+        return rows
+    return rows[loud[0]:loud[-1] + 1]
+
+
+class WakeWordGate:
+    """
+    Lets a phrase through to the recognizer only if it starts with the wake
+    word or falls inside the command window that the wake word opens.
+
+    "Jarvis, what's the weather" passes with the wake word cut off the
+    audio when the detector knows where it ends. "Jarvis" on its own opens
+    the window for the next phrase. Everything else (television, other
+    people talking) is dropped without a network call.
+    """
+
+    def __init__(self, detector, window=COMMAND_WINDOW, word=WAKE_WORD, clock=time.monotonic,
+                 on_wake=None):
+        """
+        Args:
+            detector: TemplateDetector or SphinxDetector
+            window: Seconds the command window stays open
+            word: The wake word, stripped from transcripts
+            clock: Monotonic time source
+            on_wake: Called when the wake word alone opens the window
+        """
+        self.detector = detector
+        self.window = window
+        self.word = word
+        self.clock = clock
+        self.on_wake = on_wake
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+        self.phrases = 0
+        self.detections = 0
+        self.passed = 0
+        self.audio_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.detect_seconds = []
+
+    @property
+    def window_open(self):
+        return self.clock() < self._open_until
+
+    def _extend(self):
+        self._open_until = self.clock() + self.window
+
+    def accept(self, audio, energy_threshold=None, pre_roll=0.0):
+        """
+        Decide what to do with a segmented phrase.
+
+        Args:
+            audio: sr.AudioData from the capture segmenter
+            energy_threshold: RMS above which a frame is speech, to tell
+                              whether a command follows the wake word
+            pre_roll: Seconds of audio before the speech onset
+
+        Returns:
+            AudioData to recognize (possibly with the wake word cut off), or None
+        """
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        with self._lock:
+            self.phrases += 1
+            self.audio_seconds += duration
+            if self.window_open:
+                self.passed += 1
+                return audio
+
+        started = time.perf_counter()
+        cpu = time.process_time()
+        detected, score, end = self.detector.detect(audio, skip_seconds=pre_roll)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.cpu_seconds += time.process_time() - cpu
+            self.detect_seconds.append(elapsed)
+            if len(self.detect_seconds) > 1000:
+                del self.detect_seconds[:500]
+            if not detected:
+                return None
+            self.detections += 1
+            self._extend()
+
+        command = self._after(audio, end) if end else audio
+        if end and not self._has_speech(command, energy_threshold):
+            if self.on_wake is not None:
+                self.on_wake()
+            return None
+        with self._lock:
+            self.passed += 1
+        return command
+
+    @staticmethod
+    def _after(audio, seconds):
+        """The audio from seconds onward, keeping the capture timestamps."""
+        offset = int(seconds * audio.sample_rate) * audio.sample_width
+        rest = sr.AudioData(audio.frame_data[offset:], audio.sample_rate, audio.sample_width)
+        rest.started_at = getattr(audio, 'started_at', None)
+        rest.ended_at = getattr(audio, 'ended_at', None)
+        return rest
+
+    @staticmethod
+    def _has_speech(audio, energy_threshold):
+        """True if the audio holds at least MIN_COMMAND_SECONDS of speech."""
+        if energy_threshold is None:
+            return len(audio.frame_data) / (audio.sample_rate * audio.sample_width) > 1.0
+        step = int(0.02 * audio.sample_rate) * audio.sample_width
+        loud = sum(1 for i in range(0, len(audio.frame_data) - step + 1, step)
+                   if frame_rms(audio.frame_data[i:i + step], audio.sample_width) > energy_threshold)
+        return loud * 0.02 >= MIN_COMMAND_SECONDS
+
+    def strip(self, text):
+        """Remove a leading wake word the recognizer heard anyway."""
+        if text and text.lower().startswith(self.word):
+            rest = text[len(self.word):].lstrip(" ,.!?")
+            return rest or None
+        return text
+
+    def stats(self):
+        """Phrases heard and passed on, and detector CPU per hour of audio."""
+        with self._lock:
+            ordered = sorted(self.detect_seconds)
+            hours = self.audio_seconds / 3600
+            return {
+                'detector': self.detector.name,
+                'phrases': self.phrases,
+                'detections': self.detections,
+                'passed': self.passed,
+                'detect_p50': ordered[len(ordered) // 2] if ordered else None,
+                'cpu_seconds_per_hour': self.cpu_seconds / hours if hours else None,
+            }
+
+
+def open_gate(mode=WAKE_MODE, sensitivity=SENSITIVITY, window=COMMAND_WINDOW):
+    """
+    Build the wake word gate JARVIS_WAKE asks for.
+
+    Returns:
+        WakeWordGate, or None to send every phrase to the recognizer
+    """
+    if mode == "off":
+        return None
+    if mode in ("", "template"):
+        detector = TemplateDetector.from_directory(sensitivity=sensitivity)
+        if detector is not None:
+            return WakeWordGate(detector, window)
+        if mode == "template":
+            print(f"No wake word recordings in {TEMPLATE_DIR}; run 'python jarvis.py --enroll-wake-word'")
+            return None
+    if mode == "sphinx":
+        if SphinxDetector.available():
+            return WakeWordGate(SphinxDetector(sensitivity=sensitivity), window)
+        print("The sphinx wake word detector needs pocketsphinx")
+    return None
+
+
+def enroll(capture, count=3, directory=TEMPLATE_DIR, prompt=print):
+    """
+    Record the user saying the wake word, for the template detector.
+
+    Args:
+        capture: Started AudioCapture on the microphone
+        count: Recordings to take
+        directory: Where the WAV files go; existing ones are replaced
+        prompt: Called with each instruction
+
+    Returns:
+        Paths of the recordings
+    """
+    os.makedirs(directory, exist_ok=True)
+    for old in glob.glob(os.path.join(directory, "*.wav")):
+        os.remove(old)
+    paths = []
+    while len(paths) < count:
+        prompt(f"Say '{WAKE_WORD}' ({len(paths) + 1} of {count})")
+        audio = capture.listen(timeout=10)
+        if audio is None:
+            prompt("Didn't hear anything, try again")
+            continue
+        path = os.path.join(directory, f"wake_{len(paths) + 1}.wav")
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(audio.sample_width)
+            w.setframerate(audio.sample_rate)
+            w.writeframes(audio.frame_data)
+        paths.append(path)
+    return paths
@@ -1,75 +1,425 @@
 # view.py - Manages text-to-speech and user interface feedback
+import io
 import os
+import re
+import time
+import queue
+import atexit
 import tempfile
-from gtts import gTTS
-import playsound
-import pyttsx3
+import itertools
+import threading
+from utils.instrumentation import get_tracer
+from utils.audio_output import AUDIO_OUTPUT, AudioClip, ClipCache, open_output
+from utils.health import CircuitOpenError, get_health
+from utils.playback import ProcessPlayer
+from utils.startup import FAST_START, lazy_import
+from utils.tts_cache import SpeechCache, speech_key
+
+# Imported on first use; most turns are answered from the speech cache
+gtts = lazy_import("gtts")
+pyttsx3 = lazy_import("pyttsx3")
+
+# Phrases Jarvis says word for word on every run, synthesized ahead of time
+FIXED_PHRASES = [
+    "Jarvis initialized and ready to assist you.",
+    "I didn't catch that. Could you repeat?",
+    "Sorry I didn't catch that. Could you repeat?",
+    "Shutting down. Goodbye!",
+    "Interrupted. Shutting down.",
+    "Jarvis has been terminated.",
+    "What would you like me to search for?",
+    "What would you like me to remind you about?",
+    "Sorry, I couldn't fetch any news at the moment.",
+]
+
+# Google TTS calls slower than this count as failures; after a few in a
+# row speech goes to pyttsx3 until a background probe is fast again
+GTTS_LATENCY_BUDGET = float(os.environ.get("JARVIS_GTTS_LATENCY_BUDGET", "4.0"))
+
+# Sentence chunks shorter than this are merged into their neighbour, and
+# longer ones are split again at clause boundaries
+MIN_CHUNK_CHARS = 20
+MAX_CHUNK_CHARS = 200
+
+
+def split_sentences(text, min_chars=MIN_CHUNK_CHARS, max_chars=MAX_CHUNK_CHARS):
+    """
+    Split text into chunks that can be synthesized and played one at a time.
+    
+    Args:
+        text: Text to speak
+        min_chars: Chunks shorter than this are merged with the next one
+        max_chars: Longer sentences are split at commas, semicolons and colons
+        
+    Returns:
+        List of non-empty chunks in speaking order
+    """
+    # Sentence ends, but not list numbers such as "1." in the news headlines
+    sentences = re.split(r'(?<=[.!?])(?<!\s\d\.)(?<!^\d\.)\s+|\n+', text)
+    sentences = [s.strip() for s in sentences if s.strip()]
+    
+    pieces = []
+    for sentence in sentences:
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        clause = ""
+        for part in re.split(r'(?<=[,;:])\s+', sentence):
+            if clause and len(clause) + len(part) + 1 > max_chars:
+                pieces.append(clause)
+                clause = part
+            else:
+                clause = f"{clause} {part}" if clause else part
+        if clause:
+            pieces.append(clause)
+    
+    # Merge fragments like "1." or "Hello." into the following chunk
+    chunks = []
+    pending = ""
+    for piece in pieces:
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ""
+    if pending:
+        if chunks and len(chunks[-1]) + len(pending) < max_chars:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    
+    return chunks
 
 class SpeechView:
     """View component handling speech output and user feedback."""
     
-    def __init__(self):
-        """Initialize text-to-speech engines."""
+    def __init__(self, output=None):
+        """
+        Initialize text-to-speech engines.
+        
+        Args:
+            output: AudioOutput to play speech through; defaults to the one
+                    JARVIS_AUDIO_OUTPUT names
+        """
         # Primary TTS engine (Google)
         self.use_google_tts = True
+        self.tts_lang = 'en'
+        self.tts_slow = False
         
-        # Backup TTS engine (pyttsx3)
-        self.backup_engine = pyttsx3.init()
-        self.backup_engine.setProperty('rate', 220)
-        self.backup_engine.setProperty('volume', 1.0)
-        
-        # Set voice properties for backup engine
-        voices = self.backup_engine.getProperty('voices')
-        # Try to set a male voice for more Jarvis-like experience
-        for voice in voices:
-            if "male" in voice.name.lower():
-                self.backup_engine.setProperty('voice', voice.id)
-                break
+        # Long responses are synthesized sentence by sentence, a few chunks ahead
+        self.chunk_speech = True
+        self.chunk_lookahead = 2
+        self.last_timing = {}
+        
+        # Set by interrupt() to cut the current utterance off (barge-in)
+        self._cancel = threading.Event()
+        # Speech is kept in memory and played through one long-lived output
+        # device (JARVIS_AUDIO_OUTPUT); without miniaudio, files are played
+        # by a playsound helper process instead
+        self.player = output or open_output()
+        if self.player is None:
+            if AUDIO_OUTPUT == "":
+                print("miniaudio is not installed; speech is played one file at a time by a "
+                      "playsound helper process, which adds latency to every utterance "
+                      "(pip install miniaudio)")
+            self.player = ProcessPlayer()
+        self.player.start()
+        self.clips = ClipCache()
+        
+        # Backup TTS engine (pyttsx3), set up the first time it is needed:
+        # initializing it and enumerating voices is slow and usually unused
+        self._backup_engine = None
+        self._backup_lock = threading.Lock()
+        if not FAST_START:
+            # Pay for it up front, as older versions did
+            self.backup_engine
         
         # Create temp directory for audio files if it doesn't exist
         self.temp_dir = os.path.join(tempfile.gettempdir(), "jarvis_audio")
         if not os.path.exists(self.temp_dir):
             os.makedirs(self.temp_dir)
         
-        # Counter for unique filenames
-        self.file_counter = 0
+        # Unique filenames; next() on a count is safe from several threads
+        self._file_ids = itertools.count(1)
+        
+        # Synthesized audio is reused across turns and restarts; the cache
+        # writes out what it holds at exit by itself
+        self.speech_cache = SpeechCache()
+        atexit.register(self.player.close)
+        
+        # When an engine keeps failing, its circuit opens and speech goes
+        # straight to the other one instead of waiting for it to fail again
+        self.health = get_health()
+        self.health.register('gtts', probe=lambda: self._synthesize_bytes("OK"),
+                             latency_budget=GTTS_LATENCY_BUDGET)
+        self.health.register('pyttsx3', probe=lambda: self.backup_engine)
+    
+    @property
+    def backup_engine(self):
+        """The pyttsx3 engine, initialized on first access."""
+        with self._backup_lock:
+            if self._backup_engine is None:
+                engine = pyttsx3.init()
+                engine.setProperty('rate', 220)
+                engine.setProperty('volume', 1.0)
+                
+                # Set voice properties for backup engine
+                voices = engine.getProperty('voices')
+                # Try to set a male voice for more Jarvis-like experience
+                for voice in voices:
+                    if "male" in voice.name.lower():
+                        engine.setProperty('voice', voice.id)
+                        break
+                # pyttsx3 can only be stopped from inside its own loop, between words
+                engine.connect('started-word', self._on_backup_word)
+                self._backup_engine = engine
+            return self._backup_engine
+    
+    def _cache_key(self, text):
+        """Cache key for the Google TTS rendering of text with current settings."""
+        return speech_key(text, self.tts_lang, 'gtts', slow=self.tts_slow)
+    
+    def _synthesize(self, text, path):
+        """Synthesize text with Google TTS into an mp3 file."""
+        tts = gtts.gTTS(text=text, lang=self.tts_lang, slow=self.tts_slow)
+        tts.save(path)
+    
+    def _synthesize_bytes(self, text):
+        """Synthesize text with Google TTS into mp3 bytes in memory."""
+        buffer = io.BytesIO()
+        tts = gtts.gTTS(text=text, lang=self.tts_lang, slow=self.tts_slow)
+        tts.write_to_fp(buffer)
+        return buffer.getvalue()
+    
+    def prewarm(self, phrases=None, wait=False):
+        """
+        Synthesize fixed phrases into the cache so they play without a network call.
+        
+        Args:
+            phrases: Extra phrases to warm on top of FIXED_PHRASES
+            wait: Block until warming finishes instead of using a background thread
+        """
+        if not self.use_google_tts:
+            return
+        
+        texts = FIXED_PHRASES + list(phrases or [])
+        items = [(self._cache_key(text), text) for text in texts]
+        
+        if wait:
+            self.speech_cache.warm(items, self._synthesize)
+        else:
+            threading.Thread(
+                target=self.speech_cache.warm,
+                args=(items, self._synthesize),
+                name="jarvis-tts-warm",
+                daemon=True
+            ).start()
+    
+    def _render(self, text):
+        """
+        Get audio for text, from the caches or freshly synthesized.
+        
+        Returns:
+            AudioClip if the player takes clips, else the path to an mp3 file
+        """
+        key = self._cache_key(text)
+        if not getattr(self.player, 'accepts_clips', False):
+            return self._render_file(key, text)
+        
+        clip = self.clips.get(key)
+        if clip is not None:
+            self.speech_cache.touch(key)
+            return clip
+        
+        data = self.speech_cache.read(key)
+        if data is None:
+            with get_tracer().span('synthesize.gtts'):
+                data = self.health.call('gtts', self._synthesize_bytes, text)
+            # Kept on disk for the next run only; playback never reads it
+            # back, so the write happens on the cache's writer thread
+            self.speech_cache.put_later(key, data)
+        clip = AudioClip(data)
+        if self.player.needs_pcm:
+            # Decoded here, on the synthesis side, not when playback starts
+            with get_tracer().span('decode'):
+                clip.pcm()
+        self.clips.put(key, clip)
+        return clip
+    
+    def _render_file(self, key, text):
+        """
+        Get an mp3 file for text, from the cache or freshly synthesized.
+        
+        Returns:
+            Path to the audio file
+        """
+        audio_file = self.speech_cache.get(key)
+        
+        if audio_file is None:
+            # Create a unique filename
+            temp_file = os.path.join(self.temp_dir, f"jarvis_speech_{os.getpid()}_{next(self._file_ids)}.mp3")
+            
+            # Generate speech using Google TTS and keep it for next time
+            with get_tracer().span('synthesize.gtts'):
+                self.health.call('gtts', self._synthesize, text, temp_file)
+            audio_file = self.speech_cache.put(key, temp_file)
+        
+        return audio_file
+    
+    def _play_file(self, audio_file):
+        """
+        Play an audio file or AudioClip, blocking until it finishes or is interrupted.
+        
+        Returns:
+            True if it played to the end
+        """
+        return self.player.play(audio_file, self._cancel)
+    
+    def _speak_backup(self, text):
+        """
+        Speak text with the offline pyttsx3 engine.
+        
+        Returns:
+            True if it was spoken to the end
+        """
+        if self._cancel.is_set():
+            return False
+        self.backup_engine.say(text)
+        self.backup_engine.runAndWait()
+        return not self._cancel.is_set()
+    
+    def _on_backup_word(self, name, location, length):
+        if self._cancel.is_set():
+            self._backup_engine.stop()
+    
+    def interrupt(self):
+        """Cut off whatever is being spoken, from any thread."""
+        self._cancel.set()
+    
+    def clear_interrupt(self):
+        """Allow speech again after interrupt()."""
+        self._cancel.clear()
+    
+    @property
+    def interrupted(self):
+        return self._cancel.is_set()
+    
+    def split(self, text):
+        """Split text into the chunks speak() synthesizes and plays one by one."""
+        if self.use_google_tts and self.chunk_speech:
+            return split_sentences(text)
+        return [text]
+    
+    def render_chunk(self, chunk):
+        """
+        Synthesize one chunk with Google TTS.
+        
+        Returns:
+            AudioClip or path to the audio file (see _render), or None if
+            the chunk should be spoken with the backup engine instead
+        """
+        if not self.use_google_tts:
+            return None
+        with get_tracer().span('synthesize', chars=len(chunk)) as span:
+            try:
+                return self._render(chunk)
+            except CircuitOpenError:
+                span.fields['engine'] = 'pyttsx3'
+                return None
+            except Exception as e:
+                print(f"Google TTS error: {e}")
+                span.fields['failed'] = True
+                return None
+    
+    def play_chunk(self, chunk, audio_file):
+        """
+        Play a rendered chunk, falling back to pyttsx3 for this chunk only.
+        
+        Args:
+            chunk: Text of the chunk
+            audio_file: Result of render_chunk()
+            
+        Returns:
+            True if the chunk was spoken to the end, False if interrupted
+        """
+        with get_tracer().span('play', chars=len(chunk)) as span:
+            if audio_file is not None:
+                try:
+                    # Play the generated speech
+                    return self._play_file(audio_file)
+                except Exception as e:
+                    print(f"Google TTS error: {e}")
+            span.fields['engine'] = 'pyttsx3'
+            try:
+                return self.health.call('pyttsx3', self._speak_backup, chunk)
+            except CircuitOpenError:
+                # Neither engine is working; the text has been printed
+                span.fields['engine'] = None
+                return True
     
     def speak(self, text):
-        """Convert text to speech and play it."""
+        """
+        Convert text to speech and play it.
+        
+        Long text is split into sentence chunks; a producer thread synthesizes
+        chunk N+1 while chunk N is playing, so the first sentence is heard
+        without waiting for the whole response to be synthesized.
+        interrupt() stops it before the next word or audio poll.
+        """
         if not text:
             return
         
         print(f"Jarvis: {text}")
+        self.clear_interrupt()
         
-        if self.use_google_tts:
-            try:
-                # Create a unique filename
-                self.file_counter += 1
-                temp_file = os.path.join(self.temp_dir, f"jarvis_speech_{self.file_counter}.mp3")
-                
-                # Generate speech using Google TTS
-                tts = gTTS(text=text, lang='en', slow=False)
-                tts.save(temp_file)
-                
-                # Play the generated speech
-                playsound.playsound(temp_file, True)
-                
-                # Clean up the temporary file
+        started = time.perf_counter()
+        chunks = self.split(text)
+        self.last_timing = {'chunks': len(chunks), 'time_to_first_audio': None, 'total': None}
+        
+        for chunk, audio_file in self._render_ahead(chunks):
+            if self.last_timing['time_to_first_audio'] is None:
+                self.last_timing['time_to_first_audio'] = time.perf_counter() - started
+            if not self.play_chunk(chunk, audio_file):
+                break
+        
+        self.last_timing['total'] = time.perf_counter() - started
+    
+    def _render_ahead(self, chunks):
+        """
+        Yield (chunk, audio_file) pairs, synthesizing ahead on a producer thread.
+        
+        audio_file is None for chunks that failed to synthesize. The queue is
+        bounded so the producer never runs more than a few chunks ahead.
+        """
+        if len(chunks) == 1:
+            yield chunks[0], self.render_chunk(chunks[0])
+            return
+        
+        rendered = queue.Queue(maxsize=self.chunk_lookahead)
+        stop = threading.Event()
+        
+        def produce():
+            for chunk in chunks:
+                if stop.is_set():
+                    break
+                rendered.put((chunk, self.render_chunk(chunk)))
+            rendered.put(None)
+        
+        producer = threading.Thread(target=produce, name="jarvis-tts-producer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = rendered.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            # Unblock the producer if the consumer stopped early
+            stop.set()
+            while producer.is_alive():
                 try:
-                    os.remove(temp_file)
-                except:
-                    # If removal fails, it's not critical
+                    rendered.get(timeout=0.1)
+                except queue.Empty:
                     pass
-                    
-            except Exception as e:
-                print(f"Google TTS error: {e}")
-                # Fall back to pyttsx3
-                self.backup_engine.say(text)
-                self.backup_engine.runAndWait()
-        else:
-            # Use pyttsx3 directly
-            self.backup_engine.say(text)
-            self.backup_engine.runAndWait()
     
     def speak_action(self, text):
         """Print action text without speaking it."""